@@ -1,7 +1,9 @@
 from flask import Flask
-from app.api import test, generation, health, questionnaire, submissions, kpi
+from app.api import test, generation, health, questionnaire, submissions, kpi, diagnostics, assets
 from app.config import Config
 from app.utils.logger import get_logger
+from app.utils import compression
+from app.services import assets as asset_registry, storage
 from flask_cors import CORS
 
 logger = get_logger(__name__)
@@ -16,6 +18,10 @@ def create_app():
     # CORS(app, origins=["http://localhost:3000"])
     CORS(app)
 
+    compression.init_app(app)
+    asset_registry.init_app(app)
+    storage.init_app(app)
+
     app.register_blueprint(test.bp, url_prefix="/api/test")
     logger.info("Blueprint 'test' registered at /api/test")
 
@@ -34,6 +40,12 @@ def create_app():
     app.register_blueprint(kpi.bp, url_prefix="/api")
     logger.info("Blueprint 'kpi' registered at /api/kpi")
 
+    app.register_blueprint(assets.bp, url_prefix="/api")
+    logger.info("Blueprint 'assets' registered at /api/assets")
+
+    app.register_blueprint(diagnostics.bp, url_prefix="/api/admin/diagnostics")
+    logger.info("Blueprint 'diagnostics' registered at /api/admin/diagnostics")
+
     return app
 
 
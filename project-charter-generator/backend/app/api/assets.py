@@ -0,0 +1,32 @@
+from flask import Blueprint, jsonify, current_app, url_for
+from app.services import precompressed
+
+bp = Blueprint("assets", __name__)
+
+@bp.route("/assets", methods=["GET"])
+def list_assets():
+    """
+    Content hashes and versioned URLs of the precompressed JSON assets.
+    Fetching a versioned URL returns a long-lived, immutable response.
+    """
+    hashes = precompressed.manifest()
+    return jsonify({
+        "assets": {
+            name: {"hash": digest, "url": url_for("assets.get_asset", name=name, v=digest)}
+            for name, digest in hashes.items()
+        }
+    }), 200
+
+
+@bp.route("/assets/<name>", methods=["GET"])
+def get_asset(name):
+    """
+    Serve a precompressed asset (questionnaire, output_schema, kpi).
+    """
+    try:
+        return precompressed.serve(name)
+    except (KeyError, FileNotFoundError):
+        return jsonify({"error": "Not found"}), 404
+    except Exception:
+        current_app.logger.exception("Failed to load asset %s", name)
+        return jsonify({"error": "Failed to load asset"}), 500
@@ -0,0 +1,84 @@
+from flask import Blueprint, jsonify, request
+from app.services import diagnostics
+from app.utils.admin_auth import require_admin
+from app.utils.logger import get_logger
+
+bp = Blueprint("diagnostics", __name__)
+logger = get_logger(__name__)
+
+
+def _int_arg(name: str, default: int) -> int:
+    raw = request.args.get(name, str(default))
+    try:
+        return int(raw)
+    except Exception:
+        logger.warning(f"Invalid {name} param: {raw}, defaulting to {default}")
+        return default
+
+
+@bp.route("/report", methods=["GET"])
+@require_admin
+def report():
+    """
+    Memory, thread, cache and tracemalloc report for this worker.
+    """
+    try:
+        return jsonify(diagnostics.build_report(top=_int_arg("top", 20))), 200
+    except Exception:
+        logger.exception("Failed to build diagnostics report")
+        return jsonify({"error": "Failed to build diagnostics report"}), 500
+
+
+@bp.route("/tracemalloc/start", methods=["POST"])
+@require_admin
+def start_tracing():
+    return jsonify(diagnostics.start_tracing(frames=_int_arg("frames", 1))), 200
+
+
+@bp.route("/tracemalloc/stop", methods=["POST"])
+@require_admin
+def stop_tracing():
+    return jsonify(diagnostics.stop_tracing()), 200
+
+
+@bp.route("/snapshots", methods=["POST"])
+@require_admin
+def take_snapshot():
+    """
+    Take a tracemalloc snapshot. Optional ?label=<name>.
+    """
+    try:
+        return jsonify(diagnostics.take_snapshot(request.args.get("label"))), 201
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+
+
+@bp.route("/snapshots/diff", methods=["GET"])
+@require_admin
+def diff_snapshots():
+    """
+    Top allocation growth between two snapshots: ?from=<label>&to=<label>.
+    """
+    old_label = request.args.get("from")
+    new_label = request.args.get("to")
+    if not old_label or not new_label:
+        return jsonify({"error": "Both 'from' and 'to' snapshot labels are required"}), 400
+    try:
+        lines = diagnostics.diff_snapshots(old_label, new_label, limit=_int_arg("limit", 20))
+    except KeyError as e:
+        return jsonify({"error": f"Unknown snapshot {e}"}), 404
+    return jsonify({"from": old_label, "to": new_label, "lines": lines}), 200
+
+
+@bp.route("/dump", methods=["POST"])
+@require_admin
+def dump():
+    """
+    Write the current report to DIAGNOSTICS_DIR and return its path.
+    """
+    try:
+        path = diagnostics.dump_report(top=_int_arg("top", 20))
+        return jsonify({"path": path}), 201
+    except Exception:
+        logger.exception("Failed to dump diagnostics report")
+        return jsonify({"error": "Failed to dump diagnostics report"}), 500
@@ -1,45 +1,23 @@
+import itertools
 import json
+import threading
 import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Optional
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 
 from app.config import Config
 from app.utils.logger import get_logger
-from app.services import azure_openai, prompt_builder, scoring
+from app.services import (
+    azure_openai, charter_renderer, json_stream, prompt_builder, scoring, scoring_engine, storage,
+)
 
-import html as html_lib
-from typing import Any, Dict
 
 bp = Blueprint("generation", __name__)
 logger = get_logger(__name__)
 
 
-def _compute_total_score(questions: List[Dict[str, Any]]) -> int:
-    """
-    Compute total score from frontend questions.
-    """
-    total = 0
-    if not isinstance(questions, list):
-        return 0
-    for q in questions:
-        try:
-            if not isinstance(q, dict):
-                continue
-            if q.get("score") is not None:
-                total += int(q.get("score") or 0)
-                continue
-            opts = q.get("options") or []
-            if isinstance(opts, list) and len(opts) > 0:
-                first = opts[0]
-                if isinstance(first, dict) and first.get("score") is not None:
-                    total += int(first.get("score") or 0)
-        except Exception:
-            logger.warning("Could not parse question score, ignoring: %s", q, exc_info=False)
-    return int(total)
-
-
 def _try_parse_json_from_text(text: str) -> Optional[Dict[str, Any]]:
     """
     Try to extract the first JSON object from text and parse it.
@@ -70,232 +48,135 @@ def _render_html_from_response(resp: Dict[str, Any]) -> str:
     """
     Render a complete HTML document
     """
-    esc = html_lib.escape
-
-    # render a key/value pair
-    def kv(label: str, value: Any) -> str:
-        if value is None or (isinstance(value, (list, dict)) and not value):
-            return f"<p><strong>{esc(label)}:</strong> <em>Not provided</em></p>"
-        if isinstance(value, (list, dict)):
-            return f"<p><strong>{esc(label)}:</strong></p>" + render_value(value)
-        return f"<p><strong>{esc(label)}:</strong> {esc(str(value))}</p>"
-
-    # Render lists and dicts recursively into HTML
-    def render_value(value: Any) -> str:
-        if value is None:
-            return "<div><em>null</em></div>"
-        if isinstance(value, dict):
-            html = "<div class='dict-block'><dl>"
-            for k, v in value.items():
-                html += f"<dt><strong>{esc(str(k))}</strong></dt><dd>{render_value(v)}</dd>"
-            html += "</dl></div>"
-            return html
-        if isinstance(value, list):
-            if not value:
-                return "<div><em>[]</em></div>"
-            html = "<ul>"
-            for itm in value:
-                if isinstance(itm, (dict, list)):
-                    html += f"<li>{render_value(itm)}</li>"
-                else:
-                    html += f"<li>{esc(str(itm))}</li>"
-            html += "</ul>"
-            return html
-        # fallback primitive
-        return esc(str(value))
-
-    title = resp.get("project_name") or resp.get("project_title") or ""
-    industry = resp.get("industry") or resp.get("domain") or ""
-    budget = resp.get("budget")
-    duration = resp.get("duration")
-    complexity_score = resp.get("complexity_score") or resp.get("total_score")
-    description = resp.get("description") or resp.get("project_description") or ""
-    objectives = resp.get("objectives", [])
-    project_scope = resp.get("project_scope", "")
-    timeline = resp.get("timeline", {}) 
-    budget_breakdown = resp.get("budget breakdown") or resp.get("budget_breakdown") or resp.get("budget") or {}
-    risks = resp.get("risks_and_mitigation") or resp.get("risks") or []
-    team_structure = resp.get("team_structure") or resp.get("team") or {}
-    resources = resp.get("resources_required") or {}
-    success_criteria = resp.get("success_criteria") or []
-    assumptions = resp.get("assumptions") or []
-
-    # Build HTML pieces
-    # Objectives
-    if objectives:
-        objectives_html = "<ul>" + "".join(f"<li>{esc(str(o))}</li>" for o in objectives) + "</ul>"
-    else:
-        objectives_html = "<p><em>Not provided</em></p>"
-
-    # Timeline
-    if isinstance(timeline, dict) and timeline:
-        timeline_html = ""
-        for phase_key, phase_val in timeline.items():
-            timeline_html += f"<h4>{esc(str(phase_key)).replace('_',' ').title()}</h4>"
-            if isinstance(phase_val, dict):
-                p_duration = phase_val.get("duration")
-                p_tasks = phase_val.get("tasks", [])
-                if p_duration:
-                    timeline_html += f"<p><strong>Duration:</strong> {esc(str(p_duration))}</p>"
-                if p_tasks:
-                    timeline_html += "<p><strong>Tasks:</strong></p><ul>"
-                    for t in p_tasks:
-                        timeline_html += f"<li>{esc(str(t))}</li>"
-                    timeline_html += "</ul>"
-            else:
-                timeline_html += f"<p>{render_value(phase_val)}</p>"
-    else:
-        timeline_html = "<p><em>Not provided</em></p>"
-
-    # Budget breakdown
-    if isinstance(budget_breakdown, dict) and budget_breakdown:
-        allocation = budget_breakdown.get("allocation") or {}
-        total_cost = budget_breakdown.get("total_cost") or budget_breakdown.get("total_estimated") or ""
-        bb_html = f"<p><strong>Total cost:</strong> {esc(str(total_cost))}</p>"
-        if allocation and isinstance(allocation, dict):
-            bb_html += "<p><strong>Allocation:</strong></p><ul>"
-            for k, v in allocation.items():
-                bb_html += f"<li><strong>{esc(str(k))}:</strong> {esc(str(v))}</li>"
-            bb_html += "</ul>"
-    else:
-        bb_html = "<p><em>Not provided</em></p>"
-
-    # Risks
-    if isinstance(risks, list) and risks:
-        risks_html = "<ul>"
-        for r in risks:
-            if isinstance(r, dict):
-                rr = esc(str(r.get("risk") or r.get("title") or "Risk"))
-                impact = esc(str(r.get("impact") or ""))
-                mit = esc(str(r.get("mitigation") or r.get("mitigation_plan") or ""))
-                risks_html += f"<li><strong>{rr}</strong> — Impact: {impact}<br/>Mitigation: {mit}</li>"
-            else:
-                risks_html += f"<li>{esc(str(r))}</li>"
-        risks_html += "</ul>"
-    else:
-        risks_html = "<p><em>Not provided</em></p>"
-
-    # Team structure
-    if isinstance(team_structure, dict) and team_structure:
-        team_html = ""
-        for role, details in team_structure.items():
-            team_html += f"<h4>{esc(str(role)).replace('_',' ').title()}</h4>"
-            if isinstance(details, dict):
-                count = details.get("count")
-                if count is not None:
-                    team_html += f"<p><strong>Count:</strong> {esc(str(count))}</p>"
-                duties = details.get("responsibilities") or details.get("responsibilities", [])
-                if duties:
-                    team_html += "<p><strong>Responsibilities:</strong></p><ul>"
-                    for d in duties:
-                        team_html += f"<li>{esc(str(d))}</li>"
-                    team_html += "</ul>"
-            elif isinstance(details, list):
-                team_html += "<ul>"
-                for d in details:
-                    team_html += f"<li>{esc(str(d))}</li>"
-                team_html += "</ul>"
-            else:
-                team_html += f"<p>{render_value(details)}</p>"
+    return charter_renderer.render_html(resp)
+
+
+def _llm_error_response(e: Exception):
+    err_str = str(e).lower()
+    if "timeout" in err_str:
+        return jsonify({"error": "LLM request timed out"}), 504
+    return jsonify({"error": "LLM generation failed"}), 502
+
+
+def _wants_html() -> bool:
+    fmt = request.args.get("format", "").lower()
+    return fmt == "html" or "text/html" in request.headers.get("Accept", "")
+
+
+def _wants_llm_stream() -> bool:
+    flag = request.args.get("stream")
+    if flag is None:
+        return bool(getattr(Config, "HTML_STREAM_LLM", False))
+    return flag.lower() in ("1", "true", "yes")
+
+
+def _idempotency_key(data: Dict[str, Any]) -> Optional[str]:
+    """
+    The request's Idempotency-Key header, else the payload's submission_id.
+    Raises ValueError for a key longer than storage.IDEMPOTENCY_KEY_MAX_CHARS.
+    """
+    key = request.headers.get("Idempotency-Key") or data.get("submission_id")
+    if key is None or not str(key).strip():
+        return None
+    key = str(key).strip()
+    if len(key) > storage.IDEMPOTENCY_KEY_MAX_CHARS:
+        raise ValueError(f"Idempotency key longer than {storage.IDEMPOTENCY_KEY_MAX_CHARS} characters")
+    return key
+
+
+def _submission_headers(submission_id: Optional[int]) -> Dict[str, str]:
+    return {"X-Submission-Id": str(submission_id)} if submission_id is not None else {}
+
+
+def _claimed_response(claim):
+    """Answer a request whose key was already claimed: the stored charter, or why there is none yet."""
+    if claim.state == "pending":
+        resp = jsonify({"error": "A request with this idempotency key is still in progress"})
+        resp.status_code = 409
+        resp.headers["Retry-After"] = "5"
+        return resp
+    if claim.state == "conflict":
+        return jsonify({"error": "Idempotency key was already used with a different request"}), 422
+    html = _wants_html()
+    row = storage.get_submission(claim.id, blobs=("result",), raw=not html)
+    if html:
+        resp = Response(charter_renderer.iter_html(row["result"]), status=200, mimetype="text/html")
     else:
-        team_html = "<p><em>Not provided</em></p>"
-
-    # Resources: skills and tools
-    resources_html = ""
-    if isinstance(resources, dict):
-        skills = resources.get("skills") or []
-        tools = resources.get("tools_and_technologies") or resources.get("tools") or []
-        if skills:
-            resources_html += "<p><strong>Skills:</strong></p><ul>" + "".join(f"<li>{esc(str(s))}</li>" for s in skills) + "</ul>"
-        if tools:
-            resources_html += "<p><strong>Tools & Technologies:</strong></p><ul>" + "".join(f"<li>{esc(str(t))}</li>" for t in tools) + "</ul>"
-        other_keys = {k:v for k,v in resources.items() if k not in ("skills","tools_and_technologies","tools")}
-        for k,v in other_keys.items():
-            resources_html += f"<p><strong>{esc(str(k))}:</strong> {render_value(v)}</p>"
-    elif isinstance(resources, list) and resources:
-        resources_html = "<ul>" + "".join(f"<li>{esc(str(r))}</li>" for r in resources) + "</ul>"
+        resp = Response(row["result"], status=200, mimetype="application/json")  # stored JSON text, as is
+    resp.headers.update(_submission_headers(claim.id))
+    resp.headers["Idempotent-Replayed"] = "true"
+    return resp
+
+
+def _record_result(submission_id: Optional[int], charter: Dict[str, Any]) -> None:
+    if submission_id is None:
+        return
+    try:
+        storage.save_result(submission_id, charter)
+    except Exception:
+        logger.exception("Failed to save generated charter for submission_id=%s", submission_id)
+
+
+def _record_failure(submission_id: Optional[int]) -> None:
+    """Release the claim so that a retry with the same key generates again."""
+    if submission_id is None:
+        return
+    try:
+        storage.fail_submission(submission_id)
+    except Exception:
+        logger.exception("Failed to mark submission_id=%s as failed", submission_id)
+
+
+def _recording(members, charter: Dict[str, Any]):
+    """Pass streamed (key, value) members through, merging them into `charter` as the HTML renderer does."""
+    for key, value in members:
+        if value or key not in charter:
+            charter[key] = value
+        yield key, value
+
+
+def _guard_stream(chunks, submission_id: Optional[int] = None, charter: Optional[Dict[str, Any]] = None,
+                  settled: Optional[threading.Event] = None):
+    """
+    Pass HTML chunks through; if generation fails part-way, close the document instead of cutting it off.
+    The completed `charter` is saved for `submission_id`, a failed one releases its claim, and either
+    sets `settled`. A stream closed before that (see _release_unsettled) releases the claim on close.
+    """
+    try:
+        yield from chunks
+    except Exception:
+        logger.exception("Streaming charter generation failed mid-response")
+        _record_failure(submission_id)
+        if settled is not None:
+            settled.set()
+        yield charter_renderer.interrupted_tail()
     else:
-        resources_html = "<p><em>Not provided</em></p>"
-
-    # Success criteria & assumptions
-    success_html = "<ul>" + "".join(f"<li>{esc(str(s))}</li>" for s in success_criteria) + "</ul>" if success_criteria else "<p><em>Not provided</em></p>"
-    assumptions_html = "<ul>" + "".join(f"<li>{esc(str(a))}</li>" for a in assumptions) + "</ul>" if assumptions else "<p><em>Not provided</em></p>"
-
-    # Build the HTML document
-    html_doc = f"""<!doctype html>
-        <html>
-        <head>
-        <meta charset="utf-8" />
-        <title>{esc(title)} - Project Charter</title>
-        <style>
-            body{{font-family: Arial, sans-serif; margin:24px; color:#222}}
-            .card{{border:1px solid #e0e0e0; padding:18px; border-radius:8px; box-shadow:0 1px 3px rgba(0,0,0,0.04)}}
-            h1{{margin:0 0 8px 0}}
-            h2{{margin-top:20px; color:#333}}
-            h4{{margin:10px 0 6px 0}}
-            .meta{{color:#555; margin-bottom:12px}}
-            .section{{margin-top:12px}}
-            ul{{margin:6px 0 6px 20px}}
-            dl{{margin:6px 0 6px 0}}
-            dt{{font-weight:bold}}
-            dd{{margin-left:12px; margin-bottom:8px}}
-            .small{{font-size:0.9em; color:#666}}
-        </style>
-        </head>
-        <body>
-        <div class="card">
-            <h1>{esc(title)}</h1>
-            <div class="meta">{esc(description)}</div>
-
-            <div class="section">
-            <strong>Industry:</strong> {esc(industry)} &nbsp; | &nbsp; <strong>Duration:</strong> {esc(str(duration) if duration else "")} &nbsp; | &nbsp; <strong>Complexity Score:</strong> {esc(str(complexity_score) if complexity_score is not None else "null")}
-            </div>
-
-            <h2>Objectives</h2>
-            <div class="section">{objectives_html}</div>
-
-            <h2>Project Scope</h2>
-            <div class="section">{esc(project_scope)}</div>
-
-            <h2>Timeline</h2>
-            <div class="section">{timeline_html}</div>
-
-            <h2>Budget Breakdown</h2>
-            <div class="section">{bb_html}</div>
-
-            <h2>Risks & Mitigation</h2>
-            <div class="section">{risks_html}</div>
-
-            <h2>Team Structure</h2>
-            <div class="section">{team_html}</div>
-
-            <h2>Resources Required</h2>
-            <div class="section">{resources_html}</div>
-
-            <h2>Success Criteria</h2>
-            <div class="section">{success_html}</div>
-
-            <h2>Assumptions</h2>
-            <div class="section">{assumptions_html}</div>
-
-            <div class="section">
-            <h2>Recommendation</h2>
-            <div>{esc(str(resp.get("recommendation") or resp.get("recommendation", "") or ""))}</div>
-            </div>
-
-            <div class="small" style="margin-top:18px">Generated at: {esc(str(resp.get("created_at") or ""))} | Project ID: {esc(str(resp.get("project_id") or ""))}</div>
-        </div>
-        </body>
-        </html>
-        """
-    return html_doc
+        if charter is not None:
+            _record_result(submission_id, charter)
+        if settled is not None:
+            settled.set()
+
 
+def _release_unsettled(submission_id: Optional[int], settled: threading.Event):
+    """
+    Response close callback: release the claim unless the stream saved or failed it. The generator
+    alone cannot, since a client that leaves before the first chunk is pulled never starts it.
+    """
+    def release():
+        if not settled.is_set():
+            _record_failure(submission_id)
+    return release
 
 
 @bp.route("/ask", methods=["POST"])
 def ask():
     """
     Accept frontend payload and return LLM-generated project charter JSON.
+
+    The submission and its charter are stored. A retry carrying the same
+    Idempotency-Key header (or payload submission_id) within the idempotency
+    window gets the stored charter back without another LLM call; 409 while
+    the first request is still generating, 422 if the payload differs.
     """
     try:
         data: Dict[str, Any] = request.get_json(force=True)
@@ -313,16 +194,33 @@ def ask():
     if not isinstance(questions, list):
         return jsonify({"error": "Missing or invalid 'questions' field"}), 400
 
-    # compute score and scoring summary
-    total_score = _compute_total_score(questions)
     try:
-        scoring_info = scoring.interpret_score(total_score)
+        key = _idempotency_key(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        claim = storage.claim_submission(data, key)
+    except Exception:
+        logger.exception("Failed to store submission")
+        if key is not None:
+            return jsonify({"error": "Could not record the request; retry later"}), 503
+        claim = None  # not deduplicated, so generation need not depend on the database
+    if claim is not None and claim.state != "new":
+        return _claimed_response(claim)
+    submission_id = claim.id if claim is not None else None
+
+    # compute score and scoring summary, from the selected option ids (client-supplied scores are not trusted).
+    # No total (and the "Unscored" band) when there were answers but none matched the questionnaire.
+    scored = scoring_engine.score_questions(questions)
+    total_score = scored.total
+    try:
+        scoring_info = scoring.interpret_score(total_score) if total_score is not None else scored.band
     except Exception:
         logger.exception("scoring.interpret_score failed; using fallback")
         scoring_info = {"complexity": None, "recommendation": None, "rationale": None}
 
     scoring_summary = (
-        f"Total score: {total_score}\n"
+        f"Total score: {total_score if total_score is not None else 'not scored'}\n"
         f"Complexity (expected): {scoring_info.get('complexity')}\n"
         f"Recommendation (expected): {scoring_info.get('recommendation')}\n"
         f"Rationale (expected): {scoring_info.get('rationale')}\n"
@@ -355,15 +253,44 @@ def ask():
     # max_tokens = int(getattr(Config, "AZURE_MAX_TOKENS", getattr(Config, "MAX_TOKENS", 800)))
     # temperature = float(getattr(Config, "AZURE_TEMPERATURE", 0.2))
 
+    # HTML with a streamed LLM call: render each section as soon as the model has written it
+    if _wants_html() and _wants_llm_stream():
+        base = {
+            "project_id": project_id,
+            "created_at": created_at,
+            "project_title": data.get("project_title") or "",
+            "industry": data.get("domain") or "",
+            "budget": {"range": data.get("budget_range") or ""},
+            "duration": data.get("timeline") or "",
+            "description": data.get("project_description") or "",
+            "complexity_score": total_score,
+            "recommendation": scoring_info.get("recommendation"),
+        }
+        try:
+            chunks = azure_openai.stream_answer(prompt=prompt)
+            first = next(chunks, "")  # surface connection errors before the 200 goes out
+        except Exception as e:
+            logger.exception("LLM generation failed")
+            _record_failure(submission_id)
+            return _llm_error_response(e)
+        # the stored charter also gets the scoring fallbacks the JSON response would have
+        charter = dict(base, complexity=scoring_info.get("complexity"), rationale=scoring_info.get("rationale"),
+                       recommended_pm_count=scoring_info.get("recommended_pm_count"))
+        members = _recording(json_stream.iter_members(itertools.chain([first], chunks)), charter)
+        html_chunks = charter_renderer.iter_html_from_members(base, members)
+        settled = threading.Event()
+        resp = Response(_guard_stream(html_chunks, submission_id, charter, settled), status=200,
+                        mimetype="text/html", headers=_submission_headers(submission_id))
+        resp.call_on_close(_release_unsettled(submission_id, settled))
+        return resp
+
     # Call Azure LLM
     try:
         llm_text = azure_openai.generate_answer(prompt=prompt)
     except Exception as e:
         logger.exception("LLM generation failed")
-        err_str = str(e).lower()
-        if "timeout" in err_str:
-            return jsonify({"error": "LLM request timed out"}), 504
-        return jsonify({"error": "LLM generation failed"}), 502
+        _record_failure(submission_id)
+        return _llm_error_response(e)
 
     # parse LLM output to JSON
     parsed = _try_parse_json_from_text(llm_text) or {}
@@ -396,13 +323,12 @@ def ask():
             "prompt_chars": len(prompt),
         },
     }
+    _record_result(submission_id, response)
+    headers = _submission_headers(submission_id)
 
-
-    fmt = request.args.get("format", "").lower()
-    accept = request.headers.get("Accept", "")
-    if fmt == "html" or "text/html" in accept:
-        html = _render_html_from_response(response)
-        return Response(html, status=200, mimetype="text/html")
+    if _wants_html():
+        # sent section by section rather than built up as one string
+        return Response(charter_renderer.iter_html(response), status=200, mimetype="text/html", headers=headers)
 
     # default: JSON
-    return jsonify(response), 200
+    return jsonify(response), 200, headers
@@ -1,44 +1,19 @@
 import json
 import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Optional
 
 from flask import Blueprint, request, jsonify, Response
 
 from app.config import Config
 from app.utils.logger import get_logger
-from app.services import azure_openai, prompt_builder, scoring
+from app.services import azure_openai, charter_renderer, prompt_builder, scoring, scoring_engine
 
-import html as html_lib
 
 bp = Blueprint("generation", __name__)
 logger = get_logger(__name__)
 
 
-def _compute_total_score(questions: List[Dict[str, Any]]) -> int:
-    """
-    Compute total score from frontend questions.
-    """
-    total = 0
-    if not isinstance(questions, list):
-        return 0
-    for q in questions:
-        try:
-            if not isinstance(q, dict):
-                continue
-            if q.get("score") is not None:
-                total += int(q.get("score") or 0)
-                continue
-            opts = q.get("options") or []
-            if isinstance(opts, list) and len(opts) > 0:
-                first = opts[0]
-                if isinstance(first, dict) and first.get("score") is not None:
-                    total += int(first.get("score") or 0)
-        except Exception:
-            logger.warning("Could not parse question score, ignoring: %s", q, exc_info=False)
-    return int(total)
-
-
 def _try_parse_json_from_text(text: str) -> Optional[Dict[str, Any]]:
     """
     Try to extract the first JSON object from text and parse it.
@@ -68,262 +43,7 @@ def _render_html_from_response(resp: Dict[str, Any]) -> str:
     """
     Render a complete HTML document
     """
-    esc = html_lib.escape
-
-    # render a key/value pair
-    def kv(label: str, value: Any) -> str:
-        if value is None or (isinstance(value, (list, dict)) and not value):
-            return f"<p><strong>{esc(label)}:</strong> <em>Not provided</em></p>"
-        if isinstance(value, (list, dict)):
-            return f"<p><strong>{esc(label)}:</strong></p>" + render_value(value)
-        return f"<p><strong>{esc(label)}:</strong> {esc(str(value))}</p>"
-
-    # Render lists and dicts recursively into HTML
-    def render_value(value: Any) -> str:
-        if value is None:
-            return "<div><em>null</em></div>"
-        if isinstance(value, dict):
-            html = "<div class='dict-block'><dl>"
-            for k, v in value.items():
-                html += f"<dt><strong>{esc(str(k))}</strong></dt><dd>{render_value(v)}</dd>"
-            html += "</dl></div>"
-            return html
-        if isinstance(value, list):
-            if not value:
-                return "<div><em>[]</em></div>"
-            html = "<ul>"
-            for itm in value:
-                if isinstance(itm, (dict, list)):
-                    html += f"<li>{render_value(itm)}</li>"
-                else:
-                    html += f"<li>{esc(str(itm))}</li>"
-            html += "</ul>"
-            return html
-        # fallback primitive
-        return esc(str(value))
-
-    # ----------- pull fields (added/updated sections are included below) -----------
-    title = resp.get("project_name") or resp.get("project_title") or ""
-    industry = resp.get("industry") or resp.get("domain") or ""
-    budget = resp.get("budget")
-    duration = resp.get("duration")
-    complexity_score = resp.get("complexity_score") or resp.get("total_score")
-    description = resp.get("description") or resp.get("project_description") or ""
-
-    # NEW → sponsor & date (shown on same meta line)
-    project_sponsor = resp.get("project_sponsor") or resp.get("sponsor") or ""
-    date = resp.get("date") or ""
-
-    objectives = resp.get("objectives", [])
-
-    # NEW → narrative sections
-    current_state = resp.get("current_state") or resp.get("current_state_problem") or []
-    future_state = resp.get("future_state") or resp.get("future_state_aim") or []
-    high_level_req = resp.get("high_level_requirement") or resp.get("high_level_requirements") or []
-    business_benefit = resp.get("business_benefit") or []
-
-    # UPDATED → scope can be dict with in_scope/out_scope or a string
-    project_scope = resp.get("project_scope", "")
-
-    # UPDATED → timeline can include pre_requisites/prerequisites
-    timeline = resp.get("timeline", {})
-
-    budget_breakdown = resp.get("budget breakdown") or resp.get("budget_breakdown") or resp.get("budget") or {}
-    risks = resp.get("risks_and_mitigation") or resp.get("risks") or []
-
-    # REMOVED in new template → team_structure/resources
-    # team_structure = resp.get("team_structure") or resp.get("team") or {}
-    # resources = resp.get("resources_required") or {}
-
-    success_criteria = resp.get("success_criteria") or []
-    assumptions = resp.get("assumptions") or []
-
-    # NEW → dependencies
-    dependencies = resp.get("dependencies") or []
-
-    # NEW → PM / resource recommendation & lessons
-    pm_reco = resp.get("pm_resource_recommendation") or ""
-    lessons = resp.get("lesson_learnt") or []
-
-    # Build HTML pieces
-    # Objectives
-    if objectives:
-        objectives_html = "<ul>" + "".join(f"<li>{esc(str(o))}</li>" for o in objectives) + "</ul>"
-    else:
-        objectives_html = "<p><em>Not provided</em></p>"
-
-    # Narrative sections (list or paragraph)
-    def list_or_para(seq: Any) -> str:
-        if isinstance(seq, list):
-            if not seq:
-                return "<p><em>Not provided</em></p>"
-            return "<ul>" + "".join(f"<li>{esc(str(x))}</li>" for x in seq) + "</ul>"
-        if not seq:
-            return "<p><em>Not provided</em></p>"
-        return f"<p>{esc(str(seq))}</p>"
-
-    current_state_html = list_or_para(current_state)
-    future_state_html = list_or_para(future_state)
-    hlr_html = list_or_para(high_level_req)
-    benefit_html = list_or_para(business_benefit)
-
-    # Project Scope (supports dict with in/out)
-    if isinstance(project_scope, dict) and (project_scope.get("in_scope") or project_scope.get("out_scope") or project_scope.get("scope")):
-        scope_html = ""
-        if project_scope.get("scope"):
-            scope_html += f"<p>{esc(str(project_scope.get('scope')))}</p>"
-        if project_scope.get("in_scope"):
-            scope_html += "<h4>In Scope</h4>" + list_or_para(project_scope.get("in_scope"))
-        if project_scope.get("out_scope"):
-            scope_html += "<h4>Out of Scope</h4>" + list_or_para(project_scope.get("out_scope"))
-        if not scope_html:
-            scope_html = "<p><em>Not provided</em></p>"
-    else:
-        scope_html = list_or_para(project_scope)
-
-    # Timeline (now also shows pre-requisites if available)
-    if isinstance(timeline, dict) and timeline:
-        timeline_html = ""
-        for phase_key, phase_val in timeline.items():
-            timeline_html += f"<h4>{esc(str(phase_key)).replace('_',' ').title()}</h4>"
-            if isinstance(phase_val, dict):
-                p_duration = phase_val.get("duration")
-                p_tasks = phase_val.get("tasks", [])
-                p_prereq = phase_val.get("pre_requisites") or phase_val.get("prerequisites")
-                if p_duration:
-                    timeline_html += f"<p><strong>Duration:</strong> {esc(str(p_duration))}</p>"
-                if p_prereq:
-                    timeline_html += f"<p><strong>Pre-requisites:</strong> {esc(str(p_prereq))}</p>"
-                if p_tasks:
-                    timeline_html += "<p><strong>Tasks:</strong></p><ul>"
-                    for t in p_tasks:
-                        timeline_html += f"<li>{esc(str(t))}</li>"
-                    timeline_html += "</ul>"
-            else:
-                timeline_html += f"<p>{render_value(phase_val)}</p>"
-    else:
-        timeline_html = "<p><em>Not provided</em></p>"
-
-    # Budget breakdown
-    if isinstance(budget_breakdown, dict) and budget_breakdown:
-        allocation = budget_breakdown.get("allocation") or {}
-        total_cost = budget_breakdown.get("total_cost") or budget_breakdown.get("total_estimated") or ""
-        bb_html = f"<p><strong>Total cost:</strong> {esc(str(total_cost))}</p>"
-        if allocation and isinstance(allocation, dict):
-            bb_html += "<p><strong>Allocation:</strong></p><ul>"
-            for k, v in allocation.items():
-                bb_html += f"<li><strong>{esc(str(k))}:</strong> {esc(str(v))}</li>"
-            bb_html += "</ul>"
-    else:
-        bb_html = "<p><em>Not provided</em></p>"
-
-    # Risks
-    if isinstance(risks, list) and risks:
-        risks_html = "<ul>"
-        for r in risks:
-            if isinstance(r, dict):
-                rr = esc(str(r.get("risk") or r.get("title") or "Risk"))
-                impact = esc(str(r.get("impact") or ""))
-                mit = esc(str(r.get("mitigation") or r.get("mitigation_plan") or ""))
-                risks_html += f"<li><strong>{rr}</strong> — Impact: {impact}<br/>Mitigation: {mit}</li>"
-            else:
-                risks_html += f"<li>{esc(str(r))}</li>"
-        risks_html += "</ul>"
-    else:
-        risks_html = "<p><em>Not provided</em></p>"
-
-    # Success, Assumptions, Dependencies (together, per new order)
-    success_html = list_or_para(success_criteria)
-    assumptions_html = list_or_para(assumptions)
-    dependencies_html = list_or_para(dependencies)
-
-    # PM recommendation and Lessons
-    pm_html = kv("PM / Resource Recommendation", pm_reco)
-    lessons_html = list_or_para(lessons)
-
-    # Build the HTML document (sponsor & date on meta line)
-    html_doc = f"""<!doctype html>
-        <html>
-        <head>
-        <meta charset="utf-8" />
-        <title>{esc(title)} - Project Charter</title>
-        <style>
-            body{{font-family: Arial, sans-serif; margin:24px; color:#222}}
-            .card{{border:1px solid #e0e0e0; padding:18px; border-radius:8px; box-shadow:0 1px 3px rgba(0,0,0,0.04)}}
-            h1{{margin:0 0 8px 0}}
-            h2{{margin-top:20px; color:#333}}
-            h4{{margin:10px 0 6px 0}}
-            .meta{{color:#555; margin-bottom:12px}}
-            .section{{margin-top:12px}}
-            ul{{margin:6px 0 6px 20px}}
-            dl{{margin:6px 0 6px 0}}
-            dt{{font-weight:bold}}
-            dd{{margin-left:12px; margin-bottom:8px}}
-            .small{{font-size:0.9em; color:#666}}
-        </style>
-        </head>
-        <body>
-        <div class="card">
-            <h1>{esc(title)}</h1>
-            <div class="meta">{esc(description)}</div>
-
-            <div class="section">
-                <strong>Industry:</strong> {esc(industry)} &nbsp; | &nbsp;
-                <strong>Duration:</strong> {esc(str(duration) if duration else "")} &nbsp; | &nbsp;
-                <strong>Budget:</strong> {esc(str(budget) if budget else "Not provided")} &nbsp; | &nbsp;
-                <strong>Complexity Score:</strong> {esc(str(complexity_score) if complexity_score is not None else "null")} &nbsp; | &nbsp;
-                <strong>Sponsor:</strong> {esc(str(project_sponsor) or "Not provided")} &nbsp; | &nbsp;
-                <strong>Date:</strong> {esc(str(date) or "Not provided")}
-            </div>
-
-            <h2>Current State / Problems</h2>
-            <div class="section">{current_state_html}</div>
-
-            <h2>Future State / Aim</h2>
-            <div class="section">{future_state_html}</div>
-
-            <h2>High-Level Requirements</h2>
-            <div class="section">{hlr_html}</div>
-
-            <h2>Business Benefit</h2>
-            <div class="section">{benefit_html}</div>
-
-            <h2>Objectives</h2>
-            <div class="section">{objectives_html}</div>
-
-            <h2>Project Scope</h2>
-            <div class="section">{scope_html}</div>
-
-            <h2>Timeline</h2>
-            <div class="section">{timeline_html}</div>
-
-            <h2>Budget Breakdown</h2>
-            <div class="section">{bb_html}</div>
-
-            <h2>Success Criteria</h2>
-            <div class="section">{success_html}</div>
-
-            <h2>Assumptions</h2>
-            <div class="section">{assumptions_html}</div>
-
-            <h2>Dependencies</h2>
-            <div class="section">{dependencies_html}</div>
-
-            <h2>Risks & Mitigation</h2>
-            <div class="section">{risks_html}</div>
-
-            <h2>PM / Resource Recommendation</h2>
-            <div class="section">{pm_html}</div>
-
-            <h2>Lessons Learnt</h2>
-            <div class="section">{lessons_html}</div>
-
-            <div class="small" style="margin-top:18px">Generated at: {esc(str(resp.get("created_at") or ""))} | Project ID: {esc(str(resp.get("project_id") or ""))}</div>
-        </div>
-        </body>
-        </html>
-        """
-    return html_doc
+    return charter_renderer.render_html(resp)
 
 
 @bp.route("/ask", methods=["POST"])
@@ -347,17 +67,19 @@ def ask():
     if not isinstance(questions, list):
         return jsonify({"error": "Missing or invalid 'questions' field"}), 400
 
-    # compute score and scoring summary
-    total_score = _compute_total_score(questions)
+    # compute score and scoring summary, from the selected option ids (client-supplied scores are not trusted).
+    # No total (and the "Unscored" band) when there were answers but none matched the questionnaire.
+    scored = scoring_engine.score_questions(questions)
+    total_score = scored.total
 
     try:
-        scoring_info = scoring.interpret_score(total_score)
+        scoring_info = scoring.interpret_score(total_score) if total_score is not None else scored.band
     except Exception:
         logger.exception("scoring.interpret_score failed; using fallback")
         scoring_info = {"complexity": None, "recommendation": None, "rationale": None}
 
     scoring_summary = (
-        f"Total score: {total_score}\n"
+        f"Total score: {total_score if total_score is not None else 'not scored'}\n"
         f"Complexity (expected): {scoring_info.get('complexity')}\n"
         f"Recommendation (expected): {scoring_info.get('recommendation')}\n"
         f"Rationale (expected): {scoring_info.get('rationale')}\n"
@@ -1,44 +1,31 @@
 import json
 import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from flask import Blueprint, request, jsonify, Response
 
 from app.config import Config
 from app.utils.logger import get_logger
-from app.services import azure_openai, prompt_builder, scoring
+from app.services import azure_openai, charter_renderer, prompt_builder, scoring, scoring_engine
 
-import html as html_lib
 
 bp = Blueprint("generation", __name__)
 logger = get_logger(__name__)
 
 
-def _compute_total_score(questions: List[Dict[str, Any]]) -> int:
+def _compute_total_score(questions: List[Dict[str, Any]]) -> Tuple[scoring_engine.ScoreResult, Any]:
     """
-    Compute total score from frontend questions.
+    Score the option ids selected in frontend questions (looked up
+    server-side), plus the budget answer if present. The score's total is
+    None when there were answers but none matched the questionnaire.
     """
-    total = 0
-    if not isinstance(questions, list):
-        return 0
-    for q in questions:
-        try:
-            if not isinstance(q, dict):
-                continue
-            if q.get("text") is not None and q.get("text") == "What is your expected budget?":
+    budget = None
+    if isinstance(questions, list):
+        for q in questions:
+            if isinstance(q, dict) and q.get("text") == "What is your expected budget?":
                 budget = q.get("answer")
-            if q.get("score") is not None:
-                total += int(q.get("score") or 0)
-                continue
-            opts = q.get("options") or []
-            if isinstance(opts, list) and len(opts) > 0:
-                first = opts[0]
-                if isinstance(first, dict) and first.get("score") is not None:
-                    total += int(first.get("score") or 0)
-        except Exception:
-            logger.warning("Could not parse question score, ignoring: %s", q, exc_info=False)
-    return int(total), budget
+    return scoring_engine.score_questions(questions), budget
 
 
 def _try_parse_json_from_text(text: str) -> Optional[Dict[str, Any]]:
@@ -72,293 +59,7 @@ def _render_html_from_response(resp: Dict[str, Any]) -> str:
     """
     Render a complete HTML document
     """
-    esc = html_lib.escape
-
-    # render a key/value pair
-    def kv(label: str, value: Any) -> str:
-        if value is None or (isinstance(value, (list, dict)) and not value):
-            return f"<p><strong>{esc(label)}:</strong> <em>Not provided</em></p>"
-        if isinstance(value, (list, dict)):
-            return f"<p><strong>{esc(label)}:</strong></p>" + render_value(value)
-        return f"<p><strong>{esc(label)}:</strong> {esc(str(value))}</p>"
-
-    # Render lists and dicts recursively into HTML
-    def render_value(value: Any) -> str:
-        if value is None:
-            return "<div><em>null</em></div>"
-        if isinstance(value, dict):
-            html = "<div class='dict-block'><dl>"
-            for k, v in value.items():
-                html += f"<dt><strong>{esc(str(k))}</strong></dt><dd>{render_value(v)}</dd>"
-            html += "</dl></div>"
-            return html
-        if isinstance(value, list):
-            if not value:
-                return "<div><em>[]</em></div>"
-            html = "<ul>"
-            for itm in value:
-                if isinstance(itm, (dict, list)):
-                    html += f"<li>{render_value(itm)}</li>"
-                else:
-                    html += f"<li>{esc(str(itm))}</li>"
-            html += "</ul>"
-            return html
-
-        # fallback primitive
-        return esc(str(value))
-
-    title = resp.get("project_name") or resp.get("project_title") or ""
-    industry = resp.get("industry") or resp.get("domain") or ""
-    budget = resp.get("budget")
-    duration = resp.get("duration")
-    complexity_score = resp.get("complexity_score") or resp.get("total_score")
-    project_sponsor = resp.get("sponsor") or resp.get("project_sponsor") or ""
-    # NEW: date support
-    date = resp.get("date") or ""
-    description = resp.get("description") or resp.get("project_description") or ""
-    high_level_requirement = resp.get("high_level_requirement", [])
-    objectives = resp.get("objectives", [])
-
-    # NEW: narrative sections
-    current_state = resp.get("current_state") or resp.get("current_state_problem") or []
-    future_state = resp.get("future_state") or resp.get("future_state_aim") or []
-    business_benefit = resp.get("business_benefit") or []
-
-    project_scope = resp.get("project_scope", "")
-    timeline = resp.get("timeline", {})
-    budget_breakdown = resp.get("budget breakdown") or resp.get("budget_breakdown") or resp.get("budget") or {}
-    project_manager = resp.get("project_manager") or {}
-    success_criteria = resp.get("success_criteria") or {}
-    assumptions = resp.get("assumptions") or {}
-    risks = resp.get("risks_and_mitigation") or resp.get("risks") or []
-    dependencies = resp.get("dependencies", [])
-
-    # NEW: PM resource recommendation & lessons
-    pm_reco = resp.get("pm_resource_recommendation") or ""
-    lessons = resp.get("lesson_learnt") or []
-
-    # Build HTML pieces
-    # High-level requirements
-    if high_level_requirement:
-        high_level_html = "<ul>" + "".join(f"<li>{esc(str(h))}</li>" for h in high_level_requirement) + "</ul>"
-    else:
-        high_level_html = "<p><em>Not provided</em></p>"
-
-    # Objectives
-    if objectives:
-        objectives_html = "<ul>" + "".join(f"<li>{esc(str(o))}</li>" for o in objectives) + "</ul>"
-    else:
-        objectives_html = "<p><em>Not provided</em></p>"
-
-    # NEW: narrative sections (list or paragraph)
-    def list_or_para(seq: Any) -> str:
-        if isinstance(seq, list):
-            if not seq:
-                return "<p><em>Not provided</em></p>"
-            return "<ul>" + "".join(f"<li>{esc(str(x))}</li>" for x in seq) + "</ul>"
-        if not seq:
-            return "<p><em>Not provided</em></p>"
-        return f"<p>{esc(str(seq))}</p>"
-
-    current_state_html = list_or_para(current_state)
-    future_state_html = list_or_para(future_state)
-    business_benefit_html = list_or_para(business_benefit)
-
-    # Project Scope
-    if isinstance(project_scope, dict) and project_scope:
-        scope_text = project_scope.get("scope") or ""
-        in_scope = project_scope.get("in_scope") or project_scope.get("inScope") or []
-        out_scope = project_scope.get("out_scope") or project_scope.get("outScope") or []
-        scope_html = f"{esc(scope_text)}"
-        if in_scope:
-            scope_html += "<h5>In scope:</h5><ul>" + "".join(f"<li>{esc(str(s))}</li>" for s in in_scope) + "</ul>"
-        if out_scope:
-            scope_html += "<h5>Out of scope:</h5><ul>" + "".join(f"<li>{esc(str(s))}</li>" for s in out_scope) + "</ul>"
-    else:
-        scope_html = esc(str(project_scope)) if project_scope else "<p><em>Not provided</em></p>"
-
-    # Timeline (add Pre-requisites support)
-    if isinstance(timeline, dict) and timeline:
-        timeline_html = ""
-        for phase_key, phase_val in timeline.items():
-            timeline_html += f"<h4>{esc(str(phase_key)).replace('_', ' ').title()}</h4>"
-            if isinstance(phase_val, dict):
-                p_duration = phase_val.get("duration")
-                p_tasks = phase_val.get("tasks", [])
-                # NEW: pre-requisites
-                p_prereq = phase_val.get("pre_requisites") or phase_val.get("prerequisites")
-                if p_duration:
-                    timeline_html += f"<p><strong>Duration:</strong> {esc(str(p_duration))}</p>"
-                if p_prereq:
-                    timeline_html += f"<p><strong>Pre-requisites:</strong> {esc(str(p_prereq))}</p>"
-                if p_tasks:
-                    timeline_html += "<p><strong>Tasks:</strong></p><ul>"
-                    for t in p_tasks:
-                        timeline_html += f"<li>{esc(str(t))}</li>"
-                    timeline_html += "</ul>"
-            else:
-                timeline_html += f"<p>{render_value(phase_val)}</p>"
-    else:
-        timeline_html = "<p><em>Not provided</em></p>"
-
-    # Budget breakdown
-    if isinstance(budget_breakdown, dict) and budget_breakdown:
-        allocation = budget_breakdown.get("allocation") or {}
-        total_cost = budget_breakdown.get("total_cost") or budget_breakdown.get("total_estimated") or ""
-        bb_html = f"<p><strong>Total cost:</strong> {esc(str(total_cost))}</p>"
-        if allocation and isinstance(allocation, dict):
-            bb_html += "<p><strong>Allocation:</strong></p><ul>"
-            for k, v in allocation.items():
-                bb_html += f"<li><strong>{esc(str(k))}:</strong> {esc(str(v))}</li>"
-            bb_html += "</ul>"
-    else:
-        bb_html = "<p><em>Not provided</em></p>"
-
-    # Risks
-    if isinstance(risks, list) and risks:
-        risks_html = "<ul>"
-        for r in risks:
-            if isinstance(r, dict):
-                rr = esc(str(r.get("risk") or r.get("title") or "Risk"))
-                impact = esc(str(r.get("impact") or ""))
-                mit = esc(str(r.get("mitigation") or r.get("mitigation_plan") or ""))
-                risks_html += f"<li><strong>{rr}</strong> - Impact: {impact}<br/>Mitigation: {mit}</li>"
-            else:
-                risks_html += f"<li>{esc(str(r))}</li>"
-        risks_html += "</ul>"
-    else:
-        risks_html = "<p><em>Not provided</em></p>"
-
-    # Project Manager / PM Resource Recommendation
-    if pm_reco:
-        pm_html = kv("PM / Resource Recommendation", pm_reco)
-    else:
-        if isinstance(project_manager, dict) and project_manager:
-            pm_html = ""
-            pm_count = project_manager.get("count")
-            if pm_count is not None:
-                pm_html += f"<p><strong>Project Manager(s):</strong> {esc(str(pm_count))}</p>"
-            responsibilities = project_manager.get("responsibilities") or []
-            if responsibilities:
-                pm_html += "<p><strong>Responsibilities:</strong></p><ul>"
-                for d in responsibilities:
-                    pm_html += f"<li>{esc(str(d))}</li>"
-                pm_html += "</ul>"
-        else:
-            pm_html = "<p><em>Not provided</em></p>"
-
-    # Success criteria
-    success_html = (
-        "<ul>" + "".join(f"<li>{esc(str(s))}</li>" for s in success_criteria) + "</ul>"
-        if success_criteria else "<p><em>Not provided</em></p>"
-    )
-
-    # Assumptions
-    assumptions_html = (
-        "<ul>" + "".join(f"<li>{esc(str(a))}</li>" for a in assumptions) + "</ul>"
-        if assumptions else "<p><em>Not provided</em></p>"
-    )
-
-    # Dependencies
-    dependencies_html = (
-        "<ul>" + "".join(f"<li>{esc(str(d))}</li>" for d in dependencies) + "</ul>"
-        if dependencies else "<p><em>Not provided</em></p>"
-    )
-
-    # Lessons (NEW)
-    lessons_html = (
-        "<ul>" + "".join(f"<li>{esc(str(l))}</li>" for l in lessons) + "</ul>"
-        if lessons else "<p><em>Not provided</em></p>"
-    )
-
-    # Build the HTML document (meta line updated to include Sponsor and Date)
-    html_doc = f"""<!doctype html>
-    <html>
-    <head>
-    <meta charset="utf-8">
-    <title>{esc(title)} - Project Charter</title>
-    <style>
-        body{{font-family: Arial, sans-serif; margin:24px; color:#222}}
-        .card{{border:1px solid #e0e0e0; padding:18px; border-radius:8px; box-shadow:0 1px 3px rgba(0,0,0,0.04)}}
-        h1{{margin:0 0 8px 0}}
-        h2{{margin-top:20px; color:#333}}
-        h4{{margin:10px 0 6px 0}}
-        .meta{{color:#555; margin-bottom:12px}}
-        .section{{margin-top:12px}}
-        ul{{margin:6px 0 6px 20px}}
-        dl{{margin:6px 0 6px 0}}
-        dt{{font-weight:bold}}
-        dd{{margin-left:12px; margin-bottom:8px}}
-        small{{font-size:0.9em; color:#666}}
-    </style>
-    </head>
-    <body>
-    <div class="card">
-        <h1>{esc(title)}</h1>
-        <div class="meta">{esc(description)}</div>
-
-        <div class="section">
-            <strong>Industry:</strong> {esc(industry)} &nbsp; | 
-            &nbsp; <strong>Duration:</strong> {esc(str(duration) if duration else "")} &nbsp; |
-            &nbsp; <strong>Budget:</strong> {esc(str(budget) if budget else "Not provided")} &nbsp; |
-            &nbsp; <strong>Complexity Score:</strong> {esc(str(complexity_score) if complexity_score is not None else "null")} &nbsp; |
-            &nbsp; <strong>Project Sponsor:</strong> {esc(project_sponsor)} &nbsp; |
-            &nbsp; <strong>Date:</strong> {esc(date)}
-        </div>
-
-        <!-- NEW narrative sections per structure -->
-        <h2>Current State / Problem</h2>
-        <div class="section">{current_state_html}</div>
-
-        <h2>Objectives</h2>
-        <div class="section">{objectives_html}</div>
-
-        <h2>Future State / Aim</h2>
-        <div class="section">{future_state_html}</div>
-
-        <h2>High-level Requirement</h2>
-        <div class="section">{high_level_html}</div>
-
-        <h2>Business Benefit</h2>
-        <div class="section">{business_benefit_html}</div>
-
-        <h2>Project Scope</h2>
-        <div class="section">{scope_html}</div>
-
-        <h2>Budget Breakdown</h2>
-        <div class="section">{bb_html}</div>
-
-        <h2>Timeline</h2>
-        <div class="section">{timeline_html}</div>
-
-        <h2>Success Criteria</h2>
-        <div class="section">{success_html}</div>
-
-        <h2>Assumptions</h2>
-        <div class="section">{assumptions_html}</div>
-
-        <h2>Dependencies</h2>
-        <div class="section">{dependencies_html}</div>
-
-        <h2>Risks & Mitigation</h2>
-        <div class="section">{risks_html}</div>
-
-        <h2>PM / Resource Recommendation</h2>
-        <div class="section">{pm_html}</div>
-
-        <h2>Lesson Learnt</h2>
-        <div class="section">{lessons_html}</div>
-
-        <div class="small" style="margin-top:18px">
-            Generated at: {esc(str(resp.get("created_at") or ""))} |
-            Project ID: {esc(str(resp.get("project_id") or ""))}
-        </div>
-
-    </div>
-    </body>
-    </html>
-    """
-    return html_doc
+    return charter_renderer.render_html(resp)
 
 
 @bp.route("/ask", methods=["POST"])
@@ -383,15 +84,16 @@ def ask():
         return jsonify({"error": "Missing or invalid 'questions' field"}), 400
 
     # compute score and scoring summary
-    total_score, budget = _compute_total_score(questions)
+    scored, budget = _compute_total_score(questions)
+    total_score = scored.total
     try:
-        scoring_info = scoring.interpret_score(total_score)
+        scoring_info = scoring.interpret_score(total_score) if total_score is not None else scored.band
     except Exception:
         logger.exception("scoring.interpret_score failed; using fallback")
         scoring_info = {"complexity": None, "recommendation": None, "rationale": None}
 
     scoring_summary = (
-        f"Total score: {total_score}\n"
+        f"Total score: {total_score if total_score is not None else 'not scored'}\n"
         f"Complexity (expected): {scoring_info.get('complexity')}\n"
         f"Recommendation (expected): {scoring_info.get('recommendation')}\n"
         f"Rationale (expected): {scoring_info.get('rationale')}\n"
@@ -1,10 +1,43 @@
+from datetime import date, datetime, timedelta, timezone
 from flask import Blueprint, jsonify, request
-from app.services import kpi_view
+from app.services import kpi_view, precompressed
 from app.utils.logger import get_logger
 
 bp = Blueprint("kpi", __name__)
 logger = get_logger(__name__)
 
+RANGE_DAYS = 30  # ranged queries without ?from=: the 30 days up to ?to=
+
+
+def _range_args(granularity: str):
+    """
+    (from, to, granularity) of a ranged query, or None when the request has
+    none of ?from=, ?to= and ?granularity=. Dates are YYYY-MM-DD; ValueError
+    for anything else.
+    """
+    if not any(request.args.get(k) for k in ("from", "to", "granularity")):
+        return None
+    try:
+        last = date.fromisoformat(request.args["to"]) if request.args.get("to") else datetime.now(timezone.utc).date()
+        first = (date.fromisoformat(request.args["from"]) if request.args.get("from")
+                 else last - timedelta(days=RANGE_DAYS - 1))
+    except ValueError:
+        raise ValueError("from and to must be dates (YYYY-MM-DD)") from None
+    return first, last, request.args.get("granularity") or granularity
+
+@bp.route("/kpi/snapshot", methods=["GET"])
+def snapshot():
+    """
+    The whole KPI data file, precompressed and ETag-validated.
+    """
+    try:
+        return precompressed.serve("kpi")
+    except FileNotFoundError:
+        return jsonify({"error": "KPI data not found"}), 404
+    except Exception:
+        logger.exception("Failed to load KPI snapshot")
+        return jsonify({"error": "Failed to load KPI snapshot"}), 500
+
 @bp.route("/kpi/department-charters", methods=["GET"])
 def department_charters():
     try:
@@ -15,6 +48,15 @@ def department_charters():
 
 @bp.route("/kpi/returning-users", methods=["GET"])
 def returning_users():
+    try:
+        ranged = _range_args("day")
+        if ranged:
+            return jsonify(kpi_view.returning_users_range(*ranged)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception:
+        logger.exception("Failed to fetch returning users")
+        return jsonify({"error": "Failed to fetch returning users"}), 500
     days_raw = request.args.get("days", "15")
     try:
         days = int(days_raw)
@@ -46,6 +88,15 @@ def user_activity():
 
 @bp.route("/kpi/charters-per-month", methods=["GET"])
 def charters_per_month():
+    try:
+        ranged = _range_args("month")
+        if ranged:
+            return jsonify(kpi_view.charters_range(*ranged)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception:
+        logger.exception("Failed to fetch charters per month")
+        return jsonify({"error": "Failed to fetch charters per month"}), 500
     try:
         data = kpi_view.get_charters_per_month()
         return jsonify(data), 200
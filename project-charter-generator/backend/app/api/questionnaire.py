@@ -1,13 +1,14 @@
 from flask import Blueprint, jsonify, current_app
-import os, json
+import json
 from app.config import Config
+from app.services import precompressed
 
 bp = Blueprint("questionnaire", __name__)
 
 @bp.route("/questionnaire", methods=["GET"])
 def get_questionnaire():
     """
-    Return the questionnaire JSON used by the frontend.
+    Return the questionnaire JSON used by the frontend (precompressed, ETag-validated).
     """
 
     path = getattr(Config, "QUESTIONNAIRE_PATH", None)
@@ -15,13 +16,11 @@ def get_questionnaire():
         current_app.logger.error("QUESTIONNAIRE_PATH not configured in Config")
         return jsonify({"error": "Server misconfiguration"}), 500
 
-    if not os.path.exists(path):
+    try:
+        return precompressed.serve("questionnaire")
+    except FileNotFoundError:
         current_app.logger.error("Questionnaire file not found at %s", path)
         return jsonify({"error": "Questionnaire file not found"}), 404
-
-    try:
-        with open(path, "r", encoding="utf-8") as fh:
-            data = json.load(fh)
     except json.JSONDecodeError as e:
         current_app.logger.exception("Questionnaire JSON decode error at %s: %s", path, e)
         return jsonify({"error": "Questionnaire file is invalid JSON"}), 500
@@ -29,8 +28,5 @@ def get_questionnaire():
         current_app.logger.exception("Failed to read questionnaire file at %s: %s", path, e)
         return jsonify({"error": "Failed to load questionnaire"}), 500
 
-    current_app.logger.info(f"Loaded questionnaire from {path}")
-    return jsonify(data), 200
-
 
 # http://127.0.0.1:5000/api/questionnaire
\ No newline at end of file
@@ -1,32 +1,294 @@
-from flask import Blueprint, jsonify, current_app
-from app.services.storage import list_submissions, get_submission
+import itertools
+from datetime import datetime, timezone
+from flask import Blueprint, jsonify, current_app, request, Response, send_file, url_for
+from app.config import Config
+from app.services import exporter, render_cache, scoring_engine, table_export
+from app.services.storage import (
+    ATTRIBUTE_FIELDS, BLOB_FIELDS, aggregate_submissions, get_submission, query_submissions, raw_json, search_submissions,
+)
 
 bp = Blueprint("submissions", __name__)
 
+PAGE_SIZE = int(getattr(Config, "SUBMISSIONS_PAGE_SIZE", 100))
+PAGE_MAX = int(getattr(Config, "SUBMISSIONS_PAGE_MAX", 500))
+
+
+def _iso_utc(value: str) -> str:
+    """ISO-8601 date/datetime -> the UTC isoformat created_at is stored in (naive = UTC)."""
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+def _blobs_arg(fields: str) -> tuple:
+    """?fields= (summary | full | payload,result) -> the blobs to read; raises ValueError."""
+    fields = fields.lower()
+    if fields == "summary":
+        return ()
+    if fields == "full":
+        return tuple(BLOB_FIELDS)
+    blobs = tuple(f for f in (p.strip() for p in fields.split(",")) if f and f != "summary")
+    if not blobs or any(f not in BLOB_FIELDS for f in blobs):
+        raise ValueError("fields must be 'summary', 'full' or a list of: " + ", ".join(BLOB_FIELDS))
+    return blobs
+
+
+def _filter_args(args) -> dict:
+    """Validated filter kwargs shared by query_submissions() and aggregate_submissions(); raises ValueError."""
+    kwargs = {"sponsor": args.get("sponsor") or None}
+    attributes = {name: args[name] for name in ATTRIBUTE_FIELDS if args.get(name)}
+    if attributes:
+        kwargs["attributes"] = attributes
+    if args.get("band"):
+        score_range = scoring_engine.get_engine().band_range(args["band"])
+        if score_range is None:
+            raise ValueError(f"unknown complexity band {args['band']!r}")
+        kwargs["min_score"], kwargs["max_score"] = score_range
+    if args.get("from"):
+        kwargs["created_from"] = _iso_utc(args["from"])
+    if args.get("to"):
+        kwargs["created_to"] = _iso_utc(args["to"])
+    return kwargs
+
+
+def _listing_args(args) -> dict:
+    """Validated query_submissions() kwargs from the query string; raises ValueError."""
+    blobs = _blobs_arg(args.get("fields") or "summary")
+    limit = int(args.get("limit") or PAGE_SIZE)
+    if not 1 <= limit <= PAGE_MAX:
+        raise ValueError(f"limit must be between 1 and {PAGE_MAX}")
+    return dict(_filter_args(args), limit=limit, cursor=args.get("cursor") or None, blobs=blobs)
+
+
 @bp.route("/submissions", methods=["GET"])
 def get_submissions():
     """
-    Return recent stored submissions.
+    Return stored submissions, newest first, one page at a time.
+
+    Query params: limit, cursor (the previous page's next_cursor), fields
+    (summary [default] | full | payload,result), sponsor, band (complexity
+    label prefix, e.g. "high"), from / to (ISO-8601 created_at range, `to` exclusive),
+    industry, complexity, duration, user_id, department (case-insensitive match).
     """
     try:
-        rows = list_submissions(limit=100)
-        return jsonify({"submissions": rows}), 200
+        kwargs = _listing_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        rows, next_cursor = query_submissions(**kwargs)
+        return jsonify({"submissions": rows, "next_cursor": next_cursor}), 200
+    except ValueError as e:  # malformed cursor
+        return jsonify({"error": str(e)}), 400
     except Exception:
         current_app.logger.exception("Failed to read submissions")
         return jsonify({"error": "Failed to read submissions"}), 500
 
 
+@bp.route("/submissions/stats", methods=["GET"])
+def get_submission_stats():
+    """
+    Submission counts and complexity statistics grouped by ?group_by= (industry,
+    complexity, duration, user_id, department, sponsor or recommended_pm_count),
+    largest group first. Takes the filters of GET /api/submissions.
+    """
+    group_by = request.args.get("group_by") or "industry"
+    try:
+        kwargs = _filter_args(request.args)
+        groups = aggregate_submissions(group_by, **kwargs)
+        return jsonify({"group_by": group_by, "groups": groups}), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception:
+        current_app.logger.exception("Failed to aggregate submissions")
+        return jsonify({"error": "Failed to aggregate submissions"}), 500
+
+
+@bp.route("/submissions/export", methods=["GET"])
+def export_table():
+    """
+    Stream every stored submission, oldest first, as NDJSON (default) or CSV.
+
+    Query params: format (ndjson | csv), fields (full [default] | summary |
+    payload,result), since_id (only ids above it, to resume or sync
+    incrementally), since (ISO-8601, created_at on or after it). Payload and
+    result are the stored JSON, not re-serialized; memory use does not grow
+    with the table.
+    """
+    fmt = (request.args.get("format") or "ndjson").lower()
+    if fmt not in table_export.FORMATS:
+        return jsonify({"error": "format must be 'ndjson' or 'csv'"}), 400
+    try:
+        blobs = _blobs_arg(request.args.get("fields") or "full")
+        since_id = int(request.args["since_id"]) if request.args.get("since_id") else None
+        since = _iso_utc(request.args["since"]) if request.args.get("since") else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        body = table_export.stream(fmt, blobs, since_id, since)
+        first = next(body, b"")  # open the cursor now, so a storage error is still a 500 rather than a cut stream
+    except Exception:
+        current_app.logger.exception("Failed to export submissions")
+        return jsonify({"error": "Failed to export submissions"}), 500
+    resp = Response(itertools.chain((first,), body), status=200, mimetype=table_export.FORMATS[fmt])
+    resp.headers["Content-Disposition"] = f'attachment; filename="submissions.{fmt}"'
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+@bp.route("/submissions/search", methods=["GET"])
+def search_charters():
+    """
+    Full-text search over stored charters (title, description, objectives,
+    risks and the remaining charter text), best match first.
+
+    Query params: q (words, all required; a trailing * matches a prefix),
+    limit, cursor (the previous page's next_cursor). Each hit has the summary
+    fields, a score and an HTML snippet with the matches in <mark>.
+    """
+    try:
+        limit = int(request.args.get("limit") or PAGE_SIZE)
+        if not 1 <= limit <= PAGE_MAX:
+            raise ValueError(f"limit must be between 1 and {PAGE_MAX}")
+        rows, next_cursor = search_submissions(
+            request.args.get("q") or "", limit=limit, cursor=request.args.get("cursor") or None
+        )
+        return jsonify({"results": rows, "next_cursor": next_cursor}), 200
+    except ValueError as e:  # no search words, bad limit or malformed cursor
+        return jsonify({"error": str(e)}), 400
+    except NotImplementedError as e:
+        return jsonify({"error": str(e)}), 501
+    except Exception:
+        current_app.logger.exception("Failed to search submissions")
+        return jsonify({"error": "Failed to search submissions"}), 500
+
+
 @bp.route("/submissions/<int:submission_id>", methods=["GET"])
 def get_submission_by_id(submission_id):
+    """
+    Return a stored submission as JSON (default) or its charter as HTML (?format=html).
+    JSON splices the stored payload/result text into the envelope without parsing it.
+    Responses carry a strong ETag derived from updated_at; a matching If-None-Match gets 304.
+    """
+    fmt = (request.args.get("format") or "json").lower()
+    if fmt not in render_cache.FORMATS:
+        return jsonify({"error": "format must be 'json' or 'html'"}), 400
     try:
-        row = get_submission(submission_id)
-        if not row:
+        rendered = render_cache.get_rendered(submission_id, fmt, not_modified=_not_modified)
+        if not rendered:
             return jsonify({"error":"Not found"}), 404
-        return jsonify({"submission": row}), 200
     except Exception:
         current_app.logger.exception("Failed to read submission")
         return jsonify({"error":"Failed to read submission"}), 500
 
+    etag, body, mimetype = rendered
+    return _conditional_response(etag, body, mimetype)
+
+
+def _not_modified(etag: str) -> bool:
+    return request.if_none_match.contains_weak(etag.strip('"'))
+
+
+def _conditional_response(etag: str, body, mimetype: str) -> Response:
+    if body is None or _not_modified(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(body, status=200, content_type=mimetype)
+    resp.headers["ETag"] = etag
+    resp.headers["Cache-Control"] = Config.RENDER_CACHE_CONTROL
+    return resp
+
+
+@bp.route("/submissions/<int:submission_id>/result", methods=["GET"])
+def get_submission_result(submission_id):
+    """
+    Return the stored charter JSON of a submission verbatim (404 until a result
+    is saved). A conditional request is answered from updated_at alone.
+    """
+    try:
+        if request.if_none_match:
+            meta = get_submission(submission_id, blobs=())
+            if meta is None:
+                return jsonify({"error":"Not found"}), 404
+            etag = render_cache.etag_for(meta, "result")
+            if _not_modified(etag):
+                return _conditional_response(etag, None, "application/json")
+        row = get_submission(submission_id, blobs=("result",), raw=True)
+        if row is None or row["result"] is None:
+            return jsonify({"error":"Not found"}), 404
+    except Exception:
+        current_app.logger.exception("Failed to read submission")
+        return jsonify({"error":"Failed to read submission"}), 500
+    body = raw_json(row["result"]).encode("utf-8")
+    return _conditional_response(render_cache.etag_for(row, "result"), body, "application/json")
+
+
+def _export_payload(status):
+    job_id = status["job_id"]
+    return {
+        **status,
+        "status_url": url_for("submissions.get_export_status", job_id=job_id),
+        "download_url": url_for("submissions.download_export", job_id=job_id),
+    }
+
+
+@bp.route("/submissions/<int:submission_id>/export", methods=["POST"])
+def export_submission(submission_id):
+    """
+    Queue a PDF or DOCX export of a stored charter (?format=pdf|docx).
+    Returns 202 with pollable status/download URLs, or 200 if the file already exists.
+    """
+    fmt = (request.args.get("format") or "pdf").lower()
+    if fmt not in exporter.FORMATS:
+        return jsonify({"error": "format must be 'pdf' or 'docx'"}), 400
+    try:
+        status = exporter.start_export(submission_id, fmt)
+        if status is None:
+            return jsonify({"error":"Not found"}), 404
+    except exporter.ExportError:
+        current_app.logger.exception("Failed to queue export")
+        return jsonify({"error": "Export workers unavailable"}), 503
+    except Exception:
+        current_app.logger.exception("Failed to queue export")
+        return jsonify({"error": "Failed to queue export"}), 500
+
+    code = 200 if status["status"] == exporter.DONE else 202
+    resp = jsonify(_export_payload(status))
+    resp.status_code = code
+    if code == 202:
+        resp.headers["Location"] = url_for("submissions.get_export_status", job_id=status["job_id"])
+    return resp
+
+
+@bp.route("/exports/<job_id>", methods=["GET"])
+def get_export_status(job_id):
+    """
+    Status of an export job: queued, running, done or failed.
+    """
+    status = exporter.get_status(job_id)
+    if status is None:
+        return jsonify({"error":"Not found"}), 404
+    return jsonify(_export_payload(status)), 200
+
+
+@bp.route("/exports/<job_id>/download", methods=["GET"])
+def download_export(job_id):
+    """
+    Download a finished export; 409 while the job is still pending or if it failed.
+    """
+    status = exporter.get_status(job_id)
+    if status is None:
+        return jsonify({"error":"Not found"}), 404
+    if status["status"] != exporter.DONE:
+        return jsonify(_export_payload(status)), 409
+    fmt = status["format"]
+    name = f"charter-{status.get('submission_id', job_id)}.{fmt}"
+    # the file name is a content hash, so the job id is a strong validator for the file
+    resp = send_file(exporter.file_path(job_id), mimetype=exporter.FORMATS[fmt],
+                      as_attachment=True, download_name=name, etag=job_id, conditional=True)
+    resp.headers["Cache-Control"] = Config.RENDER_CACHE_CONTROL
+    return resp
+
 
 # curl -X POST http://127.0.0.1:5000/api/generation/ask -H "Content-Type: application/json" -d "{\"project_name\":\"CRM Upgrade Initiative\",\"sponsor\":\"Alice Smith\",\"answers\":[{\"id\":\"q1\",\"question\":\"Do you have approved budget?\",\"answer\":\"Yes\",\"score\":5}],\"additional_context\":\"Demo run\"}"
 
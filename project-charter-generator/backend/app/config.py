@@ -47,8 +47,6 @@ class Config:
     ENTRA_AUTHORITY = f"https://login.microsoftonline.com/{ENTRA_TENANT_ID}/v2.0" if ENTRA_TENANT_ID else None
     ENTRA_JWKS_URL = f"https://login.microsoftonline.com/{ENTRA_TENANT_ID}/discovery/v2.0/keys" if ENTRA_TENANT_ID else None
 
-    MAX_RESULT_CHARS = int(os.getenv("MAX_RESULT_CHARS", "100000"))
-
     # PATHS
     BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     QUESTIONNAIRE_PATH = os.path.join(BASE_DIR, "data", "questions.json")
@@ -63,6 +61,90 @@ class Config:
 
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL")
+    # auto: SQLAlchemy backend when DATABASE_URL names a server database (e.g. postgresql+psycopg2://), else sqlite3
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "auto")  # auto | sqlite | sqlalchemy
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # payload_json / result_json compression (zstd needs the optional zstandard package; zlib otherwise)
+    BLOB_CODEC = os.getenv("BLOB_CODEC", "auto")  # auto | zstd | zlib | none
+    BLOB_ZLIB_LEVEL = int(os.getenv("BLOB_ZLIB_LEVEL", "6"))
+    BLOB_ZSTD_LEVEL = int(os.getenv("BLOB_ZSTD_LEVEL", "9"))
+
+    # SQLite tuning for the long-lived per-thread connections in app.services.storage
+    DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")  # OFF | NORMAL | FULL
+    DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "8192"))
+    DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+    DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "30000"))
+    DB_STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", "128"))
+    # Optional group-commit writer: one thread batches submission writes into one transaction
+    DB_WRITE_BEHIND = os.getenv("DB_WRITE_BEHIND", "False").lower() in ("true", "1", "yes")
+    DB_WRITE_BATCH_ROWS = int(os.getenv("DB_WRITE_BATCH_ROWS", "64"))
+    DB_WRITE_BATCH_MS = float(os.getenv("DB_WRITE_BATCH_MS", "0"))  # linger for more writes before committing
+    DB_WRITE_QUEUE_SIZE = int(os.getenv("DB_WRITE_QUEUE_SIZE", "1024"))
+    DB_WRITE_PUT_TIMEOUT = float(os.getenv("DB_WRITE_PUT_TIMEOUT", "5"))
+    DB_WRITE_RESULT_TIMEOUT = float(os.getenv("DB_WRITE_RESULT_TIMEOUT", "60"))  # wait for a queued write's commit
+
+    # Admin / diagnostics
+    ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+    DIAGNOSTICS_DIR = os.getenv("DIAGNOSTICS_DIR", os.path.join(BASE_DIR, "data", "diagnostics"))
+    DIAGNOSTICS_MAX_SNAPSHOTS = int(os.getenv("DIAGNOSTICS_MAX_SNAPSHOTS", "5"))
+
+    # Record/replay of outbound LLM and Databricks calls
+    CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off")  # off | record | replay
+    CASSETTE_PATH = os.getenv("CASSETTE_PATH")  # JSON Lines; records prompts as sent, user-entered text included
+    CASSETTE_REPLAY_LATENCY = os.getenv("CASSETTE_REPLAY_LATENCY", "original")  # original | zero
+    CASSETTE_MATCH = os.getenv("CASSETTE_MATCH", "exact")  # exact | sequential
+
+    # GET /api/submissions paging (keyset cursor; summary fields unless ?fields= asks for blobs)
+    SUBMISSIONS_PAGE_SIZE = int(os.getenv("SUBMISSIONS_PAGE_SIZE", "100"))
+    SUBMISSIONS_PAGE_MAX = int(os.getenv("SUBMISSIONS_PAGE_MAX", "500"))
+
+    # GET /api/submissions/search: only the newest N matches are ranked (bm25 scores every one it ranks)
+    SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "1000"))
+
+    # GET /api/submissions/export: rows read per query while streaming
+    EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "500"))
+
+    # POST /api/generation/ask with an Idempotency-Key: replay the stored result within the window;
+    # a generation still pending after the lease is presumed dead and may be retried
+    IDEMPOTENCY_WINDOW_SECONDS = float(os.getenv("IDEMPOTENCY_WINDOW_SECONDS", str(24 * 3600)))
+    IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "300"))
+
+    # /api/kpi/*: live aggregates from the submissions database, or the KPI file (auto: file until there is activity)
+    KPI_SOURCE = os.getenv("KPI_SOURCE", "auto")
+    # ranged queries (?from=&to=&granularity=) read in-memory rollups, reloaded at most this often after writes
+    KPI_ROLLUP_REFRESH_SECONDS = float(os.getenv("KPI_ROLLUP_REFRESH_SECONDS", "1"))
+
+    # Rendered charter cache (GET /api/submissions/<id>?format=html|json)
+    RENDER_CACHE_MAX_ENTRIES = int(os.getenv("RENDER_CACHE_MAX_ENTRIES", "256"))
+    RENDER_CACHE_CONTROL = os.getenv("RENDER_CACHE_CONTROL", "private, max-age=0, must-revalidate")
+    RENDER_PRERENDER_ON_SAVE = os.getenv("RENDER_PRERENDER_ON_SAVE", "True").lower() in ("true", "1", "yes")
+    RENDER_PRERENDER_WORKERS = int(os.getenv("RENDER_PRERENDER_WORKERS", "1"))
+
+    # Stream the LLM call for ?format=html and flush sections as they are parsed (override per request with ?stream=)
+    HTML_STREAM_LLM = os.getenv("HTML_STREAM_LLM", "False").lower() in ("true", "1", "yes")
+
+    # PDF/DOCX export (POST /api/submissions/<id>/export); files are cached on disk by content hash
+    EXPORT_DIR = os.getenv("EXPORT_DIR") or os.path.join(BASE_DIR, "data", "exports")
+    EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+    EXPORT_MP_START = os.getenv("EXPORT_MP_START", "spawn")  # spawn | forkserver | fork
+
+    # Response compression (gzip always, brotli when the package is installed) and precompressed JSON assets
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "500"))
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+    ASSET_CACHE_CONTROL = os.getenv("ASSET_CACHE_CONTROL", "no-cache")
+    ASSET_CACHE_CONTROL_VERSIONED = os.getenv("ASSET_CACHE_CONTROL_VERSIONED", "public, max-age=31536000, immutable")
+
+    # Data asset registry (questionnaire, schemas, prompt template, KPI file): poll for changes in the background
+    ASSET_WATCH = os.getenv("ASSET_WATCH", "True").lower() in ("true", "1", "yes")
+    ASSET_POLL_INTERVAL = float(os.getenv("ASSET_POLL_INTERVAL", "1.0"))
+    ASSET_RELOAD_DEBOUNCE = float(os.getenv("ASSET_RELOAD_DEBOUNCE", "0.5"))
+
+    # Scoring: answers are scored from questions.json; client scores only count (for unknown options) if enabled
+    SCORING_ALLOW_CLIENT_SCORES = os.getenv("SCORING_ALLOW_CLIENT_SCORES", "False").lower() in ("true", "1", "yes")
 
 
 
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 from app.config import Config
@@ -17,12 +17,35 @@ else:
     _db_url = f"sqlite:///{os.path.abspath(db_path)}"
 
 
-_engine_args = {}
-if _db_url.startswith("sqlite:///"):
-    # For SQLite in multi-threaded app, allow check_same_thread=False if using sessions across threads.
-    _engine_args["connect_args"] = {"check_same_thread": False}
+def make_engine(url: str):
+    """
+    Engine with the pool sized from DB_POOL_* settings. SQLite connections get the
+    same WAL / synchronous / busy_timeout pragmas as app.services.storage.
+    """
+    if url.startswith("sqlite"):
+        # For SQLite in multi-threaded app, allow check_same_thread=False if using sessions across threads.
+        eng = create_engine(url, pool_pre_ping=True, connect_args={"check_same_thread": False})
 
-engine = create_engine(_db_url, pool_pre_ping=True, **_engine_args)
+        @event.listens_for(eng, "connect")
+        def _sqlite_pragmas(dbapi_conn, _record):
+            cur = dbapi_conn.cursor()
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute(f"PRAGMA synchronous={getattr(Config, 'DB_SYNCHRONOUS', 'NORMAL')}")
+            cur.execute(f"PRAGMA busy_timeout={int(getattr(Config, 'DB_BUSY_TIMEOUT_MS', 30000))}")
+            cur.close()
+
+        return eng
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=int(getattr(Config, "DB_POOL_SIZE", 5)),
+        max_overflow=int(getattr(Config, "DB_MAX_OVERFLOW", 10)),
+        pool_timeout=float(getattr(Config, "DB_POOL_TIMEOUT", 30)),
+        pool_recycle=int(getattr(Config, "DB_POOL_RECYCLE", 1800)),  # drop connections before server/LB idle timeouts
+    )
+
+
+engine = make_engine(_db_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Declarative base for models
@@ -0,0 +1,251 @@
+"""
+Registry of the data files the backend serves or builds prompts from.
+
+Each asset (questionnaire, output schema, prompt template, KPI data) is read,
+parsed and validated once, then published as an immutable `Snapshot`. Readers
+call `get(name)`, which is a plain dict lookup: no lock, no file I/O. A new
+version is swapped in by replacing the whole snapshot dict, so a reader sees
+either the old or the new snapshot, never a half-built one.
+
+Changes are picked up by a background watcher (`start_watcher`, started from
+create_app) that stats each file every ASSET_POLL_INTERVAL seconds and
+reloads once the file has stopped changing for ASSET_RELOAD_DEBOUNCE seconds,
+so a half-written file is not parsed. A version that fails to parse or
+validate is logged and the previous snapshot stays live.
+
+Snapshot data is shared between requests; callers must not mutate it.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+from app.config import Config
+from app.services import diagnostics
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+POLL_INTERVAL = float(getattr(Config, "ASSET_POLL_INTERVAL", 1.0))
+RELOAD_DEBOUNCE = float(getattr(Config, "ASSET_RELOAD_DEBOUNCE", 0.5))
+
+Stamp = Tuple[str, int, int]  # (path, mtime_ns, size)
+
+
+class AssetError(ValueError):
+    """Raised when a new version of an asset fails validation."""
+
+
+class Spec(NamedTuple):
+    name: str
+    path: Callable[[], Optional[str]]      # called on every check, so config changes apply
+    parse: Callable[[str], Any]
+    validate: Optional[Callable[[Any], None]]
+
+
+class Snapshot(NamedTuple):
+    name: str
+    version: int
+    stamp: Stamp
+    digest: str          # sha256 of the file contents (first 32 hex chars)
+    text: str            # raw file contents
+    data: Any            # parsed contents; shared, treat as read-only
+    loaded_at: float
+
+
+_lock = threading.Lock()  # serialises loads; readers never take it
+_specs: Dict[str, Spec] = {}
+_snapshots: Dict[str, Snapshot] = {}
+_pending: Dict[str, Tuple[Stamp, float]] = {}   # name -> (changed stamp, first seen)
+_rejected: Dict[str, Tuple[Stamp, Exception]] = {}  # name -> (stamp, error) of a version that failed to load
+_watcher: Optional[threading.Thread] = None
+_stop = threading.Event()
+diagnostics.register_cache("assets", lambda: _snapshots)
+
+
+def register(name: str, path: Callable[[], Optional[str]], parse: Callable[[str], Any] = json.loads,
+             validate: Optional[Callable[[Any], None]] = None) -> None:
+    """Register (or replace) an asset. It is loaded on the next `refresh` or first `get`."""
+    global _snapshots
+    with _lock:
+        _specs[name] = Spec(name, path, parse, validate)
+        _snapshots = {k: v for k, v in _snapshots.items() if k != name}
+        _pending.pop(name, None)
+        _rejected.pop(name, None)
+
+
+def _stamp(spec: Spec) -> Stamp:
+    path = spec.path()
+    if not path:
+        raise FileNotFoundError(f"No path configured for asset {spec.name!r}")
+    st = os.stat(path)
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+def _load(spec: Spec, stamp: Stamp) -> Snapshot:
+    with open(stamp[0], "rb") as fh:
+        raw = fh.read()
+    text = raw.decode("utf-8").replace("\r\n", "\n")  # same text open(..., "r") would give
+    data = spec.parse(text)
+    if spec.validate is not None:
+        spec.validate(data)
+    prev = _snapshots.get(spec.name)
+    return Snapshot(spec.name, (prev.version + 1) if prev else 1, stamp,
+                    hashlib.sha256(raw).hexdigest()[:32], text, data, time.time())
+
+
+def _publish(snap: Snapshot) -> None:
+    global _snapshots
+    new = dict(_snapshots)
+    new[snap.name] = snap
+    _snapshots = new  # single reference swap; readers need no lock
+
+
+def refresh(name: str, force: bool = False) -> bool:
+    """
+    Reload an asset now if its file changed (or always with force=True).
+    Returns True if a new snapshot was published. Raises the load error if the
+    asset has no snapshot yet; otherwise errors are logged and the old snapshot kept.
+    """
+    with _lock:
+        spec = _specs[name]
+        current = _snapshots.get(name)
+        _pending.pop(name, None)
+        stamp = None
+        try:
+            stamp = _stamp(spec)
+            rejected = _rejected.get(name)
+            if not force and current is not None and current.stamp == stamp:
+                return False
+            if not force and rejected is not None and rejected[0] == stamp:
+                if current is None:
+                    raise rejected[1]
+                return False
+            snap = _load(spec, stamp)
+        except Exception as e:
+            if stamp is not None:
+                _rejected[name] = (stamp, e)
+            if current is None:
+                raise
+            logger.error("Keeping version %d of asset %r; new version rejected: %s", current.version, name, e)
+            return False
+        _rejected.pop(name, None)
+        _publish(snap)
+    logger.info("Loaded asset %r version %d from %s", name, snap.version, stamp[0])
+    return True
+
+
+def get(name: str) -> Snapshot:
+    """
+    Current snapshot of an asset. Lock-free once loaded; the first call for an
+    asset that has never loaded tries to load it and raises on failure.
+    """
+    snap = _snapshots.get(name)
+    if snap is not None:
+        return snap
+    refresh(name)
+    return _snapshots[name]
+
+
+def data(name: str) -> Any:
+    return get(name).data
+
+
+def load_all() -> None:
+    """Load every registered asset, logging (not raising) failures."""
+    for name in list(_specs):
+        try:
+            refresh(name)
+        except Exception as e:
+            logger.error("Asset %r not available: %s", name, e)
+
+
+def check_once(now: Optional[float] = None) -> None:
+    """One watcher pass: note changed files, reload those that have been stable for the debounce period."""
+    now = time.time() if now is None else now
+    for name, spec in list(_specs.items()):
+        current = _snapshots.get(name)
+        try:
+            stamp = _stamp(spec)
+        except OSError:
+            continue  # deleted or being replaced; keep serving the last good version
+        if current is not None and current.stamp == stamp:
+            _pending.pop(name, None)
+            continue
+        rejected = _rejected.get(name)
+        if rejected is not None and rejected[0] == stamp:
+            continue
+        seen = _pending.get(name)
+        if seen is None or seen[0] != stamp:
+            _pending[name] = (stamp, now)
+        elif now - seen[1] >= RELOAD_DEBOUNCE:
+            try:
+                refresh(name)
+            except Exception as e:
+                logger.error("Asset %r not available: %s", name, e)
+
+
+def _watch() -> None:
+    while not _stop.wait(POLL_INTERVAL):
+        try:
+            check_once()
+        except Exception:
+            logger.exception("Asset watcher pass failed")
+
+
+def start_watcher() -> None:
+    global _watcher
+    with _lock:
+        if _watcher is not None and _watcher.is_alive():
+            return
+        _stop.clear()
+        _watcher = threading.Thread(target=_watch, name="assets-watcher", daemon=True)
+        _watcher.start()
+
+
+def stop_watcher() -> None:
+    _stop.set()
+
+
+def init_app(app) -> None:
+    load_all()
+    if getattr(Config, "ASSET_WATCH", True):
+        start_watcher()
+
+
+# ----------------------------------------------------------------------------- validators
+
+def _require_dict(data: Any) -> None:
+    if not isinstance(data, dict):
+        raise AssetError("expected a JSON object")
+
+
+def _validate_questionnaire(data: Any) -> None:
+    _require_dict(data)
+    questions = data.get("questions")
+    if not isinstance(questions, list) or not questions:
+        raise AssetError("questionnaire has no questions")
+    ids = [q.get("id") if isinstance(q, dict) else None for q in questions]
+    if None in ids or len(set(ids)) != len(ids):
+        raise AssetError("every question needs a unique id")
+    from app.services.scoring_engine import ScoringEngine
+
+    try:
+        ScoringEngine(data, "")  # weights, scores and bands must compile
+    except (KeyError, TypeError, ValueError) as e:
+        raise AssetError(f"questionnaire scoring does not compile: {e!r}") from e
+
+
+def _validate_prompt_template(template: str) -> None:
+    try:
+        template.format(frontend_json="", scoring_summary="", output_schema="")
+    except (KeyError, IndexError, ValueError) as e:
+        raise AssetError(f"prompt template does not format: {e!r}") from e
+
+
+register("questionnaire", lambda: getattr(Config, "QUESTIONNAIRE_PATH", None), validate=_validate_questionnaire)
+register("output_schema", lambda: getattr(Config, "OUTPUT_SCHEMA_PATH", None), validate=_require_dict)
+register("kpi", lambda: getattr(Config, "KPI_FILE_PATH", None), validate=_require_dict)
+register("prompt_template", lambda: getattr(Config, "PROMPT_TEMPLATE_PATH", None), parse=str,
+         validate=_validate_prompt_template)
@@ -0,0 +1,103 @@
+"""
+Backfill of the charter attribute columns (storage.ATTRIBUTE_FIELDS).
+
+store_submission and save_result fill industry, complexity, duration,
+user_id and department for new writes; this job fills them for rows written
+before those columns existed, or after a change to storage.charter_attributes.
+It walks submissions in id-ordered chunks, decoding and extracting outside
+the write transaction, then updates the chunk in one short BEGIN IMMEDIATE
+transaction. Each UPDATE only applies if updated_at is unchanged, so a result
+saved by the API meanwhile keeps the attributes save_result wrote.
+Re-running is harmless.
+
+Run it with `python -m app.services.attribute_backfill [--db PATH]`.
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.services import storage
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _attribute_params(rows) -> List[Tuple[Any, ...]]:
+    """Rows -> conditional UPDATE parameters: result attributes, falling back to the payload's."""
+    params = []
+    for row in rows:
+        from_payload = storage.charter_attributes(storage._decode(row["payload_json"]))
+        from_result = storage.charter_attributes(storage._decode(row["result_json"]))
+        values = tuple(from_result[f] or from_payload[f] for f in storage.ATTRIBUTE_FIELDS)
+        params.append(values + (row["id"], row["updated_at"]))
+    return params
+
+
+def backfill(chunk_size: int = 500, pause: float = 0.0,
+             progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Recompute the attribute columns of every submission. Returns run statistics including rows/sec."""
+    storage.require_sqlite("attribute_backfill")
+    storage._ensure_db()
+    conn = storage._connect()  # own connection: explicit transactions below
+    conn.isolation_level = None
+    assignments = ", ".join(f"{f} = ?" for f in storage.ATTRIBUTE_FIELDS)
+    sql = f"UPDATE submissions SET {assignments} WHERE id = ? AND updated_at IS ?"
+    stats = {"rows": 0, "updated": 0, "skipped": 0, "chunks": 0}
+    started = time.perf_counter()
+    last_id = 0
+    try:
+        while True:
+            rows = conn.execute(
+                "SELECT id, payload_json, result_json, updated_at FROM submissions WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, chunk_size),
+            ).fetchall()
+            if not rows:
+                break
+            params = _attribute_params(rows)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = conn.executemany(sql, params)
+                updated = cur.rowcount if cur.rowcount >= 0 else len(params)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            last_id = rows[-1]["id"]
+            stats["rows"] += len(rows)
+            stats["updated"] += updated
+            stats["skipped"] += len(params) - updated  # saved by the API meanwhile; already current
+            stats["chunks"] += 1
+            if progress is not None:
+                elapsed = time.perf_counter() - started
+                progress(dict(stats, last_id=last_id, rows_per_sec=stats["rows"] / elapsed if elapsed else 0.0))
+            if pause:
+                time.sleep(pause)  # let online writers in between chunks
+        conn.execute("ANALYZE submissions")  # the planner's choice between the attribute indexes
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - started
+    stats.update(last_id=last_id, seconds=round(elapsed, 3),
+                 rows_per_sec=round(stats["rows"] / elapsed, 1) if elapsed else 0.0)
+    logger.info("Backfilled attributes of %d of %d submissions in %.2fs", stats["updated"], stats["rows"], elapsed)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Fill the charter attribute columns of stored submissions")
+    parser.add_argument("--db", help="SQLite file (defaults to DB_PATH)")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between chunks")
+    args = parser.parse_args(argv)
+    if args.db:
+        storage.DB_PATH = args.db
+
+    def report(s):
+        logger.info("chunk %d: %d rows, last id %d, %.0f rows/s", s["chunks"], s["rows"], s["last_id"], s["rows_per_sec"])
+
+    stats = backfill(chunk_size=args.chunk_size, pause=args.pause, progress=report)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,9 +1,10 @@
 import os
 import time
-from typing import Any, Callable, Optional, Sequence
+from typing import Any, Callable, Iterator, Optional, Sequence
 import httpx
 from openai import AzureOpenAI
 from app.config import Config
+from app.services import cassette
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -23,15 +24,20 @@ try:
 except Exception:
     RETRY_DELAY = 2.0
 
+_REPLAY_ONLY = cassette.MODE == "replay"
+
 if not getattr(Config, "AZURE_OPENAI_ENDPOINT", None) or not getattr(Config, "AZURE_OPENAI_KEY", None):
-    logger.error("Azure OpenAI endpoint/key not configured in Config (AZURE_OPENAI_ENDPOINT/AZURE_OPENAI_KEY)")
+    if _REPLAY_ONLY:
+        logger.info("Azure OpenAI not configured; serving LLM calls from cassette only")
+    else:
+        logger.error("Azure OpenAI endpoint/key not configured in Config (AZURE_OPENAI_ENDPOINT/AZURE_OPENAI_KEY)")
 
 http_client = httpx.Client(timeout=REQUEST_TIMEOUT)
 
 client = AzureOpenAI(
-    azure_endpoint=getattr(Config, "AZURE_OPENAI_ENDPOINT", None),
-    api_key=getattr(Config, "AZURE_OPENAI_KEY", None),
-    api_version=getattr(Config, "AZURE_API_VERSION", None),
+    azure_endpoint=getattr(Config, "AZURE_OPENAI_ENDPOINT", None) or ("http://cassette.invalid" if _REPLAY_ONLY else None),
+    api_key=getattr(Config, "AZURE_OPENAI_KEY", None) or ("replay" if _REPLAY_ONLY else None),
+    api_version=getattr(Config, "AZURE_API_VERSION", None) or ("replay" if _REPLAY_ONLY else None),
     http_client=http_client
 )
 
@@ -59,20 +65,40 @@ def _with_retry(func, *args, **kwargs):
                 raise
 
 
+def _usage_dict(response: Any) -> Optional[dict]:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    try:
+        return usage.model_dump()
+    except Exception:
+        return None
+
+
 def embed_text(text: str) -> Sequence[float]:
     """
     Create embeddings for input text using Azure OpenAI embedding model.
     Returns:
         embedding as a list of floats
     """
-    if not EMBEDDING_DEPLOYMENT:
+    if not EMBEDDING_DEPLOYMENT and not _REPLAY_ONLY:
         raise RuntimeError("Embedding deployment not configured (EMBEDDING_DEPLOYMENT)")
 
+    cassette_request = {"op": "embeddings", "model": EMBEDDING_DEPLOYMENT, "input": text}
+    replay = cassette.replaying()
+    if replay:
+        interaction = replay.lookup("azure_openai", cassette_request)
+        replay.wait(interaction.get("elapsed", 0))
+        logger.info("Replayed embedding from cassette for text length=%d", len(text))
+        return interaction["response"]
+
+    started = time.perf_counter()
     response = _with_retry(
         client.embeddings.create,
         model=EMBEDDING_DEPLOYMENT,
         input=text,
     )
+    elapsed = time.perf_counter() - started
 
     try:
         embedding = response.data[0].embedding
@@ -82,6 +108,10 @@ def embed_text(text: str) -> Sequence[float]:
         logger.exception("Unexpected embedding response shape")
         raise RuntimeError(f"Failed to extract embedding from Azure response: {e}")
 
+    rec = cassette.recording()
+    if rec:
+        rec.record("azure_openai", cassette_request, list(embedding), elapsed, usage=_usage_dict(response))
+
     logger.info(f"Generated embedding (len={len(embedding)}) for text length={len(text)}")
     return embedding
 
@@ -98,12 +128,27 @@ def generate_answer(prompt: str, max_tokens: Optional[int] = None, temperature:
     Returns:
       The model's textual response
     """
-    if not CHAT_DEPLOYMENT:
+    if not CHAT_DEPLOYMENT and not _REPLAY_ONLY:
         raise RuntimeError("Chat deployment not configured (CHAT_DEPLOYMENT)")
 
     max_tokens = max_tokens if max_tokens is not None else getattr(Config, "MAX_TOKENS", 500)
     temperature = temperature if temperature is not None else getattr(Config, "TEMPERATURE", 0.3)
 
+    cassette_request = {
+        "op": "chat",
+        "model": CHAT_DEPLOYMENT,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }
+    replay = cassette.replaying()
+    if replay:
+        interaction = replay.lookup("azure_openai", cassette_request)
+        replay.wait(interaction.get("elapsed", 0))
+        logger.info("Replayed LLM response from cassette (length=%d)", len(interaction["response"] or ""))
+        return interaction["response"]
+
+    started = time.perf_counter()
     response = _with_retry(
         client.chat.completions.create,
         model=CHAT_DEPLOYMENT,
@@ -111,6 +156,7 @@ def generate_answer(prompt: str, max_tokens: Optional[int] = None, temperature:
         max_tokens=max_tokens,
         temperature=temperature
     )
+    elapsed = time.perf_counter() - started
 
     try:
         answer = response.choices[0].message.content
@@ -120,5 +166,66 @@ def generate_answer(prompt: str, max_tokens: Optional[int] = None, temperature:
         logger.exception("Unexpected chat completion response shape")
         raise RuntimeError(f"Failed to extract chat message from Azure response: {e}")
 
+    rec = cassette.recording()
+    if rec:
+        rec.record("azure_openai", cassette_request, answer, elapsed, usage=_usage_dict(response))
+
     logger.info(f"LLM response generated successfully (length={len(answer)})")
     return answer
+
+
+def stream_answer(prompt: str, max_tokens: Optional[int] = None, temperature: Optional[float] = None) -> Iterator[str]:
+    """
+    Stream text from the Azure OpenAI chat model.
+
+    Yields content deltas as they arrive. Only opening the stream is retried;
+    a failure mid-stream is raised to the caller.
+    """
+    if not CHAT_DEPLOYMENT and not _REPLAY_ONLY:
+        raise RuntimeError("Chat deployment not configured (CHAT_DEPLOYMENT)")
+
+    max_tokens = max_tokens if max_tokens is not None else getattr(Config, "MAX_TOKENS", 500)
+    temperature = temperature if temperature is not None else getattr(Config, "TEMPERATURE", 0.3)
+
+    cassette_request = {
+        "op": "chat_stream",
+        "model": CHAT_DEPLOYMENT,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }
+    replay = cassette.replaying()
+    if replay:
+        interaction = replay.lookup("azure_openai", cassette_request)
+        yield from cassette.replay_chunks(replay, interaction)
+        return
+
+    started = time.perf_counter()
+    stream = _with_retry(
+        client.chat.completions.create,
+        model=CHAT_DEPLOYMENT,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=max_tokens,
+        temperature=temperature,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+
+    chunks = []
+    usage = None
+    for event in stream:
+        if getattr(event, "usage", None) is not None:
+            usage = _usage_dict(event)
+        if not event.choices:
+            continue
+        delta = event.choices[0].delta.content
+        if delta:
+            chunks.append((time.perf_counter() - started, delta))
+            yield delta
+
+    total = sum(len(c) for _, c in chunks)
+    rec = cassette.recording()
+    if rec:
+        rec.record("azure_openai", cassette_request, "".join(c for _, c in chunks),
+                   time.perf_counter() - started, chunks=chunks, usage=usage)
+    logger.info(f"LLM stream completed (chunks={len(chunks)}, length={total})")
@@ -0,0 +1,143 @@
+"""
+Compressed storage format for the payload_json / result_json columns.
+
+A stored value is either legacy plain text (a str, as written before this
+format existed) or a BLOB that starts with a NUL byte, which JSON text can
+never start with, followed by a one-byte format marker:
+
+    \\x00 \\x01 <utf-8>                      uncompressed
+    \\x00 \\x02 <zlib stream>                zlib
+    \\x00 \\x03 <zstd frame>                 zstd
+    \\x00 \\x04 <dict id: 4 bytes BE> <zstd frame compressed with that dictionary>
+
+zstd is used when the optional `zstandard` package is installed, with a
+dictionary trained on stored charters if one is supplied; otherwise zlib.
+Decoding never depends on the current settings, so any mix of formats in the
+table keeps reading back.
+"""
+import struct
+import threading
+import zlib
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+from app.config import Config
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is used instead
+    zstandard = None
+
+CODEC = getattr(Config, "BLOB_CODEC", "auto").lower()  # auto | zstd | zlib | none
+ZLIB_LEVEL = int(getattr(Config, "BLOB_ZLIB_LEVEL", 6))
+ZSTD_LEVEL = int(getattr(Config, "BLOB_ZSTD_LEVEL", 9))
+
+MAGIC = b"\x00"
+RAW, ZLIB, ZSTD, ZSTD_DICT = 1, 2, 3, 4
+FORMAT_NAMES = {RAW: "raw", ZLIB: "zlib", ZSTD: "zstd", ZSTD_DICT: "zstd+dict"}
+
+Dictionary = Tuple[int, bytes]  # (id, trained dictionary bytes)
+
+
+class BlobFormatError(ValueError):
+    """Raised for a stored blob that cannot be decoded."""
+
+
+def codec() -> str:
+    """The codec new values are written with."""
+    if CODEC == "auto":
+        return "zstd" if zstandard is not None else "zlib"
+    if CODEC == "zstd" and zstandard is None:
+        return "zlib"
+    return CODEC
+
+
+_zstd_lock = threading.Lock()
+_zstd_dicts: Dict[int, "zstandard.ZstdCompressionDict"] = {}
+
+
+def _zstd_dict(dict_id: int, data: bytes) -> "zstandard.ZstdCompressionDict":
+    d = _zstd_dicts.get(dict_id)
+    if d is None:
+        with _zstd_lock:
+            d = _zstd_dicts.get(dict_id)
+            if d is None:
+                d = zstandard.ZstdCompressionDict(data)
+                d.precompute_compress(level=ZSTD_LEVEL)
+                _zstd_dicts[dict_id] = d
+    return d
+
+
+def encode(text: str, dictionary: Optional[Dictionary] = None) -> bytes:
+    """Stored form of `text`. Falls back to the uncompressed format when compression does not pay off."""
+    raw = text.encode("utf-8")
+    name = codec()
+    if name == "zstd":
+        # compressor objects are not thread-safe and cheap to create once the dictionary is precomputed
+        if dictionary is not None:
+            dict_id, data = dictionary
+            body = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=_zstd_dict(dict_id, data)).compress(raw)
+            out = MAGIC + bytes((ZSTD_DICT,)) + struct.pack(">I", dict_id) + body
+        else:
+            out = MAGIC + bytes((ZSTD,)) + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    elif name == "zlib":
+        out = MAGIC + bytes((ZLIB,)) + zlib.compress(raw, ZLIB_LEVEL)
+    else:
+        out = b""
+    if not out or len(out) >= len(raw) + 2:
+        out = MAGIC + bytes((RAW,)) + raw
+    return out
+
+
+def decode(value: Union[None, str, bytes],
+           dictionaries: Optional[Callable[[int], Optional[bytes]]] = None) -> Optional[str]:
+    """
+    Text of a stored value (legacy text is returned as is).
+    `dictionaries` maps a dictionary id to its bytes; needed only for zstd+dict blobs.
+    """
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if not value.startswith(MAGIC) or len(value) < 2:
+        return value.decode("utf-8")  # a text value that came back as bytes
+    fmt, body = value[1], value[2:]
+    try:
+        if fmt == RAW:
+            return body.decode("utf-8")
+        if fmt == ZLIB:
+            return zlib.decompress(body).decode("utf-8")
+        if fmt in (ZSTD, ZSTD_DICT):
+            if zstandard is None:
+                raise BlobFormatError("zstd blob found but the zstandard package is not installed")
+            if fmt == ZSTD:
+                return zstandard.ZstdDecompressor().decompress(body).decode("utf-8")
+            (dict_id,) = struct.unpack(">I", body[:4])
+            try:
+                data = dictionaries(dict_id) if dictionaries is not None else None
+            except KeyError:
+                data = None
+            if data is None:
+                raise BlobFormatError(f"blob needs unknown compression dictionary {dict_id}")
+            dctx = zstandard.ZstdDecompressor(dict_data=_zstd_dict(dict_id, data))
+            return dctx.decompress(body[4:]).decode("utf-8")
+    except (zlib.error, UnicodeDecodeError, struct.error) as e:
+        raise BlobFormatError(f"corrupt {FORMAT_NAMES.get(fmt, fmt)} blob: {e}") from e
+    except Exception as e:
+        if zstandard is not None and isinstance(e, zstandard.ZstdError):
+            raise BlobFormatError(f"corrupt zstd blob: {e}") from e
+        raise
+    raise BlobFormatError(f"unknown blob format {fmt}")
+
+
+def format_of(value: Union[None, str, bytes]) -> str:
+    """Name of the format a stored value is in ("text" for legacy plain text)."""
+    if value is None:
+        return "null"
+    if isinstance(value, str) or bytes(value[:1]) != MAGIC or len(value) < 2:
+        return "text"
+    return FORMAT_NAMES.get(value[1], "unknown")
+
+
+def train_dictionary(samples: Iterable[str], size: int = 64 * 1024) -> bytes:
+    """Train a zstd dictionary on sample texts (requires the zstandard package)."""
+    if zstandard is None:
+        raise RuntimeError("training a compression dictionary requires the zstandard package")
+    return zstandard.train_dictionary(size, [s.encode("utf-8") for s in samples]).as_bytes()
@@ -0,0 +1,172 @@
+"""
+Online migration of payload_json / result_json to compressed blobs.
+
+Rows written before compressed storage hold plain JSON text; `compress_all`
+rewrites them in id-ordered chunks, one short BEGIN IMMEDIATE transaction
+per chunk, with a checkpoint in job_checkpoints so an interrupted run resumes
+where it stopped. Compression happens outside the transaction, and each
+UPDATE only applies if the row still holds the value that was read, so a
+result saved by the API in the meantime is never overwritten.
+
+With `recompress=True` blobs already compressed in another format (e.g. zlib
+before zstandard was installed, or zstd before a dictionary was trained) are
+re-encoded as well. `--train-dictionary` trains a zstd dictionary on stored
+charters first (requires the zstandard package).
+
+Run it with `python -m app.services.blob_migration [--train-dictionary] [--recompress]`.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.services import blob_codec, storage
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+JOB_NAME = "compress_blobs"
+
+
+def _target() -> str:
+    """Identifies what blobs are encoded as now; a checkpoint for another target is discarded."""
+    dictionary = storage._write_dictionary()
+    return blob_codec.codec() + (f"+dict{dictionary[0]}" if dictionary else "")
+
+
+def _size(value: Any) -> int:
+    if value is None:
+        return 0
+    return len(value.encode("utf-8")) if isinstance(value, str) else len(value)
+
+
+def _rewrite_chunk(rows, recompress: bool) -> Tuple[List[Tuple[Any, ...]], int, int]:
+    """Rows -> conditional UPDATE parameters, plus stored bytes before and after."""
+    params = []
+    before = after = 0
+    for row in rows:
+        old = (row["payload_json"], row["result_json"])
+        # encoding is deterministic, so re-encoding a blob already in the target format changes nothing
+        new = tuple(
+            storage.encode_blob(storage.decode_blob(v))
+            if v is not None and (recompress or blob_codec.format_of(v) == "text") else v
+            for v in old
+        )
+        if new == old:
+            continue
+        before += sum(_size(v) for v in old)
+        after += sum(_size(v) for v in new)
+        params.append(new + (row["id"],) + old)
+    return params, before, after
+
+
+def compress_all(chunk_size: int = 200, restart: bool = False, recompress: bool = False, pause: float = 0.0,
+                 progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Rewrite every uncompressed (or, with recompress, differently compressed) row.
+    Returns run statistics including bytes saved and rows/sec. Safe to interrupt and run again.
+    """
+    storage.require_sqlite("compress_all")
+    storage._ensure_db()
+    target = _target()
+    conn = storage._connect()  # own connection: explicit transactions below
+    conn.isolation_level = None
+    stats = {"target": target, "rows": 0, "rewritten": 0, "conflicts": 0, "chunks": 0,
+             "bytes_before": 0, "bytes_after": 0}
+    started = time.perf_counter()
+    try:
+        if restart:
+            conn.execute("DELETE FROM job_checkpoints WHERE job = ?", (JOB_NAME,))
+        row = conn.execute("SELECT last_id, version FROM job_checkpoints WHERE job = ?", (JOB_NAME,)).fetchone()
+        last_id = int(row["last_id"]) if row is not None and row["version"] == target else 0
+        stats["resumed_from_id"] = last_id
+        while True:
+            rows = conn.execute(
+                "SELECT id, payload_json, result_json FROM submissions WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, chunk_size),
+            ).fetchall()
+            if not rows:
+                break
+            params, before, after = _rewrite_chunk(rows, recompress)
+            chunk_last = rows[-1]["id"]
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = conn.executemany(
+                    "UPDATE submissions SET payload_json = ?, result_json = ? "
+                    "WHERE id = ? AND payload_json IS ? AND result_json IS ?",
+                    params,
+                )
+                rewritten = cur.rowcount if cur.rowcount >= 0 else len(params)
+                conn.execute(
+                    """
+                    INSERT INTO job_checkpoints (job, last_id, version, rows_done, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(job) DO UPDATE SET last_id = excluded.last_id, version = excluded.version,
+                        rows_done = job_checkpoints.rows_done + excluded.rows_done, updated_at = excluded.updated_at
+                    """,
+                    (JOB_NAME, chunk_last, target, rewritten, datetime.now(timezone.utc).isoformat()),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            last_id = chunk_last
+            stats["rows"] += len(rows)
+            stats["rewritten"] += rewritten
+            stats["conflicts"] += len(params) - rewritten  # saved by the API meanwhile; already compressed
+            stats["chunks"] += 1
+            stats["bytes_before"] += before
+            stats["bytes_after"] += after
+            if progress is not None:
+                elapsed = time.perf_counter() - started
+                progress(dict(stats, last_id=last_id, rows_per_sec=stats["rows"] / elapsed if elapsed else 0.0))
+            if pause:
+                time.sleep(pause)  # let online writers in between chunks
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - started
+    stats.update(last_id=last_id, seconds=round(elapsed, 3),
+                 rows_per_sec=round(stats["rows"] / elapsed, 1) if elapsed else 0.0)
+    logger.info("Compressed %d of %d submissions (%s): %d -> %d bytes in %.2fs",
+                stats["rewritten"], stats["rows"], target, stats["bytes_before"], stats["bytes_after"], elapsed)
+    return stats
+
+
+def train_dictionary(samples: int = 2000, size: int = 64 * 1024) -> int:
+    """Train a zstd dictionary on the newest stored charters and make it the write dictionary."""
+    conn = storage._get_conn(readonly=True)
+    rows = conn.execute(
+        "SELECT result_json FROM submissions WHERE result_json IS NOT NULL ORDER BY id DESC LIMIT ?", (samples,)
+    ).fetchall()
+    texts = [storage.decode_blob(r["result_json"]) for r in rows]
+    dict_id = storage.add_dictionary(blob_codec.train_dictionary(texts, size))
+    logger.info("Trained compression dictionary %d on %d charters", dict_id, len(texts))
+    return dict_id
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compress stored submission payloads and results")
+    parser.add_argument("--db", help="SQLite file (defaults to DB_PATH)")
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between chunks")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and rescan from the first row")
+    parser.add_argument("--recompress", action="store_true", help="also re-encode blobs in an older format")
+    parser.add_argument("--train-dictionary", action="store_true", help="train a zstd dictionary first")
+    parser.add_argument("--dictionary-samples", type=int, default=2000)
+    args = parser.parse_args(argv)
+    if args.db:
+        storage.DB_PATH = args.db
+    if args.train_dictionary:
+        train_dictionary(args.dictionary_samples)
+
+    def report(s):
+        logger.info("chunk %d: %d rows, last id %d, %.0f rows/s", s["chunks"], s["rows"], s["last_id"], s["rows_per_sec"])
+
+    stats = compress_all(chunk_size=args.chunk_size, restart=args.restart or args.train_dictionary,
+                         recompress=args.recompress or args.train_dictionary, pause=args.pause, progress=report)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
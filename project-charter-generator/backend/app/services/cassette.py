@@ -0,0 +1,202 @@
+"""
+Record / replay of upstream calls (Azure OpenAI, Databricks) for tests and load runs.
+
+A cassette is a JSON Lines file: one recorded interaction per line, appended
+as it happens, so recording costs O(1) per call whatever the cassette's size.
+Cassettes written by older versions (one JSON document with "interactions")
+are still read, and are rewritten as JSON Lines before anything is recorded.
+
+Credential-looking keys are redacted (sanitize), but the content of requests
+and responses is recorded as sent: prompts include the project details and
+free text users entered. Treat recorded cassettes as user data, or install a
+content redactor with set_redactor() before recording.
+"""
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from app.config import Config
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MODE = (getattr(Config, "CASSETTE_MODE", None) or "off").lower()             # off | record | replay
+CASSETTE_PATH = getattr(Config, "CASSETTE_PATH", None)
+REPLAY_LATENCY = (getattr(Config, "CASSETTE_REPLAY_LATENCY", None) or "original").lower()  # original | zero
+MATCH = (getattr(Config, "CASSETTE_MATCH", None) or "exact").lower()          # exact | sequential
+
+_SECRET_KEY = re.compile(r"^(authorization|.*api[-_]?key|.*token|.*secret|.*password)$", re.IGNORECASE)
+_REDACTED = "<redacted>"
+
+
+class CassetteMiss(RuntimeError):
+    """Replay mode found no recorded interaction for a request."""
+
+
+def sanitize(obj: Any) -> Any:
+    """Copy of obj with credential-looking keys redacted (recursively)."""
+    if isinstance(obj, dict):
+        return {k: (_REDACTED if _SECRET_KEY.search(str(k)) else sanitize(v)) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [sanitize(v) for v in obj]
+    return obj
+
+
+def request_key(service: str, request: Dict[str, Any]) -> str:
+    """Stable hash of a sanitized request."""
+    canonical = json.dumps({"service": service, "request": sanitize(request)}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# (service, request, response) -> (request, response) as written to the cassette; see set_redactor
+Redactor = Callable[[str, Dict[str, Any], Any], Tuple[Dict[str, Any], Any]]
+_redactor: Optional[Redactor] = None
+
+
+def set_redactor(redactor: Optional[Redactor]) -> None:
+    """Rewrite recorded content (e.g. strip user-entered text from prompts) before it is written."""
+    global _redactor
+    _redactor = redactor
+
+
+class Cassette:
+    """
+    JSON Lines file of recorded request/response pairs, each with its request hash.
+    Repeated identical requests are kept as a list and replayed round-robin.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", match: str = "exact", replay_latency: str = "original",
+                 redactor: Optional[Redactor] = None):
+        self.path = path
+        self.mode = mode
+        self.match = match
+        self.replay_latency = replay_latency
+        self.redactor = redactor
+        self._lock = threading.Lock()
+        self._interactions: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, Iterator[Dict[str, Any]]] = {}
+        self._dir_ready = False
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            if self.mode == "replay":
+                logger.error("Cassette file not found at %s; every replayed call will miss", self.path)
+            return
+        with open(self.path, "r", encoding="utf-8") as fh:
+            text = fh.read()
+        try:
+            legacy = json.loads(text)
+        except ValueError:
+            legacy = None
+        if isinstance(legacy, dict) and "interactions" in legacy:
+            self._interactions = legacy["interactions"]
+            if self.mode == "record":
+                self._rewrite()
+        else:
+            for line in text.splitlines():
+                if line.strip():
+                    entry = json.loads(line)
+                    self._interactions.setdefault(entry.pop("key"), []).append(entry)
+        logger.info("Loaded cassette %s (%d keys)", self.path, len(self._interactions))
+
+    def _rewrite(self) -> None:
+        """Write every interaction as JSON Lines (once, for a cassette in the old single-document format)."""
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            for key, entries in self._interactions.items():
+                for entry in entries:
+                    fh.write(json.dumps(dict(entry, key=key), ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+
+    def record(self, service: str, request: Dict[str, Any], response: Any, elapsed: float,
+               chunks: Optional[List[Tuple[float, str]]] = None, usage: Optional[Dict[str, Any]] = None) -> None:
+        stored_request, stored_response = request, response
+        redactor = self.redactor or _redactor
+        if redactor is not None:
+            stored_request, stored_response = redactor(service, request, response)
+        entry = {
+            "service": service,
+            "request": sanitize(stored_request),
+            "response": sanitize(stored_response),
+            "elapsed": round(elapsed, 6),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if chunks is not None:
+            entry["chunks"] = [[round(t, 6), text] for t, text in chunks]
+        if usage:
+            entry["usage"] = usage
+        key = request_key(service, request)  # of the request as sent, so replays still match
+        line = json.dumps(dict(entry, key=key), ensure_ascii=False) + "\n"
+        with self._lock:
+            self._interactions.setdefault(key, []).append(entry)
+            if not self._dir_ready:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._dir_ready = True
+            with open(self.path, "a", encoding="utf-8") as fh:  # one short append per call
+                fh.write(line)
+
+    def lookup(self, service: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Return the next recorded interaction for request.
+        In 'sequential' match mode the request body is ignored and interactions
+        of the same service are served in recorded order (useful when the
+        prompts differ run to run, e.g. under the load harness).
+        """
+        cursor_key = service if self.match == "sequential" else request_key(service, request)
+        with self._lock:
+            cursor = self._cursors.get(cursor_key)
+            if cursor is None:
+                if self.match == "sequential":
+                    pool = [e for entries in self._interactions.values() for e in entries if e.get("service") == service]
+                else:
+                    pool = self._interactions.get(cursor_key, [])
+                if not pool:
+                    raise CassetteMiss(f"No recorded {service} interaction for request {cursor_key[:12]}")
+                cursor = self._cursors[cursor_key] = itertools.cycle(pool)
+            return next(cursor)
+
+    def wait(self, seconds: float) -> None:
+        if self.replay_latency != "zero" and seconds > 0:
+            time.sleep(seconds)
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Module-wide cassette for the configured mode, or None when recording/replay is off."""
+    global _cassette
+    if MODE not in ("record", "replay"):
+        return None
+    if _cassette is None:
+        with _cassette_lock:
+            if _cassette is None:
+                path = CASSETTE_PATH or os.path.join(Config.BASE_DIR, "data", "cassettes", "default.jsonl")
+                _cassette = Cassette(path, mode=MODE, match=MATCH, replay_latency=REPLAY_LATENCY)
+    return _cassette
+
+
+def replaying() -> Optional[Cassette]:
+    cas = get_cassette()
+    return cas if cas is not None and cas.mode == "replay" else None
+
+
+def recording() -> Optional[Cassette]:
+    cas = get_cassette()
+    return cas if cas is not None and cas.mode == "record" else None
+
+
+def replay_chunks(cas: Cassette, interaction: Dict[str, Any]) -> Iterator[str]:
+    """Yield recorded stream chunks, spaced out like the original stream."""
+    previous = 0.0
+    for offset, text in interaction.get("chunks") or []:
+        cas.wait(offset - previous)
+        previous = offset
+        yield text
@@ -0,0 +1,449 @@
+"""
+Charter rendering shared by the generation endpoints.
+
+A charter response is first normalised into sections of simple blocks
+(`build_sections`); the HTML writer then walks those blocks appending to a
+single list, so the work is linear in the size of the output. Every value is
+escaped exactly once, when it is emitted.
+
+The section list is the union of the charter schemas the generation modules
+have produced over time. Sections of the current schema are always shown
+("Not provided" when empty); older ones (team structure, resources,
+recommendation) only appear when the response carries them.
+"""
+from functools import lru_cache
+from html import escape
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+# block kinds
+PARA = "para"        # (PARA, text)
+LIST = "list"        # (LIST, [text, ...])
+SUBHEAD = "subhead"  # (SUBHEAD, text)
+LABEL = "label"      # (LABEL, text)                  -> "text:" on its own line
+FIELD = "field"      # (FIELD, label, text)
+PAIRS = "pairs"      # (PAIRS, [(key, text), ...])
+RISKS = "risks"      # (RISKS, [(risk, impact, mitigation) or (text, None, None), ...])
+VALUE = "value"      # (VALUE, any JSON value)        -> nested dict/list rendering
+EMPTY = "empty"      # (EMPTY,)
+
+Block = Tuple[Any, ...]
+Section = Tuple[str, List[Block]]
+
+NOT_PROVIDED = "Not provided"
+
+_CSS = (
+    "body{font-family: Arial, sans-serif; margin:24px; color:#222}"
+    ".card{border:1px solid #e0e0e0; padding:18px; border-radius:8px; box-shadow:0 1px 3px rgba(0,0,0,0.04)}"
+    "h1{margin:0 0 8px 0}"
+    "h2{margin-top:20px; color:#333}"
+    "h4{margin:10px 0 6px 0}"
+    ".meta{color:#555; margin-bottom:12px}"
+    ".section{margin-top:12px}"
+    "ul{margin:6px 0 6px 20px}"
+    "dl{margin:6px 0 6px 0}"
+    "dt{font-weight:bold}"
+    "dd{margin-left:12px; margin-bottom:8px}"
+    ".small{font-size:0.9em; color:#666}"
+)
+_DOC_OPEN = '<!doctype html>\n<html>\n<head>\n<meta charset="utf-8" />\n<title>'
+_HEAD_CLOSE = " - Project Charter</title>\n<style>" + _CSS + "</style>\n</head>\n<body>\n<div class=\"card\">\n"
+_DOC_CLOSE = "</div>\n</body>\n</html>\n"
+_EMPTY_HTML = "<p><em>Not provided</em></p>"
+
+
+@lru_cache(maxsize=256)
+def _escape_label(text: str) -> str:
+    """Section titles and field labels are nearly always the same few constants."""
+    return escape(text)
+
+
+def _escape_all(items: List[str]) -> List[str]:
+    """
+    Escape many strings with one html.escape pass over their NUL-joined text;
+    falls back to one call per item if an item itself contains NUL.
+    """
+    escaped = escape("\0".join(items)).split("\0")
+    if len(escaped) != len(items):
+        return [escape(item) for item in items]
+    return escaped
+
+
+def _first(resp: Dict[str, Any], *keys: str, default: Any = None) -> Any:
+    for key in keys:
+        value = resp.get(key)
+        if value:
+            return value
+    return default
+
+
+def _text(value: Any) -> str:
+    return value if isinstance(value, str) else str(value)
+
+
+def _title_key(key: Any) -> str:
+    return _text(key).replace("_", " ").title()
+
+
+def _list_or_para(value: Any) -> List[Block]:
+    if not value:
+        return [(EMPTY,)]
+    if isinstance(value, list):
+        return [(LIST, [v if isinstance(v, str) else str(v) for v in value])]
+    if isinstance(value, dict):
+        return [(VALUE, value)]
+    return [(PARA, _text(value))]
+
+
+def _scope_blocks(scope: Any) -> List[Block]:
+    if not isinstance(scope, dict):
+        return _list_or_para(scope)
+    blocks: List[Block] = []
+    text = scope.get("scope")
+    in_scope = scope.get("in_scope") or scope.get("inScope") or []
+    out_scope = scope.get("out_scope") or scope.get("outScope") or []
+    if text:
+        blocks.append((PARA, _text(text)))
+    if in_scope:
+        blocks.append((SUBHEAD, "In Scope"))
+        blocks.extend(_list_or_para(in_scope))
+    if out_scope:
+        blocks.append((SUBHEAD, "Out of Scope"))
+        blocks.extend(_list_or_para(out_scope))
+    return blocks or [(EMPTY,)]
+
+
+def _timeline_blocks(timeline: Any) -> List[Block]:
+    if not isinstance(timeline, dict) or not timeline:
+        return _list_or_para(timeline)
+    blocks: List[Block] = []
+    for phase, details in timeline.items():
+        blocks.append((SUBHEAD, _title_key(phase)))
+        if not isinstance(details, dict):
+            blocks.append((VALUE, details))
+            continue
+        duration = details.get("duration")
+        prereq = details.get("pre_requisites") or details.get("prerequisites")
+        tasks = details.get("tasks") or []
+        if duration:
+            blocks.append((FIELD, "Duration", _text(duration)))
+        if prereq:
+            blocks.append((FIELD, "Pre-requisites", _text(prereq)))
+        if tasks:
+            blocks.append((LABEL, "Tasks"))
+            blocks.extend(_list_or_para(tasks))
+    return blocks
+
+
+def _budget_blocks(breakdown: Any) -> List[Block]:
+    if not isinstance(breakdown, dict) or not breakdown:
+        return [(EMPTY,)]
+    total = breakdown.get("total_cost") or breakdown.get("total_estimated") or ""
+    blocks: List[Block] = [(FIELD, "Total cost", _text(total))]
+    allocation = breakdown.get("allocation")
+    if isinstance(allocation, dict) and allocation:
+        blocks.append((LABEL, "Allocation"))
+        blocks.append((PAIRS, [(_text(k), _text(v)) for k, v in allocation.items()]))
+    return blocks
+
+
+def _risk_blocks(risks: Any) -> List[Block]:
+    if not isinstance(risks, list) or not risks:
+        return _list_or_para(risks)
+    items = []
+    for r in risks:
+        if isinstance(r, dict):
+            items.append((
+                _text(r.get("risk") or r.get("title") or "Risk"),
+                _text(r.get("impact") or ""),
+                _text(r.get("mitigation") or r.get("mitigation_plan") or ""),
+            ))
+        else:
+            items.append((_text(r), None, None))
+    return [(RISKS, items)]
+
+
+def _team_blocks(team: Any) -> List[Block]:
+    if not isinstance(team, dict):
+        return _list_or_para(team)
+    blocks: List[Block] = []
+    for role, details in team.items():
+        blocks.append((SUBHEAD, _title_key(role)))
+        if isinstance(details, dict):
+            if details.get("count") is not None:
+                blocks.append((FIELD, "Count", _text(details["count"])))
+            duties = details.get("responsibilities") or []
+            if duties:
+                blocks.append((LABEL, "Responsibilities"))
+                blocks.extend(_list_or_para(duties))
+        elif isinstance(details, list):
+            blocks.extend(_list_or_para(details))
+        else:
+            blocks.append((VALUE, details))
+    return blocks
+
+
+def _resources_blocks(resources: Any) -> List[Block]:
+    if not isinstance(resources, dict):
+        return _list_or_para(resources)
+    blocks: List[Block] = []
+    skills = resources.get("skills") or []
+    tools = resources.get("tools_and_technologies") or resources.get("tools") or []
+    if skills:
+        blocks.append((LABEL, "Skills"))
+        blocks.extend(_list_or_para(skills))
+    if tools:
+        blocks.append((LABEL, "Tools & Technologies"))
+        blocks.extend(_list_or_para(tools))
+    for key, value in resources.items():
+        if key in ("skills", "tools_and_technologies", "tools"):
+            continue
+        blocks.append((LABEL, _text(key)))
+        blocks.append((VALUE, value))
+    return blocks or [(EMPTY,)]
+
+
+def _pm_blocks(reco: Any, manager: Any) -> List[Block]:
+    if reco:
+        if isinstance(reco, (list, dict)):
+            return [(LABEL, "PM / Resource Recommendation"), (VALUE, reco)]
+        return [(FIELD, "PM / Resource Recommendation", _text(reco))]
+    if not isinstance(manager, dict) or not manager:
+        return [(EMPTY,)]
+    blocks: List[Block] = []
+    if manager.get("count") is not None:
+        blocks.append((FIELD, "Project Manager(s)", _text(manager["count"])))
+    duties = manager.get("responsibilities") or []
+    if duties:
+        blocks.append((LABEL, "Responsibilities"))
+        blocks.extend(_list_or_para(duties))
+    return blocks or [(EMPTY,)]
+
+
+def charter_meta(resp: Dict[str, Any]) -> Dict[str, str]:
+    """Unescaped header fields shown above the sections."""
+    budget = resp.get("budget")
+    if isinstance(budget, dict):
+        budget = budget.get("range") or None
+    complexity = resp.get("complexity_score")
+    if complexity is None:
+        complexity = resp.get("total_score")
+    return {
+        "title": _text(_first(resp, "project_name", "project_title", default="")),
+        "description": _text(_first(resp, "description", "project_description", default="")),
+        "industry": _text(_first(resp, "industry", "domain", default="")),
+        "duration": _text(resp.get("duration") or ""),
+        "budget": _text(budget) if budget else NOT_PROVIDED,
+        "complexity_score": _text(complexity) if complexity is not None else "null",
+        "sponsor": _text(_first(resp, "sponsor", "project_sponsor", "projectSponsor", default="")) or NOT_PROVIDED,
+        "date": _text(resp.get("date") or "") or NOT_PROVIDED,
+        "created_at": _text(resp.get("created_at") or ""),
+        "project_id": _text(resp.get("project_id") or ""),
+    }
+
+
+# (title, response keys the section is built from, builder, shown even when empty)
+_SECTION_SPECS: List[Tuple[str, Tuple[str, ...], Callable[[Dict[str, Any]], List[Block]], bool]] = [
+    ("Current State / Problem", ("current_state", "current_state_problem"),
+     lambda r: _list_or_para(_first(r, "current_state", "current_state_problem")), True),
+    ("Objectives", ("objectives",), lambda r: _list_or_para(r.get("objectives")), True),
+    ("Future State / Aim", ("future_state", "future_state_aim"),
+     lambda r: _list_or_para(_first(r, "future_state", "future_state_aim")), True),
+    ("High-level Requirements", ("high_level_requirement", "high_level_requirements"),
+     lambda r: _list_or_para(_first(r, "high_level_requirement", "high_level_requirements")), True),
+    ("Business Benefit", ("business_benefit",), lambda r: _list_or_para(r.get("business_benefit")), True),
+    ("Project Scope", ("project_scope",), lambda r: _scope_blocks(r.get("project_scope")), True),
+    ("Budget Breakdown", ("budget breakdown", "budget_breakdown"),
+     lambda r: _budget_blocks(_first(r, "budget breakdown", "budget_breakdown", "budget")), True),
+    ("Timeline", ("timeline",), lambda r: _timeline_blocks(r.get("timeline")), True),
+    ("Success Criteria", ("success_criteria",), lambda r: _list_or_para(r.get("success_criteria")), True),
+    ("Assumptions", ("assumptions",), lambda r: _list_or_para(r.get("assumptions")), True),
+    ("Dependencies", ("dependencies",), lambda r: _list_or_para(r.get("dependencies")), True),
+    ("Risks & Mitigation", ("risks_and_mitigation", "risks"),
+     lambda r: _risk_blocks(_first(r, "risks_and_mitigation", "risks")), True),
+    ("Team Structure", ("team_structure", "team"), lambda r: _team_blocks(_first(r, "team_structure", "team")), False),
+    ("Resources Required", ("resources_required",), lambda r: _resources_blocks(r.get("resources_required")), False),
+    ("PM / Resource Recommendation", ("pm_resource_recommendation", "project_manager", "projectManager"),
+     lambda r: _pm_blocks(r.get("pm_resource_recommendation"), _first(r, "project_manager", "projectManager")), True),
+    ("Lessons Learnt", ("lesson_learnt",), lambda r: _list_or_para(r.get("lesson_learnt")), True),
+    ("Recommendation", ("recommendation",), lambda r: _list_or_para(r.get("recommendation")), False),
+]
+
+# keys that only feed the header card
+_META_KEYS = frozenset((
+    "project_name", "project_title", "description", "project_description", "industry", "domain", "duration",
+    "budget", "complexity_score", "total_score", "sponsor", "project_sponsor", "projectSponsor", "date",
+    "created_at", "project_id",
+))
+
+
+def _has_any(resp: Dict[str, Any], keys: Tuple[str, ...]) -> bool:
+    return any(resp.get(k) for k in keys)
+
+
+def build_sections(resp: Dict[str, Any]) -> List[Section]:
+    """Normalise a charter response into an ordered list of (title, blocks)."""
+    return [(title, build(resp)) for title, keys, build, always in _SECTION_SPECS if always or _has_any(resp, keys)]
+
+
+def _emit_value(out: List[str], value: Any) -> None:
+    if value is None:
+        out.append("<div><em>null</em></div>")
+    elif isinstance(value, dict):
+        out.append("<div class='dict-block'><dl>")
+        for k, v in value.items():
+            out.append(f"<dt><strong>{escape(_text(k))}</strong></dt><dd>")
+            _emit_value(out, v)
+            out.append("</dd>")
+        out.append("</dl></div>")
+    elif isinstance(value, list):
+        if not value:
+            out.append("<div><em>[]</em></div>")
+            return
+        out.append("<ul>")
+        for item in value:
+            if isinstance(item, (dict, list)):
+                out.append("<li>")
+                _emit_value(out, item)
+                out.append("</li>")
+            else:
+                out.append(f"<li>{escape(_text(item))}</li>")
+        out.append("</ul>")
+    else:
+        out.append(escape(_text(value)))
+
+
+def _emit_blocks(out: List[str], blocks: List[Block]) -> None:
+    for block in blocks:
+        kind = block[0]
+        if kind == LIST:
+            out.append("<ul><li>" + "</li><li>".join(_escape_all(block[1])) + "</li></ul>")
+        elif kind == PARA:
+            out.append(f"<p>{escape(block[1])}</p>")
+        elif kind == SUBHEAD:
+            out.append(f"<h4>{escape(block[1])}</h4>")
+        elif kind == LABEL:
+            out.append(f"<p><strong>{_escape_label(block[1])}:</strong></p>")
+        elif kind == FIELD:
+            out.append(f"<p><strong>{_escape_label(block[1])}:</strong> {escape(block[2])}</p>")
+        elif kind == PAIRS:
+            flat = _escape_all([text for pair in block[1] for text in pair])
+            out.append("<ul>")
+            out.extend(f"<li><strong>{flat[i]}:</strong> {flat[i + 1]}</li>" for i in range(0, len(flat), 2))
+            out.append("</ul>")
+        elif kind == RISKS:
+            flat = _escape_all([text or "" for risk in block[1] for text in risk])
+            out.append("<ul>")
+            for i, (_, impact, _) in zip(range(0, len(flat), 3), block[1]):
+                if impact is None:
+                    out.append(f"<li>{flat[i]}</li>")
+                else:
+                    out.append(f"<li><strong>{flat[i]}</strong> — Impact: {flat[i + 1]}"
+                               f"<br/>Mitigation: {flat[i + 2]}</li>")
+            out.append("</ul>")
+        elif kind == VALUE:
+            _emit_value(out, block[1])
+        else:
+            out.append(_EMPTY_HTML)
+
+
+def _emit_section(out: List[str], title: str, blocks: List[Block]) -> None:
+    out.append(f"<h2>{_escape_label(title)}</h2>\n<div class=\"section\">")
+    _emit_blocks(out, blocks)
+    out.append("</div>\n")
+
+
+def render_section_html(title: str, blocks: List[Block]) -> str:
+    out: List[str] = []
+    _emit_section(out, title, blocks)
+    return "".join(out)
+
+
+def document_open(title: str) -> str:
+    """Doctype, <head> with the stylesheet, and the opening of the card."""
+    return _DOC_OPEN + escape(title) + _HEAD_CLOSE
+
+
+def header_card(meta: Dict[str, str]) -> str:
+    """Title, description and the one-line summary of industry/budget/etc."""
+    m = {k: escape(v) for k, v in meta.items()}
+    return "".join((
+        f"<h1>{m['title']}</h1>\n<div class=\"meta\">{m['description']}</div>\n",
+        "<div class=\"section\">",
+        f"<strong>Industry:</strong> {m['industry']} &nbsp; | &nbsp; ",
+        f"<strong>Duration:</strong> {m['duration']} &nbsp; | &nbsp; ",
+        f"<strong>Budget:</strong> {m['budget']} &nbsp; | &nbsp; ",
+        f"<strong>Complexity Score:</strong> {m['complexity_score']} &nbsp; | &nbsp; ",
+        f"<strong>Project Sponsor:</strong> {m['sponsor']} &nbsp; | &nbsp; ",
+        f"<strong>Date:</strong> {m['date']}",
+        "</div>\n",
+    ))
+
+
+def document_head(meta: Dict[str, str]) -> str:
+    """Opening of the document up to and including the header card."""
+    return document_open(meta["title"]) + header_card(meta)
+
+
+def document_tail(meta: Dict[str, str]) -> str:
+    return (f"<div class=\"small\" style=\"margin-top:18px\">Generated at: {escape(meta['created_at'])} | "
+            f"Project ID: {escape(meta['project_id'])}</div>\n" + _DOC_CLOSE)
+
+
+def interrupted_tail() -> str:
+    """Closes a streamed document whose generation failed part-way."""
+    return "<p><em>Charter generation was interrupted; please try again.</em></p>\n" + _DOC_CLOSE
+
+
+def iter_html(resp: Dict[str, Any]) -> Iterator[str]:
+    """Yield the document in pieces: head, one chunk per section, tail."""
+    meta = charter_meta(resp)
+    yield document_head(meta)
+    for title, blocks in build_sections(resp):
+        yield render_section_html(title, blocks)
+    yield document_tail(meta)
+
+
+def render_html(resp: Dict[str, Any]) -> str:
+    """Render a complete HTML charter document."""
+    meta = charter_meta(resp)
+    out = [document_head(meta)]
+    for title, blocks in build_sections(resp):
+        _emit_section(out, title, blocks)
+    out.append(document_tail(meta))
+    return "".join(out)
+
+
+def iter_html_from_members(base: Dict[str, Any], members: Iterable[Tuple[str, Any]]) -> Iterator[str]:
+    """
+    Render while the charter is still arriving as (key, value) members, e.g.
+    from json_stream.iter_members over a streamed LLM response.
+
+    The document head goes out before the first member; the header card once
+    the members stop being header fields; each section as soon as one of its
+    keys has arrived (so sections follow the order the model writes them).
+    Sections that never arrived are rendered at the end in the usual order.
+    `base` holds fallback values known before generation (ids, scores, titles
+    from the request); non-empty members override them.
+    """
+    resp = dict(base)
+    yield document_open(charter_meta(resp)["title"])
+    header_sent = False
+    emitted = set()
+    for key, value in members:
+        if value or key not in resp:
+            resp[key] = value
+        if key in _META_KEYS:
+            continue
+        if not header_sent:
+            header_sent = True
+            yield header_card(charter_meta(resp))
+        for i, (title, keys, build, _) in enumerate(_SECTION_SPECS):
+            if i not in emitted and key in keys and value:
+                emitted.add(i)
+                yield render_section_html(title, build(resp))
+    if not header_sent:
+        yield header_card(charter_meta(resp))
+    for i, (title, keys, build, always) in enumerate(_SECTION_SPECS):
+        if i not in emitted and (always or _has_any(resp, keys)):
+            yield render_section_html(title, build(resp))
+    yield document_tail(charter_meta(resp))
@@ -0,0 +1,297 @@
+"""
+Incremental columnar export of submissions for analytics (Parquet or Arrow IPC).
+
+Each run reads the rows changed since the previous run, keyset-paginated on
+(updated_at, id) from a read-only connection, flattens them into the typed
+COLUMNS (summary columns, a few charter fields, and the payload/result JSON
+text) and writes one file per created_at month and run:
+
+    OUT/month=2026-10/part-20261019T120000123456Z.parquet
+    OUT/_watermark.json
+
+Memory stays flat: rows are read chunk_size at a time and buffered per month
+only until a row group is full (ROW_GROUP_ROWS / ROW_GROUP_BYTES, zstd
+compressed), with all buffers together capped at BUFFER_BYTES. Files are
+written as .tmp and renamed once the run has finished; only then does the
+watermark move on, so a failed run is simply repeated. Rows are written at
+least once: a row updated again (e.g. its result saved, or re-scored) is
+exported again by the next run, so readers keep the latest updated_at per id.
+Rows updated in the last SETTLE_SECONDS are left for the next run, as a
+write stamped earlier may still be committing.
+
+Run it with `python -m app.services.columnar_export --out DIR [--format parquet|arrow]`.
+Needs pyarrow.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.services import storage
+from app.utils.logger import get_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # optional; only this job needs it
+    pa = pq = None
+
+logger = get_logger(__name__)
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+ROW_GROUP_ROWS = 64 * 1024
+ROW_GROUP_BYTES = 16 * 1024 * 1024  # buffered Python values, estimated by flatten_row
+BUFFER_BYTES = 32 * 1024 * 1024
+SETTLE_SECONDS = 60.0
+WATERMARK_FILE = "_watermark.json"
+
+# column -> arrow type name (see _schema)
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("id", "int64"),
+    ("project_name", "string"),
+    ("sponsor", "string"),
+    ("status", "string"),
+    ("created_at", "timestamp"),
+    ("updated_at", "timestamp"),
+    ("complexity_score", "float64"),
+    ("recommended_pm_count", "int32"),
+    *((name, "string") for name in storage.ATTRIBUTE_FIELDS),
+    ("scoring_version", "string"),
+    ("recommendation", "string"),
+    ("budget_range", "string"),
+    ("question_count", "int32"),
+    ("objective_count", "int32"),
+    ("risk_count", "int32"),
+    ("success_criteria_count", "int32"),
+    ("payload_json", "string"),
+    ("result_json", "string"),
+)
+
+_SELECT = (
+    f"SELECT {', '.join(storage.SUMMARY_FIELDS)}, scoring_version, payload_json, result_json FROM submissions "
+    "WHERE (updated_at, id) > (?, ?) AND updated_at < ? ORDER BY updated_at, id LIMIT ?"
+)
+
+
+def _schema():
+    types = {"int64": pa.int64(), "int32": pa.int32(), "float64": pa.float64(), "string": pa.string(),
+             "timestamp": pa.timestamp("us", tz="UTC")}
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _count(value: Any) -> Optional[int]:
+    return len(value) if isinstance(value, (list, dict)) else None
+
+
+def _parse(text: Optional[str]) -> Dict[str, Any]:
+    try:
+        doc = json.loads(text) if text else None
+    except ValueError:
+        return {}
+    return doc if isinstance(doc, dict) else {}
+
+
+_ROW_OVERHEAD = 64 * len(COLUMNS)  # Python objects per buffered value
+
+
+def flatten_row(row: Any) -> Tuple[Dict[str, Any], int]:
+    """A submissions row -> (value per COLUMNS name, approximate size in bytes for buffering)."""
+    payload_text = storage.decode_blob(row["payload_json"])
+    result_text = storage.decode_blob(row["result_json"])
+    payload, result = _parse(payload_text), _parse(result_text)
+    budget = result.get("budget")
+    budget_range = budget.get("range") if isinstance(budget, dict) else budget
+    values = {name: row[name] for name in storage.SUMMARY_FIELDS}
+    values.update(
+        created_at=_timestamp(row["created_at"]),
+        updated_at=_timestamp(row["updated_at"]),
+        scoring_version=row["scoring_version"],
+        recommendation=result.get("recommendation") if isinstance(result.get("recommendation"), str) else None,
+        budget_range=str(budget_range or payload.get("budget_range") or "") or None,
+        question_count=_count(payload.get("questions")),
+        objective_count=_count(result.get("objectives")),
+        risk_count=_count(result.get("risks_and_mitigation")),
+        success_criteria_count=_count(result.get("success_criteria")),
+        payload_json=payload_text,
+        result_json=result_text,
+    )
+    return values, len(payload_text or "") + len(result_text or "") + _ROW_OVERHEAD
+
+
+def _month(created_at: Any) -> str:
+    text = str(created_at or "")
+    return text[:7] if len(text) >= 7 and text[4] == "-" else "unknown"
+
+
+class _Partition:
+    """One month's output file of this run: a column buffer flushed as row groups."""
+
+    def __init__(self, path: str, fmt: str, schema):
+        self.path = path
+        self.fmt = fmt
+        self.schema = schema
+        self.writer = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.columns: Dict[str, List[Any]] = {name: [] for name, _ in COLUMNS}
+        self.rows = 0
+        self.nbytes = 0
+
+    def add(self, values: Dict[str, Any], size: int) -> None:
+        for name, column in self.columns.items():
+            column.append(values[name])
+        self.rows += 1
+        self.nbytes += size
+
+    def flush(self) -> int:
+        """Write the buffer as one row group (record batch); returns the bytes released."""
+        if not self.rows:
+            return 0
+        table = pa.Table.from_pydict(self.columns, schema=self.schema)
+        if self.writer is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if self.fmt == "parquet":
+                self.writer = pq.ParquetWriter(self.path + ".tmp", self.schema, compression="zstd")
+            else:
+                self.writer = pa.ipc.new_file(self.path + ".tmp", self.schema,
+                                              options=pa.ipc.IpcWriteOptions(compression="zstd"))
+        if self.fmt == "parquet":
+            self.writer.write_table(table, row_group_size=self.rows)
+        else:
+            self.writer.write_table(table, max_chunksize=self.rows)
+        released = self.nbytes
+        self._reset()
+        return released
+
+    def close(self) -> None:
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            os.replace(self.path + ".tmp", self.path)
+
+    def abort(self) -> None:
+        if self.writer is not None:
+            try:
+                self.writer.close()
+            finally:
+                os.remove(self.path + ".tmp")
+
+
+def read_watermark(out_dir: str) -> Dict[str, Any]:
+    """State of the export in out_dir: the (updated_at, id) it has reached, its format and total rows."""
+    try:
+        with open(os.path.join(out_dir, WATERMARK_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"updated_at": "", "id": 0, "format": None, "rows": 0}
+
+
+def _write_watermark(out_dir: str, mark: Dict[str, Any]) -> None:
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(mark, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def export(out_dir: str, fmt: str = "parquet", chunk_size: int = 1000, settle: float = SETTLE_SECONDS,
+           progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Append the submissions changed since the last run to out_dir. Returns run statistics including rows/sec."""
+    if pa is None:
+        raise RuntimeError("columnar export needs pyarrow (pip install pyarrow)")
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    mark = read_watermark(out_dir)
+    if mark["format"] not in (None, fmt):
+        raise ValueError(f"{out_dir} holds a {mark['format']} export; export {fmt} to another directory")
+    storage.require_sqlite("columnar_export")
+    storage._ensure_db()
+
+    now = datetime.now(timezone.utc)
+    until = (now - timedelta(seconds=settle)).isoformat()
+    run = now.strftime("%Y%m%dT%H%M%S%fZ")
+    schema = _schema()
+    partitions: Dict[str, _Partition] = {}
+    buffered = 0
+    after = (mark["updated_at"], mark["id"])
+    stats = {"rows": 0, "chunks": 0, "row_groups": 0}
+    started = time.perf_counter()
+    conn = storage._connect(readonly=True)  # own connection, one short read per chunk
+    try:
+        while True:
+            rows = conn.execute(_SELECT, after + (until, chunk_size)).fetchall()
+            if not rows:
+                break
+            for row in rows:
+                values, size = flatten_row(row)
+                month = _month(row["created_at"])
+                part = partitions.get(month)
+                if part is None:
+                    path = os.path.join(out_dir, f"month={month}", f"part-{run}{FORMATS[fmt]}")
+                    part = partitions[month] = _Partition(path, fmt, schema)
+                part.add(values, size)
+                buffered += size
+                if part.rows >= ROW_GROUP_ROWS or part.nbytes >= ROW_GROUP_BYTES:
+                    buffered -= part.flush()
+                    stats["row_groups"] += 1
+            while buffered > BUFFER_BYTES:  # many months at once: write the largest buffer early
+                buffered -= max(partitions.values(), key=lambda p: p.nbytes).flush()
+                stats["row_groups"] += 1
+            after = (rows[-1]["updated_at"], rows[-1]["id"])
+            stats["rows"] += len(rows)
+            stats["chunks"] += 1
+            if progress is not None:
+                elapsed = time.perf_counter() - started
+                progress(dict(stats, last_id=after[1], rows_per_sec=stats["rows"] / elapsed if elapsed else 0.0))
+        stats["row_groups"] += sum(1 for p in partitions.values() if p.rows)
+        for part in partitions.values():
+            part.close()
+    except BaseException:
+        for part in partitions.values():
+            part.abort()
+        raise
+    finally:
+        conn.close()
+    if stats["rows"]:
+        mark = {"updated_at": after[0], "id": after[1], "format": fmt, "rows": mark["rows"] + stats["rows"],
+                "exported_at": now.isoformat()}
+        _write_watermark(out_dir, mark)
+    elapsed = time.perf_counter() - started
+    stats.update(files=len(partitions), watermark=[mark["updated_at"], mark["id"]], seconds=round(elapsed, 3),
+                 rows_per_sec=round(stats["rows"] / elapsed, 1) if elapsed else 0.0)
+    logger.info("Exported %d submissions to %d %s files in %.2fs", stats["rows"], len(partitions), fmt, elapsed)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Append changed submissions to a Parquet / Arrow dataset")
+    parser.add_argument("--out", required=True, help="dataset directory (holds the watermark)")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    parser.add_argument("--db", help="SQLite file (defaults to DB_PATH)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS,
+                        help="leave rows updated in the last N seconds for the next run")
+    args = parser.parse_args(argv)
+    if args.db:
+        storage.DB_PATH = args.db
+
+    def report(s):
+        logger.info("chunk %d: %d rows, last id %d, %.0f rows/s", s["chunks"], s["rows"], s["last_id"], s["rows_per_sec"])
+
+    stats = export(args.out, fmt=args.format, chunk_size=args.chunk_size, settle=args.settle, progress=report)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,8 +1,10 @@
 import requests
 import json
 from app.config import Config
+from app.services import cassette
 from app.utils.logger import get_logger
 import time
+from urllib.parse import urlparse
 
 logger = get_logger(__name__)
 
@@ -15,9 +17,18 @@ def _post_with_retry(url, headers, payload):
     """
     POST with retries and timeout.
     """
+    # Host and auth header vary per workspace; the path and payload identify the call.
+    cassette_request = {"path": urlparse(url).path, "payload": payload}
+    replay = cassette.replaying()
+    if replay:
+        interaction = replay.lookup("databricks", cassette_request)
+        replay.wait(interaction.get("elapsed", 0))
+        return interaction["response"]
+
     for attempt in range(1, MAX_RETRIES + 1):
         try:
             logger.info(f"POST {url} attempt={attempt}/{MAX_RETRIES}")
+            started = time.perf_counter()
             response = requests.post(
                 url,
                 headers=headers,
@@ -25,7 +36,11 @@ def _post_with_retry(url, headers, payload):
                 timeout=REQUEST_TIMEOUT
             )
             response.raise_for_status()
-            return response.json()
+            body = response.json()
+            rec = cassette.recording()
+            if rec:
+                rec.record("databricks", cassette_request, body, time.perf_counter() - started)
+            return body
         except (requests.Timeout, requests.ConnectionError) as e:
             logger.warning(
                 f"Databricks request timeout/connection error on attempt {attempt}: {e}"
@@ -0,0 +1,223 @@
+import gc
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from app.config import Config
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DIAGNOSTICS_DIR = getattr(Config, "DIAGNOSTICS_DIR", None) or os.path.join(Config.BASE_DIR, "data", "diagnostics")
+MAX_SNAPSHOTS = int(getattr(Config, "DIAGNOSTICS_MAX_SNAPSHOTS", 5) or 5)
+
+_lock = threading.Lock()
+_snapshots: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_cache_providers: Dict[str, Callable[[], Any]] = {}
+
+# frames that only describe the profiler itself
+_IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>")
+
+
+def register_cache(name: str, provider: Callable[[], Any]) -> None:
+    """
+    Register an in-process cache so its size shows up in the diagnostics report.
+    `provider` returns the cache object (dict, list, ...) at call time.
+    """
+    _cache_providers[name] = provider
+
+
+def _approx_size(obj: Any, _seen: Optional[set] = None, _depth: int = 0) -> int:
+    """Rough deep size of obj in bytes (bounded recursion, shared objects counted once)."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen or _depth > 20:
+        return 0
+    _seen.add(id(obj))
+    try:
+        size = sys.getsizeof(obj)
+    except Exception:
+        return 0
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += _approx_size(k, _seen, _depth + 1) + _approx_size(v, _seen, _depth + 1)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += _approx_size(item, _seen, _depth + 1)
+    return size
+
+
+def cache_report() -> Dict[str, Dict[str, Any]]:
+    """Entry counts and approximate byte sizes of every registered cache."""
+    out = {}
+    for name, provider in list(_cache_providers.items()):
+        try:
+            obj = provider()
+            entries = len(obj) if hasattr(obj, "__len__") else None
+            out[name] = {"entries": entries, "approx_bytes": _approx_size(obj)}
+        except Exception as e:
+            logger.exception("Failed to size cache %s", name)
+            out[name] = {"error": str(e)}
+    return out
+
+
+def thread_report() -> Dict[str, Any]:
+    """Live thread counts, grouped by name prefix (e.g. 'Thread-12 (_persist_to_db)')."""
+    threads = threading.enumerate()
+    by_target = Counter()
+    for t in threads:
+        name = t.name or ""
+        # default names look like "Thread-12 (target)" - group on the target part
+        if "(" in name and name.endswith(")"):
+            name = name[name.index("(") + 1 : -1]
+        by_target[name] += 1
+    return {
+        "total": len(threads),
+        "daemon": sum(1 for t in threads if t.daemon),
+        "by_name": dict(by_target.most_common()),
+    }
+
+
+def process_memory() -> Dict[str, Any]:
+    """Current/peak RSS of this process (kB), read from /proc when available."""
+    out: Dict[str, Any] = {"rss_kb": None, "peak_rss_kb": None}
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    out["rss_kb"] = int(line.split()[1])
+                elif line.startswith("VmHWM:"):
+                    out["peak_rss_kb"] = int(line.split()[1])
+    except OSError:
+        try:
+            import resource
+            out["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        except Exception:
+            pass
+    out["gc_objects"] = len(gc.get_objects())
+    return out
+
+
+def tracing_status() -> Dict[str, Any]:
+    traced = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit(),
+        "traced_current_bytes": traced[0],
+        "traced_peak_bytes": traced[1],
+        "snapshots": list(_snapshots.keys()),
+    }
+
+
+def start_tracing(frames: int = 1) -> Dict[str, Any]:
+    """Start tracemalloc (no-op if it is already running)."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(max(1, int(frames)))
+        logger.info("tracemalloc started (frames=%d)", frames)
+    return tracing_status()
+
+
+def stop_tracing() -> Dict[str, Any]:
+    """Stop tracemalloc and drop stored snapshots (they pin a lot of memory)."""
+    with _lock:
+        _snapshots.clear()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        logger.info("tracemalloc stopped")
+    return tracing_status()
+
+
+def take_snapshot(label: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Take a tracemalloc snapshot and keep it under `label`.
+    Only the newest MAX_SNAPSHOTS are retained.
+    """
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not running; start it first")
+    snap = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, f) for f in _IGNORED_FILES]
+    )
+    label = label or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S.%fZ")
+    stats = snap.statistics("filename")
+    entry = {
+        "snapshot": snap,
+        "taken_at": datetime.now(timezone.utc).isoformat(),
+        "total_bytes": sum(s.size for s in stats),
+        "total_blocks": sum(s.count for s in stats),
+    }
+    with _lock:
+        _snapshots.pop(label, None)
+        _snapshots[label] = entry
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    logger.info("Took tracemalloc snapshot %s (bytes=%d)", label, entry["total_bytes"])
+    return {"label": label, "taken_at": entry["taken_at"], "total_bytes": entry["total_bytes"], "total_blocks": entry["total_blocks"]}
+
+
+def _stat_to_dict(stat) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    return {
+        "file": frame.filename,
+        "line": frame.lineno,
+        "size_bytes": stat.size,
+        "count": stat.count,
+        "size_diff_bytes": getattr(stat, "size_diff", None),
+        "count_diff": getattr(stat, "count_diff", None),
+    }
+
+
+def top_allocations(label: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    """Top allocating lines of a stored snapshot (newest when label is None)."""
+    with _lock:
+        if not _snapshots:
+            raise KeyError("no snapshots taken")
+        entry = _snapshots[label] if label else next(reversed(_snapshots.values()))
+    return [_stat_to_dict(s) for s in entry["snapshot"].statistics("lineno")[: max(1, int(limit))]]
+
+
+def diff_snapshots(old_label: str, new_label: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Lines whose allocations grew the most between two snapshots."""
+    with _lock:
+        old = _snapshots[old_label]["snapshot"]
+        new = _snapshots[new_label]["snapshot"]
+    stats = new.compare_to(old, "lineno")
+    return [_stat_to_dict(s) for s in stats[: max(1, int(limit))]]
+
+
+def build_report(top: int = 20) -> Dict[str, Any]:
+    """Full diagnostics report: memory, threads, caches, tracemalloc state."""
+    report: Dict[str, Any] = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "pid": os.getpid(),
+        "memory": process_memory(),
+        "threads": thread_report(),
+        "caches": cache_report(),
+        "tracemalloc": tracing_status(),
+    }
+    if tracemalloc.is_tracing() and _snapshots:
+        report["top_allocations"] = top_allocations(limit=top)
+        labels = list(_snapshots.keys())
+        if len(labels) >= 2:
+            report["growth"] = {
+                "from": labels[-2],
+                "to": labels[-1],
+                "lines": diff_snapshots(labels[-2], labels[-1], limit=top),
+            }
+    return report
+
+
+def dump_report(path: Optional[str] = None, top: int = 20) -> str:
+    """Write build_report() as JSON to disk and return the file path."""
+    report = build_report(top=top)
+    if not path:
+        os.makedirs(DIAGNOSTICS_DIR, exist_ok=True)
+        path = os.path.join(DIAGNOSTICS_DIR, f"diagnostics-{os.getpid()}-{int(time.time())}.json")
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2, default=str)
+    logger.info("Diagnostics report written to %s", path)
+    return path
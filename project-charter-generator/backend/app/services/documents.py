@@ -0,0 +1,320 @@
+"""
+PDF and DOCX writers for charters.
+
+Both formats are produced from the same section/block model the HTML renderer
+uses (`charter_renderer.build_sections`), flattened into styled lines. The
+writers are dependency-free: DOCX is a minimal WordprocessingML package and
+PDF uses the standard Helvetica fonts, so nothing needs installing on the
+export workers. Functions here are CPU-bound and meant to run in the export
+process pool (see app.services.exporter), never on a request thread.
+"""
+import os
+import zipfile
+import zlib
+from typing import Any, Dict, List, Tuple
+from xml.sax.saxutils import escape as xml_escape
+
+from app.services import charter_renderer as cr
+
+# a run is (text, bold, italic); a line is (style, indent level, runs)
+Run = Tuple[str, bool, bool]
+Line = Tuple[str, int, List[Run]]
+
+TITLE, HEADING, SUBHEADING, PARAGRAPH, BULLET = "title", "heading", "subheading", "paragraph", "bullet"
+
+
+def _value_lines(value: Any, level: int, out: List[Line]) -> None:
+    if isinstance(value, dict):
+        for k, v in value.items():
+            if isinstance(v, (dict, list)):
+                out.append((BULLET, level, [(f"{k}:", True, False)]))
+                _value_lines(v, level + 1, out)
+            else:
+                out.append((BULLET, level, [(f"{k}: ", True, False), (cr._text(v), False, False)]))
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, (dict, list)):
+                _value_lines(item, level + 1, out)
+            else:
+                out.append((BULLET, level, [(cr._text(item), False, False)]))
+    elif value is None:
+        out.append((PARAGRAPH, level, [("null", False, True)]))
+    else:
+        out.append((PARAGRAPH, level, [(cr._text(value), False, False)]))
+
+
+def _block_lines(block: cr.Block, out: List[Line]) -> None:
+    kind = block[0]
+    if kind == cr.PARA:
+        out.append((PARAGRAPH, 0, [(block[1], False, False)]))
+    elif kind == cr.LIST:
+        out.extend((BULLET, 0, [(item, False, False)]) for item in block[1])
+    elif kind == cr.SUBHEAD:
+        out.append((SUBHEADING, 0, [(block[1], True, False)]))
+    elif kind == cr.LABEL:
+        out.append((PARAGRAPH, 0, [(f"{block[1]}:", True, False)]))
+    elif kind == cr.FIELD:
+        out.append((PARAGRAPH, 0, [(f"{block[1]}: ", True, False), (block[2], False, False)]))
+    elif kind == cr.PAIRS:
+        out.extend((BULLET, 0, [(f"{k}: ", True, False), (v, False, False)]) for k, v in block[1])
+    elif kind == cr.RISKS:
+        for risk, impact, mitigation in block[1]:
+            if impact is None:
+                out.append((BULLET, 0, [(risk, False, False)]))
+            else:
+                out.append((BULLET, 0, [(risk, True, False), (f" — Impact: {impact}", False, False)]))
+                out.append((PARAGRAPH, 1, [("Mitigation: ", False, True), (mitigation, False, False)]))
+    elif kind == cr.VALUE:
+        _value_lines(block[1], 0, out)
+    else:
+        out.append((PARAGRAPH, 0, [(cr.NOT_PROVIDED, False, True)]))
+
+
+def charter_lines(resp: Dict[str, Any]) -> List[Line]:
+    """The whole charter as styled lines, in the same order as the HTML document."""
+    meta = cr.charter_meta(resp)
+    lines: List[Line] = [(TITLE, 0, [(meta["title"] or "Project Charter", True, False)])]
+    if meta["description"]:
+        lines.append((PARAGRAPH, 0, [(meta["description"], False, True)]))
+    for label, key in (("Industry", "industry"), ("Duration", "duration"), ("Budget", "budget"),
+                       ("Complexity Score", "complexity_score"), ("Project Sponsor", "sponsor"), ("Date", "date")):
+        lines.append((PARAGRAPH, 0, [(f"{label}: ", True, False), (meta[key], False, False)]))
+    for title, blocks in cr.build_sections(resp):
+        lines.append((HEADING, 0, [(title, True, False)]))
+        for block in blocks:
+            _block_lines(block, lines)
+    lines.append((PARAGRAPH, 0, [(f"Generated at: {meta['created_at']} | Project ID: {meta['project_id']}", False, True)]))
+    return lines
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+# ----------------------------------------------------------------------------- DOCX
+
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+    '</Types>'
+)
+_DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/></Relationships>'
+)
+_DOCX_DOC_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/></Relationships>'
+)
+_W_NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def _docx_style(style_id: str, size_half_pts: int, bold: bool, space_before: int) -> str:
+    return (
+        f'<w:style w:type="paragraph" w:styleId="{style_id}"><w:name w:val="{style_id}"/>'
+        '<w:basedOn w:val="Normal"/><w:qFormat/>'
+        f'<w:pPr><w:keepNext/><w:spacing w:before="{space_before}" w:after="80"/></w:pPr>'
+        f'<w:rPr>{"<w:b/>" if bold else ""}<w:sz w:val="{size_half_pts}"/></w:rPr></w:style>'
+    )
+
+
+_DOCX_STYLES = (
+    f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:styles {_W_NS}>'
+    '<w:docDefaults><w:rPrDefault><w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial" w:cs="Arial"/>'
+    '<w:sz w:val="21"/></w:rPr></w:rPrDefault>'
+    '<w:pPrDefault><w:pPr><w:spacing w:after="60"/></w:pPr></w:pPrDefault></w:docDefaults>'
+    '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/><w:qFormat/></w:style>'
+    + _docx_style("Title", 36, True, 0)
+    + _docx_style("Heading1", 28, True, 280)
+    + _docx_style("Heading2", 24, True, 160)
+    + '</w:styles>'
+)
+_DOCX_PSTYLE = {TITLE: "Title", HEADING: "Heading1", SUBHEADING: "Heading2"}
+
+
+def _docx_paragraph(style: str, level: int, runs: List[Run]) -> str:
+    ppr = []
+    if style in _DOCX_PSTYLE:
+        ppr.append(f'<w:pStyle w:val="{_DOCX_PSTYLE[style]}"/>')
+    indent = 360 * level + (360 if style == BULLET else 0)
+    if indent:
+        hanging = ' w:hanging="240"' if style == BULLET else ""
+        ppr.append(f'<w:ind w:left="{indent}"{hanging}/>')
+    parts = [f"<w:p><w:pPr>{''.join(ppr)}</w:pPr>" if ppr else "<w:p>"]
+    if style == BULLET:
+        runs = [("• ", False, False)] + runs
+    for text, bold, italic in runs:
+        rpr = ("<w:b/>" if bold else "") + ("<w:i/>" if italic else "")
+        parts.append(f'<w:r>{f"<w:rPr>{rpr}</w:rPr>" if rpr else ""}'
+                     f'<w:t xml:space="preserve">{xml_escape(text)}</w:t></w:r>')
+    parts.append("</w:p>")
+    return "".join(parts)
+
+
+def write_docx(resp: Dict[str, Any], path: str) -> str:
+    body = "".join(_docx_paragraph(*line) for line in charter_lines(resp))
+    document = (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document {_W_NS}><w:body>{body}'
+        '<w:sectPr><w:pgSz w:w="11906" w:h="16838"/>'
+        '<w:pgMar w:top="1134" w:right="1134" w:bottom="1134" w:left="1134" w:header="0" w:footer="0" w:gutter="0"/>'
+        '</w:sectPr></w:body></w:document>'
+    )
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _DOCX_RELS)
+        zf.writestr("word/_rels/document.xml.rels", _DOCX_DOC_RELS)
+        zf.writestr("word/styles.xml", _DOCX_STYLES)
+        zf.writestr("word/document.xml", document)
+    os.replace(tmp, path)
+    return path
+
+
+# ----------------------------------------------------------------------------- PDF
+
+# Helvetica advance widths (1/1000 em) for ASCII 32..126; other characters use 556
+_HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+_BOLD_FACTOR = 1.07  # Helvetica-Bold is slightly wider; close enough for line breaking
+
+_PAGE_W, _PAGE_H, _MARGIN = 595.0, 842.0, 56.0
+_PDF_SIZES = {TITLE: 18.0, HEADING: 14.0, SUBHEADING: 12.0, PARAGRAPH: 10.5, BULLET: 10.5}
+_PDF_SPACE_BEFORE = {TITLE: 0.0, HEADING: 14.0, SUBHEADING: 8.0, PARAGRAPH: 2.0, BULLET: 1.0}
+_INDENT = 16.0
+
+
+def _text_width(text: str, size: float, bold: bool) -> float:
+    w = 0
+    for ch in text:
+        o = ord(ch)
+        w += _HELVETICA_WIDTHS[o - 32] if 32 <= o <= 126 else 556
+    return w * size / 1000.0 * (_BOLD_FACTOR if bold else 1.0)
+
+
+def _pdf_string(text: str) -> bytes:
+    raw = text.encode("cp1252", errors="replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _font_name(bold: bool, italic: bool) -> str:
+    return "/F2" if bold else ("/F3" if italic else "/F1")
+
+
+def _wrap(runs: List[Run], size: float, width: float) -> List[List[Run]]:
+    """Greedy word wrap of styled runs into lines no wider than `width`."""
+    lines: List[List[Run]] = [[]]
+    x = 0.0
+    space = _text_width(" ", size, False)
+    for text, bold, italic in runs:
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            piece = word if i == len(words) - 1 else word + " "
+            if not piece:
+                continue
+            w = _text_width(piece, size, bold)
+            if x and x + w - (space if piece.endswith(" ") else 0) > width:
+                lines.append([])
+                x = 0.0
+            lines[-1].append((piece, bold, italic))
+            x += w
+    return lines
+
+
+def write_pdf(resp: Dict[str, Any], path: str) -> str:
+    pages: List[List[bytes]] = [[]]
+    y = _PAGE_H - _MARGIN
+    for style, level, runs in charter_lines(resp):
+        size = _PDF_SIZES[style]
+        leading = size * 1.35
+        left = _MARGIN + _INDENT * level
+        if style == BULLET:
+            runs = [("• ", False, False)] + runs
+            left += _INDENT * 0.5
+        y -= _PDF_SPACE_BEFORE[style]
+        wrapped = _wrap(runs, size, _PAGE_W - _MARGIN - left)
+        if style in (HEADING, SUBHEADING) and y - leading * 3 < _MARGIN:
+            y = _MARGIN - 1  # keep headings with what follows
+        for line in wrapped:
+            if y - leading < _MARGIN:
+                pages.append([])
+                y = _PAGE_H - _MARGIN
+            y -= leading
+            ops = [b"BT", f"{left:.2f} {y:.2f} Td".encode()]
+            font, text = None, ""
+            for piece, bold, italic in line:
+                name = _font_name(bold, italic)
+                if name != font:
+                    if text:
+                        ops.append(_pdf_string(text) + b" Tj")
+                    ops.append(f"{name} {size:g} Tf".encode())
+                    font, text = name, ""
+                text += piece
+            ops.append(_pdf_string(text.rstrip(" ")) + b" Tj")
+            ops.append(b"ET")
+            pages[-1].append(b"\n".join(ops))
+
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # pages tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Oblique /Encoding /WinAnsiEncoding >>",
+    ]
+    page_ids = []
+    for content in pages:
+        stream = zlib.compress(b"\n".join(content))
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R /F3 5 0 R >> >> >>" % (int(_PAGE_W), int(_PAGE_H), content_id)
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    out = [b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"]
+    offsets = []
+    pos = len(out[0])
+    for i, obj in enumerate(objects, start=1):
+        chunk = b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+        offsets.append(pos)
+        out.append(chunk)
+        pos += len(chunk)
+    xref = [b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)]
+    xref.extend(b"%010d 00000 n \n" % off for off in offsets)
+    out.extend(xref)
+    out.append(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, pos))
+    _write_atomic(path, b"".join(out))
+    return path
+
+
+WRITERS = {"pdf": write_pdf, "docx": write_docx}
+MIMETYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+def export_charter(fmt: str, resp: Dict[str, Any], path: str) -> str:
+    """Entry point run in the export worker process."""
+    return WRITERS[fmt](resp, path)
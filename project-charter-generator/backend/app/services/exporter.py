@@ -0,0 +1,150 @@
+"""
+Background PDF/DOCX export of stored charters.
+
+Conversion runs on a process pool so the CPU-bound document writers never
+occupy a request thread (or the GIL the request threads share). Output files
+are cached on disk under EXPORT_DIR, named after the submission's content
+hash and format, so exporting an unchanged charter again is a file lookup and
+the job id doubles as the cache key. Job state lives in this process; the
+file on disk is the source of truth once a job has finished.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Optional
+from app.config import Config
+from app.services import diagnostics, documents, render_cache
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+EXPORT_DIR = getattr(Config, "EXPORT_DIR", None) or os.path.join(Config.BASE_DIR, "data", "exports")
+EXPORT_WORKERS = int(getattr(Config, "EXPORT_WORKERS", 2))
+EXPORT_MP_START = getattr(Config, "EXPORT_MP_START", "spawn")
+MAX_TRACKED_JOBS = 1000
+
+FORMATS = documents.MIMETYPES
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_lock = threading.Lock()
+_jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # job id -> {"future", "submission_id", "format", ...}
+_executor: Optional[ProcessPoolExecutor] = None
+diagnostics.register_cache("export_jobs", lambda: _jobs)
+
+
+class ExportError(Exception):
+    """Raised when an export cannot be queued."""
+
+
+def job_id_for(row: Dict[str, Any], fmt: str) -> str:
+    return f"{render_cache.content_hash(row)[:32]}-{fmt}"
+
+
+def _parse_job_id(job_id: str) -> Optional[str]:
+    """Format of a well-formed job id, else None (job ids become file names)."""
+    digest, _, fmt = job_id.partition("-")
+    if fmt in FORMATS and len(digest) == 32 and all(c in "0123456789abcdef" for c in digest):
+        return fmt
+    return None
+
+
+def file_path(job_id: str) -> str:
+    return os.path.join(EXPORT_DIR, f"{job_id}.{_parse_job_id(job_id)}")
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=EXPORT_WORKERS,
+                mp_context=multiprocessing.get_context(EXPORT_MP_START),
+            )
+        return _executor
+
+
+def _on_done(job_id: str, future: Future) -> None:
+    exc = future.exception()
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return
+        job["finished_at"] = time.time()
+        if exc is not None:
+            job["error"] = f"{type(exc).__name__}: {exc}"
+    if exc is not None:
+        logger.error("Export %s failed: %s", job_id, exc)
+    else:
+        logger.info("Export %s written in %.2fs", job_id, job["finished_at"] - job["created_at"])
+
+
+def start_export(submission_id: int, fmt: str) -> Optional[Dict[str, Any]]:
+    """
+    Queue conversion of a stored charter to `fmt` ("pdf" or "docx").
+    Returns the job status, or None if the submission does not exist.
+    Already-exported content and in-flight jobs for the same content are reused.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    from app.services import storage
+
+    row = storage.get_submission(submission_id)
+    if row is None:
+        return None
+    job_id = job_id_for(row, fmt)
+    path = file_path(job_id)
+    with _lock:
+        job = _jobs.get(job_id)
+    if (job is not None and "error" not in job) or os.path.exists(path):
+        return get_status(job_id)
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    try:
+        future = _get_executor().submit(documents.export_charter, fmt, render_cache.charter_response(row), path)
+    except RuntimeError as e:  # pool shut down or broken
+        raise ExportError(str(e)) from e
+    with _lock:
+        _jobs[job_id] = {"future": future, "submission_id": submission_id, "format": fmt, "created_at": time.time()}
+        while len(_jobs) > MAX_TRACKED_JOBS:
+            _jobs.popitem(last=False)
+    future.add_done_callback(lambda f: _on_done(job_id, f))
+    logger.info("Queued %s export %s for submission_id=%s", fmt, job_id, submission_id)
+    return get_status(job_id)
+
+
+def get_status(job_id: str) -> Optional[Dict[str, Any]]:
+    """Status of an export job, or None if the id is unknown."""
+    fmt = _parse_job_id(job_id)
+    if fmt is None:
+        return None
+    with _lock:
+        job = _jobs.get(job_id)
+    status = {"job_id": job_id, "format": fmt}
+    if job is not None:
+        status["submission_id"] = job["submission_id"]
+        future: Future = job["future"]
+        if not future.done():
+            status["status"] = RUNNING if future.running() else QUEUED
+            return status
+        if "error" in job or future.exception() is not None:
+            status["status"] = FAILED
+            status["error"] = job.get("error") or str(future.exception())
+            return status
+    if os.path.exists(file_path(job_id)):
+        status["status"] = DONE
+        return status
+    return None if job is None else {**status, "status": FAILED, "error": "export file missing"}
+
+
+def shutdown(wait: bool = True) -> None:
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+        _jobs.clear()
+    if executor is not None:
+        executor.shutdown(wait=wait)
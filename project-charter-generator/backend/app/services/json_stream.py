@@ -0,0 +1,111 @@
+"""
+Incremental parsing of a streamed JSON object, one top-level member at a time.
+
+LLM output arrives in small text chunks. `TopLevelMemberParser` scans those
+chunks and hands back each `"key": value` pair of the first JSON object as
+soon as its value is complete, so callers can act on `objectives` while the
+model is still writing `timeline`. Text before the first `{` (prose, code
+fences) and after the closing `}` is ignored; a member that is not valid JSON
+is skipped rather than failing the whole stream.
+"""
+import json
+import re
+from typing import Any, Iterable, Iterator, List, Tuple
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_STRUCTURAL = re.compile(r'[{}\[\]",]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+Member = Tuple[str, Any]
+
+
+class TopLevelMemberParser:
+    def __init__(self):
+        self.started = False
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._skip_next = False  # chunk ended right after a backslash inside a string
+        self._pending: List[str] = []
+
+    def feed(self, chunk: str) -> List[Member]:
+        """Consume a chunk; return the members completed by it."""
+        out: List[Member] = []
+        if self.done or not chunk:
+            return out
+        i, n = 0, len(chunk)
+        if not self.started:
+            i = chunk.find("{")
+            if i == -1:
+                return out
+            self.started = True
+            self._depth = 1
+            i += 1
+        start = i
+        if self._skip_next:
+            self._skip_next = False
+            i += 1
+        while i < n:
+            if self._in_string:
+                m = _STRING_SPECIAL.search(chunk, i)
+                if m is None:
+                    break
+                i = m.end()
+                if m.group() == "\\":
+                    if i < n:
+                        i += 1
+                    else:
+                        self._skip_next = True
+                    continue
+                self._in_string = False
+                continue
+            m = _STRUCTURAL.search(chunk, i)
+            if m is None:
+                break
+            c = m.group()
+            i = m.end()
+            if c == '"':
+                self._in_string = True
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(chunk[start:i - 1], out)
+                    self.done = True
+                    return out
+            elif self._depth == 1:  # a comma between top-level members
+                self._emit(chunk[start:i - 1], out)
+                start = i
+        self._pending.append(chunk[start:])
+        return out
+
+    def close(self) -> List[Member]:
+        """End of stream: try to salvage a final member left unterminated."""
+        out: List[Member] = []
+        if self.started and not self.done and self._depth == 1 and not self._in_string:
+            self._emit("", out)
+        self.done = True
+        return out
+
+    def _emit(self, tail: str, out: List[Member]) -> None:
+        self._pending.append(tail)
+        text = "".join(self._pending).strip()
+        self._pending = []
+        if not text:
+            return
+        try:
+            out.extend(json.loads("{" + text + "}").items())
+        except ValueError:
+            logger.warning("Skipping malformed member in streamed JSON (%d chars)", len(text))
+
+
+def iter_members(chunks: Iterable[str]) -> Iterator[Member]:
+    """Yield (key, value) pairs of the first JSON object in a stream of text chunks."""
+    parser = TopLevelMemberParser()
+    for chunk in chunks:
+        # keep draining after the object closes so the upstream call finishes cleanly
+        yield from parser.feed(chunk)
+    yield from parser.close()
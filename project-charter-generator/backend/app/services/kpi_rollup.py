@@ -0,0 +1,227 @@
+"""
+In-memory rollups behind the ranged KPI queries (?from=&to=&granularity=).
+
+The buckets are persisted in SQLite by storage's KPI triggers: charters and
+new users per day (kpi_charter_days, kpi_daily_users) and distinct active
+users per day, week and month (kpi_daily_users, kpi_period_users). A Rollups
+snapshot holds them as array columns sorted by day ordinal. Additive counts
+carry prefix sums, so the count over a run of days is a bisect and a
+subtraction, and week and month buckets are merged from days as they are
+read; distinct users cannot be added up and are looked up per bucket. A
+range of B consecutive buckets costs one bisect over the whole series, then
+B searches no wider than a bucket, whatever its span.
+
+current() swaps in a fresh snapshot once the database has changed (PRAGMA
+data_version on the store's own connection), checking at most every
+REFRESH_SECONDS; readers share snapshots without locking.
+"""
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from app.config import Config
+from app.services import diagnostics, storage
+
+GRANULARITIES = ("day", "week", "month")
+MAX_BUCKETS = 10_000
+REFRESH_SECONDS = float(getattr(Config, "KPI_ROLLUP_REFRESH_SECONDS", 1.0))
+
+
+class DaySeries:
+    """Additive per-day counts: day ordinals ascending, with prefix sums."""
+
+    __slots__ = ("days", "sums")
+
+    def __init__(self, rows: Iterable[Tuple[int, int]]):
+        self.days = array("l")
+        self.sums = array("q", [0])  # sums[i] = total of the first i days
+        for day, count in rows:
+            self.days.append(day)
+            self.sums.append(self.sums[-1] + count)
+
+    def totals(self, spans: List[Tuple[int, int]]) -> List[int]:
+        """
+        Sum over each (first, last) span of consecutive spans (ordinals,
+        inclusive). A span of k days holds at most k entries, so after the
+        first bisect each search is confined to k slots.
+        """
+        days, sums, out = self.days, self.sums, []
+        i = bisect_left(days, spans[0][0]) if spans else 0
+        for first, last in spans:
+            j = bisect_left(days, last + 1, i, min(i + last + 1 - first, len(days)))
+            out.append(sums[j] - sums[i])
+            i = j
+        return out
+
+
+class PeriodSeries:
+    """Per-period values that do not add up (distinct users), keyed by the ordinal of the period's first day."""
+
+    __slots__ = ("starts", "values")
+
+    def __init__(self, rows: Iterable[Tuple[int, int]]):
+        self.starts = array("l")
+        self.values = array("q")
+        for start, value in rows:
+            self.starts.append(start)
+            self.values.append(value)
+
+    def at(self, starts: List[int]) -> List[int]:
+        """Value per period start (ascending), 0 for periods without one: a merge after one bisect."""
+        keys, values, out = self.starts, self.values, []
+        i = bisect_left(keys, starts[0]) if starts else 0
+        n = len(keys)
+        for start in starts:
+            while i < n and keys[i] < start:
+                i += 1
+            out.append(values[i] if i < n and keys[i] == start else 0)
+        return out
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+def buckets(first: date, last: date, granularity: str) -> List[Tuple[int, int]]:
+    """
+    (first day, last day) ordinals of each bucket overlapping first..last.
+    Week (Monday to Sunday) and month buckets are always whole, so the first
+    and last may reach outside the range.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    if first > last:
+        raise ValueError("from must not be after to")
+    if granularity == "month":
+        first = first.replace(day=1)
+        count = (last.year - first.year) * 12 + last.month - first.month + 1
+    else:
+        step = 7 if granularity == "week" else 1
+        first -= timedelta(days=first.weekday() if granularity == "week" else 0)
+        count = (last - first).days // step + 1
+    if count > MAX_BUCKETS:
+        raise ValueError(f"range too long: more than {MAX_BUCKETS} {granularity} buckets")
+    if granularity != "month":
+        start = first.toordinal()
+        return [(start + i * step, start + i * step + step - 1) for i in range(count)]
+    out = []
+    for _ in range(count):
+        end = _next_month(first)
+        out.append((first.toordinal(), end.toordinal() - 1))
+        first = end
+    return out
+
+
+class Rollups(NamedTuple):
+    charters: DaySeries
+    new_users: DaySeries
+    active_users: Dict[str, PeriodSeries]  # granularity -> distinct users per bucket
+
+    def charters_in(self, first: date, last: date, granularity: str) -> List[Tuple[date, int]]:
+        """(bucket's first day, charters created) per bucket, oldest first."""
+        spans = buckets(first, last, granularity)
+        return list(zip(map(date.fromordinal, (a for a, _ in spans)), self.charters.totals(spans)))
+
+    def users_in(self, first: date, last: date, granularity: str) -> List[Tuple[date, int, int]]:
+        """(bucket's first day, distinct active users, new users) per bucket, oldest first."""
+        spans = buckets(first, last, granularity)
+        starts = [a for a, _ in spans]
+        active = self.active_users[granularity].at(starts)
+        return list(zip(map(date.fromordinal, starts), active, self.new_users.totals(spans)))
+
+
+def _dated(rows: Iterable[Any]) -> Iterable[Tuple[int, ...]]:
+    """Rows keyed by an ISO day -> the same rows keyed by its ordinal; malformed days are skipped."""
+    for key, *values in rows:
+        try:
+            yield (date.fromisoformat(key).toordinal(), *values)
+        except (TypeError, ValueError):
+            continue
+
+
+def load(conn) -> Rollups:
+    """Read the rollup bucket tables into a snapshot."""
+    daily = list(_dated(conn.execute("SELECT day, total_users, new_users FROM kpi_daily_users ORDER BY day")))
+    active = {"day": PeriodSeries((day, total) for day, total, _ in daily)}
+    for grain in storage.KPI_PERIODS:
+        active[grain] = PeriodSeries(_dated(conn.execute(
+            "SELECT period, total_users FROM kpi_period_users WHERE grain = ? ORDER BY period", (grain,)
+        )))
+    return Rollups(
+        charters=DaySeries(_dated(conn.execute("SELECT day, charters FROM kpi_charter_days ORDER BY day"))),
+        new_users=DaySeries((day, new) for day, _, new in daily),
+        active_users=active,
+    )
+
+
+class _Snapshot(NamedTuple):
+    key: Tuple[int, str]  # (pid, database path)
+    version: int  # PRAGMA data_version when loaded
+    checked: float  # time.monotonic() of the last check
+    rollups: Rollups
+
+
+_lock = threading.Lock()
+_conn: Optional[Tuple[Tuple[int, str], Any]] = None  # (key, the store's own read-only connection)
+_snapshot: Optional[_Snapshot] = None
+
+diagnostics.register_cache("kpi_rollup", lambda: _arrays())
+
+
+def _arrays() -> List[array]:
+    snap = _snapshot
+    if snap is None:
+        return []
+    r = snap.rollups
+    out = [r.charters.days, r.charters.sums, r.new_users.days, r.new_users.sums]
+    for series in r.active_users.values():
+        out += [series.starts, series.values]
+    return out
+
+
+def _connection(key: Tuple[int, str]):
+    """The store's connection; data_version only means something when asked of the same connection."""
+    global _conn
+    if _conn is None or _conn[0] != key:
+        if _conn is not None and _conn[0][0] == key[0]:
+            _conn[1].close()
+        storage._ensure_db()
+        conn = storage._connect(key[1], readonly=True)
+        conn.isolation_level = None  # explicit read transaction in current()
+        _conn = (key, conn)
+    return _conn[1]
+
+
+def current() -> Rollups:
+    """The rollups of the current database, at most REFRESH_SECONDS behind its last write."""
+    global _snapshot
+    key = (os.getpid(), storage.DB_PATH)
+    snap = _snapshot
+    if snap is not None and snap.key == key and time.monotonic() - snap.checked < REFRESH_SECONDS:
+        return snap.rollups
+    with _lock:
+        conn = _connection(key)
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        snap = _snapshot
+        if snap is not None and snap.key == key and snap.version == version:
+            rollups = snap.rollups
+        else:
+            conn.execute("BEGIN")  # one consistent read of all the tables
+            try:
+                rollups = load(conn)
+            finally:
+                conn.execute("COMMIT")
+        _snapshot = _Snapshot(key, version, time.monotonic(), rollups)
+        return rollups
+
+
+def clear() -> None:
+    """Drop the snapshot and close the store's connection."""
+    global _conn, _snapshot
+    with _lock:
+        if _conn is not None and _conn[0][0] == os.getpid():
+            _conn[1].close()
+        _conn = _snapshot = None
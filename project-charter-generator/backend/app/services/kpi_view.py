@@ -1,34 +1,94 @@
-import json, os, threading
+"""
+Dashboard KPIs.
+
+With the sqlite storage backend the figures are live: they come from the
+aggregate tables that storage keeps current by trigger on every write
+(kpi_department_charters, kpi_monthly_charters, kpi_users, kpi_daily_users),
+so each read costs O(result size) however many submissions there are. The
+hand-maintained KPI file (the "kpi" asset) is used with KPI_SOURCE=file, on
+other backends, and under the default KPI_SOURCE=auto while the database
+has no activity yet.
+
+Ranged queries (returning_users_range, charters_range) always read the
+database, through the in-memory rollups of kpi_rollup.
+"""
+import calendar
+import sqlite3
+import zlib
+from datetime import date, datetime, timedelta, timezone
 from typing import Any, Dict, List
 from operator import itemgetter
 from app.config import Config
+from app.services import assets, diagnostics, kpi_rollup, storage
+from app.utils.logger import get_logger
 
-KPI_FILE_PATH = getattr(Config, "KPI_FILE_PATH")
+logger = get_logger(__name__)
 
-_lock = threading.Lock()
-_cache: Dict[str, Any] = {"mtime": None, "data": None}
+diagnostics.register_cache("kpi_view", lambda: _get_data())
 
+SOURCE = (getattr(Config, "KPI_SOURCE", None) or "auto").lower()  # auto | database | file
+MONTHS = 12  # charters per month: the current month and the 11 before it
+MAX_DAYS = 3660
+COLORS = ("#3B82F6", "#14B8A6", "#F97316", "#8B5CF6", "#EF4444", "#10B981", "#F59E0B", "#6366F1")
 
-def _load_file() -> Dict[str, Any]:
-    if not os.path.exists(KPI_FILE_PATH):
-        return {}
-    with open(KPI_FILE_PATH, "r", encoding="utf-8") as fh:
-        return json.load(fh)
 
+def _from_database() -> bool:
+    if SOURCE == "file" or storage.get_backend().name != "sqlite":  # the aggregates are sqlite triggers
+        return False
+    if SOURCE == "database":
+        return True
+    try:
+        conn = storage._get_conn(readonly=True)
+        return conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM kpi_users) OR EXISTS (SELECT 1 FROM kpi_monthly_charters)"
+        ).fetchone()[0] == 1
+    except sqlite3.Error:
+        logger.exception("KPI aggregates unavailable; serving the KPI file")
+        return False
 
-def _get_data() -> Dict[str, Any]:
-    with _lock:
+
+def _query(sql: str, params=()) -> List[sqlite3.Row]:
+    return storage._get_conn(readonly=True).execute(sql, params).fetchall()
+
+
+def rebuild() -> None:
+    """Recompute the KPI aggregates from submissions, e.g. after rows were deleted or edited by hand."""
+    storage.require_sqlite("KPI rebuild")
+    storage._ensure_db()
+    conn = storage._connect()
+    conn.isolation_level = None  # explicit transaction below
+    try:
+        conn.execute("BEGIN IMMEDIATE")
         try:
-            mtime = os.path.getmtime(KPI_FILE_PATH)
-        except OSError:
-            mtime = None
-        if _cache["data"] is None or _cache["mtime"] != mtime:
-            _cache["data"] = _load_file()
-            _cache["mtime"] = mtime
-        return _cache["data"] or {}
+            storage._rebuild_kpi(conn)
+            storage._rebuild_kpi_rollups(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+def _get_data() -> Dict[str, Any]:
+    """Current KPI snapshot from the asset registry (lock-free); {} if the file is missing or invalid."""
+    try:
+        return assets.data("kpi") or {}
+    except (OSError, ValueError):
+        return {}
 
 
 def get_department_charters() -> List[Dict]:
+    if _from_database():
+        rows = _query(
+            "SELECT department, charters FROM kpi_department_charters WHERE charters > 0 "
+            "ORDER BY charters DESC, department"
+        )
+        return [
+            {"department": r["department"], "charterCount": r["charters"],
+             "color": COLORS[zlib.crc32(r["department"].lower().encode("utf-8")) % len(COLORS)]}
+            for r in rows
+        ]
     data = _get_data()
     return [dict(d) for d in data.get("department_charters", [])]
 
@@ -53,7 +113,24 @@ def get_returning_users(days: int = 15) -> List[Dict]:
     """
     Return the last `days` items from `returning_users` in file.
     Assumes entries are in chronological order oldest->newest.
+    From the database: one entry per UTC day up to today, days without activity included.
     """
+    if _from_database():
+        try:
+            days = min(max(int(days), 1), MAX_DAYS)
+        except Exception:
+            days = 15
+        first = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+        counts = {
+            r["day"]: (r["total_users"], r["new_users"])
+            for r in _query("SELECT day, total_users, new_users FROM kpi_daily_users WHERE day >= ?", (first.isoformat(),))
+        }
+        out = []
+        for i in range(days):
+            day = (first + timedelta(days=i)).isoformat()
+            total, new = counts.get(day, (0, 0))
+            out.append({"date": day, "returningUsers": total - new, "newUsers": new, "totalUsers": total})
+        return out
     data = _get_data()
     arr = data.get("returning_users", [])
     if not arr:
@@ -66,7 +143,26 @@ def get_returning_users(days: int = 15) -> List[Dict]:
 
 
 def get_user_activity(limit: int = 10) -> List[Dict]:
-    """Return most recent user activity events, up to `limit` entries."""
+    """
+    Return most recent user activity events, up to `limit` entries.
+    From the database: users by last active day, with their submission count
+    (chartersCreated) and number of active days (totalLogins).
+    """
+    if _from_database():
+        try:
+            limit = max(0, int(limit))
+        except Exception:
+            limit = 10
+        rows = _query(
+            "SELECT user_id, last_day, submissions, active_days FROM kpi_users "
+            "ORDER BY last_day DESC, submissions DESC LIMIT ?",
+            (limit,),
+        )
+        return [
+            {"userId": r["user_id"], "name": r["user_id"], "chartersCreated": r["submissions"],
+             "lastLogin": r["last_day"], "totalLogins": r["active_days"]}
+            for r in rows
+        ]
     data = _get_data()
     arr = data.get("user_activity", [])
     try:
@@ -79,9 +175,52 @@ def get_user_activity(limit: int = 10) -> List[Dict]:
 def get_charters_per_month() -> List[Dict]:
     """
     Return the list of {month, chartersCreated} entries from KPI file.
+    From the database: the last MONTHS months, oldest first, each also with
+    its year and "YYYY-MM" period.
     """
+    if _from_database():
+        today = datetime.now(timezone.utc).date()
+        periods = []
+        year, month = today.year, today.month
+        for _ in range(MONTHS):
+            periods.append((year, month))
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        periods.reverse()
+        first = f"{periods[0][0]:04d}-{periods[0][1]:02d}"
+        counts = dict(_query("SELECT month, charters FROM kpi_monthly_charters WHERE month >= ?", (first,)))
+        return [
+            {"month": calendar.month_name[m], "year": y, "period": f"{y:04d}-{m:02d}",
+             "chartersCreated": counts.get(f"{y:04d}-{m:02d}", 0)}
+            for y, m in periods
+        ]
     data = _get_data()
     arr = data.get("charters_per_month", [])
     if not isinstance(arr, list):
         return []
     return [dict(i) for i in arr]
+
+
+def _rollups() -> kpi_rollup.Rollups:
+    if SOURCE == "file" or storage.get_backend().name != "sqlite":
+        raise ValueError("ranged KPI queries need the sqlite database (KPI_SOURCE=auto or database)")
+    return kpi_rollup.current()
+
+
+def returning_users_range(first: date, last: date, granularity: str = "day") -> List[Dict]:
+    """
+    Returning, new and total users per day, week or month bucket overlapping
+    first..last, buckets without activity included. "date" is the bucket's
+    first day. ValueError for a bad granularity or range.
+    """
+    return [
+        {"date": start.isoformat(), "returningUsers": total - new, "newUsers": new, "totalUsers": total}
+        for start, total, new in _rollups().users_in(first, last, granularity)
+    ]
+
+
+def charters_range(first: date, last: date, granularity: str = "month") -> List[Dict]:
+    """Charters created per day, week or month bucket overlapping first..last; "period" is the bucket's first day."""
+    return [
+        {"period": start.isoformat(), "chartersCreated": count}
+        for start, count in _rollups().charters_in(first, last, granularity)
+    ]
@@ -0,0 +1,97 @@
+"""
+Precompressed JSON assets.
+
+Registry assets the frontend fetches on every page (the questionnaire, output
+schema, KPI snapshot) are re-serialized compactly and compressed once per
+snapshot version (see app.services.assets) and then served straight from
+bytes: no file access, no json.dumps, no per-request compression.
+
+Every asset has a content hash. Its ETag is derived from the hash and a
+request carrying `?v=<hash>` (see `manifest()`) gets a long-lived immutable
+Cache-Control, because that URL can never serve different content.
+"""
+import json
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+from flask import Response, request
+from app.config import Config
+from app.services import assets, diagnostics
+from app.utils import compression
+
+CACHE_CONTROL = getattr(Config, "ASSET_CACHE_CONTROL", "no-cache")
+CACHE_CONTROL_VERSIONED = getattr(Config, "ASSET_CACHE_CONTROL_VERSIONED", "public, max-age=31536000, immutable")
+
+SERVED = ("questionnaire", "output_schema", "kpi")
+
+
+class Asset(NamedTuple):
+    name: str
+    digest: str                                # content hash of the source file
+    bodies: Dict[Optional[str], bytes]         # coding (None = identity) -> body
+    mimetype: str
+
+    def etag(self, coding: Optional[str]) -> str:
+        return f"{self.digest}-{coding}" if coding else self.digest
+
+
+_lock = threading.Lock()
+_built: Dict[str, Tuple[int, Asset]] = {}  # name -> (snapshot version, asset)
+diagnostics.register_cache("precompressed", lambda: _built)
+
+
+def _build(snap: assets.Snapshot) -> Asset:
+    body = json.dumps(snap.data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    bodies: Dict[Optional[str], bytes] = {None: body}
+    for coding in compression.available_encodings():
+        # built once per snapshot, so spend the CPU on the best ratio
+        bodies[coding] = compression.compress(body, coding, level=11 if coding == "br" else 9)
+    return Asset(snap.name, snap.digest, bodies, "application/json")
+
+
+def get(name: str) -> Asset:
+    """
+    Compressed build of the current snapshot of a served asset.
+    Raises KeyError for unknown names, and the registry's load error if the asset never loaded.
+    """
+    if name not in SERVED:
+        raise KeyError(name)
+    snap = assets.get(name)
+    hit = _built.get(name)
+    if hit is not None and hit[0] == snap.version:
+        return hit[1]
+    asset = _build(snap)
+    with _lock:
+        _built[name] = (snap.version, asset)
+    return asset
+
+
+def manifest() -> Dict[str, str]:
+    """Content hash of every served asset that is loaded, for versioned (?v=) URLs."""
+    out = {}
+    for name in SERVED:
+        try:
+            out[name] = assets.get(name).digest
+        except (OSError, ValueError):
+            continue
+    return out
+
+
+def serve(name: str) -> Response:
+    """Response for an asset negotiated against Accept-Encoding / If-None-Match."""
+    asset = get(name)
+    coding = compression.choose_encoding([c for c in asset.bodies if c])
+    if any(request.if_none_match.contains_weak(asset.etag(c)) for c in asset.bodies):
+        resp = Response(status=304)
+    else:
+        resp = Response(asset.bodies[coding], mimetype=asset.mimetype)
+        if coding:
+            resp.headers["Content-Encoding"] = coding
+    resp.set_etag(asset.etag(coding))
+    resp.vary.add("Accept-Encoding")
+    resp.headers["Cache-Control"] = CACHE_CONTROL_VERSIONED if request.args.get("v") == asset.digest else CACHE_CONTROL
+    return resp
+
+
+def clear() -> None:
+    with _lock:
+        _built.clear()
@@ -1,14 +1,14 @@
 import json
-import os
 from typing import Any, Dict
 from app.config import Config
+from app.services import assets
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 def build_prompt(payload: Dict[str, Any], scoring_summary: str) -> str:
     """
-    Build prompt string by loading the single-file template and filling placeholders:
+    Build prompt string from the registry's template snapshot by filling placeholders:
       {frontend_json}, {scoring_summary}, {output_schema}
     """
     # serialize frontend payload
@@ -20,15 +20,13 @@ def build_prompt(payload: Dict[str, Any], scoring_summary: str) -> str:
     # load output schema
     output_schema_text = "{}"
     try:
-        with open(Config.OUTPUT_SCHEMA_PATH, "r", encoding="utf-8") as fh:
-            output_schema_text = fh.read()
+        output_schema_text = assets.get("output_schema").text
     except Exception as e:
         logger.exception("Failed to read OUTPUT_SCHEMA_PATH=%s: %s", Config.OUTPUT_SCHEMA_PATH, e)
 
     # load prompt template file
     try:
-        with open(Config.PROMPT_TEMPLATE_PATH, "r", encoding="utf-8") as fh:
-            template = fh.read()
+        template = assets.data("prompt_template")
     except Exception as e:
         logger.exception("Failed to read PROMPT_TEMPLATE_PATH=%s: %s", Config.PROMPT_TEMPLATE_PATH, e)
         # fallback minimal template to avoid breaking
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.config import Config
+from app.services import charter_renderer, diagnostics
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MAX_ENTRIES = int(getattr(Config, "RENDER_CACHE_MAX_ENTRIES", 256))
+PRERENDER_ON_SAVE = bool(getattr(Config, "RENDER_PRERENDER_ON_SAVE", True))
+PRERENDER_WORKERS = int(getattr(Config, "RENDER_PRERENDER_WORKERS", 1))
+
+FORMATS = {"json": "application/json", "html": "text/html; charset=utf-8"}
+
+# (etag, body, mimetype); body is None when the caller's ETag matched and nothing was read or rendered
+Rendered = Tuple[str, Optional[bytes], str]
+
+# Keyed by version tag, which every lookup reads from the row first: a save by another process or node
+# (rescoring CLI, other workers, a shared SQLAlchemy database) changes updated_at and so misses the cache.
+_lock = threading.Lock()
+_renders: "OrderedDict[Tuple[int, str, str], Rendered]" = OrderedDict()  # (id, version tag, fmt) -> rendered, LRU
+_executor: Optional[ThreadPoolExecutor] = None
+diagnostics.register_cache("render_cache", lambda: _renders)
+
+
+def content_hash(row: Dict[str, Any]) -> str:
+    """Hash of a stored submission row; any saved change gives a new hash."""
+    canonical = json.dumps(row, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def version_tag(row: Dict[str, Any]) -> str:
+    """Identifies a saved state of a submission: every write sets a new updated_at."""
+    return hashlib.sha256(f"{row['id']}:{row.get('updated_at') or ''}".encode("utf-8")).hexdigest()
+
+
+def etag_for(row: Dict[str, Any], fmt: str) -> str:
+    """Strong ETag of a representation of a submission, from its id and updated_at alone (no blob needed)."""
+    return f'"{version_tag(row)[:32]}-{fmt}"'
+
+
+def charter_response(row: Dict[str, Any]) -> Dict[str, Any]:
+    """The charter dict of a stored submission row, with header fields filled from the row."""
+    result = row.get("result")
+    if not isinstance(result, dict):
+        result = {}
+    resp = dict(result)
+    resp.setdefault("project_title", row.get("project_name") or "")
+    resp.setdefault("sponsor", row.get("sponsor") or "")
+    resp.setdefault("created_at", row.get("created_at") or "")
+    return resp
+
+
+def _render(row: Dict[str, Any], fmt: str) -> bytes:
+    """`row` as read with raw=True: JSON splices the stored text, only HTML parses the result."""
+    from app.services import storage
+
+    if fmt == "html":
+        result = row.get("result")
+        if isinstance(result, str):
+            try:
+                result = json.loads(result)
+            except ValueError:
+                result = None
+        return charter_renderer.render_html(charter_response(dict(row, result=result))).encode("utf-8")
+    blobs = [b for b in storage.BLOB_FIELDS if b in row]
+    return ('{"submission":' + storage.raw_row_json(row, blobs) + "}").encode("utf-8")
+
+
+def _render_and_store(row: Dict[str, Any], fmt: str) -> Rendered:
+    key = (row["id"], version_tag(row), fmt)
+    with _lock:
+        hit = _renders.get(key)
+    if hit is None:
+        hit = (etag_for(row, fmt), _render(row, fmt), FORMATS[fmt])
+    with _lock:
+        _renders[key] = hit
+        _renders.move_to_end(key)
+        while len(_renders) > MAX_ENTRIES:
+            _renders.popitem(last=False)
+    return hit
+
+
+def get_rendered(submission_id: int, fmt: str = "json",
+                 not_modified: Optional[Callable[[str], bool]] = None) -> Optional[Rendered]:
+    """
+    Rendered representation of a stored submission, from cache when possible.
+    Returns None if the submission does not exist. The row's updated_at is
+    read first (no blobs), so a save made anywhere is never served stale. On
+    a cache miss, if `not_modified(etag)` is true for the current ETag (a
+    conditional request that matches), returns it with body None without
+    reading the blobs.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    from app.services import storage
+
+    meta = storage.get_submission(submission_id, blobs=())
+    if meta is None:
+        return None
+    key = (submission_id, version_tag(meta), fmt)
+    with _lock:
+        hit = _renders.get(key)
+        if hit is not None:
+            _renders.move_to_end(key)
+            return hit
+    if not_modified is not None:
+        etag = etag_for(meta, fmt)
+        if not_modified(etag):
+            return etag, None, FORMATS[fmt]
+    row = storage.get_submission(submission_id, raw=True)
+    if row is None:
+        return None
+    return _render_and_store(row, fmt)
+
+
+def invalidate(submission_id: int) -> None:
+    """Drop this process's renders of a submission early; stale ones are never served either way."""
+    with _lock:
+        for key in [k for k in _renders if k[0] == submission_id]:
+            del _renders[key]
+
+
+def _prerender(submission_id: int) -> None:
+    from app.services import storage
+
+    try:
+        row = storage.get_submission(submission_id, raw=True)
+        if row is None:
+            return
+        for fmt in FORMATS:
+            _render_and_store(row, fmt)
+    except Exception:
+        logger.exception("Pre-render failed for submission_id=%s", submission_id)
+
+
+def on_result_saved(submission_id: int) -> None:
+    """Called by storage.save_result after commit: drop stale renders and pre-render in the background."""
+    invalidate(submission_id)
+    if not PRERENDER_ON_SAVE:
+        return
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PRERENDER_WORKERS, thread_name_prefix="prerender")
+        executor = _executor
+    executor.submit(_prerender, submission_id)
+
+
+def clear() -> None:
+    with _lock:
+        _renders.clear()
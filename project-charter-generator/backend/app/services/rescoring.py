@@ -0,0 +1,167 @@
+"""
+Bulk re-scoring of stored submissions.
+
+When weights or bands in questions.json change, the stored complexity_score
+and recommended_pm_count of every submission are stale. `rescore_all` walks
+the submissions table in id order, re-scores each chunk's payloads with one
+`ScoringEngine.score_batch` call and writes the chunk back with executemany,
+together with the scoring version and a checkpoint, in one short write
+transaction. The online API only ever waits for one chunk's write, and an
+interrupted run resumes after the last committed chunk.
+
+Run it with `python -m app.services.rescoring [--chunk-size N] [--restart]`.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.services import render_cache, scoring_engine, storage
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+JOB_NAME = "rescore"
+
+
+def _read_checkpoint(conn, version: str) -> Tuple[int, int]:
+    row = conn.execute("SELECT last_id, version, rows_done FROM job_checkpoints WHERE job = ?", (JOB_NAME,)).fetchone()
+    if row is None or row["version"] != version:
+        return 0, 0  # first run, or the scoring changed again: start over
+    return int(row["last_id"]), int(row["rows_done"])
+
+
+def _score_chunk(engine: scoring_engine.ScoringEngine, rows) -> Tuple[List[Tuple[Any, ...]], List[Tuple[Any, ...]]]:
+    """
+    (id, payload_json) rows -> UPDATE parameters for re-scored rows, and for rows
+    whose payload cannot be parsed (those keep their scores but are marked as seen).
+    As in ScoringEngine.score, answers none of which match the questionnaire get
+    no score and no PM count rather than the 0 band.
+    """
+    ids, selections, extra, unscored = [], [], [], []
+    skipped = []
+    for row in rows:
+        try:
+            text = storage.decode_blob(row["payload_json"])
+            payload = json.loads(text) if text else {}
+        except ValueError:  # includes BlobFormatError
+            payload = None
+        if not isinstance(payload, dict):
+            skipped.append((engine.version, row["id"]))
+            continue
+        cols, unmatched, client_total = engine.selected_columns(payload.get("questions"))
+        ids.append(row["id"])
+        selections.append(cols)
+        extra.append(client_total)
+        unscored.append(bool(unmatched) and not cols and not scoring_engine.ALLOW_CLIENT_SCORES)
+
+    totals, bands = engine.score_batch(selections)
+    now = datetime.now(timezone.utc).isoformat()
+    params = []
+    for sid, total, band, client_total, no_score in zip(ids, totals, bands, extra, unscored):
+        if no_score:
+            params.append((None, None, engine.version, now, sid))
+            continue
+        if client_total:
+            total += client_total
+            band = engine.band_index(total)
+        pm_count = engine.bands[band].get("recommended_pm_count", 0) if band >= 0 else 0
+        params.append((total, pm_count, engine.version, now, sid))
+    return params, skipped
+
+
+def rescore_all(chunk_size: int = 500, restart: bool = False, pause: float = 0.0,
+                progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Re-score every submission not yet scored with the current questionnaire version.
+    Returns run statistics including rows/sec. Safe to interrupt and run again.
+    """
+    storage.require_sqlite("rescore_all")
+    engine = scoring_engine.get_engine()
+    storage._ensure_db()
+    conn = storage._connect()  # own connection: the pooled ones use implicit transactions
+    conn.isolation_level = None  # explicit BEGIN/COMMIT below; reads run in autocommit
+    stats = {"scoring_version": engine.version, "rows": 0, "skipped": 0, "chunks": 0}
+    started = time.perf_counter()
+    try:
+        if restart:
+            conn.execute("DELETE FROM job_checkpoints WHERE job = ?", (JOB_NAME,))
+        last_id, rows_done = _read_checkpoint(conn, engine.version)
+        stats["resumed_from_id"] = last_id
+        while True:
+            rows = conn.execute(
+                """
+                SELECT id, payload_json FROM submissions
+                WHERE id > ? AND (scoring_version IS NULL OR scoring_version != ?)
+                ORDER BY id LIMIT ?
+                """,
+                (last_id, engine.version, chunk_size),
+            ).fetchall()
+            if not rows:
+                break
+            params, skipped = _score_chunk(engine, rows)
+            chunk_last = rows[-1]["id"]
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "UPDATE submissions SET complexity_score = ?, recommended_pm_count = ?, scoring_version = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    params,
+                )
+                conn.executemany("UPDATE submissions SET scoring_version = ? WHERE id = ?", skipped)
+                conn.execute(
+                    """
+                    INSERT INTO job_checkpoints (job, last_id, version, rows_done, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(job) DO UPDATE SET last_id = excluded.last_id, version = excluded.version,
+                        rows_done = excluded.rows_done, updated_at = excluded.updated_at
+                    """,
+                    (JOB_NAME, chunk_last, engine.version, rows_done + len(params),
+                     datetime.now(timezone.utc).isoformat()),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            for p in params:
+                render_cache.invalidate(p[-1])
+            last_id = chunk_last
+            rows_done += len(params)
+            stats["rows"] += len(params)
+            stats["skipped"] += len(skipped)
+            stats["chunks"] += 1
+            if progress is not None:
+                elapsed = time.perf_counter() - started
+                progress(dict(stats, last_id=last_id, rows_per_sec=stats["rows"] / elapsed if elapsed else 0.0))
+            if pause:
+                time.sleep(pause)  # let online writers in between chunks
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - started
+    stats.update(last_id=last_id, seconds=round(elapsed, 3),
+                 rows_per_sec=round(stats["rows"] / elapsed, 1) if elapsed else 0.0)
+    logger.info("Re-scored %d submissions (version %s) in %.2fs, %.0f rows/s",
+                stats["rows"], engine.version[:12], elapsed, stats["rows_per_sec"])
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Re-score stored submissions with the current questions.json")
+    parser.add_argument("--db", help="SQLite file (defaults to DB_PATH)")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between chunks")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and rescan from the first row")
+    args = parser.parse_args(argv)
+    if args.db:
+        storage.DB_PATH = args.db
+
+    def report(s):
+        logger.info("chunk %d: %d rows, last id %d, %.0f rows/s", s["chunks"], s["rows"], s["last_id"], s["rows_per_sec"])
+
+    stats = rescore_all(chunk_size=args.chunk_size, restart=args.restart, pause=args.pause, progress=report)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
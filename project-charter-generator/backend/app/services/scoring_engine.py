@@ -0,0 +1,236 @@
+"""
+Server-side scoring of questionnaire answers.
+
+The questionnaire (questions.json, via the asset registry) is compiled into
+an option-id -> weighted score table plus the complexity bands from its
+`scoring` section. Submissions are scored from the option ids they selected;
+scores sent by the client are ignored unless SCORING_ALLOW_CLIENT_SCORES is
+set, and then only for answers that match no known option. Answers none of
+which match (e.g. ids from another questionnaire) are not scored at all: the
+result has no total and the UNSCORED_BAND, rather than a misleading 0.
+
+`score_batch` scores many submissions at once. With numpy installed it is a
+single gather + bincount + searchsorted over flat arrays; without numpy the
+same table is used in a plain loop.
+"""
+import bisect
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from app.config import Config
+from app.services import assets
+from app.utils.logger import get_logger
+
+try:
+    import numpy as np
+except ImportError:  # optional; batch scoring falls back to Python
+    np = None
+
+logger = get_logger(__name__)
+
+ALLOW_CLIENT_SCORES = bool(getattr(Config, "SCORING_ALLOW_CLIENT_SCORES", False))
+
+INVALID_BAND = {
+    "complexity": "Invalid Score",
+    "recommendation": "Score out of expected range.",
+    "rationale": "Score is outside defined buckets.",
+    "recommended_pm_count": 0,
+}
+
+UNSCORED_BAND = {
+    "complexity": "Unscored",
+    "recommendation": "Complexity not assessed: no answer matched the questionnaire.",
+    "rationale": "None of the answers matched a known question option.",
+    "recommended_pm_count": None,
+}
+
+
+class ScoreResult(NamedTuple):
+    total: Optional[float]      # None when answers were given but none could be scored
+    answered: int               # questions scored from a known option
+    unmatched: List[str]        # question ids whose answer matched no known option
+    band: Dict[str, Any]
+
+
+def _number(value: Any) -> float:
+    total = float(value)
+    return int(total) if total.is_integer() else round(total, 2)
+
+
+class ScoringEngine:
+    def __init__(self, questionnaire: Dict[str, Any], version: str):
+        self.version = version
+        config = questionnaire.get("scoring") or {}
+        default_weight = float(config.get("default_weight", 1))
+        self.option_index: Dict[str, int] = {}           # option id -> column
+        self.label_index: Dict[Tuple[str, str], int] = {}  # (question id, lowercased label) -> column
+        self.option_question: List[int] = []              # column -> question number
+        values: List[float] = []
+        self.question_ids: List[str] = []
+        for qn, q in enumerate(questionnaire.get("questions") or []):
+            self.question_ids.append(q["id"])
+            weight = float(q.get("weight", default_weight))
+            for opt in q.get("options") or []:
+                if opt["id"] in self.option_index:
+                    raise ValueError(f"duplicate option id {opt['id']!r}")
+                col = len(values)
+                self.option_index[opt["id"]] = col
+                if opt.get("label"):
+                    self.label_index[(q["id"], str(opt["label"]).strip().lower())] = col
+                self.option_question.append(qn)
+                values.append(weight * float(opt.get("score") or 0))
+        self.values = values
+        bands = sorted(config.get("bands") or [], key=lambda b: float(b["min"]))
+        self.band_mins = [float(b["min"]) for b in bands]
+        self.bands = [{k: v for k, v in b.items() if k != "min"} for b in bands]
+        self.max_score = float(config["max_score"]) if config.get("max_score") is not None else None
+        if np is not None:
+            self._values_arr = np.asarray(values, dtype=np.float64)
+            self._band_mins_arr = np.asarray(self.band_mins, dtype=np.float64)
+
+    # ------------------------------------------------------------------ selection
+
+    def _column(self, q: Dict[str, Any]) -> Optional[int]:
+        """Column of the option a frontend question answer selected, or None."""
+        for key in ("selected_option_id", "option_id", "answer_id"):
+            if q.get(key) in self.option_index:
+                return self.option_index[q[key]]
+        opts = q.get("options")
+        if isinstance(opts, list):
+            opts = [o for o in opts if isinstance(o, dict)]
+            if any("selected" in o for o in opts):
+                opts = [o for o in opts if o.get("selected")]
+            elif len(opts) > 1:
+                opts = []  # the full option list with nothing marked selected
+            for o in opts:
+                col = self.option_index.get(o.get("id"))
+                if col is not None:
+                    return col
+        answer = q.get("answer")
+        if isinstance(answer, str) and q.get("id") is not None:
+            return self.label_index.get((str(q["id"]), answer.strip().lower()))
+        return None
+
+    def selected_columns(self, questions: Any) -> Tuple[List[int], List[str], float]:
+        """
+        Option columns chosen in a frontend `questions` list, one per questionnaire question.
+        Returns (columns, unmatched question ids, client score total for unmatched answers).
+        """
+        cols: List[int] = []
+        seen = set()
+        unmatched: List[str] = []
+        client_total = 0.0
+        if not isinstance(questions, list):
+            return cols, unmatched, client_total
+        for q in questions:
+            if not isinstance(q, dict):
+                continue
+            col = self._column(q)
+            if col is None:
+                unmatched.append(str(q.get("id")))
+                if ALLOW_CLIENT_SCORES:
+                    client_total += _client_score(q)
+                continue
+            qn = self.option_question[col]
+            if qn in seen:
+                continue  # one answer per question, whatever the client sends
+            seen.add(qn)
+            cols.append(col)
+        return cols, unmatched, client_total
+
+    def option_columns(self, option_ids: Iterable[str]) -> List[int]:
+        cols, seen = [], set()
+        for oid in option_ids:
+            col = self.option_index.get(oid)
+            if col is not None and self.option_question[col] not in seen:
+                seen.add(self.option_question[col])
+                cols.append(col)
+        return cols
+
+    # ------------------------------------------------------------------ scoring
+
+    def band_index(self, total: float) -> int:
+        if total < 0 or (self.max_score is not None and total > self.max_score):
+            return -1
+        return bisect.bisect_right(self.band_mins, total) - 1
+
+    def band_range(self, name: str) -> Optional[Tuple[float, Optional[float]]]:
+        """
+        Score range [min, next band's min) of the first band whose complexity label
+        starts with `name` (case-insensitive), e.g. "high"; None if no band matches.
+        """
+        prefix = name.strip().lower()
+        for i, b in enumerate(self.bands):
+            if prefix and str(b.get("complexity", "")).lower().startswith(prefix):
+                return self.band_mins[i], self.band_mins[i + 1] if i + 1 < len(self.band_mins) else None
+        return None
+
+
+    def band(self, total: float) -> Dict[str, Any]:
+        i = self.band_index(total)
+        return dict(self.bands[i]) if i >= 0 else dict(INVALID_BAND, rationale=f"Score {_number(total)} is outside defined buckets.")
+
+    def score(self, questions: Any) -> ScoreResult:
+        cols, unmatched, client_total = self.selected_columns(questions)
+        if unmatched:
+            logger.warning("%d answer(s) matched no known option: %s", len(unmatched), unmatched[:10])
+            if not cols and not ALLOW_CLIENT_SCORES:
+                rationale = f"None of the answers matched a known question option (question ids: {', '.join(unmatched[:10])})."
+                return ScoreResult(None, 0, unmatched, dict(UNSCORED_BAND, rationale=rationale))
+        total = sum(self.values[c] for c in cols) + client_total
+        return ScoreResult(_number(total), len(cols), unmatched, self.band(total))
+
+    def score_batch(self, selections: Sequence[Sequence[int]]) -> Tuple[List[float], List[int]]:
+        """
+        Totals and band indexes (-1 = out of range) for many submissions,
+        each given as option columns (see `selected_columns` / `option_columns`).
+        """
+        n = len(selections)
+        if np is not None and n:
+            lengths = np.fromiter((len(s) for s in selections), dtype=np.int64, count=n)
+            flat = np.fromiter((c for s in selections for c in s), dtype=np.int64, count=int(lengths.sum()))
+            rows = np.repeat(np.arange(n, dtype=np.int64), lengths)
+            totals = np.bincount(rows, weights=self._values_arr[flat], minlength=n)
+            idx = np.searchsorted(self._band_mins_arr, totals, side="right") - 1
+            out_of_range = totals < 0
+            if self.max_score is not None:
+                out_of_range |= totals > self.max_score
+            idx[out_of_range] = -1
+            return totals.tolist(), idx.tolist()
+        values = self.values
+        totals = [float(sum(values[c] for c in s)) for s in selections]
+        return totals, [self.band_index(t) for t in totals]
+
+
+def _client_score(q: Dict[str, Any]) -> float:
+    """Legacy: the score the client attached to an answer."""
+    try:
+        if q.get("score") is not None:
+            return float(q["score"])
+        opts = q.get("options") or []
+        if isinstance(opts, list) and opts and isinstance(opts[0], dict) and opts[0].get("score") is not None:
+            return float(opts[0]["score"])
+    except (TypeError, ValueError):
+        logger.warning("Could not parse client score, ignoring: %s", q.get("id"))
+    return 0.0
+
+
+_lock = threading.Lock()
+_compiled: Optional[Tuple[int, ScoringEngine]] = None  # (questionnaire snapshot version, engine)
+
+
+def get_engine() -> ScoringEngine:
+    """Engine for the current questionnaire snapshot; recompiled when the file changes."""
+    global _compiled
+    snap = assets.get("questionnaire")
+    compiled = _compiled
+    if compiled is not None and compiled[0] == snap.version:
+        return compiled[1]
+    with _lock:
+        if _compiled is None or _compiled[0] != snap.version:
+            _compiled = (snap.version, ScoringEngine(snap.data, snap.digest))
+            logger.info("Compiled scoring engine %s (%d options)", snap.digest[:12], len(_compiled[1].values))
+        return _compiled[1]
+
+
+def score_questions(questions: Any) -> ScoreResult:
+    return get_engine().score(questions)
@@ -0,0 +1,109 @@
+"""
+Rebuild of the full-text search index (submissions_fts) from stored charters.
+
+save_result keeps the index current for new results; this job indexes rows
+saved before the index existed, or repairs it after a change to
+storage.search_fields. It walks submissions in id-ordered chunks, decoding
+and extracting outside the write transaction, then replaces the chunk's
+index rows in one short BEGIN IMMEDIATE transaction. A row whose result was
+saved by the API meanwhile (updated_at changed) is skipped: save_result has
+already indexed its new text. Re-running is harmless.
+
+Run it with `python -m app.services.search_index [--db PATH]`.
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.services import storage
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _index_chunk(rows) -> List[Tuple[int, Any, Optional[Tuple[str, ...]]]]:
+    """Rows -> (id, updated_at, search fields or None)."""
+    out = []
+    for row in rows:
+        result = storage._decode(row["result_json"]) if row["result_json"] is not None else None
+        out.append((row["id"], row["updated_at"], storage.search_fields(result)))
+    return out
+
+
+def rebuild(chunk_size: int = 500, pause: float = 0.0,
+            progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Re-index every submission. Returns run statistics including rows/sec."""
+    storage.require_sqlite("search_index.rebuild")
+    storage._ensure_db()
+    conn = storage._connect()  # own connection: explicit transactions below
+    conn.isolation_level = None
+    stats = {"rows": 0, "indexed": 0, "skipped": 0, "chunks": 0}
+    started = time.perf_counter()
+    last_id = 0
+    try:
+        while True:
+            rows = conn.execute(
+                "SELECT id, result_json, updated_at FROM submissions WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, chunk_size),
+            ).fetchall()
+            if not rows:
+                break
+            entries = _index_chunk(rows)
+            chunk_first, chunk_last = last_id + 1, rows[-1]["id"]
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = dict(conn.execute(
+                    "SELECT id, updated_at FROM submissions WHERE id BETWEEN ? AND ?", (chunk_first, chunk_last)
+                ).fetchall())
+                indexed = skipped = 0
+                for sid, updated_at, fields in entries:
+                    if sid not in current or current[sid] != updated_at:
+                        skipped += 1  # deleted, or saved meanwhile and indexed by save_result
+                        continue
+                    storage._index_for_search(conn, sid, fields)
+                    indexed += fields is not None
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            last_id = chunk_last
+            stats["rows"] += len(rows)
+            stats["indexed"] += indexed
+            stats["skipped"] += skipped
+            stats["chunks"] += 1
+            if progress is not None:
+                elapsed = time.perf_counter() - started
+                progress(dict(stats, last_id=last_id, rows_per_sec=stats["rows"] / elapsed if elapsed else 0.0))
+            if pause:
+                time.sleep(pause)  # let online writers in between chunks
+        # drop index rows of submissions deleted before the delete trigger existed, then merge segments
+        conn.execute("DELETE FROM submissions_fts WHERE rowid NOT IN (SELECT id FROM submissions)")
+        conn.execute("INSERT INTO submissions_fts (submissions_fts) VALUES ('optimize')")
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - started
+    stats.update(last_id=last_id, seconds=round(elapsed, 3),
+                 rows_per_sec=round(stats["rows"] / elapsed, 1) if elapsed else 0.0)
+    logger.info("Indexed %d of %d submissions for search in %.2fs", stats["indexed"], stats["rows"], elapsed)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild the full-text search index of stored charters")
+    parser.add_argument("--db", help="SQLite file (defaults to DB_PATH)")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between chunks")
+    args = parser.parse_args(argv)
+    if args.db:
+        storage.DB_PATH = args.db
+
+    def report(s):
+        logger.info("chunk %d: %d rows, last id %d, %.0f rows/s", s["chunks"], s["rows"], s["last_id"], s["rows_per_sec"])
+
+    stats = rebuild(chunk_size=args.chunk_size, pause=args.pause, progress=report)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
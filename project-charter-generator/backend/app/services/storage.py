@@ -1,9 +1,20 @@
+import atexit
+import base64
+import hashlib
+import html
 import os
 import json
+import re
 import sqlite3
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+import threading
+import weakref
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote
 from app.config import Config
+from app.services import blob_codec, render_cache, write_behind
+from app.services.storage_backend import Claim, StorageBackend
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -12,76 +23,753 @@ _db_default = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."
 DB_PATH = getattr(Config, "DB_PATH", None) or os.getenv("DATABASE_URL") or _db_default
 DB_PATH = os.path.abspath(DB_PATH)
 
-MAX_RESULT_CHARS = int(getattr(Config, "MAX_RESULT_CHARS", 200_000))
+# DATABASE_URL of a server database (e.g. postgresql+psycopg2://...) selects the SQLAlchemy backend
+DATABASE_URL = getattr(Config, "DATABASE_URL", None)
+BACKEND = (getattr(Config, "STORAGE_BACKEND", None) or "auto").lower()  # auto | sqlite | sqlalchemy
 
+SYNCHRONOUS = getattr(Config, "DB_SYNCHRONOUS", "NORMAL")
+CACHE_SIZE_KB = int(getattr(Config, "DB_CACHE_SIZE_KB", 8192))
+MMAP_SIZE = int(getattr(Config, "DB_MMAP_SIZE", 64 * 1024 * 1024))
+BUSY_TIMEOUT_MS = int(getattr(Config, "DB_BUSY_TIMEOUT_MS", 30_000))
+STATEMENT_CACHE = int(getattr(Config, "DB_STATEMENT_CACHE", 128))
 
-def _get_conn():
-    """Return a sqlite3 connection configured for simple concurrent use."""
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH, timeout=30, check_same_thread=False)
+WRITE_BEHIND = bool(getattr(Config, "DB_WRITE_BEHIND", False))
+WRITE_BATCH_ROWS = int(getattr(Config, "DB_WRITE_BATCH_ROWS", 64))
+WRITE_BATCH_MS = float(getattr(Config, "DB_WRITE_BATCH_MS", 0.0))
+WRITE_QUEUE_SIZE = int(getattr(Config, "DB_WRITE_QUEUE_SIZE", 1024))
+WRITE_PUT_TIMEOUT = float(getattr(Config, "DB_WRITE_PUT_TIMEOUT", 5.0))
+WRITE_RESULT_TIMEOUT = float(getattr(Config, "DB_WRITE_RESULT_TIMEOUT", 60.0))
+
+# full-text search: indexed charter fields and their bm25 weights
+SEARCH_COLUMNS = ("title", "description", "objectives", "risks", "body")
+SEARCH_WEIGHTS = (10.0, 4.0, 3.0, 3.0, 1.0)
+SEARCH_SNIPPET_TOKENS = 16
+SEARCH_MAX_CANDIDATES = int(getattr(Config, "SEARCH_MAX_CANDIDATES", 1000))
+
+EXPORT_CHUNK_ROWS = int(getattr(Config, "EXPORT_CHUNK_ROWS", 500))
+
+# charter attributes copied out of payload/result into indexed columns at write time (see charter_attributes)
+ATTRIBUTE_FIELDS = ("industry", "complexity", "duration", "user_id", "department")
+GROUP_FIELDS = ATTRIBUTE_FIELDS + ("sponsor", "recommended_pm_count")
+
+# idempotent generation (see claim_submission): a key is answered from its stored result for
+# IDEMPOTENCY_WINDOW_SECONDS; an in-progress claim not touched for IDEMPOTENCY_LEASE_SECONDS is presumed abandoned
+IDEMPOTENCY_WINDOW_SECONDS = float(getattr(Config, "IDEMPOTENCY_WINDOW_SECONDS", 24 * 3600))
+IDEMPOTENCY_LEASE_SECONDS = float(getattr(Config, "IDEMPOTENCY_LEASE_SECONDS", 300))
+IDEMPOTENCY_KEY_MAX_CHARS = 255
+
+
+# ----------------------------------------------------------------------------- migrations
+#
+# Each step moves the schema from version N-1 to N (PRAGMA user_version). Steps
+# must also work on databases created before versioning (user_version 0 with
+# some tables already present), hence IF NOT EXISTS and the column checks.
+
+def _columns(conn, table: str) -> set:
+    return {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _m1_submissions(conn) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS submissions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_name TEXT,
+            sponsor TEXT,
+            payload_json TEXT,
+            result_json TEXT,
+            complexity_score REAL,
+            recommended_pm_count INTEGER,
+            created_at TEXT,
+            updated_at TEXT
+        )
+        """
+    )
+
+
+def _m2_scoring_version(conn) -> None:
+    if "scoring_version" not in _columns(conn, "submissions"):
+        conn.execute("ALTER TABLE submissions ADD COLUMN scoring_version TEXT")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS job_checkpoints (
+            job TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            version TEXT,
+            rows_done INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT
+        )
+        """
+    )
+
+
+def _m3_listing_indexes(conn) -> None:
+    # keyset pagination and the listing filters (see query_submissions)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_submissions_created ON submissions (created_at, id)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_submissions_sponsor ON submissions (sponsor COLLATE NOCASE, created_at, id)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_submissions_score ON submissions (complexity_score)")
+
+
+def _m4_blob_dictionaries(conn) -> None:
+    # zstd dictionaries referenced by compressed payload_json / result_json blobs (see blob_codec)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS blob_dictionaries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data BLOB NOT NULL,
+            created_at TEXT
+        )
+        """
+    )
+
+
+def _m5_search_index(conn) -> None:
+    # full-text index over charter text (see search_fields / search_submissions); rowid = submissions.id.
+    # result_json is a compressed blob, so rows are indexed by save_result rather than by an INSERT trigger;
+    # rows saved before this migration are indexed by `python -m app.services.search_index`.
+    conn.execute(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS submissions_fts USING fts5(
+            {", ".join(SEARCH_COLUMNS)},
+            tokenize = 'porter unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+        """
+    )
+    weights = ", ".join(f"{w:.1f}" for w in SEARCH_WEIGHTS)
+    conn.execute(f"INSERT INTO submissions_fts (submissions_fts, rank) VALUES ('rank', 'bm25({weights})')")
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS submissions_fts_delete AFTER DELETE ON submissions BEGIN
+            DELETE FROM submissions_fts WHERE rowid = old.id;
+        END
+        """
+    )
+    if conn.execute("SELECT 1 FROM submissions WHERE result_json IS NOT NULL LIMIT 1").fetchone():
+        logger.warning("Existing charters are not searchable until `python -m app.services.search_index` is run")
+
+
+def _m6_attribute_columns(conn) -> None:
+    # result_json is a compressed blob, so these are plain columns written by store_submission /
+    # save_result rather than JSON1 generated columns; `python -m app.services.attribute_backfill`
+    # fills them for rows saved earlier. The indexes cover aggregate_submissions, date range included,
+    # so grouping never reads table rows (whose blobs precede the score columns).
+    existing = _columns(conn, "submissions")
+    for name in ATTRIBUTE_FIELDS:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE submissions ADD COLUMN {name} TEXT")
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_submissions_{name} "
+            f"ON submissions ({name} COLLATE NOCASE, created_at, complexity_score, recommended_pm_count)"
+        )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_submissions_pm_count "
+        "ON submissions (recommended_pm_count, created_at, complexity_score)"
+    )
+    if conn.execute("SELECT 1 FROM submissions LIMIT 1").fetchone():
+        logger.warning("Existing submissions have no attribute columns until "
+                       "`python -m app.services.attribute_backfill` is run")
+
+
+def _m7_idempotency(conn) -> None:
+    # status: pending (generating) | done (result saved) | failed; NULL for rows stored outside claim_submission.
+    # The unique index is what makes concurrent claims of one key safe on every backend.
+    existing = _columns(conn, "submissions")
+    for name in ("status", "idempotency_key", "request_hash"):
+        if name not in existing:
+            conn.execute(f"ALTER TABLE submissions ADD COLUMN {name} TEXT")
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_submissions_idempotency_key "
+        "ON submissions (idempotency_key) WHERE idempotency_key IS NOT NULL"
+    )
+
+
+def _m8_updated_index(conn) -> None:
+    # incremental readers keyset on (updated_at, id) (see columnar_export); a NULL updated_at would never match
+    conn.execute("UPDATE submissions SET updated_at = COALESCE(created_at, '') WHERE updated_at IS NULL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_submissions_updated ON submissions (updated_at, id)")
+
+
+# KPI aggregates read by kpi_view. Triggers keep them current inside the transaction of every write
+# (API, write-behind, maintenance jobs), so KPI reads never scan submissions. A charter counts once its
+# result is saved; users count from their submissions. Per-day user figures only ever grow (a deleted or
+# reassigned submission is not taken back out of them); _rebuild_kpi recomputes everything exactly.
+_KPI_DEPARTMENT = "COALESCE(NULLIF({r}.department, ''), 'Unassigned')"
+_KPI_CHARTER_ADD = """
+    INSERT INTO kpi_department_charters (department, charters)
+    SELECT {department}, 1 WHERE {r}.result_json IS NOT NULL
+    ON CONFLICT (department) DO UPDATE SET charters = charters + 1;
+    INSERT INTO kpi_monthly_charters (month, charters)
+    SELECT substr({r}.created_at, 1, 7), 1 WHERE {r}.result_json IS NOT NULL AND {r}.created_at IS NOT NULL
+    ON CONFLICT (month) DO UPDATE SET charters = charters + 1;
+"""
+_KPI_CHARTER_REMOVE = """
+    UPDATE kpi_department_charters SET charters = charters - 1
+    WHERE {r}.result_json IS NOT NULL AND department = {department};
+    UPDATE kpi_monthly_charters SET charters = charters - 1
+    WHERE {r}.result_json IS NOT NULL AND month = substr({r}.created_at, 1, 7);
+"""
+# order matters: the day and user rows read kpi_users / kpi_user_days before they are updated
+_KPI_USER_ADD = """
+    INSERT INTO kpi_daily_users (day, total_users, new_users)
+    SELECT substr({r}.created_at, 1, 10), 1, NOT EXISTS (SELECT 1 FROM kpi_users WHERE user_id = {r}.user_id)
+    WHERE {r}.user_id IS NOT NULL AND {r}.created_at IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM kpi_user_days WHERE user_id = {r}.user_id AND day = substr({r}.created_at, 1, 10))
+    ON CONFLICT (day) DO UPDATE SET total_users = total_users + 1, new_users = new_users + excluded.new_users;
+    INSERT INTO kpi_users (user_id, first_day, last_day, submissions, active_days)
+    SELECT {r}.user_id, substr({r}.created_at, 1, 10), substr({r}.created_at, 1, 10), 1, 1
+    WHERE {r}.user_id IS NOT NULL AND {r}.created_at IS NOT NULL
+    ON CONFLICT (user_id) DO UPDATE SET
+        first_day = min(first_day, excluded.first_day), last_day = max(last_day, excluded.last_day),
+        submissions = submissions + 1,
+        active_days = active_days + NOT EXISTS (
+            SELECT 1 FROM kpi_user_days WHERE user_id = excluded.user_id AND day = excluded.first_day);
+    INSERT OR IGNORE INTO kpi_user_days (user_id, day)
+    SELECT {r}.user_id, substr({r}.created_at, 1, 10) WHERE {r}.user_id IS NOT NULL AND {r}.created_at IS NOT NULL;
+"""
+_KPI_USER_REMOVE = """
+    UPDATE kpi_users SET submissions = submissions - 1 WHERE {r}.user_id IS NOT NULL AND user_id = {r}.user_id;
+"""
+
+
+def _kpi_sql(template: str, r: str) -> str:
+    return template.format(r=r, department=_KPI_DEPARTMENT.format(r=r))
+
+
+def _rebuild_kpi(conn) -> None:
+    """Recompute the KPI aggregate tables from submissions (set-based; no blob is read)."""
+    for table in ("kpi_department_charters", "kpi_monthly_charters", "kpi_users", "kpi_user_days", "kpi_daily_users"):
+        conn.execute(f"DELETE FROM {table}")
+    department = _KPI_DEPARTMENT.format(r="submissions")
+    conn.execute(
+        f"""
+        INSERT INTO kpi_department_charters (department, charters)
+        SELECT MIN({department}), COUNT(*) FROM submissions WHERE result_json IS NOT NULL
+        GROUP BY {department} COLLATE NOCASE
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO kpi_monthly_charters (month, charters)
+        SELECT substr(created_at, 1, 7), COUNT(*) FROM submissions
+        WHERE result_json IS NOT NULL AND created_at IS NOT NULL GROUP BY 1
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO kpi_users (user_id, first_day, last_day, submissions, active_days)
+        SELECT MIN(user_id), MIN(substr(created_at, 1, 10)), MAX(substr(created_at, 1, 10)), COUNT(*),
+               COUNT(DISTINCT substr(created_at, 1, 10))
+        FROM submissions WHERE user_id IS NOT NULL AND created_at IS NOT NULL GROUP BY user_id COLLATE NOCASE
+        """
+    )
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO kpi_user_days (user_id, day)
+        SELECT user_id, substr(created_at, 1, 10) FROM submissions WHERE user_id IS NOT NULL AND created_at IS NOT NULL
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO kpi_daily_users (day, total_users, new_users)
+        SELECT d.day, COUNT(*), SUM(d.day = u.first_day)
+        FROM kpi_user_days d JOIN kpi_users u ON u.user_id = d.user_id GROUP BY d.day
+        """
+    )
+
+
+def _m9_kpi_aggregates(conn) -> None:
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS kpi_department_charters "
+        "(department TEXT PRIMARY KEY COLLATE NOCASE, charters INTEGER NOT NULL)"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS kpi_monthly_charters (month TEXT PRIMARY KEY, charters INTEGER NOT NULL)")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS kpi_users (
+            user_id TEXT PRIMARY KEY COLLATE NOCASE,
+            first_day TEXT NOT NULL,
+            last_day TEXT NOT NULL,
+            submissions INTEGER NOT NULL,
+            active_days INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_kpi_users_last_day ON kpi_users (last_day, submissions)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS kpi_user_days "
+        "(user_id TEXT COLLATE NOCASE, day TEXT, PRIMARY KEY (user_id, day)) WITHOUT ROWID"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS kpi_daily_users "
+        "(day TEXT PRIMARY KEY, total_users INTEGER NOT NULL, new_users INTEGER NOT NULL)"
+    )
+    triggers = {
+        "kpi_submissions_insert": ("AFTER INSERT", _kpi_sql(_KPI_CHARTER_ADD, "new") + _kpi_sql(_KPI_USER_ADD, "new")),
+        "kpi_submissions_charter": (
+            "AFTER UPDATE OF result_json, department, created_at",
+            _kpi_sql(_KPI_CHARTER_REMOVE, "old") + _kpi_sql(_KPI_CHARTER_ADD, "new"),
+        ),
+        "kpi_submissions_user": (
+            "AFTER UPDATE OF user_id",
+            _kpi_sql(_KPI_USER_REMOVE, "old") + _kpi_sql(_KPI_USER_ADD, "new"),
+        ),
+        "kpi_submissions_delete": (
+            "AFTER DELETE", _kpi_sql(_KPI_CHARTER_REMOVE, "old") + _kpi_sql(_KPI_USER_REMOVE, "old"),
+        ),
+    }
+    for name, (event, body) in triggers.items():
+        when = " WHEN old.user_id IS NOT new.user_id" if name == "kpi_submissions_user" else ""
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} ON submissions{when} BEGIN {body} END")
+    _rebuild_kpi(conn)  # existing rows; plain columns only, so this is quick
+
+
+# Rollup buckets for ranged KPI queries (kpi_rollup): charters per day, summed into weeks and months when
+# read, and distinct active users per week and month, which cannot be summed from days. A period is
+# named by its first day (weeks start on Monday). Kept by their own triggers, alongside the ones above;
+# like the per-day user figures, the per-period ones only ever grow.
+KPI_PERIODS = {
+    "week": "date(substr({r}.created_at, 1, 10), '-6 days', 'weekday 1')",
+    "month": "substr({r}.created_at, 1, 7) || '-01'",
+}
+_KPI_DAY_ADD = """
+    INSERT INTO kpi_charter_days (day, charters)
+    SELECT substr({r}.created_at, 1, 10), 1 WHERE {r}.result_json IS NOT NULL AND {r}.created_at IS NOT NULL
+    ON CONFLICT (day) DO UPDATE SET charters = charters + 1;
+"""
+_KPI_DAY_REMOVE = """
+    UPDATE kpi_charter_days SET charters = charters - 1
+    WHERE {r}.result_json IS NOT NULL AND day = substr({r}.created_at, 1, 10);
+"""
+_KPI_PERIOD_ADD = """
+    INSERT INTO kpi_period_users (grain, period, total_users)
+    SELECT '{grain}', {period}, 1 WHERE {r}.user_id IS NOT NULL AND {period} IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM kpi_user_periods WHERE grain = '{grain}' AND period = {period} AND user_id = {r}.user_id)
+    ON CONFLICT (grain, period) DO UPDATE SET total_users = total_users + 1;
+    INSERT OR IGNORE INTO kpi_user_periods (grain, period, user_id)
+    SELECT '{grain}', {period}, {r}.user_id WHERE {r}.user_id IS NOT NULL AND {period} IS NOT NULL;
+"""
+
+
+def _kpi_periods_sql(r: str) -> str:
+    return "".join(
+        _KPI_PERIOD_ADD.format(r=r, grain=grain, period=period.format(r=r)) for grain, period in KPI_PERIODS.items()
+    )
+
+
+def _rebuild_kpi_rollups(conn) -> None:
+    """Recompute the rollup bucket tables from submissions."""
+    for table in ("kpi_charter_days", "kpi_user_periods", "kpi_period_users"):
+        conn.execute(f"DELETE FROM {table}")
+    conn.execute(
+        """
+        INSERT INTO kpi_charter_days (day, charters)
+        SELECT substr(created_at, 1, 10), COUNT(*) FROM submissions
+        WHERE result_json IS NOT NULL AND created_at IS NOT NULL GROUP BY 1
+        """
+    )
+    for grain, period in KPI_PERIODS.items():
+        period = period.format(r="submissions")
+        conn.execute(
+            f"INSERT OR IGNORE INTO kpi_user_periods (grain, period, user_id) SELECT '{grain}', {period}, user_id "
+            f"FROM submissions WHERE user_id IS NOT NULL AND {period} IS NOT NULL"
+        )
+    conn.execute(
+        "INSERT INTO kpi_period_users (grain, period, total_users) "
+        "SELECT grain, period, COUNT(*) FROM kpi_user_periods GROUP BY grain, period"
+    )
+
+
+def _m10_kpi_rollups(conn) -> None:
+    conn.execute("CREATE TABLE IF NOT EXISTS kpi_charter_days (day TEXT PRIMARY KEY, charters INTEGER NOT NULL)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS kpi_user_periods "
+        "(grain TEXT, period TEXT, user_id TEXT COLLATE NOCASE, PRIMARY KEY (grain, period, user_id)) WITHOUT ROWID"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS kpi_period_users "
+        "(grain TEXT, period TEXT, total_users INTEGER NOT NULL, PRIMARY KEY (grain, period)) WITHOUT ROWID"
+    )
+    triggers = {
+        "kpi_rollup_insert": ("AFTER INSERT", _KPI_DAY_ADD.format(r="new") + _kpi_periods_sql("new")),
+        "kpi_rollup_charter": (
+            "AFTER UPDATE OF result_json, created_at",
+            _KPI_DAY_REMOVE.format(r="old") + _KPI_DAY_ADD.format(r="new"),
+        ),
+        "kpi_rollup_user": ("AFTER UPDATE OF user_id", _kpi_periods_sql("new")),
+        "kpi_rollup_delete": ("AFTER DELETE", _KPI_DAY_REMOVE.format(r="old")),
+    }
+    for name, (event, body) in triggers.items():
+        when = " WHEN old.user_id IS NOT new.user_id" if name == "kpi_rollup_user" else ""
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} ON submissions{when} BEGIN {body} END")
+    _rebuild_kpi_rollups(conn)
+
+
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _m1_submissions),
+    (2, _m2_scoring_version),
+    (3, _m3_listing_indexes),
+    (4, _m4_blob_dictionaries),
+    (5, _m5_search_index),
+    (6, _m6_attribute_columns),
+    (7, _m7_idempotency),
+    (8, _m8_updated_index),
+    (9, _m9_kpi_aggregates),
+    (10, _m10_kpi_rollups),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+# ----------------------------------------------------------------------------- connections
+
+def _connect(path: Optional[str] = None, readonly: bool = False) -> sqlite3.Connection:
+    """Open a new connection with the tuned pragmas. Callers own it and must close it."""
+    path = path or DB_PATH
+    if readonly:
+        conn = sqlite3.connect(f"file:{quote(path)}?mode=ro", uri=True, timeout=BUSY_TIMEOUT_MS / 1000,
+                               check_same_thread=False, cached_statements=STATEMENT_CACHE)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE)
     conn.row_factory = sqlite3.Row
     try:
-        cur = conn.cursor()
-        # Better concurrency and foreign key enforcement
-        cur.execute("PRAGMA journal_mode=WAL;")
-        cur.execute("PRAGMA foreign_keys=ON;")
-        cur.close()
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA synchronous = {SYNCHRONOUS}")  # NORMAL is durable enough under WAL
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA foreign_keys = ON")
+        if readonly:
+            conn.execute("PRAGMA query_only = ON")
     except Exception:
         logger.exception("Failed to set sqlite pragmas")
     return conn
 
 
-def _ensure_db():
-    """Create submissions table if not exists (convenience for dev)."""
+def migrate(path: Optional[str] = None) -> int:
+    """Apply pending schema migrations to the database. Returns the schema version."""
+    conn = _connect(path)
+    conn.isolation_level = None  # explicit transaction below
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return SCHEMA_VERSION
+        conn.execute("PRAGMA journal_mode=WAL")  # persistent; set once with the schema
+        conn.execute("BEGIN IMMEDIATE")  # another process may be migrating the same file
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for target, step in MIGRATIONS:
+                if target > version:
+                    step(conn)
+                    logger.info("Applied storage migration %d (%s)", target, step.__name__)
+            conn.execute(f"PRAGMA user_version = {max(version, SCHEMA_VERSION)}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return SCHEMA_VERSION
+    finally:
+        conn.close()
+
+
+class _ThreadConns:
+    """One thread's pooled connections, (path, readonly) -> connection; closed when the thread exits."""
+
+    __slots__ = ("pid", "conns", "__weakref__")
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.conns: Dict[Tuple[str, bool], sqlite3.Connection] = {}
+
+
+def _close_conns(conns: Dict[Tuple[str, bool], sqlite3.Connection]) -> None:
+    for conn in list(conns.values()):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    conns.clear()
+
+
+_lock = threading.Lock()
+_migrated: set = set()  # database paths migrated by this process
+_local = threading.local()  # .pool: the calling thread's _ThreadConns
+_pools: "weakref.WeakSet[_ThreadConns]" = weakref.WeakSet()  # of live threads, for close_all
+_pool_pid = os.getpid()
+
+
+def _ensure_db() -> None:
+    """Migrate the current database once per process (normally already done by init_app)."""
+    path = DB_PATH
+    if path in _migrated:
+        return
+    with _lock:
+        if path not in _migrated:
+            try:
+                migrate(path)
+            except Exception:
+                logger.exception("Failed to ensure DB schema")
+                raise
+            _migrated.add(path)
+
+
+def _get_conn(readonly: bool = False) -> sqlite3.Connection:
+    """
+    Long-lived connection for the calling thread; do not close it. Statements
+    are compiled once per connection and reused from sqlite3's statement cache.
+    Read-only connections never take the write lock, so GETs are not queued
+    behind writers under WAL. The connections live in a thread-local and are
+    closed when their thread exits, so a server that starts a thread per
+    request does not accumulate one open connection per thread it ever ran.
+    """
+    global _pool_pid
+    if _pool_pid != os.getpid():  # forked: inherited connections must not be used
+        with _lock:
+            if _pool_pid != os.getpid():
+                for pool in list(_pools):
+                    pool.conns.clear()
+                _pools.clear()
+                _migrated.clear()
+                _pool_pid = os.getpid()
+    pool = getattr(_local, "pool", None)
+    if pool is None or pool.pid != _pool_pid:
+        pool = _ThreadConns()
+        weakref.finalize(pool, _close_conns, pool.conns)  # runs when the thread's locals are released
+        with _lock:
+            _pools.add(pool)
+        _local.pool = pool
+    key = (DB_PATH, readonly)
+    conn = pool.conns.get(key)
+    if conn is None:
+        _ensure_db()
+        conn = pool.conns[key] = _connect(DB_PATH, readonly)
+    return conn
+
+
+def close_all() -> None:
+    """Stop the write-behind writer and close every pooled connection (shutdown, tests)."""
+    shutdown_writer()
+    with _lock:
+        pools = list(_pools)
+        engines = list(_backends.values())
+        _backends.clear()
+    for backend in engines:
+        backend.close()
+    for pool in pools:
+        _close_conns(pool.conns)
+
+
+def init_app(app) -> None:
+    """Apply migrations at startup instead of on the first request."""
+    backend = get_backend()
+    backend.migrate()
+    logger.info("Submission storage: %s backend", backend.name)
+
+
+# ----------------------------------------------------------------------------- blobs
+
+_dictionaries: Dict[Tuple[str, int], bytes] = {}                 # (path, id) -> dictionary; rows are immutable
+_latest_dictionary: Dict[str, Optional[blob_codec.Dictionary]] = {}  # path -> dictionary new blobs use
+
+
+def _dictionary(dict_id: int) -> Optional[bytes]:
+    key = (DB_PATH, dict_id)
+    data = _dictionaries.get(key)
+    if data is None:
+        row = _get_conn(readonly=True).execute("SELECT data FROM blob_dictionaries WHERE id = ?", (dict_id,)).fetchone()
+        if row is None:
+            return None
+        data = _dictionaries[key] = bytes(row["data"])
+    return data
+
+
+def _write_dictionary() -> Optional[blob_codec.Dictionary]:
+    if blob_codec.codec() != "zstd":
+        return None
+    path = DB_PATH
+    if path not in _latest_dictionary:
+        row = _get_conn(readonly=True).execute(
+            "SELECT id, data FROM blob_dictionaries ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        _latest_dictionary[path] = (row["id"], bytes(row["data"])) if row else None
+    return _latest_dictionary[path]
+
+
+def add_dictionary(data: bytes) -> int:
+    """Store a trained compression dictionary; blobs written from now on use it."""
     conn = _get_conn()
     try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS submissions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                project_name TEXT,
-                sponsor TEXT,
-                payload_json TEXT,
-                result_json TEXT,
-                complexity_score REAL,
-                recommended_pm_count INTEGER,
-                created_at TEXT,
-                updated_at TEXT
-            )
-            """
+        cur = conn.execute(
+            "INSERT INTO blob_dictionaries (data, created_at) VALUES (?, ?)",
+            (data, datetime.now(timezone.utc).isoformat()),
         )
         conn.commit()
-        cur.close()
     except Exception:
-        logger.exception("Failed to ensure DB schema")
+        conn.rollback()
         raise
-    finally:
-        conn.close()
+    dict_id = int(cur.lastrowid)
+    _dictionaries[(DB_PATH, dict_id)] = data
+    _latest_dictionary[DB_PATH] = (dict_id, data)
+    return dict_id
 
 
-def store_submission(payload: Dict[str, Any]) -> int:
-    """
-    Insert the incoming submission payload (raw JSON).
-    Returns the inserted row id (int).
-    """
-    _ensure_db()
+def encode_blob(text: str) -> bytes:
+    """Stored (compressed) form of a JSON text for payload_json / result_json."""
+    return blob_codec.encode(text, _write_dictionary())
+
+
+def decode_blob(value: Any) -> Optional[str]:
+    """Inverse of `encode_blob`; legacy plain-text values are returned unchanged."""
+    return blob_codec.decode(value, _dictionary)
+
+
+_INSERT_SUBMISSION = """
+    INSERT INTO submissions
+    (project_name, sponsor, payload_json, created_at, updated_at, industry, complexity, duration, user_id, department)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+# attributes the result does not state keep the value taken from the payload
+_UPDATE_RESULT = """
+    UPDATE submissions
+    SET result_json = ?, complexity_score = ?, recommended_pm_count = ?, updated_at = ?, status = 'done',
+        industry = COALESCE(?, industry), complexity = COALESCE(?, complexity), duration = COALESCE(?, duration),
+        user_id = COALESCE(?, user_id), department = COALESCE(?, department)
+    WHERE id = ?
+"""
+
+
+def _submission_params(payload: Dict[str, Any]) -> Tuple[Any, ...]:
+    project_name = payload.get("project_title") or payload.get("project_name") or None
+    sponsor = payload.get("sponsor") or None
+    payload_blob = encode_blob(json.dumps(payload, ensure_ascii=False))
+    created_at = datetime.now(timezone.utc).isoformat()
+    attributes = charter_attributes(payload)
+    return (project_name, sponsor, payload_blob, created_at, created_at) + tuple(attributes[f] for f in ATTRIBUTE_FIELDS)
+
+
+# attribute column -> keys it is read from, in order, in a submission payload or a charter result
+_ATTRIBUTE_KEYS = {
+    "industry": ("industry", "domain"),
+    "complexity": ("complexity",),
+    "duration": ("duration", "timeline"),
+    "user_id": ("user_id", "userId"),
+    "department": ("department",),
+}
+_ATTRIBUTE_MAX_CHARS = 200
+
+
+def charter_attributes(doc: Any) -> Dict[str, Optional[str]]:
+    """ATTRIBUTE_FIELDS of a payload or result dict; None where absent or not a scalar."""
+    out: Dict[str, Optional[str]] = dict.fromkeys(ATTRIBUTE_FIELDS)
+    if not isinstance(doc, dict):
+        return out
+    for field, keys in _ATTRIBUTE_KEYS.items():
+        for key in keys:
+            value = doc.get(key)
+            if isinstance(value, (str, int, float)) and not isinstance(value, bool) and str(value).strip():
+                out[field] = str(value).strip()[:_ATTRIBUTE_MAX_CHARS]
+                break
+    return out
+
+
+def result_scores(result: Any) -> Tuple[Optional[float], Optional[int]]:
+    """(complexity_score, recommended_pm_count) columns for a charter result."""
+    complexity = None
+    pm_count = None
+    if isinstance(result, dict):
+        try:
+            complexity = float(result.get("complexity_score") or result.get("total_score") or None)
+        except Exception:
+            complexity = None
+        try:
+            pm_count = int(result.get("recommended_pm_count") or result.get("pm_count") or 0)
+        except Exception:
+            pm_count = None
+    return complexity, pm_count
+
+
+_SEARCH_KEYS = {
+    "title": ("project_title", "project_name"),
+    "description": ("description", "project_description"),
+    "objectives": ("objectives",),
+    "risks": ("risks_and_mitigation", "risks"),
+}
+_UNSEARCHED_KEYS = frozenset(("project_id", "created_at", "diagnostics", "complexity_score", "total_score",
+                              "recommended_pm_count"))
+
+
+def _flatten_text(value: Any, out: List[str]) -> None:
+    if isinstance(value, dict):
+        for v in value.values():
+            _flatten_text(v, out)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _flatten_text(v, out)
+    elif value is not None and not isinstance(value, bool) and str(value).strip():
+        out.append(str(value).strip())
+
+
+def search_fields(result: Any) -> Optional[Tuple[str, ...]]:
+    """Text of a charter result for each of SEARCH_COLUMNS, or None if there is nothing to index."""
+    if not isinstance(result, dict):
+        return None
+    fields, used = [], set(_UNSEARCHED_KEYS)
+    for column in SEARCH_COLUMNS[:-1]:
+        out: List[str] = []
+        for key in _SEARCH_KEYS[column]:
+            _flatten_text(result.get(key), out)
+            used.add(key)
+        fields.append("\n".join(out))
+    body: List[str] = []
+    _flatten_text({k: v for k, v in result.items() if k not in used}, body)
+    fields.append("\n".join(body))
+    return tuple(fields) if any(fields) else None
+
+
+_SEARCH_DELETE = "DELETE FROM submissions_fts WHERE rowid = ?"
+_SEARCH_INSERT = (
+    f"INSERT INTO submissions_fts (rowid, {', '.join(SEARCH_COLUMNS)}) "
+    f"VALUES (?, {', '.join('?' for _ in SEARCH_COLUMNS)})"
+)
+
+
+def _index_for_search(conn, submission_id: int, fields: Optional[Tuple[str, ...]]) -> None:
+    """Replace the submission's full-text row; call inside the transaction that saved the result."""
+    conn.execute(_SEARCH_DELETE, (submission_id,))
+    if fields is not None:
+        conn.execute(_SEARCH_INSERT, (submission_id,) + fields)
+
+
+def _result_params(submission_id: int, result: Dict[str, Any]) -> Tuple[Any, ...]:
+    try:
+        result_text = json.dumps(result, ensure_ascii=False)
+    except Exception:
+        logger.exception("Failed to JSON-serialize result; storing stringified version")
+        result_text = str(result)
+
+    result_blob = encode_blob(result_text)  # compressed, never truncated
+    complexity, pm_count = result_scores(result)
+    updated_at = datetime.now(timezone.utc).isoformat()
+    attributes = charter_attributes(result)
+    return (result_blob, complexity, pm_count, updated_at) + tuple(attributes[f] for f in ATTRIBUTE_FIELDS) + (submission_id,)
+
+
+def _after_result_saved(submission_id: int, updated: int) -> None:
+    if updated == 0:
+        logger.warning("save_result: no submission found with id=%s", submission_id)
+    else:
+        render_cache.on_result_saved(submission_id)
+
+
+def _sqlite_store_submission(payload: Dict[str, Any]) -> int:
+    if WRITE_BEHIND:
+        return store_submission_async(payload).result(WRITE_RESULT_TIMEOUT)
     conn = _get_conn()
     try:
         cur = conn.cursor()
-        project_name = payload.get("project_title") or payload.get("project_name") or None
-        sponsor = payload.get("sponsor") or None
-        payload_text = json.dumps(payload, ensure_ascii=False)
-
-        created_at = datetime.now(timezone.utc).isoformat()
-        cur.execute(
-            """
-            INSERT INTO submissions
-            (project_name, sponsor, payload_json, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (project_name, sponsor, payload_text, created_at, created_at),
-        )
+        cur.execute(_INSERT_SUBMISSION, _submission_params(payload))
         rowid = cur.lastrowid
         conn.commit()
         cur.close()
@@ -91,160 +779,672 @@ def store_submission(payload: Dict[str, Any]) -> int:
         conn.rollback()
         logger.exception("Failed to store submission")
         raise
-    finally:
-        conn.close()
 
 
-def save_result(submission_id: int, result: Dict[str, Any]) -> None:
-    """
-    Save LLM result (a dict) for the given submission id.
-    Updates result_json, complexity_score and recommended_pm_count where available.
-    """
-    _ensure_db()
+def _sqlite_store_submissions(payloads: Iterable[Dict[str, Any]]) -> List[int]:
+    params = [_submission_params(p) for p in payloads]
+    if WRITE_BEHIND:
+        def insert_all(conn):
+            return [int(conn.execute(_INSERT_SUBMISSION, p).lastrowid) for p in params]
+        return _get_writer().submit(insert_all).result(WRITE_RESULT_TIMEOUT)
     conn = _get_conn()
     try:
-        cur = conn.cursor()
-        try:
-            result_text = json.dumps(result, ensure_ascii=False)
-        except Exception:
-            logger.exception("Failed to JSON-serialize result; storing stringified version")
-            result_text = str(result)
+        ids = [int(conn.execute(_INSERT_SUBMISSION, p).lastrowid) for p in params]  # one transaction
+        conn.commit()
+        logger.info("Stored %d submissions", len(ids))
+        return ids
+    except Exception:
+        conn.rollback()
+        logger.exception("Failed to store submissions")
+        raise
 
-        # Truncate if too large (or switch to blob storage in future)
-        if len(result_text) > MAX_RESULT_CHARS:
-            logger.warning(
-                "Result JSON too large (%d chars); truncating to %d chars", len(result_text), MAX_RESULT_CHARS
-            )
-            result_text = result_text[:MAX_RESULT_CHARS]
 
-        complexity = None
-        pm_count = None
-        if isinstance(result, dict):
-            try:
-                complexity = float(result.get("complexity_score") or result.get("total_score") or None)
-            except Exception:
-                complexity = None
-            try:
-                pm_count = int(result.get("recommended_pm_count") or result.get("pm_count") or 0)
-            except Exception:
-                pm_count = None
-
-        updated_at = datetime.now(timezone.utc).isoformat()
-        cur.execute(
-            """
-            UPDATE submissions
-            SET result_json = ?, complexity_score = ?, recommended_pm_count = ?, updated_at = ?
-            WHERE id = ?
-            """,
-            (result_text, complexity, pm_count, updated_at, submission_id),
-        )
-        if cur.rowcount == 0:
-            logger.warning("save_result: no submission found with id=%s", submission_id)
+def _sqlite_save_result(submission_id: int, result: Dict[str, Any]) -> int:
+    if WRITE_BEHIND:
+        return save_result_async(submission_id, result).result(WRITE_RESULT_TIMEOUT)
+    params, fields = _result_params(submission_id, result), search_fields(result)
+    conn = _get_conn()
+    try:
+        cur = conn.cursor()
+        cur.execute(_UPDATE_RESULT, params)
+        updated = cur.rowcount
+        if updated:
+            _index_for_search(conn, submission_id, fields)
         conn.commit()
         cur.close()
+        _after_result_saved(submission_id, updated)
+        return updated
     except Exception:
         conn.rollback()
         logger.exception("Failed to save result for submission_id=%s", submission_id)
         raise
-    finally:
-        conn.close()
 
 
-def list_submissions(limit: int = 100) -> List[Dict[str, Any]]:
-    """Return most recent submissions (as plain dicts)."""
-    _ensure_db()
+_SELECT_CLAIM = "SELECT id, status, request_hash, created_at, updated_at FROM submissions WHERE idempotency_key = ?"
+_INSERT_CLAIM = """
+    INSERT INTO submissions
+    (project_name, sponsor, payload_json, created_at, updated_at, industry, complexity, duration, user_id, department,
+     status, idempotency_key, request_hash)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending', ?, ?)
+"""
+_FAIL_SUBMISSION = "UPDATE submissions SET status = 'failed', updated_at = ? WHERE id = ? AND status = 'pending'"
+
+
+def request_hash(payload: Dict[str, Any]) -> str:
+    """Fingerprint of a request payload; a key reused with a different payload is a conflict."""
+    text = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def claim_action(row: Any, req_hash: Optional[str], window_from: str, lease_from: str) -> str:
+    """
+    What a new request does about an existing claim of its key: "expire" (older
+    than the window: release the key), "conflict" (different payload), "done"
+    (replay the stored result), "pending" (still generating) or "take" (failed
+    or abandoned: generate again in the same row).
+    """
+    if row["created_at"] < window_from:
+        return "expire"
+    if row["request_hash"] != req_hash:
+        return "conflict"
+    if row["status"] == "done":
+        return "done"
+    if row["status"] == "pending" and row["updated_at"] >= lease_from:
+        return "pending"
+    return "take"
+
+
+def _claim_in(conn, params: Tuple[Any, ...], key: Optional[str], req_hash: Optional[str],
+              window_from: str, lease_from: str) -> Claim:
+    """Claim inside a write transaction (BEGIN IMMEDIATE), so the lookup and the insert are atomic."""
+    row = conn.execute(_SELECT_CLAIM, (key,)).fetchone() if key is not None else None
+    action = "new" if row is None else claim_action(row, req_hash, window_from, lease_from)
+    if action == "expire":
+        conn.execute("UPDATE submissions SET idempotency_key = NULL WHERE id = ?", (row["id"],))
+        action = "new"
+    if action == "new":
+        return Claim(int(conn.execute(_INSERT_CLAIM, params + (key, req_hash)).lastrowid), "new")
+    if action == "take":
+        conn.execute("UPDATE submissions SET status = 'pending', updated_at = ? WHERE id = ?", (params[4], row["id"]))
+        return Claim(row["id"], "new")
+    return Claim(row["id"], action)
+
+
+def _sqlite_claim_submission(payload: Dict[str, Any], key: Optional[str], req_hash: Optional[str],
+                             window_from: str, lease_from: str) -> Claim:
+    params = _submission_params(payload)
+    if WRITE_BEHIND:
+        future = _get_writer().submit(lambda conn: _claim_in(conn, params, key, req_hash, window_from, lease_from))
+        return future.result(WRITE_RESULT_TIMEOUT)
     conn = _get_conn()
     try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, project_name, sponsor, payload_json, result_json, complexity_score, recommended_pm_count, created_at, updated_at
-            FROM submissions
-            ORDER BY id DESC
-            LIMIT ?
-            """,
-            (limit,),
-        )
-        rows = cur.fetchall()
-        cur.close()
+        conn.execute("BEGIN IMMEDIATE")
+        claim = _claim_in(conn, params, key, req_hash, window_from, lease_from)
+        conn.commit()
+        return claim
+    except Exception:
+        conn.rollback()
+        logger.exception("Failed to claim submission (key=%r)", key)
+        raise
 
-        out = []
-        for r in rows:
-            payload = None
-            result = None
-            try:
-                payload = json.loads(r["payload_json"]) if r["payload_json"] else None
-            except Exception:
-                payload = r["payload_json"]
-            try:
-                result = json.loads(r["result_json"]) if r["result_json"] else None
-            except Exception:
-                result = r["result_json"]
-
-            out.append(
-                {
-                    "id": r["id"],
-                    "project_name": r["project_name"],
-                    "sponsor": r["sponsor"],
-                    "payload": payload,
-                    "result": result,
-                    "complexity_score": r["complexity_score"],
-                    "recommended_pm_count": r["recommended_pm_count"],
-                    "created_at": r["created_at"],
-                    "updated_at": r["updated_at"],
-                }
+
+def _sqlite_fail_submission(submission_id: int) -> int:
+    params = (datetime.now(timezone.utc).isoformat(), submission_id)
+    if WRITE_BEHIND:
+        future = _get_writer().submit(lambda conn: conn.execute(_FAIL_SUBMISSION, params).rowcount)
+        return future.result(WRITE_RESULT_TIMEOUT)
+    conn = _get_conn()
+    try:
+        updated = conn.execute(_FAIL_SUBMISSION, params).rowcount
+        conn.commit()
+        return updated
+    except Exception:
+        conn.rollback()
+        logger.exception("Failed to mark submission id=%s as failed", submission_id)
+        raise
+
+
+# ----------------------------------------------------------------------------- write-behind
+
+_writer: Optional[write_behind.Writer] = None
+_writer_path: Optional[str] = None
+
+
+def _get_writer() -> write_behind.Writer:
+    global _writer, _writer_path
+    _ensure_db()
+    path = DB_PATH
+    writer = _writer
+    if writer is not None and _writer_path == path and not writer.closed:
+        return writer
+    with _lock:
+        if _writer is None or _writer_path != path or _writer.closed:  # a writer that died is replaced
+            if _writer is not None:
+                _writer.close()
+            _writer = write_behind.Writer(
+                lambda: _connect(path), batch_rows=WRITE_BATCH_ROWS, batch_ms=WRITE_BATCH_MS,
+                queue_size=WRITE_QUEUE_SIZE, put_timeout=WRITE_PUT_TIMEOUT,
             )
-        return out
+            _writer_path = path
+        return _writer
+
+
+def store_submission_async(payload: Dict[str, Any]) -> Future:
+    """Queue an insert on the group-commit writer; the future resolves to the new row id."""
+    params = _submission_params(payload)  # serialize and compress on the caller's thread
+
+    def insert(conn):
+        return int(conn.execute(_INSERT_SUBMISSION, params).lastrowid)
+
+    return _get_writer().submit(insert, after_commit=lambda rowid: logger.info(f"Stored submission id={rowid}"))
+
+
+def save_result_async(submission_id: int, result: Dict[str, Any]) -> Future:
+    """Queue a result update on the group-commit writer; the future resolves to the updated row count (0 or 1)."""
+    params, fields = _result_params(submission_id, result), search_fields(result)
+
+    def update(conn):
+        updated = conn.execute(_UPDATE_RESULT, params).rowcount
+        if updated:
+            _index_for_search(conn, submission_id, fields)
+        return updated
+
+    return _get_writer().submit(update, after_commit=lambda updated: _after_result_saved(submission_id, updated))
+
+
+def flush_writes(timeout: Optional[float] = None) -> None:
+    """Wait until every queued write has been committed (no-op without write-behind)."""
+    if _writer is not None:
+        _writer.flush(timeout)
+
+
+def shutdown_writer() -> None:
+    """Commit queued writes and stop the writer thread."""
+    global _writer
+    with _lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
+
+
+atexit.register(shutdown_writer)
+
+
+SUMMARY_FIELDS = (
+    "id", "project_name", "sponsor", "complexity_score", "recommended_pm_count", "created_at", "updated_at", "status",
+) + ATTRIBUTE_FIELDS
+BLOB_FIELDS = {"payload": "payload_json", "result": "result_json"}  # output key -> column, decoded only on request
+
+
+def _decode(value: Any) -> Any:
+    text = decode_blob(value)
+    try:
+        return json.loads(text) if text else None
+    except Exception:
+        return text
+
+
+def _pack_cursor(key: Any, submission_id: int) -> str:
+    raw = json.dumps([key, submission_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _unpack_cursor(cursor: str) -> Tuple[Any, int]:
+    try:
+        key, submission_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return key, int(submission_id)
+    except Exception as e:
+        raise ValueError(f"invalid cursor {cursor!r}") from e
+
+
+def encode_cursor(created_at: str, submission_id: int) -> str:
+    return _pack_cursor(created_at, submission_id)
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Inverse of `encode_cursor`; raises ValueError for a malformed cursor."""
+    created_at, submission_id = _unpack_cursor(cursor)
+    return str(created_at), submission_id
+
+
+def _sqlite_filters(sponsor, min_score, max_score, created_from, created_to,
+                    attributes) -> Tuple[List[str], List[Any]]:
+    where, params = [], []  # type: List[str], List[Any]
+    if sponsor:
+        where.append("sponsor = ? COLLATE NOCASE")
+        params.append(sponsor)
+    if min_score is not None:
+        where.append("complexity_score >= ?")
+        params.append(min_score)
+    if max_score is not None:
+        where.append("complexity_score < ?")
+        params.append(max_score)
+    if created_from:
+        where.append("created_at >= ?")
+        params.append(created_from)
+    if created_to:
+        where.append("created_at < ?")
+        params.append(created_to)
+    for name, value in (attributes or {}).items():
+        if name not in ATTRIBUTE_FIELDS:
+            raise ValueError(f"unknown attribute {name!r}")
+        where.append(f"{name} = ? COLLATE NOCASE")
+        params.append(value)
+    return where, params
+
+
+def _sqlite_query_submissions(limit, cursor, blobs, sponsor, min_score, max_score, created_from, created_to,
+                              attributes=None):
+    columns = list(SUMMARY_FIELDS) + [BLOB_FIELDS[b] for b in blobs]
+    where, params = _sqlite_filters(sponsor, min_score, max_score, created_from, created_to, attributes)
+    if cursor:
+        where.insert(0, "(created_at, id) < (?, ?)")
+        params[:0] = list(cursor)
+    sql = (
+        f"SELECT {', '.join(columns)} FROM submissions"
+        + (f" WHERE {' AND '.join(where)}" if where else "")
+        + " ORDER BY created_at DESC, id DESC LIMIT ?"
+    )
+    conn = _get_conn(readonly=True)
+    try:
+        rows = conn.execute(sql, params + [limit]).fetchall()
     except Exception:
         logger.exception("Failed to list submissions")
         raise
-    finally:
-        conn.close()
+    out = []
+    for r in rows:
+        item = {f: r[f] for f in SUMMARY_FIELDS}
+        for b in blobs:
+            item[b] = _decode(r[BLOB_FIELDS[b]])
+        out.append(item)
+    return out
 
 
-def get_submission(submission_id: int) -> Optional[Dict[str, Any]]:
-    """Return a single submission by id or None."""
-    _ensure_db()
-    conn = _get_conn()
+def _sqlite_aggregate_submissions(group_by, sponsor, min_score, max_score, created_from, created_to,
+                                  attributes) -> List[Dict[str, Any]]:
+    if group_by not in GROUP_FIELDS:
+        raise ValueError(f"group_by must be one of: {', '.join(GROUP_FIELDS)}")
+    where, params = _sqlite_filters(sponsor, min_score, max_score, created_from, created_to, attributes)
+    group = group_by if group_by == "recommended_pm_count" else f"{group_by} COLLATE NOCASE"
+    sql = (
+        f"SELECT {group_by} AS value, COUNT(*) AS count, AVG(complexity_score) AS avg_complexity_score, "
+        "MIN(complexity_score) AS min_complexity_score, MAX(complexity_score) AS max_complexity_score, "
+        "AVG(recommended_pm_count) AS avg_pm_count FROM submissions"
+        + (f" WHERE {' AND '.join(where)}" if where else "")
+        + f" GROUP BY {group} ORDER BY count DESC, value"
+    )
+    conn = _get_conn(readonly=True)
     try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, project_name, sponsor, payload_json, result_json, complexity_score, recommended_pm_count, created_at, updated_at
-            FROM submissions
-            WHERE id = ?
-            """,
-            (submission_id,),
-        )
-        row = cur.fetchone()
-        cur.close()
+        return [dict(r) for r in conn.execute(sql, params).fetchall()]
+    except Exception:
+        logger.exception("Failed to aggregate submissions by %s", group_by)
+        raise
+
+
+def _sqlite_get_submission(submission_id: int, blobs: Sequence[str], raw: bool = False) -> Optional[Dict[str, Any]]:
+    conn = _get_conn(readonly=True)
+    try:
+        columns = list(SUMMARY_FIELDS) + [BLOB_FIELDS[b] for b in blobs]
+        row = conn.execute(f"SELECT {', '.join(columns)} FROM submissions WHERE id = ?", (submission_id,)).fetchone()
         if not row:
             return None
-
-        payload = None
-        result = None
-        try:
-            payload = json.loads(row["payload_json"]) if row["payload_json"] else None
-        except Exception:
-            payload = row["payload_json"]
-        try:
-            result = json.loads(row["result_json"]) if row["result_json"] else None
-        except Exception:
-            result = row["result_json"]
-
-        return {
-            "id": row["id"],
-            "project_name": row["project_name"],
-            "sponsor": row["sponsor"],
-            "payload": payload,
-            "result": result,
-            "complexity_score": row["complexity_score"],
-            "recommended_pm_count": row["recommended_pm_count"],
-            "created_at": row["created_at"],
-            "updated_at": row["updated_at"],
-        }
+        out = {f: row[f] for f in SUMMARY_FIELDS}
+        for b in blobs:
+            out[b] = decode_blob(row[BLOB_FIELDS[b]]) if raw else _decode(row[BLOB_FIELDS[b]])
+        return out
     except Exception:
         logger.exception("Failed to get submission id=%s", submission_id)
         raise
+
+
+def _sqlite_iter_submissions(blobs: Sequence[str], since_id: Optional[int], created_from: Optional[str],
+                             chunk_rows: int) -> Iterator[Dict[str, Any]]:
+    _ensure_db()
+    columns = list(SUMMARY_FIELDS) + [BLOB_FIELDS[b] for b in blobs]
+    sql = (
+        f"SELECT {', '.join(columns)} FROM submissions WHERE id > ?"
+        + (" AND created_at >= ?" if created_from else "")
+        + " ORDER BY id LIMIT ?"
+    )
+    # own connection, one short read per chunk: a long export never pins a WAL snapshot or a pooled connection
+    conn = _connect(readonly=True)
+    try:
+        last_id = since_id or 0
+        while True:
+            rows = conn.execute(sql, [last_id] + ([created_from] if created_from else []) + [chunk_rows]).fetchall()
+            for r in rows:
+                item = {f: r[f] for f in SUMMARY_FIELDS}
+                for b in blobs:
+                    item[b] = decode_blob(r[BLOB_FIELDS[b]])
+                yield item
+            if len(rows) < chunk_rows:
+                return
+            last_id = rows[-1]["id"]
     finally:
         conn.close()
+
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def raw_json(value: Any) -> str:
+    """
+    A blob read with raw=True as a JSON value, without parsing it. Text that is
+    not a JSON object or array (results truncated or stringified by older
+    versions) is quoted as a string rather than emitted as broken JSON.
+    """
+    if value is None:
+        return "null"
+    if not isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    stripped = value.strip()
+    if stripped and _CLOSERS.get(stripped[0]) == stripped[-1]:
+        return stripped
+    return json.dumps(value, ensure_ascii=False)
+
+
+def raw_row_json(row: Dict[str, Any], blobs: Sequence[str]) -> str:
+    """JSON object of a raw row: summary fields serialized, the stored blob text spliced in as-is."""
+    head = json.dumps({f: row.get(f) for f in SUMMARY_FIELDS}, ensure_ascii=False, separators=(",", ":"))
+    if not blobs:
+        return head
+    return head[:-1] + "".join(f',"{b}":{raw_json(row.get(b))}' for b in blobs) + "}"
+
+
+def match_query(q: str) -> str:
+    """
+    FTS5 MATCH expression for a user's search box text: every word must occur
+    (in any indexed field), a trailing * makes a word a prefix. FTS5 operators
+    and punctuation in `q` are not interpreted. Raises ValueError if `q` has no words.
+    """
+    terms = [f'"{word}"' + ("*" if star else "") for word, star in re.findall(r"(\w+)(\*?)", q or "")]
+    if not terms:
+        raise ValueError("q must contain at least one word")
+    return " ".join(terms[:32])
+
+
+def _snippet_html(text: Optional[str]) -> str:
+    # snippet() marks hits with \x02 ... \x03 so the charter text can be escaped before <mark> is added
+    return html.escape(text or "").replace("\x02", "<mark>").replace("\x03", "</mark>")
+
+
+def _sqlite_search_floor(match: str, candidates: int) -> int:
+    # walks the match's doclist newest first without scoring it
+    sql = "SELECT rowid FROM submissions_fts WHERE submissions_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?"
+    try:
+        row = _get_conn(readonly=True).execute(sql, (match, candidates - 1)).fetchone()
+    except sqlite3.OperationalError as e:
+        raise ValueError(f"invalid search query: {e}") from e
+    return row[0] if row else 0
+
+
+def _sqlite_search_submissions(match: str, limit: int, cursor: Optional[Tuple[float, int]],
+                               min_id: int) -> List[Dict[str, Any]]:
+    # a rowid bound is applied inside FTS5, so only rows above it are scored
+    where, params = ["submissions_fts MATCH ?", "submissions_fts.rowid >= ?"], [match, min_id]  # type: List[str], List[Any]
+    if cursor:
+        where.append("(submissions_fts.rank, submissions_fts.rowid) > (?, ?)")
+        params += list(cursor)
+    sql = (
+        f"SELECT {', '.join('s.' + f for f in SUMMARY_FIELDS)}, submissions_fts.rank AS rank, "
+        f"snippet(submissions_fts, -1, char(2), char(3), '…', {SEARCH_SNIPPET_TOKENS}) AS snippet "
+        "FROM submissions_fts JOIN submissions s ON s.id = submissions_fts.rowid "
+        f"WHERE {' AND '.join(where)} ORDER BY submissions_fts.rank, submissions_fts.rowid LIMIT ?"
+    )
+    conn = _get_conn(readonly=True)
+    try:
+        rows = conn.execute(sql, params + [limit]).fetchall()
+    except sqlite3.OperationalError as e:
+        raise ValueError(f"invalid search query: {e}") from e
+    out = []
+    for r in rows:
+        item = {f: r[f] for f in SUMMARY_FIELDS}
+        item["rank"] = r["rank"]
+        item["snippet"] = _snippet_html(r["snippet"])
+        out.append(item)
+    return out
+
+
+# ----------------------------------------------------------------------------- backends
+
+class SQLiteBackend(StorageBackend):
+    """Built-in backend: raw sqlite3 on DB_PATH with the connection pool, blobs and write-behind above."""
+
+    name = "sqlite"
+
+    def migrate(self) -> None:
+        _ensure_db()
+
+    def store_submission(self, payload):
+        return _sqlite_store_submission(payload)
+
+    def store_submissions(self, payloads):
+        return _sqlite_store_submissions(payloads)
+
+    def save_result(self, submission_id, result):
+        return _sqlite_save_result(submission_id, result)
+
+    def claim_submission(self, payload, key, req_hash, window_from, lease_from):
+        return _sqlite_claim_submission(payload, key, req_hash, window_from, lease_from)
+
+    def fail_submission(self, submission_id):
+        return _sqlite_fail_submission(submission_id)
+
+    def get_submission(self, submission_id, blobs, raw=False):
+        return _sqlite_get_submission(submission_id, blobs, raw)
+
+    def query_submissions(self, limit, cursor, blobs, sponsor, min_score, max_score, created_from, created_to,
+                          attributes=None):
+        return _sqlite_query_submissions(limit, cursor, blobs, sponsor, min_score, max_score, created_from,
+                                         created_to, attributes)
+
+    def aggregate_submissions(self, group_by, sponsor, min_score, max_score, created_from, created_to, attributes):
+        return _sqlite_aggregate_submissions(group_by, sponsor, min_score, max_score, created_from, created_to,
+                                             attributes)
+
+    def iter_submissions(self, blobs, since_id, created_from, chunk_rows):
+        return _sqlite_iter_submissions(blobs, since_id, created_from, chunk_rows)
+
+    def search_floor(self, match, candidates):
+        return _sqlite_search_floor(match, candidates)
+
+    def search_submissions(self, match, limit, cursor, min_id):
+        return _sqlite_search_submissions(match, limit, cursor, min_id)
+
+
+_sqlite_backend = SQLiteBackend()
+_backends: Dict[str, StorageBackend] = {}  # database URL -> SQLAlchemy backend
+
+
+def get_backend() -> StorageBackend:
+    """The configured backend: SQLAlchemy for a non-SQLite DATABASE_URL (or STORAGE_BACKEND=sqlalchemy)."""
+    url = DATABASE_URL
+    if BACKEND == "sqlite" or (BACKEND == "auto" and (not url or url.startswith("sqlite"))):
+        return _sqlite_backend
+    url = url or f"sqlite:///{DB_PATH}"
+    backend = _backends.get(url)
+    if backend is None:
+        from app.services.storage_sqlalchemy import SQLAlchemyBackend
+
+        with _lock:
+            backend = _backends.get(url)
+            if backend is None:
+                backend = SQLAlchemyBackend(url)
+                backend.migrate()
+                _backends[url] = backend
+    return backend
+
+
+def require_sqlite(job: str) -> None:
+    """Maintenance jobs rewrite the sqlite3 file directly; refuse to run against another backend."""
+    backend = get_backend()
+    if backend.name != "sqlite":
+        raise RuntimeError(f"{job} only supports the sqlite backend (configured: {backend.name})")
+
+
+def store_submission(payload: Dict[str, Any]) -> int:
+    """
+    Insert the incoming submission payload (raw JSON).
+    Returns the inserted row id (int).
+    """
+    return get_backend().store_submission(payload)
+
+
+def store_submissions(payloads: Iterable[Dict[str, Any]]) -> List[int]:
+    """Insert many submission payloads in one transaction; returns their ids in order."""
+    return get_backend().store_submissions(payloads)
+
+
+def save_result(submission_id: int, result: Dict[str, Any]) -> None:
+    """
+    Save LLM result (a dict) for the given submission id.
+    Updates result_json, complexity_score and recommended_pm_count where available.
+    """
+    get_backend().save_result(submission_id, result)
+
+
+def claim_submission(payload: Dict[str, Any], key: Optional[str] = None) -> Claim:
+    """
+    Store a submission about to be generated, deduplicated by idempotency `key`.
+
+    Returns Claim(id, state). "new": the caller generates the charter and calls
+    save_result (or fail_submission). For a key seen within
+    IDEMPOTENCY_WINDOW_SECONDS: "done" if its result is stored, "pending" if
+    another request is still generating it, "conflict" if it came with a
+    different payload. A failed claim, or one left pending for longer than
+    IDEMPOTENCY_LEASE_SECONDS, is handed over as "new" in the same row; an
+    expired key starts a new submission. Without a key every call is "new".
+    """
+    now = datetime.now(timezone.utc)
+    window_from = (now - timedelta(seconds=IDEMPOTENCY_WINDOW_SECONDS)).isoformat()
+    lease_from = (now - timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)).isoformat()
+    req_hash = request_hash(payload) if key is not None else None
+    claim = get_backend().claim_submission(payload, key, req_hash, window_from, lease_from)
+    logger.info("Claimed submission id=%s (key=%r): %s", claim.id, key, claim.state)
+    return claim
+
+
+def fail_submission(submission_id: int) -> None:
+    """Mark a pending submission whose generation failed, so a retry with its key generates again."""
+    get_backend().fail_submission(submission_id)
+
+
+def query_submissions(
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    blobs: Sequence[str] = (),
+    sponsor: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    attributes: Optional[Dict[str, str]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of submissions, newest first, and the cursor of the next page (None on the last page).
+
+    Pages are keyset-paginated on (created_at, id), so the cost of a page does not
+    depend on how deep it is. Only the summary columns are read unless `blobs`
+    names "payload" and/or "result". Filters: sponsor (case-insensitive),
+    min_score <= complexity_score < max_score, created_from <= created_at < created_to
+    (ISO-8601 UTC strings, as stored), and `attributes`, a case-insensitive
+    equality match per ATTRIBUTE_FIELDS column (ValueError for another name).
+    """
+    after = decode_cursor(cursor) if cursor else None
+    rows = get_backend().query_submissions(limit + 1, after, tuple(blobs), sponsor, min_score, max_score,
+                                           created_from, created_to, attributes)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return rows, next_cursor
+
+
+def aggregate_submissions(
+    group_by: str,
+    sponsor: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    attributes: Optional[Dict[str, str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Submissions grouped by one of GROUP_FIELDS (text values case-insensitively),
+    largest group first: {"value", "count", "avg_complexity_score",
+    "min_complexity_score", "max_complexity_score", "avg_pm_count"} per group.
+    Takes the filters of query_submissions. Computed in the database from the
+    indexed attribute columns; no blob is read.
+    """
+    return get_backend().aggregate_submissions(group_by, sponsor, min_score, max_score, created_from, created_to,
+                                               attributes)
+
+
+def list_submissions(limit: int = 100) -> List[Dict[str, Any]]:
+    """Return most recent submissions (as plain dicts), including decoded payload and result."""
+    return query_submissions(limit, blobs=tuple(BLOB_FIELDS))[0]
+
+
+def get_submission(
+    submission_id: int, blobs: Sequence[str] = tuple(BLOB_FIELDS), raw: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Return a single submission by id or None.
+    Only the blobs named in `blobs` ("payload", "result") are read and decompressed;
+    with raw=True they are returned as their stored JSON text (see raw_row_json).
+    """
+    return get_backend().get_submission(submission_id, tuple(blobs), raw)
+
+
+def iter_submissions(
+    blobs: Sequence[str] = tuple(BLOB_FIELDS), since_id: Optional[int] = None, created_from: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Every submission with id > since_id and created_at >= created_from, in id
+    order, read EXPORT_CHUNK_ROWS rows at a time so memory stays flat however
+    large the table is. Unlike the other readers, the blobs named in `blobs`
+    are returned as their stored JSON text (decompressed, not parsed).
+    """
+    return get_backend().iter_submissions(tuple(blobs), since_id, created_from, EXPORT_CHUNK_ROWS)
+
+
+def search_submissions(
+    q: str, limit: int = 20, cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of charters matching the search text `q` (see match_query), best
+    match first (bm25 over SEARCH_COLUMNS, title weighted highest), and the
+    cursor of the next page. Each row has the summary fields, its `score`
+    (higher is better) and an HTML-escaped `snippet` with hits in <mark>.
+    Raises ValueError for a query without words or a malformed cursor.
+
+    bm25 has to score every row it ranks, so only the newest
+    SEARCH_MAX_CANDIDATES matches are ranked; older ones are not returned
+    once a query matches more than that. The first page fixes that set (its
+    lowest id travels in the cursor), so later pages rank the same rows.
+    With every charter matching (the worst case), a page takes about 18 ms
+    at 10k charters and 34 ms at 100k with 1000 candidates (51 ms with
+    5000), against 75 ms and 665 ms ranking every match; what is left grows
+    with the match count, as FTS5 still reads each word's full doclist.
+    """
+    match = match_query(q)
+    after, min_id = None, None
+    if cursor:
+        key, submission_id = _unpack_cursor(cursor)
+        try:
+            rank, min_id = key
+            after = (float(rank), submission_id)
+            min_id = int(min_id)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"invalid cursor {cursor!r}") from e
+    backend = get_backend()
+    if min_id is None:
+        min_id = backend.search_floor(match, SEARCH_MAX_CANDIDATES)
+    rows = backend.search_submissions(match, limit + 1, after, min_id)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _pack_cursor([rows[-1]["rank"], min_id], rows[-1]["id"])
+    for row in rows:
+        row["score"] = round(-row.pop("rank"), 6)  # bm25 rank is lower-is-better
+    return rows, next_cursor
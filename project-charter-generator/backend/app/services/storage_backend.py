@@ -0,0 +1,107 @@
+"""
+Interface every submission storage backend implements.
+
+`app.services.storage` picks the backend from configuration (built-in
+sqlite3 for a local file, SQLAlchemy for DATABASE_URL pointing at a server
+database such as Postgres) and its module-level functions delegate to it,
+so callers never see which one is in use.
+
+Rows are plain dicts with the SUMMARY_FIELDS of app.services.storage plus
+the decoded "payload" / "result" when requested through `blobs`.
+"""
+import abc
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class Claim(NamedTuple):
+    """Outcome of storage.claim_submission: the submission id and "new", "done", "pending" or "conflict"."""
+    id: int
+    state: str
+
+
+class StorageBackend(abc.ABC):
+    name = "abstract"
+
+    @abc.abstractmethod
+    def migrate(self) -> None:
+        """Create or upgrade the schema."""
+
+    @abc.abstractmethod
+    def store_submission(self, payload: Dict[str, Any]) -> int:
+        """Insert one submission; returns its id."""
+
+    def store_submissions(self, payloads: Iterable[Dict[str, Any]]) -> List[int]:
+        """Insert many submissions, ideally in one round trip; returns their ids in order."""
+        return [self.store_submission(p) for p in payloads]
+
+    @abc.abstractmethod
+    def save_result(self, submission_id: int, result: Dict[str, Any]) -> int:
+        """Store the charter of a submission; returns the number of rows updated (0 if unknown id)."""
+
+    @abc.abstractmethod
+    def claim_submission(self, payload: Dict[str, Any], key: Optional[str], req_hash: Optional[str],
+                         window_from: str, lease_from: str) -> Claim:
+        """
+        Atomically look up `key` and either report its claim or insert a pending
+        submission for it. See storage.claim_submission and storage.claim_action.
+        """
+
+    @abc.abstractmethod
+    def fail_submission(self, submission_id: int) -> int:
+        """Set a pending submission to failed; returns the number of rows updated."""
+
+    @abc.abstractmethod
+    def get_submission(self, submission_id: int, blobs: Sequence[str], raw: bool = False) -> Optional[Dict[str, Any]]:
+        """One submission, or None. With `raw`, blobs are the stored JSON text rather than decoded values."""
+
+    @abc.abstractmethod
+    def query_submissions(
+        self,
+        limit: int,
+        cursor: Optional[Tuple[str, int]],
+        blobs: Sequence[str],
+        sponsor: Optional[str],
+        min_score: Optional[float],
+        max_score: Optional[float],
+        created_from: Optional[str],
+        created_to: Optional[str],
+        attributes: Optional[Dict[str, str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Up to `limit` rows ordered by (created_at, id) descending, strictly after
+        the decoded keyset `cursor` if given. See storage.query_submissions.
+        """
+
+    @abc.abstractmethod
+    def aggregate_submissions(
+        self,
+        group_by: str,
+        sponsor: Optional[str],
+        min_score: Optional[float],
+        max_score: Optional[float],
+        created_from: Optional[str],
+        created_to: Optional[str],
+        attributes: Optional[Dict[str, str]],
+    ) -> List[Dict[str, Any]]:
+        """Per-group counts and score statistics. See storage.aggregate_submissions."""
+
+    @abc.abstractmethod
+    def iter_submissions(self, blobs: Sequence[str], since_id: Optional[int], created_from: Optional[str],
+                         chunk_rows: int) -> Iterator[Dict[str, Any]]:
+        """All rows after `since_id` / from `created_from` in id order, blobs as stored JSON text."""
+
+    def search_floor(self, match: str, candidates: int) -> int:
+        """Lowest id among the newest `candidates` rows matching `match` (0 if there are no more than that)."""
+        raise NotImplementedError(f"full-text search is not supported by the {self.name} backend")
+
+    def search_submissions(self, match: str, limit: int, cursor: Optional[Tuple[float, int]],
+                           min_id: int) -> List[Dict[str, Any]]:
+        """
+        Up to `limit` rows with id >= `min_id` matching the full-text `match`
+        expression, best first, each with `rank` (lower is better) and
+        `snippet`. See storage.search_submissions.
+        """
+        raise NotImplementedError(f"full-text search is not supported by the {self.name} backend")
+
+    def close(self) -> None:
+        """Release connections."""
@@ -0,0 +1,269 @@
+"""
+SQLAlchemy implementation of the submission storage (see storage_backend).
+
+Selected by app.services.storage when DATABASE_URL names a server database,
+so several API nodes can share one Postgres database. Uses SQLAlchemy Core
+on an engine from app.db.make_engine (pool sized by DB_POOL_*).
+
+payload_json / result_json are JSONB on Postgres and JSON text on other
+dialects; the database stores them natively, so there is no blob codec here.
+Keyset pagination, filters and indexes mirror the sqlite3 backend; the
+case-insensitive sponsor filter uses an index on lower(sponsor).
+"""
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import (
+    JSON, Column, Float, Index, Integer, MetaData, String, Table, Text, cast, func, insert, select, tuple_, update,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.exc import IntegrityError
+from app.db import make_engine
+from app.services import storage
+from app.services.storage_backend import Claim, StorageBackend
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+metadata = MetaData()
+_JSON = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")
+
+submissions = Table(
+    "submissions",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("project_name", Text),
+    Column("sponsor", Text),
+    Column("payload_json", _JSON),
+    Column("result_json", _JSON),
+    Column("complexity_score", Float),
+    Column("recommended_pm_count", Integer),
+    Column("created_at", String(40)),  # ISO-8601 UTC text, same as the sqlite3 backend (cursors are portable)
+    Column("updated_at", String(40)),
+    Column("scoring_version", String(64)),
+    *(Column(name, Text) for name in storage.ATTRIBUTE_FIELDS),
+    Column("status", String(16)),
+    Column("idempotency_key", String(storage.IDEMPOTENCY_KEY_MAX_CHARS)),
+    Column("request_hash", String(64)),
+)
+Index("idx_submissions_created", submissions.c.created_at, submissions.c.id)
+Index("idx_submissions_updated", submissions.c.updated_at, submissions.c.id)
+Index("idx_submissions_sponsor", func.lower(submissions.c.sponsor), submissions.c.created_at, submissions.c.id)
+Index("idx_submissions_score", submissions.c.complexity_score)
+for _name in storage.ATTRIBUTE_FIELDS:
+    Index(f"idx_submissions_{_name}", func.lower(submissions.c[_name]), submissions.c.created_at,
+          submissions.c.complexity_score, submissions.c.recommended_pm_count)
+Index("idx_submissions_pm_count", submissions.c.recommended_pm_count, submissions.c.created_at,
+      submissions.c.complexity_score)
+Index("idx_submissions_idempotency_key", submissions.c.idempotency_key, unique=True)  # NULLs never conflict
+
+_BLOB_COLUMNS = {name: submissions.c[col] for name, col in storage.BLOB_FIELDS.items()}
+_SUMMARY_COLUMNS = [submissions.c[f] for f in storage.SUMMARY_FIELDS]
+
+
+def _jsonable(value: Any) -> Any:
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        logger.exception("Failed to JSON-serialize value; storing stringified version")
+        return str(value)
+
+
+def _submission_values(payload: Dict[str, Any]) -> Dict[str, Any]:
+    created_at = datetime.now(timezone.utc).isoformat()
+    return {
+        "project_name": payload.get("project_title") or payload.get("project_name") or None,
+        "sponsor": payload.get("sponsor") or None,
+        "payload_json": _jsonable(payload),
+        "created_at": created_at,
+        "updated_at": created_at,
+        **storage.charter_attributes(payload),
+    }
+
+
+def _filters(sponsor, min_score, max_score, created_from, created_to, attributes) -> list:
+    c = submissions.c
+    where = []
+    if sponsor:
+        where.append(func.lower(c.sponsor) == sponsor.lower())
+    if min_score is not None:
+        where.append(c.complexity_score >= min_score)
+    if max_score is not None:
+        where.append(c.complexity_score < max_score)
+    if created_from:
+        where.append(c.created_at >= created_from)
+    if created_to:
+        where.append(c.created_at < created_to)
+    for name, value in (attributes or {}).items():
+        if name not in storage.ATTRIBUTE_FIELDS:
+            raise ValueError(f"unknown attribute {name!r}")
+        where.append(func.lower(c[name]) == value.lower())
+    return where
+
+
+def _blob_column(name: str, raw: bool):
+    # raw: the JSON column cast to text, so it is neither parsed nor re-serialized
+    column = _BLOB_COLUMNS[name]
+    return cast(column, Text).label(column.name) if raw else column
+
+
+def _row(mapping, blobs: Sequence[str]) -> Dict[str, Any]:
+    out = {f: mapping[f] for f in storage.SUMMARY_FIELDS}
+    for b in blobs:
+        out[b] = mapping[storage.BLOB_FIELDS[b]]
+    return out
+
+
+class SQLAlchemyBackend(StorageBackend):
+    name = "sqlalchemy"
+
+    def __init__(self, url: str):
+        self.engine = make_engine(url)
+        self.name = f"sqlalchemy:{self.engine.dialect.name}"
+
+    def migrate(self) -> None:
+        metadata.create_all(self.engine)
+
+    def store_submission(self, payload: Dict[str, Any]) -> int:
+        with self.engine.begin() as conn:
+            rowid = conn.execute(insert(submissions).returning(submissions.c.id), _submission_values(payload)).scalar_one()
+        logger.info(f"Stored submission id={rowid}")
+        return int(rowid)
+
+    def store_submissions(self, payloads: Iterable[Dict[str, Any]]) -> List[int]:
+        rows = [_submission_values(p) for p in payloads]
+        if not rows:
+            return []
+        # executemany with RETURNING: batched multi-row INSERTs ("insertmanyvalues"), ids in input order
+        stmt = insert(submissions).returning(submissions.c.id, sort_by_parameter_order=True)
+        with self.engine.begin() as conn:
+            ids = [int(i) for i in conn.execute(stmt, rows).scalars()]
+        logger.info("Stored %d submissions", len(ids))
+        return ids
+
+    def save_result(self, submission_id: int, result: Dict[str, Any]) -> int:
+        complexity, pm_count = storage.result_scores(result)
+        # attributes the result does not state keep the value taken from the payload
+        attributes = {k: v for k, v in storage.charter_attributes(result).items() if v is not None}
+        stmt = (
+            update(submissions)
+            .where(submissions.c.id == submission_id)
+            .values(result_json=_jsonable(result), complexity_score=complexity, recommended_pm_count=pm_count,
+                    updated_at=datetime.now(timezone.utc).isoformat(), status="done", **attributes)
+        )
+        try:
+            with self.engine.begin() as conn:
+                updated = conn.execute(stmt).rowcount
+        except Exception:
+            logger.exception("Failed to save result for submission_id=%s", submission_id)
+            raise
+        storage._after_result_saved(submission_id, updated)
+        return updated
+
+    def _claim(self, conn, values: Dict[str, Any], window_from: str, lease_from: str) -> Optional[Claim]:
+        c = submissions.c
+        key = values["idempotency_key"]
+        row = None
+        if key is not None:
+            stmt = select(c.id, c.status, c.request_hash, c.created_at, c.updated_at).where(c.idempotency_key == key)
+            row = conn.execute(stmt.with_for_update()).mappings().first()
+        action = "new" if row is None else storage.claim_action(row, values["request_hash"], window_from, lease_from)
+        if action == "expire":
+            conn.execute(update(submissions).where(c.id == row["id"]).values(idempotency_key=None))
+            action = "new"
+        if action == "new":
+            return Claim(int(conn.execute(insert(submissions).returning(c.id), values).scalar_one()), "new")
+        if action == "take":
+            # compare-and-set: of two requests taking over the same failed claim, one wins
+            taken = conn.execute(
+                update(submissions)
+                .where(c.id == row["id"], c.status == row["status"], c.updated_at == row["updated_at"])
+                .values(status="pending", updated_at=values["updated_at"])
+            ).rowcount
+            return Claim(row["id"], "new") if taken else None
+        return Claim(row["id"], action)
+
+    def claim_submission(self, payload: Dict[str, Any], key: Optional[str], req_hash: Optional[str],
+                         window_from: str, lease_from: str) -> Claim:
+        values = dict(_submission_values(payload), status="pending", idempotency_key=key, request_hash=req_hash)
+        for _ in range(3):
+            try:
+                with self.engine.begin() as conn:
+                    claim = self._claim(conn, values, window_from, lease_from)
+            except IntegrityError:
+                continue  # a concurrent request inserted the same key first; look it up again
+            if claim is not None:
+                return claim
+        raise RuntimeError(f"could not claim idempotency key {key!r}")
+
+    def fail_submission(self, submission_id: int) -> int:
+        stmt = (
+            update(submissions)
+            .where(submissions.c.id == submission_id, submissions.c.status == "pending")
+            .values(status="failed", updated_at=datetime.now(timezone.utc).isoformat())
+        )
+        with self.engine.begin() as conn:
+            return conn.execute(stmt).rowcount
+
+    def get_submission(self, submission_id: int, blobs: Sequence[str], raw: bool = False) -> Optional[Dict[str, Any]]:
+        stmt = select(*_SUMMARY_COLUMNS, *(_blob_column(b, raw) for b in blobs)).where(submissions.c.id == submission_id)
+        with self.engine.connect() as conn:
+            row = conn.execute(stmt).mappings().first()
+        return _row(row, blobs) if row is not None else None
+
+    def query_submissions(self, limit: int, cursor: Optional[Tuple[str, int]], blobs: Sequence[str],
+                          sponsor: Optional[str], min_score: Optional[float], max_score: Optional[float],
+                          created_from: Optional[str], created_to: Optional[str],
+                          attributes: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        c = submissions.c
+        stmt = select(*_SUMMARY_COLUMNS, *(_BLOB_COLUMNS[b] for b in blobs))
+        stmt = stmt.where(*_filters(sponsor, min_score, max_score, created_from, created_to, attributes))
+        if cursor:
+            stmt = stmt.where(tuple_(c.created_at, c.id) < tuple_(*cursor))
+        stmt = stmt.order_by(c.created_at.desc(), c.id.desc()).limit(limit)
+        with self.engine.connect() as conn:
+            return [_row(r, blobs) for r in conn.execute(stmt).mappings()]
+
+    def aggregate_submissions(self, group_by: str, sponsor: Optional[str], min_score: Optional[float],
+                              max_score: Optional[float], created_from: Optional[str], created_to: Optional[str],
+                              attributes: Optional[Dict[str, str]]) -> List[Dict[str, Any]]:
+        if group_by not in storage.GROUP_FIELDS:
+            raise ValueError(f"group_by must be one of: {', '.join(storage.GROUP_FIELDS)}")
+        c = submissions.c
+        column = c[group_by]
+        group = column if group_by == "recommended_pm_count" else func.lower(column)
+        count = func.count().label("count")
+        stmt = (
+            select(
+                func.min(column).label("value"), count,
+                func.avg(c.complexity_score).label("avg_complexity_score"),
+                func.min(c.complexity_score).label("min_complexity_score"),
+                func.max(c.complexity_score).label("max_complexity_score"),
+                func.avg(c.recommended_pm_count).label("avg_pm_count"),
+            )
+            .where(*_filters(sponsor, min_score, max_score, created_from, created_to, attributes))
+            .group_by(group)
+            .order_by(count.desc(), group)
+        )
+        with self.engine.connect() as conn:
+            return [
+                {k: float(v) if k.startswith("avg_") and v is not None else v for k, v in r.items()}
+                for r in conn.execute(stmt).mappings()
+            ]
+
+    def iter_submissions(self, blobs: Sequence[str], since_id: Optional[int], created_from: Optional[str],
+                         chunk_rows: int) -> Iterator[Dict[str, Any]]:
+        c = submissions.c
+        # yield_per uses a server-side cursor on Postgres
+        stmt = select(*_SUMMARY_COLUMNS, *(_blob_column(b, raw=True) for b in blobs))
+        stmt = stmt.where(c.id > (since_id or 0))
+        if created_from:
+            stmt = stmt.where(c.created_at >= created_from)
+        with self.engine.connect() as conn:
+            result = conn.execution_options(yield_per=chunk_rows).execute(stmt.order_by(c.id))
+            for r in result.mappings():
+                yield _row(r, blobs)
+
+    def close(self) -> None:
+        self.engine.dispose()
@@ -0,0 +1,50 @@
+"""
+Streaming NDJSON / CSV serialization of the submissions table.
+
+Rows come from storage.iter_submissions, whose payload/result values are the
+stored JSON text. NDJSON lines splice that text in as-is instead of parsing
+and re-serializing it (storage.raw_row_json); CSV puts it in a cell. Output is produced in chunks of
+about CHUNK_BYTES, so a response over the whole table needs no more memory
+than one chunk plus one storage read.
+"""
+import csv
+import io
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence
+from app.services import storage
+
+CHUNK_BYTES = 64 * 1024
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def iter_ndjson(rows: Iterable[Dict[str, Any]], blobs: Sequence[str]) -> Iterator[bytes]:
+    buf, size = [], 0
+    for row in rows:
+        line = storage.raw_row_json(row, blobs) + "\n"
+        buf.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield "".join(buf).encode("utf-8")
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+def iter_csv(rows: Iterable[Dict[str, Any]], blobs: Sequence[str]) -> Iterator[bytes]:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(list(storage.SUMMARY_FIELDS) + list(blobs))
+    for row in rows:
+        writer.writerow([row[f] for f in storage.SUMMARY_FIELDS] + [row[b] for b in blobs])
+        if out.tell() >= CHUNK_BYTES:
+            yield out.getvalue().encode("utf-8")
+            out.seek(0)
+            out.truncate()
+    if out.tell():
+        yield out.getvalue().encode("utf-8")
+
+
+def stream(fmt: str, blobs: Sequence[str] = tuple(storage.BLOB_FIELDS), since_id: Optional[int] = None,
+           created_from: Optional[str] = None) -> Iterator[bytes]:
+    """Body of an export in `fmt` (a key of FORMATS)."""
+    rows = storage.iter_submissions(blobs, since_id, created_from)
+    return (iter_ndjson if fmt == "ndjson" else iter_csv)(rows, blobs)
@@ -0,0 +1,185 @@
+"""
+Group-commit writer for submission persistence.
+
+One dedicated thread owns a write connection and consumes a bounded queue of
+write operations. It takes whatever has queued up, up to batch_rows
+operations (optionally lingering batch_ms for more), and runs them in a
+single transaction. Writes that arrive while a commit is in progress go into
+the next batch, so a burst of N writes costs a handful of commits (WAL syncs)
+instead of N, and writers no longer contend for SQLite's write lock.
+
+Each operation runs inside its own SAVEPOINT, so a failing row is rolled
+back and reported on its own future without failing the rest of the batch.
+Callers get a Future per operation, resolved after the batch has committed
+and the operation's after_commit hook has run. When the queue is full,
+`submit` blocks for up to PUT_TIMEOUT seconds and then raises WriteQueueFull.
+`close` processes everything already queued before the thread exits. If the
+thread dies (e.g. its connection cannot be opened), the writer closes itself
+and fails every pending future with the error, so no caller waits forever.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, NamedTuple, Optional
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class WriteQueueFull(RuntimeError):
+    """Raised when the write queue stays full for longer than the put timeout."""
+
+
+class _Op(NamedTuple):
+    fn: Callable[[sqlite3.Connection], Any]
+    future: Future
+    after_commit: Optional[Callable[[Any], None]]
+
+
+_STOP = object()
+
+
+class Writer:
+    def __init__(self, connect: Callable[[], sqlite3.Connection], batch_rows: int = 64, batch_ms: float = 0.0,
+                 queue_size: int = 1024, put_timeout: float = 5.0, name: str = "db-writer"):
+        self._connect = connect
+        self.batch_rows = max(1, batch_rows)
+        self.batch_ms = batch_ms
+        self.put_timeout = put_timeout
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()  # the closed check and the put are one step
+        self._closed = False
+        self._inflight: List[_Op] = []
+        self.stats = {"batches": 0, "ops": 0, "failed": 0, "max_batch": 0}
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: Callable[[sqlite3.Connection], Any],
+               after_commit: Optional[Callable[[Any], None]] = None) -> Future:
+        """Queue `fn(conn)`; the future resolves to its return value once committed."""
+        op = _Op(fn, Future(), after_commit)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("writer is closed")
+            try:
+                self._queue.put(op, timeout=self.put_timeout)
+            except queue.Full:
+                raise WriteQueueFull(f"write queue full ({self._queue.maxsize} pending)") from None
+        return op.future
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait until everything queued before this call has been committed."""
+        self.submit(lambda conn: None).result(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Commit everything queued, then stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        while self._thread.is_alive():  # nothing is queued after _STOP: submit sees closed first
+            try:
+                self._queue.put(_STOP, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self._thread.join(timeout)
+
+    # ------------------------------------------------------------------ writer thread
+
+    def _next_batch(self) -> List[Any]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_ms / 1000
+        while len(batch) < self.batch_rows and batch[-1] is not _STOP:
+            try:
+                timeout = deadline - time.monotonic()
+                batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        error: BaseException = RuntimeError("writer is closed")
+        try:
+            self._serve()
+        except BaseException as e:
+            logger.exception("Writer thread %s died; failing pending writes", self._thread.name)
+            error = e
+        finally:
+            with self._lock:
+                self._closed = True
+            self._fail_pending(error)
+
+    def _fail_pending(self, error: BaseException) -> None:
+        """Fail the futures of the batch in flight and of everything still queued."""
+        pending = [op for op in self._inflight if not op.future.done()]
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP and item.future.set_running_or_notify_cancel():
+                pending.append(item)
+        for op in pending:
+            op.future.set_exception(error)
+        self.stats["failed"] += len(pending)
+
+    def _serve(self) -> None:
+        conn = self._connect()
+        conn.isolation_level = None  # explicit transactions
+        try:
+            while True:
+                batch = self._next_batch()
+                stop = batch[-1] is _STOP
+                ops = [op for op in batch if op is not _STOP and op.future.set_running_or_notify_cancel()]
+                if ops:
+                    self._inflight = ops
+                    self._commit(conn, ops)
+                    self._inflight = []
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, ops: List[_Op]) -> None:
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for op in ops:
+                conn.execute("SAVEPOINT op")
+                try:
+                    outcomes.append((True, op.fn(conn)))
+                    conn.execute("RELEASE op")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO op")
+                    conn.execute("RELEASE op")
+                    outcomes.append((False, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            logger.exception("Write batch of %d operations failed", len(ops))
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for op in ops:
+                op.future.set_exception(e)
+            self.stats["failed"] += len(ops)
+            return
+        self.stats["batches"] += 1
+        self.stats["ops"] += len(ops)
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(ops))
+        for op, (ok, value) in zip(ops, outcomes):
+            if not ok:
+                self.stats["failed"] += 1
+                op.future.set_exception(value)
+                continue
+            if op.after_commit is not None:
+                try:
+                    op.after_commit(value)
+                except Exception:
+                    logger.exception("after_commit hook failed")
+            op.future.set_result(value)
@@ -0,0 +1,23 @@
+import hmac
+from functools import wraps
+from flask import request, jsonify, current_app
+from app.config import Config
+
+
+def require_admin(func):
+    """
+    Flask decorator for operator-only endpoints.
+    Expects the shared ADMIN_API_TOKEN in the X-Admin-Token header.
+    When no token is configured the endpoints are disabled entirely.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        expected = getattr(Config, "ADMIN_API_TOKEN", None)
+        if not expected:
+            return jsonify({"error": "Admin endpoints are disabled"}), 403
+        supplied = request.headers.get("X-Admin-Token", "")
+        if not hmac.compare_digest(supplied.encode("utf-8"), expected.encode("utf-8")):
+            current_app.logger.warning("Rejected admin request to %s", request.path)
+            return jsonify({"error": "Invalid admin token"}), 401
+        return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,105 @@
+"""
+Response compression for every blueprint.
+
+`init_app` installs an after_request hook that gzip- or brotli-encodes
+textual responses above COMPRESS_MIN_SIZE when the client's Accept-Encoding
+allows it. Brotli is used only if the optional `brotli` package is installed.
+Streamed responses are gzip-encoded incrementally, flushing after every
+chunk so sections still reach the browser as they are produced. File
+responses (send_file) are left alone, as are responses that already carry a
+Content-Encoding (precompressed assets).
+
+Encoded bodies differ byte-for-byte from the identity body, so a strong ETag
+set by a handler is downgraded to a weak one; handlers compare If-None-Match
+with `contains_weak`, as RFC 9110 specifies for GET.
+"""
+import gzip
+import zlib
+from typing import Iterable, Optional
+from flask import Flask, Response, request
+from app.config import Config
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+MIN_SIZE = int(getattr(Config, "COMPRESS_MIN_SIZE", 500))
+GZIP_LEVEL = int(getattr(Config, "COMPRESS_GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(getattr(Config, "COMPRESS_BROTLI_QUALITY", 5))
+
+_COMPRESSIBLE = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+
+def available_encodings() -> Iterable[str]:
+    """Supported content codings, most preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(offered: Optional[Iterable[str]] = None) -> Optional[str]:
+    """Best coding the current request accepts among `offered`, or None for identity."""
+    accept = request.accept_encodings
+    best, best_q = None, 0.0
+    for coding in offered if offered is not None else available_encodings():
+        q = accept[coding]
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(data: bytes, coding: str, level: Optional[int] = None) -> bytes:
+    if coding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY if level is None else level)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL if level is None else level, mtime=0)
+
+
+def _gzip_stream(chunks: Iterable) -> Iterable[bytes]:
+    z = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            if chunk:
+                yield z.compress(chunk) + z.flush(zlib.Z_SYNC_FLUSH)
+        yield z.flush()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def _compressible(resp: Response) -> bool:
+    if resp.direct_passthrough or "Content-Encoding" in resp.headers:
+        return False
+    if resp.status_code < 200 or resp.status_code in (204, 206, 304):
+        return False
+    return (resp.mimetype or "").startswith(_COMPRESSIBLE)
+
+
+def _compress_response(resp: Response) -> Response:
+    if not _compressible(resp):
+        return resp
+    resp.vary.add("Accept-Encoding")
+    if resp.is_streamed:
+        if choose_encoding(("gzip",)) is None:
+            return resp
+        resp.response = _gzip_stream(resp.response)
+        resp.headers["Content-Encoding"] = "gzip"
+        resp.headers.pop("Content-Length", None)
+        return resp
+    body = resp.get_data()
+    if len(body) < MIN_SIZE:
+        return resp
+    coding = choose_encoding()
+    if coding is None:
+        return resp
+    resp.set_data(compress(body, coding))
+    resp.headers["Content-Encoding"] = coding
+    etag, weak = resp.get_etag()
+    if etag and not weak:
+        resp.set_etag(etag, weak=True)
+    return resp
+
+
+def init_app(app: Flask) -> None:
+    app.after_request(_compress_response)
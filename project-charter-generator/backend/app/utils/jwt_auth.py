@@ -97,8 +97,10 @@ from flask import request, jsonify, current_app, g
 import jwt  # PyJWT
 from jwt import PyJWKClient
 from app.config import Config
+from app.services import diagnostics
 
 _jwks_clients = {}  # cache JWK clients per issuer/jwks_url
+diagnostics.register_cache("jwt_jwks_clients", lambda: _jwks_clients)
 
 
 def _get_jwk_client(jwks_url: str) -> PyJWKClient:
@@ -0,0 +1,7 @@
+"""
+Performance tooling for the backend (not imported by the app).
+
+    benchmarks.stats - shared timing/percentile helpers
+    benchmarks.load  - end-to-end load tests against a local Azure OpenAI stand-in
+    benchmarks.micro - micro-benchmarks for per-request CPU hot paths
+"""
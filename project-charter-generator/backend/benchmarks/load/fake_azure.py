@@ -0,0 +1,303 @@
+"""
+Local stand-in for the Azure OpenAI Chat Completions and Embeddings APIs.
+
+Serves the same URL shapes the `openai.AzureOpenAI` client calls:
+    POST /openai/deployments/<deployment>/chat/completions
+    POST /openai/deployments/<deployment>/embeddings
+
+Latency, streaming token rate and 429/5xx injection are configurable so the
+load harness can reproduce production-like upstream behaviour.
+"""
+import json
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+
+_DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Turn a latency spec into a sampler returning seconds.
+
+        fixed:<ms>
+        uniform:<lo_ms>:<hi_ms>
+        normal:<mean_ms>:<sd_ms>
+        lognormal:<median_ms>:<sigma>
+    """
+    parts = (spec or "fixed:0").split(":")
+    kind, args = parts[0].lower(), [float(p) for p in parts[1:]]
+    if kind == "fixed":
+        ms = args[0] if args else 0.0
+        return lambda rng: ms / 1000.0
+    if kind == "uniform":
+        lo, hi = args
+        return lambda rng: rng.uniform(lo, hi) / 1000.0
+    if kind == "normal":
+        mean, sd = args
+        return lambda rng: max(0.0, rng.gauss(mean, sd)) / 1000.0
+    if kind == "lognormal":
+        median, sigma = args
+        mu = math.log(max(median, 1e-6))
+        return lambda rng: rng.lognormvariate(mu, sigma) / 1000.0
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def count_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token), good enough for accounting."""
+    return max(1, (len(text or "") + 3) // 4)
+
+
+def _default_completion() -> str:
+    try:
+        with open(os.path.join(_DATA_DIR, "output_template.json"), "r", encoding="utf-8") as fh:
+            return json.dumps(json.load(fh), ensure_ascii=False)
+    except Exception:
+        return json.dumps({"project_title": "Load Test Charter", "objectives": ["Measure throughput"]})
+
+
+@dataclass
+class FakeAzureConfig:
+    chat_latency: str = "lognormal:800:0.4"
+    embedding_latency: str = "fixed:40"
+    stream_tokens_per_second: float = 80.0
+    error_rate_429: float = 0.0
+    error_rate_5xx: float = 0.0
+    retry_after_ms: int = 100
+    embedding_dim: int = 1536
+    completion_text: str = field(default_factory=_default_completion)
+    seed: Optional[int] = None
+
+
+class FakeAzureStats:
+    """Thread-safe counters for calls, injected errors and token usage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.data: Dict[str, int] = {
+            "chat_calls": 0,
+            "stream_calls": 0,
+            "embedding_calls": 0,
+            "injected_429": 0,
+            "injected_5xx": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+
+    def incr(self, **deltas: int) -> None:
+        with self._lock:
+            for k, v in deltas.items():
+                self.data[k] = self.data.get(k, 0) + v
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.data)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeAzureServer"
+
+    def log_message(self, fmt, *args):  # keep benchmark output quiet
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _maybe_inject_error(self) -> bool:
+        cfg, rng = self.server.config, self.server.rng()
+        roll = rng.random()
+        if roll < cfg.error_rate_429:
+            self.server.stats.incr(injected_429=1)
+            self._send_json(
+                429,
+                {"error": {"code": "429", "message": "Rate limit is exceeded (injected)."}},
+                {"retry-after-ms": str(cfg.retry_after_ms), "Retry-After": str(max(0, cfg.retry_after_ms // 1000))},
+            )
+            return True
+        if roll < cfg.error_rate_429 + cfg.error_rate_5xx:
+            self.server.stats.incr(injected_5xx=1)
+            self._send_json(503, {"error": {"code": "503", "message": "Service unavailable (injected)."}})
+            return True
+        return False
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except Exception:
+            return self._send_json(400, {"error": {"message": "invalid JSON"}})
+
+        path = self.path.split("?", 1)[0]
+        if path.endswith("/chat/completions"):
+            return self._chat(body)
+        if path.endswith("/embeddings"):
+            return self._embeddings(body)
+        return self._send_json(404, {"error": {"message": f"unknown path {path}"}})
+
+    def _chat(self, body: Dict[str, Any]) -> None:
+        cfg, rng = self.server.config, self.server.rng()
+        time.sleep(self.server.chat_latency(rng))
+        if self._maybe_inject_error():
+            return
+
+        prompt = "".join(str(m.get("content") or "") for m in body.get("messages") or [])
+        text = cfg.completion_text
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+        if max_tokens:
+            text = text[: int(max_tokens) * 4]
+        usage = {
+            "prompt_tokens": count_tokens(prompt),
+            "completion_tokens": count_tokens(text),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        self.server.stats.incr(
+            chat_calls=1,
+            prompt_tokens=usage["prompt_tokens"],
+            completion_tokens=usage["completion_tokens"],
+        )
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model") or "fake-chat"
+
+        if body.get("stream"):
+            self.server.stats.incr(stream_calls=1)
+            return self._stream(completion_id, model, text, usage, body)
+
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": text},
+            }],
+            "usage": usage,
+        })
+
+    def _stream(self, completion_id: str, model: str, text: str, usage: Dict[str, int], body: Dict[str, Any]) -> None:
+        cfg = self.server.config
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def emit(payload: Dict[str, Any]) -> None:
+            self.wfile.write(b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n")
+            self.wfile.flush()
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> Dict[str, Any]:
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+
+        delay = 1.0 / cfg.stream_tokens_per_second if cfg.stream_tokens_per_second > 0 else 0.0
+        emit(chunk({"role": "assistant", "content": ""}))
+        for i in range(0, len(text), 4):  # one "token" per 4 chars
+            if delay:
+                time.sleep(delay)
+            emit(chunk({"content": text[i : i + 4]}))
+        emit(chunk({}, finish="stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            emit({"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                  "model": model, "choices": [], "usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _embeddings(self, body: Dict[str, Any]) -> None:
+        cfg, rng = self.server.config, self.server.rng()
+        time.sleep(self.server.embedding_latency(rng))
+        if self._maybe_inject_error():
+            return
+        inputs = body.get("input")
+        if not isinstance(inputs, list):
+            inputs = [inputs]
+        tokens = sum(count_tokens(str(i)) for i in inputs)
+        self.server.stats.incr(embedding_calls=1, prompt_tokens=tokens)
+        data = [
+            {"object": "embedding", "index": i, "embedding": [round(rng.uniform(-1, 1), 6) for _ in range(cfg.embedding_dim)]}
+            for i in range(len(inputs))
+        ]
+        self._send_json(200, {
+            "object": "list",
+            "data": data,
+            "model": body.get("model") or "fake-embedding",
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+
+class FakeAzureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: Optional[FakeAzureConfig] = None):
+        super().__init__(address, _Handler)
+        self.config = config or FakeAzureConfig()
+        self.stats = FakeAzureStats()
+        self.chat_latency = parse_latency(self.config.chat_latency)
+        self.embedding_latency = parse_latency(self.config.embedding_latency)
+        self._local = threading.local()
+        self._seed_counter = 0
+        self._seed_lock = threading.Lock()
+
+    def rng(self) -> random.Random:
+        """Per-thread RNG so samplers do not contend on one lock."""
+        rng = getattr(self._local, "rng", None)
+        if rng is None:
+            with self._seed_lock:
+                self._seed_counter += 1
+                seed = None if self.config.seed is None else self.config.seed + self._seed_counter
+            rng = self._local.rng = random.Random(seed)
+        return rng
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_fake_azure(config: Optional[FakeAzureConfig] = None, host: str = "127.0.0.1", port: int = 0) -> FakeAzureServer:
+    """Start the fake server on a background thread and return it."""
+    server = FakeAzureServer((host, port), config)
+    threading.Thread(target=server.serve_forever, name="fake-azure", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the fake Azure OpenAI server standalone.")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--chat-latency", default=FakeAzureConfig.chat_latency)
+    parser.add_argument("--tokens-per-second", type=float, default=FakeAzureConfig.stream_tokens_per_second)
+    parser.add_argument("--error-429", type=float, default=0.0)
+    parser.add_argument("--error-5xx", type=float, default=0.0)
+    args = parser.parse_args()
+
+    srv = FakeAzureServer(("127.0.0.1", args.port), FakeAzureConfig(
+        chat_latency=args.chat_latency,
+        stream_tokens_per_second=args.tokens_per_second,
+        error_rate_429=args.error_429,
+        error_rate_5xx=args.error_5xx,
+    ))
+    print(f"Fake Azure OpenAI listening on {srv.endpoint}")
+    srv.serve_forever()
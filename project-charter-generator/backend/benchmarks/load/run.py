@@ -0,0 +1,329 @@
+"""
+End-to-end load test: Flask app behind a real WSGI server, Azure OpenAI replaced
+by benchmarks.load.fake_azure, traffic driven by a pool of HTTP client threads.
+
+    cd backend
+    python -m benchmarks.load.run --duration 30 --concurrency 16 --out results/load.json
+    python -m benchmarks.load.run --compare results/before.json results/after.json
+    python -m benchmarks.load.run --cassette data/cassettes/prod.jsonl --cassette-latency zero
+
+With --cassette, upstream calls are served from a recorded cassette (see
+app.services.cassette) instead of the fake server, matched sequentially since
+load-test prompts differ from the recorded ones.
+
+Results are written as JSON (per-endpoint throughput, latency percentiles,
+status codes and error rates, plus fake-upstream call/token accounting).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from benchmarks.stats import summarize_latencies
+from benchmarks.load.fake_azure import FakeAzureConfig, start_fake_azure
+from benchmarks.load import scenarios as scenario_mod
+
+
+def _configure_environment(endpoint: str, db_path: str, retry_delay: float,
+                           cassette: Optional[str] = None, cassette_latency: str = "original") -> None:
+    """
+    Point the app at the fake upstream. Must run before `app` is imported,
+    because azure_openai builds its client at import time.
+    """
+    os.environ["AZURE_OPENAI_ENDPOINT"] = endpoint
+    os.environ["AZURE_OPENAI_KEY"] = "load-test-key"
+    os.environ.setdefault("AZURE_API_VERSION", "2024-02-01")
+    os.environ["AZURE_CHAT_DEPLOYMENT"] = "fake-chat"
+    os.environ["AZURE_EMBEDDING_DEPLOYMENT"] = "fake-embedding"
+    os.environ["AZURE_RETRY_DELAY"] = str(retry_delay)
+    os.environ["DB_PATH"] = db_path
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    if cassette:
+        os.environ["CASSETTE_MODE"] = "replay"
+        os.environ["CASSETTE_PATH"] = os.path.abspath(cassette)
+        os.environ["CASSETTE_MATCH"] = "sequential"
+        os.environ["CASSETTE_REPLAY_LATENCY"] = cassette_latency
+
+
+def _seed_submissions(payloads: List[Dict[str, Any]], count: int, completion_text: str) -> List[int]:
+    from app.services import storage
+
+    result = json.loads(completion_text)
+    ids = []
+    for i in range(count):
+        payload = dict(payloads[i % len(payloads)])
+        payload["project_title"] = f"{payload.get('project_title') or 'Seed'} (seed {i})"
+        sid = storage.store_submission(payload)
+        storage.save_result(sid, result)
+        ids.append(sid)
+    return ids
+
+
+def _start_app_server(host: str, port: int):
+    import logging
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # per-request access log skews timings
+
+    app = create_app()
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="load-wsgi", daemon=True).start()
+    return server
+
+
+class _Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.bytes: Dict[str, int] = defaultdict(int)
+
+    def add(self, name: str, seconds: float, status: str, nbytes: int) -> None:
+        with self.lock:
+            self.latencies[name].append(seconds)
+            self.statuses[name][status] += 1
+            self.bytes[name] += nbytes
+
+
+def _worker(base_url: str, scen, rng: random.Random, deadline: float, budget: Optional[List[int]],
+            rec: _Recorder, timeout: float, stop: threading.Event) -> None:
+    import requests
+
+    session = requests.Session()
+    while not stop.is_set() and time.perf_counter() < deadline:
+        if budget is not None:
+            with rec.lock:
+                if budget[0] <= 0:
+                    return
+                budget[0] -= 1
+        req = scenario_mod.pick(scen, rng)
+        started = time.perf_counter()
+        try:
+            resp = session.request(req.method, base_url + req.path, json=req.json, headers=req.headers, timeout=timeout)
+            body = resp.content
+            rec.add(req.name, time.perf_counter() - started, str(resp.status_code), len(body))
+        except Exception as e:
+            rec.add(req.name, time.perf_counter() - started, type(e).__name__, 0)
+
+
+def _summarize(rec: _Recorder, elapsed: float) -> Dict[str, Any]:
+    endpoints = {}
+    all_latencies: List[float] = []
+    total_errors = 0
+    for name in sorted(rec.latencies):
+        lat = rec.latencies[name]
+        statuses = dict(rec.statuses[name])
+        errors = sum(n for code, n in statuses.items() if not code.isdigit() or int(code) >= 400)
+        total_errors += errors
+        all_latencies.extend(lat)
+        endpoints[name] = {
+            "requests": len(lat),
+            "throughput_rps": round(len(lat) / elapsed, 3) if elapsed else None,
+            "error_rate": round(errors / len(lat), 4) if lat else 0.0,
+            "statuses": statuses,
+            "bytes_received": rec.bytes[name],
+            "latency": summarize_latencies(lat),
+        }
+    overall = {
+        "requests": len(all_latencies),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(all_latencies) / elapsed, 3) if elapsed else None,
+        "error_rate": round(total_errors / len(all_latencies), 4) if all_latencies else 0.0,
+        "latency": summarize_latencies(all_latencies),
+    }
+    return {"overall": overall, "endpoints": endpoints}
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    fake_cfg = FakeAzureConfig(
+        chat_latency=args.chat_latency,
+        embedding_latency=args.embedding_latency,
+        stream_tokens_per_second=args.tokens_per_second,
+        error_rate_429=args.error_429,
+        error_rate_5xx=args.error_5xx,
+        seed=args.seed,
+    )
+    fake = start_fake_azure(fake_cfg)
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="pcg-load-"), "load.db")
+    _configure_environment(fake.endpoint, db_path, args.retry_delay, args.cassette, args.cassette_latency)
+
+    payloads = scenario_mod.load_payloads(args.payloads)
+    submission_ids = _seed_submissions(payloads, args.seed_rows, fake_cfg.completion_text)
+
+    server = _start_app_server("127.0.0.1", args.port)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    scen = scenario_mod.default_scenarios(payloads, submission_ids)
+    if args.only:
+        wanted = set(args.only.split(","))
+        scen = [s for s in scen if s.name in wanted]
+    for override in args.weight or []:
+        name, _, value = override.partition("=")
+        for s in scen:
+            if s.name == name:
+                s.weight = float(value)
+    scen = [s for s in scen if s.weight > 0]
+    if not scen:
+        raise SystemExit("No scenarios selected")
+
+    started_at = datetime.now(timezone.utc).isoformat()  # when traffic starts, warm-up included
+
+    # warm-up (not recorded)
+    if args.warmup > 0:
+        warm = _Recorder()
+        stop = threading.Event()
+        _run_phase(base_url, scen, args, args.warmup, None, warm, stop)
+
+    rec = _Recorder()
+    stop = threading.Event()
+    budget = [args.requests] if args.requests else None
+    upstream_before = fake.stats.snapshot()
+    started = time.perf_counter()
+    _run_phase(base_url, scen, args, args.duration if not args.requests else 10 ** 9, budget, rec, stop)
+    elapsed = time.perf_counter() - started
+    upstream_after = fake.stats.snapshot()
+
+    server.shutdown()
+    fake.shutdown()
+
+    results = _summarize(rec, elapsed)
+    results["fake_azure"] = {k: upstream_after[k] - upstream_before.get(k, 0) for k in upstream_after}
+    results["meta"] = {
+        "started_at": started_at,
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "requests": args.requests,
+        "seed_rows": args.seed_rows,
+        "fake_azure": {
+            "chat_latency": args.chat_latency,
+            "embedding_latency": args.embedding_latency,
+            "tokens_per_second": args.tokens_per_second,
+            "error_429": args.error_429,
+            "error_5xx": args.error_5xx,
+        },
+        "cassette": args.cassette,
+        "mix": {s.name: s.weight for s in scen},
+    }
+    return results
+
+
+def _run_phase(base_url, scen, args, seconds, budget, rec, stop) -> None:
+    deadline = time.perf_counter() + seconds
+    threads = []
+    for i in range(args.concurrency):
+        rng = random.Random(None if args.seed is None else args.seed * 1000 + i)
+        t = threading.Thread(target=_worker, args=(base_url, scen, rng, deadline, budget, rec, args.timeout, stop), daemon=True)
+        t.start()
+        threads.append(t)
+    try:
+        for t in threads:
+            t.join()
+    except KeyboardInterrupt:
+        stop.set()
+        for t in threads:
+            t.join()
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    o = results["overall"]
+    print(f"\n{o['requests']} requests in {o['elapsed_seconds']}s "
+          f"({o['throughput_rps']} req/s, error rate {o['error_rate']:.2%})")
+    header = f"{'endpoint':28} {'reqs':>6} {'rps':>8} {'err%':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, e in results["endpoints"].items():
+        lat = e["latency"]
+        print(f"{name:28} {e['requests']:>6} {e['throughput_rps']:>8} {e['error_rate'] * 100:>5.1f}% "
+              f"{lat.get('p50_ms', 0):>9.1f} {lat.get('p95_ms', 0):>9.1f} {lat.get('p99_ms', 0):>9.1f} {lat.get('max_ms', 0):>9.1f}")
+    print(f"\nfake azure: {results.get('fake_azure')}")
+
+
+def compare(before_path: str, after_path: str) -> None:
+    """Print per-endpoint deltas between two result files."""
+    with open(before_path, "r", encoding="utf-8") as fh:
+        before = json.load(fh)
+    with open(after_path, "r", encoding="utf-8") as fh:
+        after = json.load(fh)
+
+    def pct(old, new):
+        if not old:
+            return "   n/a"
+        return f"{(new - old) / old * 100:+6.1f}%"
+
+    print(f"{'endpoint':28} {'rps':>16} {'p50':>16} {'p99':>16} {'err':>14}")
+    names = sorted(set(before["endpoints"]) | set(after["endpoints"]))
+    for name in names + ["<overall>"]:
+        b = before["overall"] if name == "<overall>" else before["endpoints"].get(name)
+        a = after["overall"] if name == "<overall>" else after["endpoints"].get(name)
+        if not a or not b:
+            print(f"{name:28} (only in {'after' if a else 'before'})")
+            continue
+        print(f"{name:28} "
+              f"{a['throughput_rps']:>8} {pct(b['throughput_rps'], a['throughput_rps'])} "
+              f"{a['latency'].get('p50_ms', 0):>8.1f} {pct(b['latency'].get('p50_ms'), a['latency'].get('p50_ms', 0))} "
+              f"{a['latency'].get('p99_ms', 0):>8.1f} {pct(b['latency'].get('p99_ms'), a['latency'].get('p99_ms', 0))} "
+              f"{a['error_rate']:>7.2%} ({b['error_rate']:.2%})")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load-test the backend against a fake Azure OpenAI.")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run (ignored with --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unrecorded warm-up traffic")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--port", type=int, default=0, help="port for the app server (0 = any free port)")
+    parser.add_argument("--db", help="SQLite path (default: a fresh temp file)")
+    parser.add_argument("--seed-rows", type=int, default=200, help="submissions inserted before the run")
+    parser.add_argument("--payloads", help="glob for payload fixtures (default: ../payload*.json)")
+    parser.add_argument("--only", help="comma-separated scenario names to run")
+    parser.add_argument("--weight", action="append", help="override a scenario weight, e.g. generation.ask=5")
+    parser.add_argument("--seed", type=int, default=None, help="RNG seed for a reproducible request mix")
+    parser.add_argument("--chat-latency", default="lognormal:800:0.4")
+    parser.add_argument("--embedding-latency", default="fixed:40")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--error-429", type=float, default=0.0, help="fraction of upstream calls answered with 429")
+    parser.add_argument("--error-5xx", type=float, default=0.0, help="fraction of upstream calls answered with 503")
+    parser.add_argument("--retry-delay", type=float, default=0.2, help="AZURE_RETRY_DELAY used by the app")
+    parser.add_argument("--cassette", help="replay upstream calls from this cassette instead of the fake server")
+    parser.add_argument("--cassette-latency", choices=("original", "zero"), default="original",
+                        help="replay with the recorded upstream latency or none")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two result files and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = run(args)
+    print_report(results)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"results written to {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Weighted request mix for the load harness.
+
+Generation payloads come from the repo's payload*.json fixtures; each request
+gets a randomised title/user so the backend cannot serve everything from one
+hot path.
+"""
+import glob
+import json
+import os
+import random
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+_PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+
+@dataclass
+class Request:
+    name: str
+    method: str
+    path: str
+    json: Optional[Dict[str, Any]] = None
+    headers: Optional[Dict[str, str]] = None
+
+
+@dataclass
+class Scenario:
+    name: str
+    weight: float
+    build: Callable[[random.Random], Request]
+
+
+def load_payloads(pattern: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Load every payload*.json fixture next to the backend folder."""
+    pattern = pattern or os.path.join(_PROJECT_DIR, "payload*.json")
+    payloads = []
+    for path in sorted(glob.glob(pattern)):
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                payloads.append(json.load(fh))
+        except Exception:
+            continue
+    if not payloads:
+        raise RuntimeError(f"No payload fixtures matched {pattern}")
+    return payloads
+
+
+def _vary_payload(base: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    payload = json.loads(json.dumps(base))
+    suffix = rng.randrange(1_000_000)
+    payload["project_title"] = f"{payload.get('project_title') or 'Project'} #{suffix}"
+    payload["user_id"] = f"loadtest.user{rng.randrange(200)}@example.com"
+    payload.pop("submission_id", None)
+    return payload
+
+
+def default_scenarios(payloads: List[Dict[str, Any]], submission_ids: List[int]) -> List[Scenario]:
+    """
+    Request mix roughly matching frontend traffic: mostly reads, a steady trickle of generations.
+    """
+    def ask(rng):
+        return Request("generation.ask", "POST", "/api/generation/ask", json=_vary_payload(rng.choice(payloads), rng))
+
+    def ask_html(rng):
+        return Request("generation.ask_html", "POST", "/api/generation/ask?format=html", json=_vary_payload(rng.choice(payloads), rng))
+
+    def ask_html_stream(rng):
+        return Request("generation.ask_html_stream", "POST", "/api/generation/ask?format=html&stream=1",
+                       json=_vary_payload(rng.choice(payloads), rng))
+
+    def submission(rng):
+        sid = rng.choice(submission_ids) if submission_ids else 1
+        return Request("submissions.get", "GET", f"/api/submissions/{sid}")
+
+    def submission_html(rng):
+        sid = rng.choice(submission_ids) if submission_ids else 1
+        return Request("submissions.get_html", "GET", f"/api/submissions/{sid}?format=html")
+
+    return [
+        Scenario("generation.ask", 1.0, ask),
+        Scenario("generation.ask_html", 0.5, ask_html),
+        Scenario("generation.ask_html_stream", 0.5, ask_html_stream),
+        Scenario("questionnaire", 3.0, lambda rng: Request("questionnaire", "GET", "/api/questionnaire")),
+        Scenario("submissions.list", 2.0, lambda rng: Request("submissions.list", "GET", "/api/submissions")),
+        Scenario("submissions.get", 2.0, submission),
+        Scenario("submissions.get_html", 1.0, submission_html),
+        Scenario("kpi.department_charters", 1.0, lambda rng: Request("kpi.department_charters", "GET", "/api/kpi/department-charters")),
+        Scenario("kpi.returning_users", 1.0, lambda rng: Request("kpi.returning_users", "GET", f"/api/kpi/returning-users?days={rng.choice([7, 15, 30])}")),
+        Scenario("kpi.user_activity", 1.0, lambda rng: Request("kpi.user_activity", "GET", "/api/kpi/user-activity?limit=10")),
+        Scenario("kpi.charters_per_month", 1.0, lambda rng: Request("kpi.charters_per_month", "GET", "/api/kpi/charters-per-month")),
+        Scenario("kpi.snapshot", 1.0, lambda rng: Request("kpi.snapshot", "GET", "/api/kpi/snapshot")),
+    ]
+
+
+def pick(scenarios: List[Scenario], rng: random.Random) -> Request:
+    scenario = rng.choices(scenarios, weights=[s.weight for s in scenarios], k=1)[0]
+    return scenario.build(rng)
@@ -0,0 +1,294 @@
+"""
+Benchmark case registry.
+
+A case is a setup function registered with @case(name, params). For each
+param it returns a zero-argument callable; only that callable is timed.
+Params listed in `full` are skipped unless the runner is started with --full.
+"""
+import itertools
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Sequence
+
+from benchmarks.micro import inputs
+
+
+@dataclass
+class Case:
+    name: str
+    params: Sequence[Any]
+    setup: Callable[[Any], Callable[[], Any]]
+    full: Sequence[Any] = field(default_factory=tuple)
+
+
+CASES: List[Case] = []
+
+
+def case(name: str, params: Sequence[Any], full: Sequence[Any] = ()):
+    def register(setup):
+        CASES.append(Case(name, params, setup, full))
+        return setup
+    return register
+
+
+_RENDER_SIZES = (4, 32, 256)
+_RENDER_FULL = (2048,)
+
+
+@case("render_html.generation", _RENDER_SIZES, _RENDER_FULL)
+def _render_generation(n):
+    from app.api import generation
+    resp = inputs.legacy_charter_response(n)
+    return lambda: generation._render_html_from_response(resp)
+
+
+@case("render_html.generation2", _RENDER_SIZES, _RENDER_FULL)
+def _render_generation2(n):
+    from app.api import generation2
+    resp = inputs.charter_response(n)
+    return lambda: generation2._render_html_from_response(resp)
+
+
+@case("render_html.generation4", _RENDER_SIZES, _RENDER_FULL)
+def _render_generation4(n):
+    from app.api import generation4
+    resp = inputs.charter_response(n)
+    return lambda: generation4._render_html_from_response(resp)
+
+
+@case("render_html.charter_renderer", _RENDER_SIZES, _RENDER_FULL)
+def _render_charter_renderer(n):
+    from app.services import charter_renderer
+    resp = inputs.charter_response(n)
+    return lambda: charter_renderer.render_html(resp)
+
+
+@case("render_html.linearity", (64, 512, 4096))
+def _render_linearity(n):
+    """Fixed-size charter with n risks; time per call should grow linearly with n."""
+    from app.services import charter_renderer
+    resp = inputs.charter_response(8)
+    resp["risks_and_mitigation"] = inputs.charter_response(n)["risks_and_mitigation"]
+    return lambda: charter_renderer.render_html(resp)
+
+
+@case("parse_json.clean", (32, 256))
+def _parse_clean(n):
+    from app.api import generation
+    text = inputs.llm_outputs(n)["clean"]
+    return lambda: generation._try_parse_json_from_text(text)
+
+
+@case("parse_json.fenced", (32, 256))
+def _parse_fenced(n):
+    from app.api import generation
+    text = inputs.llm_outputs(n)["fenced"]
+    return lambda: generation._try_parse_json_from_text(text)
+
+
+@case("parse_json.prose", (32, 256))
+def _parse_prose(n):
+    from app.api import generation
+    text = inputs.llm_outputs(n)["prose"]
+    return lambda: generation._try_parse_json_from_text(text)
+
+
+@case("parse_json.truncated", (32, 256))
+def _parse_truncated(n):
+    from app.api import generation
+    text = inputs.llm_outputs(n)["truncated"]
+    return lambda: generation._try_parse_json_from_text(text)
+
+
+@case("compute_total_score.generation", (18, 1000, 10000))
+def _score_generation(n):
+    from app.services import scoring_engine
+    qs = inputs.questions(n)
+    return lambda: scoring_engine.score_questions(qs)
+
+
+@case("compute_total_score.generation4", (18, 1000, 10000))
+def _score_generation4(n):
+    from app.api import generation4
+    qs = inputs.questions(n)
+    return lambda: generation4._compute_total_score(qs)
+
+
+@case("scoring_engine.score_batch", (1_000, 10_000), (100_000,))
+def _score_batch(n):
+    import random
+    from app.services import scoring_engine
+    engine = scoring_engine.get_engine()
+    rng = random.Random(n)
+    by_question: Dict[int, List[int]] = {}
+    for col, qn in enumerate(engine.option_question):
+        by_question.setdefault(qn, []).append(col)
+    selections = [[rng.choice(cols) for cols in by_question.values()] for _ in range(n)]
+    return lambda: engine.score_batch(selections)
+
+
+@case("build_prompt", (18, 200))
+def _build_prompt(n):
+    from app.services import prompt_builder
+    payload = inputs.frontend_payload(n)
+    summary = "Total score: 42\nComplexity (expected): High\n"
+    return lambda: prompt_builder.build_prompt(payload, summary)
+
+
+_db_files: Dict[int, str] = {}
+
+
+def _db_for(rows: int) -> str:
+    if rows not in _db_files:
+        path = os.path.join(tempfile.mkdtemp(prefix="pcg-micro-"), f"submissions-{rows}.db")
+        inputs.seed_submissions_db(path, rows)
+        _db_files[rows] = path
+    return _db_files[rows]
+
+
+@case("storage.list_submissions", (10_000,), (100_000,))
+def _list_submissions(rows):
+    from app.services import storage
+    path = _db_for(rows)
+
+    def run():
+        storage.DB_PATH = path
+        return storage.list_submissions(limit=100)
+    return run
+
+
+@case("storage.query_submissions.summary", (10_000,), (100_000,))
+def _query_submissions_summary(rows):
+    from app.services import storage
+    path = _db_for(rows)
+
+    def run():
+        storage.DB_PATH = path
+        return storage.query_submissions(limit=100, sponsor="Sponsor 7")
+    return run
+
+
+@case("storage.get_submission", (10_000,))
+def _get_submission(rows):
+    from app.services import storage
+    path = _db_for(rows)
+    ids = itertools.cycle(range(1, rows + 1, 97))
+
+    def run():
+        storage.DB_PATH = path
+        return storage.get_submission(next(ids))
+    return run
+
+
+@case("render_cache.get_rendered.json_miss", (10_000,))
+def _get_rendered_json_miss(rows):
+    from app.services import render_cache, storage
+    path = _db_for(rows)
+    ids = itertools.cycle(range(1, rows + 1, 97))
+
+    def run():
+        storage.DB_PATH = path
+        render_cache.clear()
+        return render_cache.get_rendered(next(ids), "json")
+    return run
+
+
+@case("storage.aggregate_submissions.industry", (10_000,), (100_000,))
+def _aggregate_submissions(rows):
+    import sqlite3
+    from app.services import storage
+    path = _db_for(rows)
+    storage.DB_PATH = path
+    storage._ensure_db()
+    conn = sqlite3.connect(path)  # seeded rows predate the attribute columns; fill them directly
+    conn.execute("UPDATE submissions SET industry = 'Industry ' || (id % 23), complexity = 'Band ' || (id % 4)")
+    conn.commit()
+    conn.close()
+
+    def run():
+        storage.DB_PATH = path
+        return storage.aggregate_submissions("industry", created_from="2023-02-01")
+    return run
+
+
+@case("storage.search_submissions", (10_000,))
+def _search_submissions(rows):
+    from app.services import search_index, storage
+    storage.DB_PATH = _db_for(rows)
+    search_index.rebuild(chunk_size=2000)  # seeded rows are not indexed; every row matches (worst case)
+
+    def run():
+        storage.DB_PATH = _db_files[rows]
+        return storage.search_submissions("vendor migration", limit=20)
+    return run
+
+
+_KPI_SIZES = (30, 3650)
+
+
+def _kpi_file(n: int) -> str:
+    path = os.path.join(tempfile.mkdtemp(prefix="pcg-kpi-"), f"kpi-{n}.json")
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(inputs.kpi_data(n), fh)
+    return path
+
+
+def _kpi_case(accessor: Callable[[Any], Any]):
+    def setup(n):
+        from app.config import Config
+        from app.services import assets, kpi_view
+        Config.KPI_FILE_PATH = _kpi_file(n)
+        assets.refresh("kpi")
+
+        def run():
+            kpi_view.SOURCE = "file"
+            return accessor(kpi_view)
+        return run
+    return setup
+
+
+def _kpi_db_case(accessor: Callable[[Any], Any], spread_days: int = 0):
+    def setup(rows):
+        import sqlite3
+        from app.services import kpi_view, storage
+        if spread_days:  # its own copy: the rows are back-dated below
+            path = os.path.join(tempfile.mkdtemp(prefix="pcg-micro-"), f"submissions-{rows}-spread.db")
+            inputs.seed_submissions_db(path, rows)
+        else:
+            path = _db_for(rows)
+        storage.DB_PATH = path
+        storage._ensure_db()
+        conn = sqlite3.connect(path)  # seeded rows have no users or departments; the KPI triggers pick these up
+        if spread_days:  # back-date the rows over the last spread_days days, before the users count them
+            conn.execute(f"UPDATE submissions SET created_at = datetime('now', '-' || (id % {spread_days}) || ' days')")
+        conn.execute("UPDATE submissions SET user_id = 'user' || (id % 500), department = 'Dept ' || (id % 9)")
+        conn.commit()
+        conn.close()
+
+        def run():
+            storage.DB_PATH = path
+            kpi_view.SOURCE = "database"
+            return accessor(kpi_view)
+        return run
+    return setup
+
+
+case("kpi_view.get_department_charters", _KPI_SIZES)(_kpi_case(lambda kv: kv.get_department_charters()))
+case("kpi_view.get_returning_users", _KPI_SIZES)(_kpi_case(lambda kv: kv.get_returning_users(days=15)))
+case("kpi_view.get_user_activity", _KPI_SIZES)(_kpi_case(lambda kv: kv.get_user_activity(limit=10)))
+case("kpi_view.get_charters_per_month", _KPI_SIZES)(_kpi_case(lambda kv: kv.get_charters_per_month()))
+case("kpi_view.top_departments", _KPI_SIZES)(_kpi_case(lambda kv: kv.top_departments(limit=3)))
+
+case("kpi_view.db.get_department_charters", (10_000,), (100_000,))(_kpi_db_case(lambda kv: kv.get_department_charters()))
+case("kpi_view.db.get_returning_users", (10_000,), (100_000,))(_kpi_db_case(lambda kv: kv.get_returning_users(days=15)))
+case("kpi_view.db.get_user_activity", (10_000,), (100_000,))(_kpi_db_case(lambda kv: kv.get_user_activity(limit=10)))
+case("kpi_view.db.get_charters_per_month", (10_000,), (100_000,))(_kpi_db_case(lambda kv: kv.get_charters_per_month()))
+
+_TEN_YEARS = (date.today() - timedelta(days=3652), date.today())
+case("kpi_view.db.charters_range.month", (10_000,), (100_000,))(
+    _kpi_db_case(lambda kv: kv.charters_range(*_TEN_YEARS, "month"), spread_days=3652))
+case("kpi_view.db.returning_users_range.week", (10_000,), (100_000,))(
+    _kpi_db_case(lambda kv: kv.returning_users_range(*_TEN_YEARS, "week"), spread_days=3652))
@@ -0,0 +1,142 @@
+"""
+Timing and allocation measurement for micro-benchmarks.
+
+Each case is timed in calibrated batches (so one sample is well above timer
+resolution), with GC disabled inside a batch, and summarised with robust
+statistics (median/IQR) plus a 95% confidence interval on the mean.
+Allocations are measured on a separate, untimed call under tracemalloc.
+"""
+import gc
+import math
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+# two-sided 95% Student-t critical values for small sample counts
+_T95 = {2: 12.706, 3: 4.303, 4: 3.182, 5: 2.776, 6: 2.571, 7: 2.447, 8: 2.365, 9: 2.306, 10: 2.262,
+        12: 2.201, 15: 2.145, 20: 2.093, 25: 2.064, 30: 2.045}
+
+
+def _t95(n: int) -> float:
+    if n >= 30:
+        return 1.96
+    keys = [k for k in sorted(_T95) if k <= n]
+    return _T95[keys[-1]] if keys else _T95[2]
+
+
+def _time_batch(fn: Callable[[], Any], loops: int) -> float:
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        return time.perf_counter() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def calibrate(fn: Callable[[], Any], min_time: float) -> int:
+    """Smallest power-of-two loop count whose batch takes at least min_time."""
+    loops = 1
+    while loops < 1 << 20:
+        if _time_batch(fn, loops) >= min_time:
+            return loops
+        loops *= 2
+    return loops
+
+
+def measure_time(fn: Callable[[], Any], repeats: int = 15, min_time: float = 0.02, warmup: int = 1) -> Dict[str, Any]:
+    """Per-call timing statistics in microseconds."""
+    for _ in range(max(0, warmup)):
+        fn()
+    loops = calibrate(fn, min_time)
+    samples = [_time_batch(fn, loops) / loops * 1e6 for _ in range(max(2, repeats))]
+    samples.sort()
+    mean = statistics.fmean(samples)
+    stdev = statistics.stdev(samples) if len(samples) > 1 else 0.0
+    half_width = _t95(len(samples)) * stdev / math.sqrt(len(samples))
+    q1, _, q3 = statistics.quantiles(samples, n=4) if len(samples) >= 2 else (samples[0], None, samples[0])
+    return {
+        "loops": loops,
+        "repeats": len(samples),
+        "median_us": round(statistics.median(samples), 4),
+        "mean_us": round(mean, 4),
+        "stdev_us": round(stdev, 4),
+        "min_us": round(samples[0], 4),
+        "q1_us": round(q1, 4),
+        "q3_us": round(q3, 4),
+        "ci95_us": [round(mean - half_width, 4), round(mean + half_width, 4)],
+    }
+
+
+def measure_allocations(fn: Callable[[], Any]) -> Dict[str, Any]:
+    """
+    Allocation profile of a single call: peak traced bytes, number of
+    allocated blocks seen by tracemalloc, and net blocks still alive afterwards.
+    """
+    gc.collect()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        before_blocks = sys.getallocatedblocks()
+        tracemalloc.reset_peak()
+        base_current, _ = tracemalloc.get_traced_memory()
+        snap_before = tracemalloc.take_snapshot()
+        result = fn()
+        snap_after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        del result
+        grown = sum(max(0, s.count_diff) for s in snap_after.compare_to(snap_before, "lineno"))
+        gc.collect()
+        net_blocks = sys.getallocatedblocks() - before_blocks
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return {
+        "peak_bytes": max(0, peak - base_current),
+        "allocated_blocks": grown,
+        "net_blocks": net_blocks,
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.05) -> Dict[str, Any]:
+    """
+    Compare two result sets case by case.
+
+    A case is only called slower/faster when the median moved by more than
+    `threshold` AND the interquartile ranges do not overlap, so ordinary
+    run-to-run noise does not get reported as a regression.
+    """
+    rows = []
+    for key, cur in current.get("cases", {}).items():
+        base = baseline.get("cases", {}).get(key)
+        if not base:
+            rows.append({"case": key, "verdict": "new"})
+            continue
+        bt, ct = base["time"], cur["time"]
+        ratio = ct["median_us"] / bt["median_us"] if bt["median_us"] else float("inf")
+        verdict = "same"
+        if ratio > 1 + threshold and ct["q1_us"] > bt["q3_us"]:
+            verdict = "slower"
+        elif ratio < 1 - threshold and ct["q3_us"] < bt["q1_us"]:
+            verdict = "faster"
+        rows.append({
+            "case": key,
+            "verdict": verdict,
+            "ratio": round(ratio, 4),
+            "baseline_median_us": bt["median_us"],
+            "median_us": ct["median_us"],
+            "baseline_peak_bytes": base.get("alloc", {}).get("peak_bytes"),
+            "peak_bytes": cur.get("alloc", {}).get("peak_bytes"),
+        })
+    missing = sorted(set(baseline.get("cases", {})) - set(current.get("cases", {})))
+    return {
+        "rows": rows,
+        "missing": missing,
+        "regressions": [r["case"] for r in rows if r["verdict"] == "slower"],
+    }
@@ -0,0 +1,202 @@
+"""
+Deterministic, realistic-looking inputs for the micro-benchmarks.
+
+Sizes are expressed as a single integer `n` that scales the long lists in a
+charter (risks, timeline phases/tasks, objectives, ...), the number of
+questions, or the number of stored rows.
+"""
+import json
+import os
+import random
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+_WORDS = (
+    "stakeholder delivery platform integration rollout migration vendor budget governance risk "
+    "compliance analytics dashboard supply chain capability engineering programme milestone "
+    "procurement security testing deployment training adoption benefit requirement scope"
+).split()
+
+
+def _sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def charter_response(n: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    A generated charter with every section the renderers know about.
+    `n` controls list lengths: n risks, n objectives, n//4 timeline phases with 8 tasks each.
+    """
+    rng = random.Random(seed + n)
+    phases = max(1, n // 4)
+    return {
+        "project_id": "bench-0001",
+        "created_at": "2025-01-01T00:00:00+00:00",
+        "project_title": "Benchmark <Charter> & Co",
+        "industry": "Aerospace",
+        "budget": "500k-1M",
+        "duration": "12 months",
+        "sponsor": "Jane Doe",
+        "project_sponsor": "Jane Doe",
+        "date": "2025-01-01",
+        "description": _sentence(rng, 60),
+        "objectives": [_sentence(rng) for _ in range(n)],
+        "current_state": [_sentence(rng) for _ in range(max(1, n // 2))],
+        "future_state": [_sentence(rng) for _ in range(max(1, n // 2))],
+        "high_level_requirement": [_sentence(rng) for _ in range(max(1, n // 2))],
+        "business_benefit": [_sentence(rng) for _ in range(max(1, n // 2))],
+        "project_scope": {
+            "scope": _sentence(rng, 30),
+            "in_scope": [_sentence(rng) for _ in range(max(1, n // 2))],
+            "out_scope": [_sentence(rng) for _ in range(max(1, n // 4))],
+        },
+        "timeline": {
+            f"phase_{i}_delivery": {
+                "duration": f"{rng.randint(2, 12)} weeks",
+                "tasks": [_sentence(rng, 6) for _ in range(8)],
+                "pre_requisites": _sentence(rng, 8),
+            }
+            for i in range(phases)
+        },
+        "budget_breakdown": {
+            "total_cost": "750k",
+            "allocation": {f"line_item_{i}": f"{rng.randint(1, 30)}%" for i in range(max(3, n // 4))},
+        },
+        "risks_and_mitigation": [
+            {"risk": _sentence(rng, 5), "impact": rng.choice(["Low", "Medium", "High"]), "mitigation": _sentence(rng, 14)}
+            for _ in range(n)
+        ],
+        "team_structure": {
+            f"role_{i}": {"count": rng.randint(1, 5), "responsibilities": [_sentence(rng, 6) for _ in range(4)]}
+            for i in range(max(1, n // 8))
+        },
+        "resources_required": {
+            "skills": [_sentence(rng, 3) for _ in range(max(1, n // 4))],
+            "tools_and_technologies": [_sentence(rng, 2) for _ in range(max(1, n // 4))],
+            "facilities": {"site": "Derby", "labs": [_sentence(rng, 3) for _ in range(3)]},
+        },
+        "project_manager": {"count": 1, "responsibilities": [_sentence(rng, 6) for _ in range(4)]},
+        "success_criteria": [_sentence(rng) for _ in range(max(1, n // 2))],
+        "assumptions": [_sentence(rng) for _ in range(max(1, n // 2))],
+        "dependencies": [_sentence(rng) for _ in range(max(1, n // 2))],
+        "pm_resource_recommendation": _sentence(rng, 20),
+        "lesson_learnt": [_sentence(rng) for _ in range(max(1, n // 4))],
+        "complexity_score": 42,
+        "recommendation": _sentence(rng, 25),
+    }
+
+
+def legacy_charter_response(n: int, seed: int = 0) -> Dict[str, Any]:
+    """Charter in the original schema used by generation.py (plain-text project_scope)."""
+    resp = charter_response(n, seed)
+    resp["project_scope"] = resp["project_scope"]["scope"]
+    return resp
+
+
+def llm_outputs(n: int) -> Dict[str, str]:
+    """The shapes of model output `_try_parse_json_from_text` has to cope with."""
+    body = json.dumps(charter_response(n), ensure_ascii=False, indent=2)
+    return {
+        "clean": body,
+        "fenced": f"```json\n{body}\n```",
+        "prose": f"Here is the project charter you asked for:\n\n{body}\n\nLet me know if you need changes.",
+        "truncated": body[: int(len(body) * 0.9)],
+    }
+
+
+def questions(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Frontend-style answered questions: the selected option carries its score."""
+    rng = random.Random(seed + n)
+    out = []
+    for i in range(n):
+        qid = f"q{i:05d}"
+        if i % 3 == 0:  # payload5-style flat answer with score
+            out.append({"id": qid, "text": _sentence(rng, 8), "answer": "Yes", "score": rng.randint(0, 4)})
+        else:
+            out.append({
+                "id": qid,
+                "text": "What is your expected budget?" if i == 1 else _sentence(rng, 8),
+                "type": "radio",
+                "answer": "500k-1M",
+                "options": [{"id": f"{qid}_opt{rng.randint(1, 4)}", "label": _sentence(rng, 3), "score": rng.randint(0, 4)}],
+            })
+    return out
+
+
+def frontend_payload(n_questions: int, seed: int = 0) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    return {
+        "project_title": "NextGen Learning Platform",
+        "domain": "Education",
+        "budget_range": "50k-100k",
+        "timeline": "12-18 months",
+        "project_description": _sentence(rng, 40),
+        "questions": questions(n_questions, seed),
+        "additional_context": _sentence(rng, 30),
+        "user_id": "sponsor.jane.doe@example.com",
+    }
+
+
+def kpi_data(n: int, seed: int = 0) -> Dict[str, Any]:
+    """KPI file with n days of returning users and n users of activity."""
+    rng = random.Random(seed + n)
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    return {
+        "department_charters": [
+            {"department": f"Dept {i}", "charterCount": rng.randint(0, 50), "color": "#3B82F6"} for i in range(max(6, n // 50))
+        ],
+        "returning_users": [
+            {"date": (start + timedelta(days=i)).date().isoformat(), "returningUsers": rng.randint(50, 200),
+             "newUsers": rng.randint(0, 50), "totalUsers": rng.randint(100, 250)}
+            for i in range(n)
+        ],
+        "user_activity": [
+            {"userId": str(i), "name": f"User {i}", "chartersCreated": rng.randint(0, 20),
+             "lastLogin": "2025-09-10", "totalLogins": rng.randint(1, 100)}
+            for i in range(n)
+        ],
+        "charters_per_month": [{"month": f"M{i}", "chartersCreated": rng.randint(0, 40)} for i in range(max(12, n // 30))],
+    }
+
+
+def seed_submissions_db(path: str, rows: int, seed: int = 0) -> None:
+    """
+    Fill a SQLite file with `rows` submissions in the storage schema using one
+    bulk transaction (going through storage.store_submission would take minutes).
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    payload_text = json.dumps(frontend_payload(18, seed), ensure_ascii=False)
+    result_text = json.dumps(charter_response(12, seed), ensure_ascii=False)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS submissions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                project_name TEXT,
+                sponsor TEXT,
+                payload_json TEXT,
+                result_json TEXT,
+                complexity_score REAL,
+                recommended_pm_count INTEGER,
+                created_at TEXT,
+                updated_at TEXT
+            )
+            """
+        )
+        start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+        conn.executemany(
+            "INSERT INTO submissions (project_name, sponsor, payload_json, result_json, complexity_score, "
+            "recommended_pm_count, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (f"Project {i}", f"Sponsor {i % 97}", payload_text, result_text, float(rng.randint(0, 60)),
+                 rng.randint(0, 2), (start + timedelta(minutes=i)).isoformat(), (start + timedelta(minutes=i)).isoformat())
+                for i in range(rows)
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
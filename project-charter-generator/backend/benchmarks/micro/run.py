@@ -0,0 +1,115 @@
+"""
+Micro-benchmarks for the pure-Python work done per request.
+
+    cd backend
+    python -m benchmarks.micro.run                         # all cases, default sizes
+    python -m benchmarks.micro.run -k render_html --full   # include the largest sizes
+    python -m benchmarks.micro.run --save results/micro-baseline.json
+    python -m benchmarks.micro.run --compare results/micro-baseline.json
+
+--compare exits with status 1 when any case is significantly slower than the
+baseline (median moved past --threshold and the IQRs do not overlap).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+
+def _configure_environment() -> None:
+    """Dummy Azure settings so app modules import without real credentials."""
+    os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "http://127.0.0.1:9")
+    os.environ.setdefault("AZURE_OPENAI_KEY", "bench")
+    os.environ.setdefault("AZURE_API_VERSION", "2024-02-01")
+    os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(prefix="pcg-micro-"), "bench.db"))
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+
+def run_cases(pattern: Optional[str], full: bool, repeats: int, min_time: float, allocations: bool) -> Dict[str, Any]:
+    from benchmarks.micro.cases import CASES
+    from benchmarks.micro.harness import measure_allocations, measure_time
+
+    results: Dict[str, Any] = {}
+    for c in CASES:
+        if pattern and pattern not in c.name:
+            continue
+        params = list(c.params) + (list(c.full) if full else [])
+        for p in params:
+            key = f"{c.name}[{p}]"
+            fn = c.setup(p)
+            timing = measure_time(fn, repeats=repeats, min_time=min_time)
+            entry = {"case": c.name, "param": p, "time": timing}
+            if allocations:
+                entry["alloc"] = measure_allocations(fn)
+            results[key] = entry
+            alloc = entry.get("alloc", {})
+            print(f"{key:52} median {timing['median_us']:>12.2f} us  "
+                  f"IQR [{timing['q1_us']:.2f}, {timing['q3_us']:.2f}]  "
+                  f"peak {alloc.get('peak_bytes', 0):>10} B  blocks {alloc.get('allocated_blocks', 0)}")
+            sys.stdout.flush()
+    return results
+
+
+def print_comparison(cmp: Dict[str, Any]) -> None:
+    print(f"\n{'case':52} {'baseline':>12} {'current':>12} {'ratio':>7}  verdict")
+    for row in cmp["rows"]:
+        if row["verdict"] == "new":
+            print(f"{row['case']:52} {'':>12} {'':>12} {'':>7}  new")
+            continue
+        print(f"{row['case']:52} {row['baseline_median_us']:>12.2f} {row['median_us']:>12.2f} {row['ratio']:>7.3f}  {row['verdict']}")
+    for key in cmp["missing"]:
+        print(f"{key:52} missing from current run")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for CPU hot paths.")
+    parser.add_argument("-k", dest="pattern", help="only run cases whose name contains this string")
+    parser.add_argument("--full", action="store_true", help="include the largest input sizes (slow)")
+    parser.add_argument("--repeats", type=int, default=15, help="timed samples per case")
+    parser.add_argument("--min-time", type=float, default=0.02, help="minimum seconds per timed sample")
+    parser.add_argument("--no-alloc", action="store_true", help="skip allocation measurement")
+    parser.add_argument("--save", help="write results JSON here (e.g. a baseline)")
+    parser.add_argument("--compare", help="baseline JSON to compare this run against")
+    parser.add_argument("--threshold", type=float, default=0.05, help="relative median change treated as significant")
+    args = parser.parse_args(argv)
+
+    _configure_environment()
+    from benchmarks.micro.harness import compare_results
+
+    cases = run_cases(args.pattern, args.full, args.repeats, args.min_time, not args.no_alloc)
+    results = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeats": args.repeats,
+            "min_time": args.min_time,
+        },
+        "cases": cases,
+    }
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"\nresults written to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        if args.pattern:
+            baseline["cases"] = {k: v for k, v in baseline.get("cases", {}).items() if args.pattern in v.get("case", k)}
+        cmp = compare_results(baseline, results, threshold=args.threshold)
+        print_comparison(cmp)
+        if cmp["regressions"]:
+            print(f"\n{len(cmp['regressions'])} regression(s): {', '.join(cmp['regressions'])}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
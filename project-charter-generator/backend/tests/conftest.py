@@ -1,2 +1,26 @@
 import os, sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _submissions_db(tmp_path, monkeypatch):
+    """Every test gets its own submissions database: create_app() migrates storage.DB_PATH."""
+    from app.services import storage
+
+    monkeypatch.setattr(storage, "DB_PATH", str(tmp_path / "submissions.db"))
+    yield
+    storage.close_all()
+
+
+@pytest.fixture
+def app_client(monkeypatch):
+    """Flask test client on the test's own database, without background pre-rendering of saved charters."""
+    from app import create_app
+    from app.services import render_cache
+
+    monkeypatch.setattr(render_cache, "on_result_saved", lambda sid: None)
+    app = create_app()
+    app.config["TESTING"] = True
+    return app.test_client()
@@ -0,0 +1,72 @@
+import builtins
+import json
+import pytest
+from app.services import assets, kpi_view, prompt_builder
+
+
+@pytest.fixture
+def asset(tmp_path):
+    path = tmp_path / "thing.json"
+    path.write_text(json.dumps({"v": 1}), encoding="utf-8")
+
+    def validate(data):
+        if "v" not in data:
+            raise assets.AssetError("missing v")
+
+    assets.register("test_thing", lambda: str(path), validate=validate)
+    yield path
+    assets._specs.pop("test_thing", None)
+    assets._snapshots.pop("test_thing", None)
+
+
+def _rewrite(path, data):
+    # size changes with the payload so the stamp differs even on coarse mtime filesystems
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_reads_are_served_from_the_snapshot_without_file_io(asset, monkeypatch):
+    first = assets.get("test_thing")
+    assert first.data == {"v": 1} and first.version == 1
+    monkeypatch.setattr(builtins, "open", lambda *a, **k: pytest.fail("file opened on read"))
+    monkeypatch.setattr(assets.os, "stat", lambda *a, **k: pytest.fail("file stat'ed on read"))
+    assert assets.get("test_thing") is first
+
+
+def test_watcher_reloads_once_file_is_stable(asset):
+    assets.get("test_thing")
+    _rewrite(asset, {"v": 22})
+    assets.check_once(now=100.0)
+    assert assets.data("test_thing") == {"v": 1}  # change noticed, still inside the debounce window
+    assets.check_once(now=100.0 + assets.RELOAD_DEBOUNCE)
+    snap = assets.get("test_thing")
+    assert snap.data == {"v": 22} and snap.version == 2
+
+
+def test_invalid_version_is_rejected_and_old_snapshot_kept(asset):
+    assets.get("test_thing")
+    _rewrite(asset, {"oops": True})
+    assert assets.refresh("test_thing") is False
+    assert assets.data("test_thing") == {"v": 1}
+    asset.write_text("{not json", encoding="utf-8")
+    assert assets.refresh("test_thing") is False
+    assert assets.data("test_thing") == {"v": 1}
+    _rewrite(asset, {"v": 333})
+    assert assets.refresh("test_thing") is True
+    assert assets.data("test_thing") == {"v": 333}
+
+
+def test_missing_file_raises_until_it_appears(asset):
+    asset.unlink()
+    with pytest.raises(FileNotFoundError):
+        assets.get("test_thing")
+    _rewrite(asset, {"v": 4})
+    assert assets.data("test_thing") == {"v": 4}
+
+
+def test_builtin_assets_feed_prompt_builder_and_kpi_view(monkeypatch):
+    assets.load_all()
+    monkeypatch.setattr(builtins, "open", lambda *a, **k: pytest.fail("file opened per request"))
+    prompt = prompt_builder.build_prompt({"project_title": "Apollo"}, "Total score: 3")
+    assert "Apollo" in prompt and "Total score: 3" in prompt
+    assert assets.get("output_schema").text.strip()[:1] == "{"
+    assert isinstance(kpi_view.get_department_charters(), list)
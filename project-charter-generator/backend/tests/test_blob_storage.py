@@ -0,0 +1,102 @@
+import json
+import sqlite3
+import pytest
+from app.services import blob_codec, blob_migration, render_cache, storage
+
+
+CHARTER = {"project_title": "Apollo", "objectives": [f"Deliver milestone {i} on time and on budget" for i in range(50)]}
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = str(tmp_path / "subs.db")
+    monkeypatch.setattr(storage, "DB_PATH", path)
+    monkeypatch.setattr(render_cache, "on_result_saved", lambda sid: None)
+    yield path
+    storage.close_all()
+
+
+def _raw(path, sid):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT payload_json, result_json FROM submissions WHERE id = ?", (sid,)).fetchone()
+    finally:
+        conn.close()
+
+
+def test_codec_round_trips_and_reads_legacy_text():
+    text = json.dumps(CHARTER)
+    blob = blob_codec.encode(text)
+    assert blob_codec.format_of(blob) == blob_codec.codec() and len(blob) < len(text) / 3
+    assert blob_codec.decode(blob) == text
+    assert blob_codec.format_of(blob_codec.encode("{}")) == "raw"  # too small to gain anything
+    assert blob_codec.decode('{"legacy": true}') == '{"legacy": true}'
+    with pytest.raises(blob_codec.BlobFormatError):
+        blob_codec.decode(b"\x00\x02not zlib")
+
+
+def test_large_results_are_stored_compressed_and_losslessly(db):
+    big = dict(CHARTER, scope={"in_scope": ["Integrate legacy system %d" % i for i in range(20_000)]})
+    sid = storage.store_submission({"project_title": "Apollo"})
+    storage.save_result(sid, big)
+    payload, result = _raw(db, sid)
+    assert isinstance(result, bytes) and len(result) < len(json.dumps(big)) / 5
+    assert storage.get_submission(sid)["result"] == big
+    assert storage.get_submission(sid, blobs=("payload",))["payload"] == {"project_title": "Apollo"}
+    assert "result" not in storage.get_submission(sid, blobs=())
+
+
+def test_migration_compresses_legacy_rows_and_resumes(db):
+    storage._ensure_db()
+    conn = sqlite3.connect(db)
+    conn.executemany(
+        "INSERT INTO submissions (project_name, payload_json, result_json) VALUES (?, ?, ?)",
+        [(f"P{i}", json.dumps({"n": i}), json.dumps(dict(CHARTER, n=i))) for i in range(5)],
+    )
+    conn.commit()
+    conn.close()
+
+    def stop(stats):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        blob_migration.compress_all(chunk_size=2, progress=stop)
+    assert isinstance(_raw(db, 2)[1], bytes) and isinstance(_raw(db, 3)[1], str)
+
+    stats = blob_migration.compress_all(chunk_size=2)
+    assert stats["resumed_from_id"] == 2 and stats["rewritten"] == 3
+    assert stats["bytes_after"] < stats["bytes_before"]
+    assert all(isinstance(v, bytes) for sid in range(1, 6) for v in _raw(db, sid))
+    assert storage.get_submission(4)["result"] == dict(CHARTER, n=3)
+    assert blob_migration.compress_all(restart=True)["rewritten"] == 0
+
+
+def test_migration_never_overwrites_a_concurrent_save(db, monkeypatch):
+    storage._ensure_db()
+    conn = sqlite3.connect(db)
+    conn.execute("INSERT INTO submissions (payload_json, result_json) VALUES ('{}', '{\"old\": 1}')")
+    conn.commit()
+    conn.close()
+    real = blob_migration._rewrite_chunk
+
+    def save_meanwhile(rows, recompress):
+        out = real(rows, recompress)
+        storage.save_result(1, {"new": 2})
+        return out
+
+    monkeypatch.setattr(blob_migration, "_rewrite_chunk", save_meanwhile)
+    stats = blob_migration.compress_all()
+    assert stats["conflicts"] == 1
+    assert storage.get_submission(1)["result"] == {"new": 2}
+
+
+@pytest.mark.skipif(blob_codec.zstandard is None, reason="zstandard not installed")
+def test_zstd_dictionary_blobs(db):
+    sids = [storage.store_submission({"n": i}) for i in range(200)]
+    for sid in sids:
+        storage.save_result(sid, dict(CHARTER, n=sid))
+    dict_id = blob_migration.train_dictionary(size=4096)
+    stats = blob_migration.compress_all(recompress=True)
+    assert stats["target"].endswith(f"+dict{dict_id}") and stats["rewritten"] == len(sids)
+    assert blob_codec.format_of(_raw(db, 1)[1]) == "zstd+dict"
+    assert storage.get_submission(7)["result"] == dict(CHARTER, n=7)
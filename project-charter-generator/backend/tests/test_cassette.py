@@ -0,0 +1,146 @@
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+
+from app.api import generation
+from app.services import azure_openai, cassette, databricks
+
+
+@pytest.fixture
+def use_cassette(tmp_path, monkeypatch):
+    """Install a module-wide cassette in the given mode, backed by a temp file."""
+    path = str(tmp_path / "cassette.jsonl")
+
+    def install(mode, match="exact"):
+        cas = cassette.Cassette(path, mode=mode, match=match, replay_latency="zero")
+        monkeypatch.setattr(cassette, "MODE", mode)
+        monkeypatch.setattr(cassette, "_cassette", cas)
+        return cas
+    return install
+
+
+def test_sanitize_redacts_credentials_but_keeps_usage():
+    data = {"Authorization": "Bearer x", "api_key": "k", "usage": {"prompt_tokens": 3}, "nested": [{"client_secret": "s"}]}
+    clean = cassette.sanitize(data)
+    assert clean["Authorization"] == "<redacted>"
+    assert clean["api_key"] == "<redacted>"
+    assert clean["nested"][0]["client_secret"] == "<redacted>"
+    assert clean["usage"] == {"prompt_tokens": 3}
+
+
+@patch("app.services.azure_openai.client")
+def test_generate_answer_record_then_replay(mock_client, use_cassette):
+    """
+    A recorded completion (here a malformed, truncated JSON body) is served back
+    verbatim in replay mode without touching the client.
+    """
+    malformed = '```json\n{"project_title": "X", "objectives": ["a", '
+    mock_resp = MagicMock()
+    mock_resp.choices = [MagicMock(message=MagicMock(content=malformed))]
+    mock_resp.usage.model_dump.return_value = {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+    mock_client.chat.completions.create.return_value = mock_resp
+
+    use_cassette("record")
+    assert azure_openai.generate_answer("prompt") == malformed
+
+    with open(use_cassette("replay").path, "r", encoding="utf-8") as fh:
+        (stored,) = [json.loads(line) for line in fh]
+    assert stored["usage"]["total_tokens"] == 15
+
+    mock_client.chat.completions.create.reset_mock()
+    assert azure_openai.generate_answer("prompt") == malformed
+    mock_client.chat.completions.create.assert_not_called()
+    assert generation._try_parse_json_from_text(malformed) is None
+
+
+@patch("app.services.azure_openai.client")
+def test_stream_answer_records_chunk_timing(mock_client, use_cassette):
+    def event(text=None, usage=None):
+        ev = MagicMock()
+        ev.choices = [MagicMock(delta=MagicMock(content=text))] if text is not None else []
+        ev.usage = usage
+        return ev
+
+    usage = MagicMock()
+    usage.model_dump.return_value = {"completion_tokens": 2}
+    mock_client.chat.completions.create.return_value = iter([event('{"a"'), event(": 1}"), event(usage=usage)])
+
+    use_cassette("record")
+    assert "".join(azure_openai.stream_answer("prompt")) == '{"a": 1}'
+
+    cas = use_cassette("replay")
+    (entries,) = cas._interactions.values()
+    assert [c[1] for c in entries[0]["chunks"]] == ['{"a"', ": 1}"]
+    assert entries[0]["usage"] == {"completion_tokens": 2}
+    assert list(azure_openai.stream_answer("prompt")) == ['{"a"', ": 1}"]
+
+
+def test_replay_miss_raises(use_cassette):
+    use_cassette("replay")
+    with pytest.raises(cassette.CassetteMiss):
+        azure_openai.generate_answer("never recorded")
+
+
+@patch("app.services.databricks.requests.post")
+def test_databricks_record_then_replay_ignores_host(mock_post, use_cassette):
+    mock_post.return_value = MagicMock(**{"raise_for_status.return_value": None, "json.return_value": {"run_id": 7}})
+
+    use_cassette("record")
+    databricks._post_with_retry("https://a.example.com/api/2.1/jobs/run-now", headers={"Authorization": "Bearer t"}, payload={"job_id": "1"})
+
+    use_cassette("replay")
+    mock_post.reset_mock()
+    result = databricks._post_with_retry("https://b.example.com/api/2.1/jobs/run-now", headers={}, payload={"job_id": "1"})
+    assert result == {"run_id": 7}
+    mock_post.assert_not_called()
+
+
+def test_sequential_match_cycles_in_recorded_order(use_cassette):
+    cas = use_cassette("record")
+    cas.record("azure_openai", {"prompt": "a"}, "first", 0.0)
+    cas.record("azure_openai", {"prompt": "b"}, "second", 0.0)
+
+    replay = use_cassette("replay", match="sequential")
+    got = [replay.lookup("azure_openai", {"prompt": "other"})["response"] for _ in range(3)]
+    assert got == ["first", "second", "first"]
+
+
+def test_record_appends_one_line_per_call(use_cassette):
+    cas = use_cassette("record")
+    cas.record("azure_openai", {"prompt": "a"}, "first", 0.0)
+    with open(cas.path, "r", encoding="utf-8") as fh:
+        head = fh.read()
+    cas.record("azure_openai", {"prompt": "a"}, "again", 0.0)
+    with open(cas.path, "r", encoding="utf-8") as fh:
+        text = fh.read()
+    assert text.startswith(head) and len(text.splitlines()) == 2  # appended, not rewritten
+
+    replay = use_cassette("replay")
+    assert [replay.lookup("azure_openai", {"prompt": "a"})["response"] for _ in range(2)] == ["first", "again"]
+
+
+def test_legacy_cassette_is_read_and_converted(tmp_path):
+    path = str(tmp_path / "old.json")
+    key = cassette.request_key("azure_openai", {"prompt": "a"})
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"version": 1, "interactions": {key: [{"service": "azure_openai", "response": "old"}]}}, fh)
+    assert cassette.Cassette(path).lookup("azure_openai", {"prompt": "a"})["response"] == "old"
+
+    cassette.Cassette(path, mode="record").record("azure_openai", {"prompt": "b"}, "new", 0.0)
+    with open(path, "r", encoding="utf-8") as fh:
+        assert [json.loads(line)["response"] for line in fh] == ["old", "new"]
+
+
+def test_redactor_rewrites_stored_content_but_not_the_key(use_cassette, monkeypatch):
+    def redact(service, request, response):
+        return dict(request, prompt="<user text>"), response
+    monkeypatch.setattr(cassette, "_redactor", None)
+    cassette.set_redactor(redact)
+    cas = use_cassette("record")
+    cas.record("azure_openai", {"prompt": "my secret project"}, "ok", 0.0)
+    with open(cas.path, "r", encoding="utf-8") as fh:
+        text = fh.read()
+    assert "my secret project" not in text and "<user text>" in text
+
+    replay = use_cassette("replay")
+    assert replay.lookup("azure_openai", {"prompt": "my secret project"})["response"] == "ok"
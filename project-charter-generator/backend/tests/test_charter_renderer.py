@@ -0,0 +1,85 @@
+import time
+
+from app.services import charter_renderer
+
+
+def _charter(**extra):
+    resp = {
+        "project_id": "p-1",
+        "created_at": "2025-01-01T00:00:00+00:00",
+        "project_title": "Apollo <Phase 1> & Co",
+        "objectives": ["Ship <it>"],
+        "project_scope": {"scope": "All plants", "in_scope": ["Derby"], "out_scope": ["Bristol"]},
+        "timeline": {"phase_1_discovery": {"duration": "4 weeks", "pre_requisites": "Funding", "tasks": ["Interview"]}},
+        "risks_and_mitigation": [{"risk": "Delay", "impact": "High", "mitigation": "Buffer"}, "Plain risk"],
+    }
+    resp.update(extra)
+    return resp
+
+
+def _titles(resp):
+    return [title for title, _ in charter_renderer.build_sections(resp)]
+
+
+def test_values_are_escaped_exactly_once():
+    html = charter_renderer.render_html(_charter())
+    assert "<title>Apollo &lt;Phase 1&gt; &amp; Co - Project Charter</title>" in html
+    assert "<h1>Apollo &lt;Phase 1&gt; &amp; Co</h1>" in html
+    assert "<li>Ship &lt;it&gt;</li>" in html
+    assert "&amp;amp;" not in html and "&amp;lt;" not in html
+
+
+def test_renders_union_of_schemas():
+    html = charter_renderer.render_html(_charter(project_scope="Legacy plain scope"))
+    assert "<p>Legacy plain scope</p>" in html
+
+    html = charter_renderer.render_html(_charter())
+    assert "<h4>In Scope</h4><ul><li>Derby</li></ul>" in html
+    assert "<h4>Phase 1 Discovery</h4>" in html
+    assert "<p><strong>Pre-requisites:</strong> Funding</p>" in html
+    assert "<li><strong>Delay</strong> — Impact: High<br/>Mitigation: Buffer</li>" in html
+    assert "<li>Plain risk</li>" in html
+
+
+def test_legacy_sections_only_when_present():
+    titles = _titles(_charter())
+    assert "Dependencies" in titles and "Lessons Learnt" in titles
+    assert "Team Structure" not in titles and "Resources Required" not in titles and "Recommendation" not in titles
+
+    titles = _titles(_charter(
+        team_structure={"data_engineer": {"count": 2, "responsibilities": ["Pipelines"]}},
+        resources_required={"skills": ["SQL"], "facilities": {"site": "Derby"}},
+        recommendation="Proceed",
+    ))
+    assert titles[-1] == "Recommendation"
+    assert "Team Structure" in titles and "Resources Required" in titles
+
+
+def test_empty_sections_say_not_provided():
+    html = charter_renderer.render_html({})
+    assert html.count("<p><em>Not provided</em></p>") >= 10
+    assert html.endswith("</html>\n")
+
+
+def test_generation_modules_share_the_renderer():
+    from app.api import generation, generation2, generation4
+
+    resp = _charter()
+    expected = charter_renderer.render_html(resp)
+    for module in (generation, generation2, generation4):
+        assert module._render_html_from_response(resp) == expected
+
+
+def test_render_time_is_linear_in_list_length():
+    def best_time(n):
+        resp = _charter(risks_and_mitigation=[{"risk": f"r{i}", "impact": "Low", "mitigation": "m" * 40} for i in range(n)])
+        best = float("inf")
+        for _ in range(5):
+            started = time.perf_counter()
+            charter_renderer.render_html(resp)
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    small, large = best_time(2000), best_time(16000)
+    # 8x the input: linear is ~8x, quadratic would be ~64x
+    assert large / small < 20
@@ -0,0 +1,77 @@
+import glob
+import json
+import os
+import sqlite3
+import pytest
+from app.services import columnar_export, render_cache, storage
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(render_cache, "on_result_saved", lambda sid: None)
+    for i in range(5):
+        sid = storage.store_submission({"project_title": f"P{i}", "domain": "IT", "questions": [{}] * i})
+        if i % 2 == 0:
+            storage.save_result(sid, {"complexity_score": 10.0 * i, "recommended_pm_count": 1,
+                                      "recommendation": "One PM", "budget": {"range": "$1M"},
+                                      "objectives": ["a", "b"], "risks_and_mitigation": []})
+    conn = sqlite3.connect(storage.DB_PATH)
+    conn.execute("UPDATE submissions SET created_at = '2026-0' || (id % 2 + 8) || '-15T00:00:00+00:00', "
+                 "updated_at = '2026-09-20T00:00:00.' || id || '+00:00'")
+    conn.commit()
+    conn.close()
+    return tmp_path
+
+
+def test_flatten_row_types_charter_fields(db):
+    conn = storage._connect(readonly=True)
+    row = conn.execute(columnar_export._SELECT, ("", 0, "9999", 1)).fetchone()
+    conn.close()
+    values, size = columnar_export.flatten_row(row)
+    assert set(values) == {name for name, _ in columnar_export.COLUMNS}
+    assert values["id"] == 1 and values["created_at"].month == 9 and values["industry"] == "IT"
+    assert values["recommendation"] == "One PM" and values["budget_range"] == "$1M"
+    assert (values["objective_count"], values["risk_count"], values["question_count"]) == (2, 0, 0)
+    assert json.loads(values["payload_json"])["project_title"] == "P0" and size > len(values["payload_json"])
+
+
+def test_requires_pyarrow(db, monkeypatch):
+    monkeypatch.setattr(columnar_export, "pa", None)
+    with pytest.raises(RuntimeError, match="pyarrow"):
+        columnar_export.export(str(db / "out"))
+
+
+def test_incremental_parquet_export_by_month(db, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(columnar_export, "ROW_GROUP_ROWS", 2)
+    out = str(db / "out")
+    stats = columnar_export.export(out, chunk_size=2)
+    assert stats["rows"] == 5 and stats["files"] == 2
+    assert sorted(os.listdir(out)) == ["_watermark.json", "month=2026-08", "month=2026-09"]
+    table = pq.read_table(os.path.join(out, "month=2026-09"))
+    assert sorted(table.column("id").to_pylist()) == [1, 3, 5]
+    assert str(table.schema.field("updated_at").type) == "timestamp[us, tz=UTC]"
+    assert pq.ParquetFile(glob.glob(os.path.join(out, "month=2026-09", "*.parquet"))[0]).num_row_groups == 2
+
+    assert columnar_export.export(out)["rows"] == 0  # nothing changed
+    storage.save_result(2, {"complexity_score": 99.0})
+    storage.store_submission({"project_title": "new"})
+    second = columnar_export.export(out, settle=0)
+    assert second["rows"] == 2 and columnar_export.read_watermark(out)["rows"] == 7
+    latest = {}
+    for row in pq.read_table(out).to_pylist():  # readers keep the latest version of each id
+        if row["id"] not in latest or row["updated_at"] > latest[row["id"]]["updated_at"]:
+            latest[row["id"]] = row
+    assert len(latest) == 6 and latest[2]["complexity_score"] == 99.0
+    assert not glob.glob(os.path.join(out, "**", "*.tmp"), recursive=True)
+
+
+def test_recent_rows_wait_and_arrow_format(db):
+    ipc = pytest.importorskip("pyarrow.ipc")
+    out = str(db / "arrow")
+    storage.store_submission({"project_title": "just now"})
+    assert columnar_export.export(out, fmt="arrow")["rows"] == 5  # the new row is inside the settle window
+    files = glob.glob(os.path.join(out, "month=*", "*.arrow"))
+    assert sum(ipc.open_file(f).read_all().num_rows for f in files) == 5
+    with pytest.raises(ValueError):
+        columnar_export.export(out, fmt="parquet")
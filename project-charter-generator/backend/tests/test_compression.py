@@ -0,0 +1,90 @@
+import gzip
+import json
+import pytest
+from app import create_app
+from app.config import Config
+from app.services import assets, precompressed
+from app.utils import compression
+
+
+@pytest.fixture
+def client():
+    precompressed.clear()
+    app = create_app()
+    app.config["TESTING"] = True
+    return app.test_client()
+
+
+def test_questionnaire_is_precompressed_and_revalidates(client):
+    with open(Config.QUESTIONNAIRE_PATH, "r", encoding="utf-8") as fh:
+        expected = json.load(fh)
+
+    plain = client.get("/api/questionnaire")
+    assert plain.status_code == 200
+    assert "Content-Encoding" not in plain.headers
+    assert plain.get_json() == expected
+
+    zipped = client.get("/api/questionnaire", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in zipped.headers["Vary"]
+    assert json.loads(gzip.decompress(zipped.data)) == expected
+    assert len(zipped.data) < len(plain.data) / 3
+    assert zipped.headers["ETag"] != plain.headers["ETag"]
+
+    again = client.get("/api/questionnaire", headers={"If-None-Match": zipped.headers["ETag"]})
+    assert again.status_code == 304 and again.data == b""
+
+
+@pytest.fixture
+def kpi_path(tmp_path, monkeypatch):
+    path = tmp_path / "kpi.json"
+    path.write_text(json.dumps({"department_charters": []}), encoding="utf-8")
+    monkeypatch.setattr(Config, "KPI_FILE_PATH", str(path))
+    assets.refresh("kpi")
+    yield path
+    monkeypatch.undo()
+    assets.refresh("kpi")
+
+
+def test_asset_rebuilt_when_file_changes(client, kpi_path):
+    first = client.get("/api/kpi/snapshot")
+    assert first.get_json() == {"department_charters": []}
+
+    kpi_path.write_text(json.dumps({"department_charters": [{"department": "IT", "charterCount": 3}]}), encoding="utf-8")
+    assets.refresh("kpi")
+    second = client.get("/api/kpi/snapshot", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.get_json()["department_charters"][0]["charterCount"] == 3
+
+
+def test_versioned_url_is_immutable(client):
+    assets = client.get("/api/assets").get_json()["assets"]
+    assert {"questionnaire", "output_schema", "kpi"} <= set(assets)
+    url = assets["output_schema"]["url"]
+    assert "immutable" in client.get(url).headers["Cache-Control"]
+    assert "immutable" not in client.get("/api/assets/output_schema").headers["Cache-Control"]
+    assert client.get("/api/assets/nope").status_code == 404
+
+
+def test_dynamic_responses_compressed_above_threshold(client):
+    big = client.get("/api/kpi/department-charters", headers={"Accept-Encoding": "gzip"})
+    body = client.get("/api/kpi/department-charters").data
+    if len(body) >= compression.MIN_SIZE:
+        assert big.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(big.data) == body
+    small = client.get("/api/health", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+
+
+def test_streamed_response_gzipped_incrementally():
+    app = create_app()
+
+    @app.route("/_stream")
+    def _stream():
+        return app.response_class((f"<p>{i}</p>" for i in range(3)), mimetype="text/html")
+
+    resp = app.test_client().get("/_stream", headers={"Accept-Encoding": "gzip"}, buffered=False)
+    chunks = [c for c in resp.response]
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert len(chunks) == 4  # one flushed member per chunk plus the trailer
+    assert gzip.decompress(b"".join(chunks)) == b"<p>0</p><p>1</p><p>2</p>"
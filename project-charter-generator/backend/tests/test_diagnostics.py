@@ -0,0 +1,59 @@
+import json
+import pytest
+from app import create_app
+from app.config import Config
+from app.services import diagnostics
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """
+    Flask test client with an admin token configured.
+    """
+    monkeypatch.setattr(Config, "ADMIN_API_TOKEN", "secret", raising=False)
+    app = create_app()
+    app.config["TESTING"] = True
+    yield app.test_client()
+    diagnostics.stop_tracing()
+
+
+def test_report_requires_admin_token(client):
+    assert client.get("/api/admin/diagnostics/report").status_code == 401
+    resp = client.get("/api/admin/diagnostics/report", headers={"X-Admin-Token": "secret"})
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["threads"]["total"] >= 1
+    assert "kpi_view" in body["caches"]
+
+
+def test_admin_endpoints_disabled_without_token(monkeypatch, client):
+    monkeypatch.setattr(Config, "ADMIN_API_TOKEN", None)
+    resp = client.get("/api/admin/diagnostics/report", headers={"X-Admin-Token": "secret"})
+    assert resp.status_code == 403
+
+
+def test_snapshot_diff_reports_growth():
+    """
+    Allocations made between two snapshots should show up in the diff.
+    """
+    diagnostics.start_tracing()
+    try:
+        diagnostics.take_snapshot("before")
+        hoard = [bytearray(1024) for _ in range(500)]
+        diagnostics.take_snapshot("after")
+        lines = diagnostics.diff_snapshots("before", "after", limit=5)
+        assert lines
+        assert lines[0]["size_diff_bytes"] >= 500 * 1024
+        assert lines[0]["file"].endswith("test_diagnostics.py")
+        del hoard
+    finally:
+        diagnostics.stop_tracing()
+
+
+def test_dump_report_writes_json(tmp_path):
+    diagnostics.register_cache("test_cache", lambda: {"a": "x" * 100})
+    path = diagnostics.dump_report(path=str(tmp_path / "report.json"))
+    with open(path, "r", encoding="utf-8") as fh:
+        report = json.load(fh)
+    assert report["caches"]["test_cache"]["entries"] == 1
+    assert report["caches"]["test_cache"]["approx_bytes"] > 100
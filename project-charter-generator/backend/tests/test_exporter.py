@@ -0,0 +1,94 @@
+import re
+import time
+import zipfile
+import zlib
+import pytest
+from app.services import documents, exporter, render_cache, storage
+
+
+CHARTER = {
+    "project_title": "Apollo (Phase 2)",
+    "objectives": ["Ship \\ fast", "Café — naïve"],
+    "timeline": {"phase_1": {"duration": "4 weeks", "tasks": ["a", "b"]}},
+    "risks_and_mitigation": [{"risk": "Delay", "impact": "High", "mitigation": "Buffer"}],
+    "scope": {"in_scope": ["x " * 200]},
+}
+
+
+@pytest.fixture
+def client(app_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(render_cache, "on_result_saved", lambda sid: render_cache.invalidate(sid))
+    monkeypatch.setattr(exporter, "EXPORT_DIR", str(tmp_path / "exports"))
+    monkeypatch.setattr(exporter, "EXPORT_WORKERS", 1)
+    render_cache.clear()
+    yield app_client
+    exporter.shutdown()
+
+
+def _pdf_text(data: bytes) -> bytes:
+    streams = re.findall(rb"\nstream\n(.*?)\nendstream", data, re.DOTALL)
+    return b"".join(zlib.decompress(s) for s in streams)
+
+
+def test_pdf_is_well_formed_and_wraps_long_text(tmp_path):
+    path = documents.write_pdf(CHARTER, str(tmp_path / "c.pdf"))
+    data = open(path, "rb").read()
+    assert data.startswith(b"%PDF-1.4") and data.rstrip().endswith(b"%%EOF")
+    startxref = int(data.rsplit(b"startxref\n", 1)[1].split(b"\n")[0])
+    assert data[startxref:].startswith(b"xref")
+    text = _pdf_text(data)
+    assert b"(Apollo \\(Phase 2\\)) Tj" in text
+    assert b"Ship \\\\ fast" in text
+    assert "Café — naïve".encode("cp1252") in text
+    assert max(len(line) for line in text.split(b"\n")) < 400  # the long scope item was wrapped
+
+
+def test_docx_has_document_and_styles(tmp_path):
+    path = documents.write_docx(CHARTER, str(tmp_path / "c.docx"))
+    with zipfile.ZipFile(path) as zf:
+        assert {"[Content_Types].xml", "word/document.xml", "word/styles.xml"} <= set(zf.namelist())
+        body = zf.read("word/document.xml").decode("utf-8")
+    assert '<w:pStyle w:val="Title"/>' in body and "Apollo (Phase 2)" in body
+    assert "<w:t xml:space=\"preserve\">Objectives</w:t>" in body
+    assert "Café — naïve" in body
+
+
+def _wait_done(client, url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(url).get_json()
+        if status["status"] not in (exporter.QUEUED, exporter.RUNNING):
+            return status
+        time.sleep(0.1)
+    raise AssertionError("export did not finish")
+
+
+def test_export_runs_in_worker_process_and_is_cached(client):
+    sid = storage.store_submission({"project_title": "Apollo", "sponsor": "Jane"})
+    storage.save_result(sid, CHARTER)
+
+    resp = client.post(f"/api/submissions/{sid}/export?format=docx")
+    assert resp.status_code in (200, 202)
+    job = resp.get_json()
+    assert _wait_done(client, job["status_url"])["status"] == exporter.DONE
+
+    download = client.get(job["download_url"])
+    assert download.status_code == 200
+    assert download.mimetype == exporter.FORMATS["docx"]
+    assert f"charter-{sid}.docx" in download.headers["Content-Disposition"]
+    assert download.data[:2] == b"PK"
+    assert client.get(job["download_url"], headers={"If-None-Match": download.headers["ETag"]}).status_code == 304
+
+    # same content -> same job, served from disk without another conversion
+    again = client.post(f"/api/submissions/{sid}/export?format=docx")
+    assert again.status_code == 200 and again.get_json()["job_id"] == job["job_id"]
+
+    storage.save_result(sid, dict(CHARTER, objectives=["changed"]))
+    assert client.post(f"/api/submissions/{sid}/export?format=docx").get_json()["job_id"] != job["job_id"]
+
+
+def test_export_errors(client):
+    assert client.post("/api/submissions/1/export?format=odt").status_code == 400
+    assert client.post("/api/submissions/999999/export?format=pdf").status_code == 404
+    assert client.get("/api/exports/../../etc/passwd-pdf").status_code == 404
+    assert client.get("/api/exports/" + "0" * 32 + "-pdf/download").status_code == 404
@@ -0,0 +1,61 @@
+import pytest
+from openai import AzureOpenAI
+
+from benchmarks.load.fake_azure import FakeAzureConfig, parse_latency, start_fake_azure
+from benchmarks.stats import percentile
+
+
+@pytest.fixture
+def fake():
+    server = start_fake_azure(FakeAzureConfig(chat_latency="fixed:0", embedding_latency="fixed:0",
+                                              stream_tokens_per_second=0, completion_text='{"ok": true}',
+                                              embedding_dim=8, seed=7))
+    yield server
+    server.shutdown()
+
+
+def _client(server):
+    return AzureOpenAI(azure_endpoint=server.endpoint, api_key="k", api_version="2024-02-01", max_retries=0)
+
+
+def test_fake_server_speaks_chat_and_embeddings(fake):
+    """
+    The stand-in must be wire-compatible with the real openai client.
+    """
+    client = _client(fake)
+    chat = client.chat.completions.create(model="dep", messages=[{"role": "user", "content": "hello"}])
+    assert chat.choices[0].message.content == '{"ok": true}'
+    assert chat.usage.total_tokens == chat.usage.prompt_tokens + chat.usage.completion_tokens
+
+    emb = client.embeddings.create(model="emb", input="text")
+    assert len(emb.data[0].embedding) == 8
+
+    stats = fake.stats.snapshot()
+    assert stats["chat_calls"] == 1 and stats["embedding_calls"] == 1
+
+
+def test_fake_server_streams_chunks(fake):
+    client = _client(fake)
+    stream = client.chat.completions.create(model="dep", messages=[{"role": "user", "content": "hi"}], stream=True)
+    text = "".join((c.choices[0].delta.content or "") for c in stream if c.choices)
+    assert text == '{"ok": true}'
+
+
+def test_fake_server_injects_rate_limits():
+    server = start_fake_azure(FakeAzureConfig(chat_latency="fixed:0", error_rate_429=1.0))
+    try:
+        with pytest.raises(Exception) as exc:
+            _client(server).chat.completions.create(model="dep", messages=[{"role": "user", "content": "x"}])
+        assert getattr(exc.value, "status_code", None) == 429
+        assert server.stats.snapshot()["injected_429"] == 1
+    finally:
+        server.shutdown()
+
+
+def test_latency_specs_and_percentiles():
+    import random
+    rng = random.Random(1)
+    assert parse_latency("fixed:250")(rng) == 0.25
+    assert 0.1 <= parse_latency("uniform:100:200")(rng) <= 0.2
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([5], 99) == 5
@@ -0,0 +1,108 @@
+import threading
+import pytest
+from unittest.mock import patch
+from app.services import storage
+
+
+PAYLOAD = {"project_title": "Apollo", "domain": "IT", "questions": []}
+LLM_JSON = '{"project_title": "Apollo", "objectives": ["Ship it"]}'
+
+
+@pytest.fixture
+def llm():
+    with patch("app.api.generation.prompt_builder") as mock_prompt, patch("app.api.generation.azure_openai") as mock_azure:
+        mock_prompt.build_prompt.return_value = "PROMPT"
+        mock_azure.generate_answer.return_value = LLM_JSON
+        yield mock_azure
+
+
+def _ask(app_client, payload=PAYLOAD, key="k-1", query=""):
+    headers = {"Idempotency-Key": key} if key else {}
+    return app_client.post(f"/api/generation/ask{query}", json=payload, headers=headers)
+
+
+def test_retry_replays_the_stored_charter(app_client, llm):
+    first = _ask(app_client)
+    assert first.status_code == 200 and "Idempotent-Replayed" not in first.headers
+    sid = int(first.headers["X-Submission-Id"])
+    again = _ask(app_client)
+    assert again.status_code == 200 and again.headers["Idempotent-Replayed"] == "true"
+    assert again.get_json() == first.get_json()
+    assert "<li>Ship it</li>" in _ask(app_client, query="?format=html").get_data(as_text=True)
+    assert llm.generate_answer.call_count == 1
+    row = storage.get_submission(sid)
+    assert row["status"] == "done" and row["payload"] == PAYLOAD and row["result"]["objectives"] == ["Ship it"]
+
+
+def test_payload_submission_id_is_the_key_and_requests_without_one_are_stored(app_client, llm):
+    payload = dict(PAYLOAD, submission_id="app_client-42")
+    assert _ask(app_client, payload, key=None).headers["X-Submission-Id"] == _ask(app_client, payload, key=None).headers["X-Submission-Id"]
+    assert _ask(app_client, key=None).headers["X-Submission-Id"] != _ask(app_client, key=None).headers["X-Submission-Id"]
+    assert llm.generate_answer.call_count == 3
+
+
+def test_in_progress_and_conflicting_requests(app_client, llm, monkeypatch):
+    storage.claim_submission(PAYLOAD, "k-1")  # another worker is generating
+    busy = _ask(app_client)
+    assert busy.status_code == 409 and busy.headers["Retry-After"]
+    assert _ask(app_client, dict(PAYLOAD, project_title="Gemini")).status_code == 422
+    assert _ask(app_client, key="x" * 300).status_code == 400
+    llm.generate_answer.assert_not_called()
+    monkeypatch.setattr(storage, "IDEMPOTENCY_LEASE_SECONDS", -1)  # the other worker died
+    assert _ask(app_client).status_code == 200
+
+
+def test_failed_generation_can_be_retried(app_client, llm):
+    llm.generate_answer.side_effect = RuntimeError("boom")
+    assert _ask(app_client).status_code == 502
+    assert storage.query_submissions()[0][0]["status"] == "failed"
+    llm.generate_answer.side_effect = None
+    assert _ask(app_client).status_code == 200
+    assert llm.generate_answer.call_count == 2
+    rows = storage.query_submissions()[0]
+    assert len(rows) == 1 and rows[0]["status"] == "done"
+
+
+def test_expired_key_starts_a_new_submission(app_client, llm, monkeypatch):
+    first = _ask(app_client).headers["X-Submission-Id"]
+    monkeypatch.setattr(storage, "IDEMPOTENCY_WINDOW_SECONDS", -1)
+    assert _ask(app_client).headers["X-Submission-Id"] != first
+    assert llm.generate_answer.call_count == 2
+
+
+def test_concurrent_claims_have_one_winner(app_client):
+    states = []
+    barrier = threading.Barrier(8)
+
+    def claim():
+        barrier.wait()
+        states.append(storage.claim_submission(PAYLOAD, "race").state)
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(states) == ["new"] + ["pending"] * 7
+
+
+def test_streamed_charter_is_stored(app_client, llm, monkeypatch):
+    llm.stream_answer.side_effect = lambda prompt: iter([LLM_JSON[:20], LLM_JSON[20:]])
+    resp = _ask(app_client, query="?format=html&stream=1")
+    assert "<li>Ship it</li>" in resp.get_data(as_text=True)
+    row = storage.get_submission(int(resp.headers["X-Submission-Id"]))
+    assert row["status"] == "done" and row["result"]["objectives"] == ["Ship it"]
+    assert row["result"]["industry"] == "IT"
+
+
+def test_stream_closed_before_it_starts_releases_the_claim(app_client, llm):
+    llm.stream_answer.side_effect = lambda prompt: iter([LLM_JSON])
+    app = app_client.application
+    with app.test_request_context("/api/generation/ask?format=html&stream=1", method="POST", json=PAYLOAD,
+                                  headers={"Idempotency-Key": "k-1"}):
+        resp = app.full_dispatch_request()
+    resp.close()  # the app_client disconnected before the server pulled a chunk
+    assert storage.get_submission(int(resp.headers["X-Submission-Id"]))["status"] == "failed"
+    again = _ask(app_client, query="?format=html&stream=1")
+    assert again.status_code == 200 and "<li>Ship it</li>" in again.get_data(as_text=True)
+    assert llm.stream_answer.call_count == 2
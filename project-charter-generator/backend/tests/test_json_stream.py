@@ -0,0 +1,90 @@
+import json
+import pytest
+from unittest.mock import patch
+
+from app import create_app
+from app.services import charter_renderer, json_stream
+
+
+DOC = {
+    "project_name": "Apollo",
+    "objectives": ["Ship {fast}", "Say \"hi\" \\ bye"],
+    "timeline": {"phase_1": {"duration": "4 weeks", "tasks": ["a, b", "[c]"]}},
+    "risks_and_mitigation": [{"risk": "Delay", "impact": "High", "mitigation": "Buffer"}],
+}
+
+
+def _chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10_000])
+def test_members_survive_any_chunking(size):
+    text = "Sure! Here it is:\n```json\n" + json.dumps(DOC, indent=2) + "\n```\nThanks"
+    assert list(json_stream.iter_members(_chunked(text, size))) == list(DOC.items())
+
+
+def test_members_are_yielded_before_the_object_closes():
+    parser = json_stream.TopLevelMemberParser()
+    assert parser.feed('{"project_name": "Apollo", "objectives": ["a"') == [("project_name", "Apollo")]
+    assert parser.feed('], "timeline"') == [("objectives", ["a"])]
+    assert not parser.done
+
+
+def test_malformed_member_is_skipped_and_truncated_tail_salvaged():
+    text = '{"a": 1, "b": [1, 2,, 3], "c": "ok"'
+    assert list(json_stream.iter_members(_chunked(text, 5))) == [("a", 1), ("c", "ok")]
+    assert list(json_stream.iter_members(['{"a": 1, "b": {"x": '])) == [("a", 1)]
+
+
+def test_streamed_render_matches_sections_in_arrival_order():
+    chunks = list(charter_renderer.iter_html_from_members({"project_id": "p-1"}, DOC.items()))
+    html = "".join(chunks)
+    assert chunks[0].startswith("<!doctype html>") and "<h1>" not in chunks[0]
+    assert "<h1>Apollo</h1>" in chunks[1]
+    assert html.index("<h2>Objectives</h2>") < html.index("<h2>Timeline</h2>") < html.index("<h2>Risks &amp; Mitigation</h2>")
+    assert html.count("<h2>") == len(charter_renderer.build_sections(DOC))
+    assert html.endswith("</html>\n")
+
+
+@patch("app.api.generation.prompt_builder")
+@patch("app.api.generation.azure_openai")
+def test_ask_streams_html_section_by_section(mock_azure, mock_prompt):
+    mock_prompt.build_prompt.return_value = "PROMPT"
+    consumed = []
+
+    def stream_answer(prompt):
+        for piece in _chunked(json.dumps(DOC), 16):
+            consumed.append(piece)
+            yield piece
+
+    mock_azure.stream_answer.side_effect = stream_answer
+    client = create_app().test_client()
+    resp = client.post("/api/generation/ask?format=html&stream=1", json={"questions": []}, buffered=False)
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/html"
+
+    pieces = (p.decode() if isinstance(p, bytes) else p for p in resp.response)
+    first = next(pieces)
+    assert first.startswith("<!doctype html>")
+    assert len(consumed) <= 1  # the head went out before the model finished
+    body = first + "".join(pieces)
+    assert "<li>Ship {fast}</li>" in body
+    assert body.endswith("</html>\n")
+    mock_azure.generate_answer.assert_not_called()
+
+
+@patch("app.api.generation.prompt_builder")
+@patch("app.api.generation.azure_openai")
+def test_ask_stream_failure_mid_response_closes_document(mock_azure, mock_prompt):
+    mock_prompt.build_prompt.return_value = "PROMPT"
+
+    def stream_answer(prompt):
+        yield '{"objectives": ["a"], '
+        raise RuntimeError("connection reset")
+
+    mock_azure.stream_answer.side_effect = stream_answer
+    client = create_app().test_client()
+    body = client.post("/api/generation/ask?format=html&stream=1", json={"questions": []}).get_data(as_text=True)
+    assert "<li>a</li>" in body
+    assert "interrupted" in body and body.endswith("</html>\n")
@@ -0,0 +1,89 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.services import kpi_view, storage
+
+TABLES = ("kpi_department_charters", "kpi_monthly_charters", "kpi_users", "kpi_user_days", "kpi_daily_users")
+
+
+@pytest.fixture
+def client(app_client, monkeypatch):
+    monkeypatch.setattr(kpi_view, "SOURCE", "auto")
+    return app_client
+
+
+def _day(offset: int) -> str:
+    return (datetime.now(timezone.utc) - timedelta(days=offset)).isoformat()
+
+
+def _insert(rows):
+    """(user_id, department, created_at, has_result) rows, written the way a maintenance job would."""
+    conn = sqlite3.connect(storage.DB_PATH)
+    conn.executemany(
+        "INSERT INTO submissions (user_id, department, created_at, updated_at, result_json) VALUES (?, ?, ?, ?, ?)",
+        [(u, d, c, c, "{}" if done else None) for u, d, c, done in rows],
+    )
+    conn.commit()
+    conn.close()
+
+
+def _snapshot():
+    conn = sqlite3.connect(storage.DB_PATH)
+    out = {t: sorted(conn.execute(f"SELECT * FROM {t} WHERE {'charters > 0' if 'charters' in t else '1'}")) for t in TABLES}
+    conn.close()
+    return out
+
+
+def test_file_until_there_is_activity(client):
+    assert client.get("/api/kpi/department-charters").get_json()[0]["department"] == "Engineering"
+    storage.save_result(storage.store_submission({"user_id": "ann", "department": "Legal"}), {"complexity": "Low"})
+    assert client.get("/api/kpi/department-charters").get_json()[0] == {
+        "department": "Legal", "charterCount": 1, "color": kpi_view.COLORS[kpi_view.zlib.crc32(b"legal") % 8]}
+
+
+def test_live_kpis_from_writes(client):
+    _insert([("ann", "Eng", _day(2), True), ("ANN", "eng", _day(1), False), ("bob", None, _day(1), True),
+             ("bob", "Ops", _day(1), True), ("cy", "Ops", _day(0), True)])
+    storage.save_result(2, {"department": "Ops"})  # ann's second charter lands in Ops
+    assert [(d["department"], d["charterCount"]) for d in client.get("/api/kpi/department-charters").get_json()] == [
+        ("Ops", 3), ("Eng", 1), ("Unassigned", 1)]
+    days = client.get("/api/kpi/returning-users?days=3").get_json()
+    assert [(d["totalUsers"], d["newUsers"], d["returningUsers"]) for d in days] == [(1, 1, 0), (2, 1, 1), (1, 1, 0)]
+    assert days[-1]["date"] == _day(0)[:10]
+    activity = client.get("/api/kpi/user-activity?limit=2").get_json()
+    assert [(a["userId"], a["chartersCreated"], a["totalLogins"]) for a in activity] == [("cy", 1, 1), ("bob", 2, 1)]
+    months = client.get("/api/kpi/charters-per-month").get_json()
+    assert len(months) == 12 and months[-1]["period"] == _day(0)[:7]
+    assert sum(m["chartersCreated"] for m in months) == 5
+
+
+def test_triggers_match_a_rebuild(client):
+    _insert([(f"u{i % 7}", f"Dept {i % 3}", _day(i % 10), i % 4 != 0) for i in range(60)])
+    conn = sqlite3.connect(storage.DB_PATH)
+    conn.execute("UPDATE submissions SET result_json = '{}' WHERE id % 8 = 0")
+    conn.execute("UPDATE submissions SET department = 'Dept 9' WHERE id % 5 = 0")
+    conn.execute("DELETE FROM submissions WHERE id % 11 = 0 AND result_json IS NOT NULL")
+    conn.commit()
+    conn.close()
+    live = _snapshot()
+    kpi_view.rebuild()
+    rebuilt = _snapshot()
+    for table in ("kpi_department_charters", "kpi_monthly_charters"):
+        assert live[table] == rebuilt[table]
+    # per-user counts are exact; days only grow (a deleted submission's day stays counted until a rebuild)
+    assert [(u[0], u[3]) for u in live["kpi_users"]] == [(u[0], u[3]) for u in rebuilt["kpi_users"]]
+
+
+def test_reads_do_not_scan_submissions(client):
+    _insert([("ann", "Eng", _day(0), True)])
+    conn = sqlite3.connect(storage.DB_PATH)
+    plan = " ".join(r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT user_id FROM kpi_users ORDER BY last_day DESC, submissions DESC LIMIT 10"))
+    conn.close()
+    assert "idx_kpi_users_last_day" in plan and "TEMP B-TREE" not in plan
+
+
+def test_file_source(client, monkeypatch):
+    _insert([("ann", "Eng", _day(0), True)])
+    monkeypatch.setattr(kpi_view, "SOURCE", "file")
+    assert client.get("/api/kpi/user-activity?limit=1").get_json()[0]["name"] == "Sarah Johnson"
@@ -0,0 +1,47 @@
+from benchmarks.micro import cases, inputs
+from benchmarks.micro.harness import compare_results, measure_allocations, measure_time
+
+
+def _result(median, q1, q3):
+    return {"cases": {"c[1]": {"case": "c", "time": {"median_us": median, "q1_us": q1, "q3_us": q3}}}}
+
+
+def test_measure_time_reports_robust_stats():
+    stats = measure_time(lambda: sum(range(100)), repeats=5, min_time=0.001)
+    assert stats["repeats"] == 5
+    assert stats["q1_us"] <= stats["median_us"] <= stats["q3_us"]
+    assert stats["ci95_us"][0] <= stats["mean_us"] <= stats["ci95_us"][1]
+
+
+def test_measure_allocations_sees_new_objects():
+    alloc = measure_allocations(lambda: [bytearray(64) for _ in range(1000)])
+    assert alloc["peak_bytes"] >= 64 * 1000
+    assert alloc["allocated_blocks"] >= 1000
+
+
+def test_compare_ignores_noise_and_flags_regressions():
+    base = _result(100, 95, 105)
+    # median moved 8% but IQRs overlap -> noise
+    assert compare_results(base, _result(108, 100, 115))["rows"][0]["verdict"] == "same"
+    slower = compare_results(base, _result(150, 140, 160))
+    assert slower["regressions"] == ["c[1]"]
+    assert compare_results(base, _result(50, 45, 55))["rows"][0]["verdict"] == "faster"
+
+
+def test_every_case_builds_and_runs(tmp_path, monkeypatch):
+    """Each registered case, at its smallest param and on a small database, sets up and runs once."""
+    from app.config import Config
+    from app.services import assets, kpi_rollup, kpi_view
+    seed = inputs.seed_submissions_db
+    monkeypatch.setattr(inputs, "seed_submissions_db", lambda path, rows, seed_=0: seed(path, min(rows, 200), seed_))
+    monkeypatch.setattr(cases.tempfile, "tempdir", str(tmp_path))
+    monkeypatch.setattr(cases, "_db_files", {})
+    monkeypatch.setattr(kpi_view, "SOURCE", kpi_view.SOURCE)
+    kpi_file = Config.KPI_FILE_PATH
+    try:
+        for c in cases.CASES:
+            c.setup(min(c.params))()
+    finally:
+        Config.KPI_FILE_PATH = kpi_file
+        assets.refresh("kpi")
+        kpi_rollup.clear()
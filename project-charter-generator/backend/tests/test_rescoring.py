@@ -0,0 +1,101 @@
+import json
+import sqlite3
+import pytest
+from app.services import render_cache, rescoring, scoring_engine, storage
+
+
+QUESTIONNAIRE = {
+    "questions": [
+        {"id": "a", "options": [{"id": "a1", "score": 1}, {"id": "a2", "score": 4}]},
+        {"id": "b", "options": [{"id": "b1", "score": 0}, {"id": "b2", "score": 3}]},
+    ],
+    "scoring": {
+        "max_score": 10,
+        "bands": [
+            {"min": 0, "complexity": "None", "recommended_pm_count": 0},
+            {"min": 1, "complexity": "Low", "recommended_pm_count": 0},
+            {"min": 6, "complexity": "High", "recommended_pm_count": 1},
+        ],
+    },
+}
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = str(tmp_path / "subs.db")
+    monkeypatch.setattr(storage, "DB_PATH", path)
+    monkeypatch.setattr(render_cache, "on_result_saved", lambda sid: render_cache.invalidate(sid))
+    engine = scoring_engine.ScoringEngine(QUESTIONNAIRE, "v1")
+    monkeypatch.setattr(scoring_engine, "get_engine", lambda: engine)
+    selections = [["a1"], ["a2", "b2"], [], ["b2"], ["a2"]]
+    for ids in selections:
+        storage.store_submission({"questions": [{"id": i[0], "selected_option_id": i} for i in ids]})
+    return path, engine
+
+
+def _rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(
+            "SELECT complexity_score, recommended_pm_count, scoring_version FROM submissions ORDER BY id"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def test_rescores_every_row_in_chunks(db):
+    path, _ = db
+    stats = rescoring.rescore_all(chunk_size=2)
+    assert stats["rows"] == 5 and stats["chunks"] == 3 and stats["last_id"] == 5
+    assert stats["rows_per_sec"] >= 0
+    assert _rows(path) == [(1, 0, "v1"), (7, 1, "v1"), (0, 0, "v1"), (3, 0, "v1"), (4, 0, "v1")]
+    assert rescoring.rescore_all(chunk_size=2)["rows"] == 0  # nothing left at this version
+
+
+def test_interrupted_run_resumes_after_last_committed_chunk(db):
+    path, _ = db
+
+    def stop(stats):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        rescoring.rescore_all(chunk_size=2, progress=stop)
+    assert [r[2] for r in _rows(path)] == ["v1", "v1", None, None, None]
+
+    stats = rescoring.rescore_all(chunk_size=2)
+    assert stats["resumed_from_id"] == 2 and stats["rows"] == 3
+    assert all(r[2] == "v1" for r in _rows(path))
+
+
+def test_new_version_or_restart_rescans(db, monkeypatch):
+    path, engine = db
+    rescoring.rescore_all(chunk_size=10)
+    assert rescoring.rescore_all(chunk_size=10, restart=True)["rows"] == 0  # rows already carry v1
+
+    changed = json.loads(json.dumps(QUESTIONNAIRE))
+    changed["questions"][0]["weight"] = 2
+    monkeypatch.setattr(scoring_engine, "get_engine", lambda: scoring_engine.ScoringEngine(changed, "v2"))
+    stats = rescoring.rescore_all(chunk_size=10)
+    assert stats["resumed_from_id"] == 0 and stats["rows"] == 5
+    assert [r[0] for r in _rows(path)] == [2, 11, 0, 3, 8]
+    assert {r[2] for r in _rows(path)} == {"v2"}
+
+
+def test_unparseable_payload_is_skipped_but_marked(db):
+    path, _ = db
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE submissions SET payload_json = 'not json' WHERE id = 3")
+    conn.commit()
+    conn.close()
+    stats = rescoring.rescore_all(chunk_size=10)
+    assert stats["rows"] == 4 and stats["skipped"] == 1
+    assert _rows(path)[2] == (None, None, "v1")
+
+
+def test_answers_that_match_nothing_are_left_unscored(db, monkeypatch):
+    path, _ = db
+    monkeypatch.setattr(scoring_engine, "ALLOW_CLIENT_SCORES", False)
+    sid = storage.store_submission({"questions": [{"id": "q1", "options": [{"id": "opt1", "score": 5}]}]})
+    rescoring.rescore_all()
+    assert _rows(path)[sid - 1] == (None, None, "v1")  # as ScoringEngine.score: no total, not the 0 band
+    assert _rows(path)[2] == (0, 0, "v1")  # no answers at all still scores 0
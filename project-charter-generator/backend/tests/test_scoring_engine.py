@@ -0,0 +1,133 @@
+import os
+import pytest
+from app.services import scoring, scoring_engine
+
+
+QUESTIONNAIRE = {
+    "questions": [
+        {"id": "a", "options": [{"id": "a1", "label": "Low", "score": 1}, {"id": "a2", "label": "High", "score": 4}]},
+        {"id": "b", "weight": 2, "options": [{"id": "b1", "label": "No", "score": 0}, {"id": "b2", "label": "Yes", "score": 3}]},
+    ],
+    "scoring": {
+        "max_score": 10,
+        "bands": [
+            {"min": 0, "complexity": "None"},
+            {"min": 1, "complexity": "Low"},
+            {"min": 6, "complexity": "High"},
+        ],
+    },
+}
+
+
+@pytest.fixture
+def engine():
+    return scoring_engine.ScoringEngine(QUESTIONNAIRE, "v-test")
+
+
+def test_scores_from_option_ids_and_ignores_client_scores(engine):
+    questions = [
+        {"id": "a", "options": [{"id": "a2", "label": "High", "score": 99}]},
+        {"id": "b", "score": 50, "answer": "yes"},  # matched by label, client score ignored
+    ]
+    result = engine.score(questions)
+    assert result.total == 4 + 2 * 3
+    assert result.band["complexity"] == "High"
+    assert result.answered == 2 and result.unmatched == []
+
+
+def test_one_answer_per_question_and_unknown_options_unmatched(engine):
+    questions = [
+        {"id": "a", "selected_option_id": "a1"},
+        {"id": "a", "selected_option_id": "a2"},  # second answer to the same question is dropped
+        {"id": "b", "options": [{"id": "b1"}, {"id": "b2"}]},  # full list, nothing selected
+        {"id": "zzz", "options": [{"id": "nope", "score": 15}]},
+    ]
+    result = engine.score(questions)
+    assert result.total == 1
+    assert result.unmatched == ["b", "zzz"]
+
+
+def test_out_of_range_is_invalid(engine):
+    assert engine.band(11)["complexity"] == "Invalid Score"
+    assert engine.band(-1)["complexity"] == "Invalid Score"
+    assert engine.band(0)["complexity"] == "None"
+
+
+def test_batch_matches_single_scoring(engine):
+    selections = [engine.option_columns(ids) for ids in (["a1"], ["a2", "b2"], [], ["b2", "b1"])]
+    totals, bands = engine.score_batch(selections)
+    assert totals == [1.0, 10.0, 0.0, 6.0]
+    assert [engine.bands[i]["complexity"] for i in bands] == ["Low", "High", "None", "High"]
+
+
+def test_batch_python_fallback_matches_numpy(engine, monkeypatch):
+    pytest.importorskip("numpy")
+    selections = [engine.option_columns(ids) for ids in (["a1"], ["a2", "b2"], [])]
+    vectorized = engine.score_batch(selections)
+    monkeypatch.setattr(scoring_engine, "np", None)
+    assert engine.score_batch(selections) == vectorized
+
+
+def test_questions_json_bands_match_previous_thresholds():
+    for score, complexity in [(0, "No Score"), (1, "Low"), (27, "Low"), (28, "Medium"), (39, "Medium"),
+                              (40, "High"), (51, "High"), (52, "Critical"), (60, "Critical"), (61, "Invalid")]:
+        assert scoring.interpret_score(score)["complexity"].startswith(complexity)
+    top = [{"id": f"q{i:02d}", "selected_option_id": f"q{i:02d}_opt4"} for i in range(4, 19)]
+    assert scoring_engine.score_questions(top).total == 60
+
+
+def test_answers_that_match_nothing_are_unscored(engine, monkeypatch):
+    warnings = []
+    monkeypatch.setattr(scoring_engine.logger, "warning", lambda *a: warnings.append(a))
+    result = engine.score([{"id": "q1", "options": [{"id": "opt1", "score": 5}]}])
+    assert result.total is None and result.unmatched == ["q1"]
+    assert result.band["complexity"] == "Unscored" and "q1" in result.band["rationale"]
+    assert warnings and warnings[0][2] == ["q1"]
+    assert engine.score([]).total == 0  # no answers at all still scores 0
+
+
+def test_repo_sample_payload_through_ask(app_client):
+    import json
+    from unittest.mock import patch
+    with open(os.path.join(os.path.dirname(__file__), "..", "..", "payload.json"), encoding="utf-8") as f:
+        payload = json.load(f)
+    with patch("app.api.generation.prompt_builder") as prompt, patch("app.api.generation.azure_openai") as llm:
+        prompt.build_prompt.return_value = "PROMPT"
+        llm.generate_answer.return_value = "{}"
+        resp = app_client.post("/api/generation/ask", json=payload)
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert body["complexity_score"] == 22 and body["complexity"].startswith("Low Complexity")
+    assert "Total score: 22" in prompt.build_prompt.call_args[0][1]
+
+
+def test_every_repo_sample_payload_matches_the_questionnaire():
+    """The payload*.json fixtures (also replayed by the load harness) use data/questions.json's ids."""
+    import glob
+    import json
+    paths = glob.glob(os.path.join(os.path.dirname(__file__), "..", "..", "payload*.json"))
+    assert paths
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            result = scoring_engine.score_questions(json.load(f)["questions"])
+        assert result.unmatched == [] and result.total > 0, path
+
+
+@pytest.mark.parametrize("name", ["generation2", "generation4"])
+def test_other_ask_endpoints_leave_unmatched_answers_unscored(name):
+    import importlib
+    from unittest.mock import patch
+    from flask import Flask
+    module = importlib.import_module(f"app.api.{name}")
+    app = Flask(__name__)
+    app.register_blueprint(module.bp, url_prefix="/api/generation")
+    payload = {"project_title": "X", "questions": [{"id": "zz", "options": [{"id": "zz1", "score": 5}]}]}
+    with patch.object(module, "prompt_builder") as prompt, patch.object(module, "azure_openai") as llm:
+        prompt.build_prompt.return_value = "PROMPT"
+        llm.generate_answer.return_value = "{}"
+        resp = app.test_client().post("/api/generation/ask", json=payload)
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert body["complexity_score"] is None and body["complexity"] == "Unscored"
+    summary = prompt.build_prompt.call_args[0][1]
+    assert "Total score: not scored" in summary and "Invalid Score" not in summary
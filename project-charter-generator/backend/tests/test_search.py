@@ -0,0 +1,78 @@
+import sqlite3
+import pytest
+from app.services import search_index, storage
+
+
+CHARTERS = [
+    {"project_title": "Cloud migration", "description": "Move the data centre to the cloud",
+     "risks_and_mitigation": [{"risk": "Vendor lock-in", "mitigation": "Multi-cloud design"}]},
+    {"project_title": "Payroll upgrade", "objectives": ["Migrate payroll to the new <ERP>"],
+     "timeline": {"phase 1": "Vendor selection"}},
+    {"project_title": "Office move", "description": "Relocate staff", "assumptions": ["Cloud telephony"]},
+]
+
+
+@pytest.fixture
+def client(app_client):
+    for charter in CHARTERS:
+        storage.save_result(storage.store_submission({"project_title": charter["project_title"]}), charter)
+    return app_client
+
+
+def _search(client, query):
+    resp = client.get(f"/api/submissions/search?{query}")
+    assert resp.status_code == 200, resp.get_json()
+    return resp.get_json()
+
+
+def test_ranked_with_escaped_snippets(client):
+    body = _search(client, "q=cloud")
+    hits = body["results"]
+    assert [h["id"] for h in hits] == [1, 3]  # title match outranks a match in the remaining text
+    assert hits[0]["score"] > hits[1]["score"] and "<mark>Cloud</mark>" in hits[0]["snippet"]
+    assert "&lt;ERP&gt;" in _search(client, "q=migrating+payroll")["results"][0]["snippet"]  # stemmed
+    assert [h["id"] for h in _search(client, "q=vendor")["results"]] == [1, 2]
+    assert _search(client, "q=vend*+lock")["results"][0]["id"] == 1
+    assert _search(client, 'q="cloud"+(')["results"][0]["id"] == 1  # punctuation is not FTS5 syntax
+    assert _search(client, "q=payroll+OR+office")["results"] == []  # nor are operators: all words required
+
+
+def test_pagination_and_bad_queries(client):
+    first = _search(client, "q=cloud&limit=1")
+    second = _search(client, f"q=cloud&limit=1&cursor={first['next_cursor']}")
+    assert [first["results"][0]["id"], second["results"][0]["id"]] == [1, 3] and second["next_cursor"] is None
+    assert client.get("/api/submissions/search?q=%20*").status_code == 400
+    assert client.get("/api/submissions/search?q=cloud&cursor=zzz").status_code == 400
+
+
+def test_saving_again_replaces_and_deleting_removes(client):
+    storage.save_result(3, {"project_title": "Office move"})
+    assert [h["id"] for h in _search(client, "q=cloud")["results"]] == [1]
+    conn = sqlite3.connect(storage.DB_PATH)
+    conn.execute("DELETE FROM submissions WHERE id = 1")
+    conn.commit()
+    conn.close()
+    assert _search(client, "q=cloud")["results"] == []
+
+
+def test_rebuild_indexes_existing_rows(client):
+    conn = sqlite3.connect(storage.DB_PATH)
+    conn.execute("DELETE FROM submissions_fts")
+    conn.execute("INSERT INTO submissions (result_json, updated_at) VALUES ('{\"project_title\": \"Cloud HR\"}', 'x')")
+    conn.commit()
+    conn.close()
+    assert _search(client, "q=cloud")["results"] == []
+    stats = search_index.rebuild(chunk_size=2)
+    assert stats["rows"] == 4 and stats["indexed"] == 4 and stats["chunks"] == 2
+    assert [h["id"] for h in _search(client, "q=cloud")["results"]] == [4, 1, 3]
+
+
+def test_only_the_newest_matches_are_ranked(client, monkeypatch):
+    monkeypatch.setattr(storage, "SEARCH_MAX_CANDIDATES", 1)
+    assert [h["id"] for h in _search(client, "q=cloud")["results"]] == [3]  # the title match (1) is older
+    monkeypatch.setattr(storage, "SEARCH_MAX_CANDIDATES", 2)
+    first = _search(client, "q=cloud&limit=1")
+    monkeypatch.setattr(storage, "SEARCH_MAX_CANDIDATES", 1)
+    second = _search(client, f"q=cloud&limit=1&cursor={first['next_cursor']}")
+    assert storage._unpack_cursor(first["next_cursor"])[0][1] == 1  # the first page's candidates: ids >= 1
+    assert [first["results"][0]["id"], second["results"][0]["id"]] == [1, 3] and second["next_cursor"] is None
@@ -0,0 +1,75 @@
+import gc
+import sqlite3
+import threading
+import pytest
+from app.services import render_cache, storage
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = str(tmp_path / "subs.db")
+    monkeypatch.setattr(storage, "DB_PATH", path)
+    monkeypatch.setattr(render_cache, "on_result_saved", lambda sid: None)
+    yield path
+    storage.close_all()
+
+
+def test_migrates_unversioned_database_once(db):
+    legacy = sqlite3.connect(db)
+    legacy.execute(
+        "CREATE TABLE submissions (id INTEGER PRIMARY KEY AUTOINCREMENT, project_name TEXT, sponsor TEXT, "
+        "payload_json TEXT, result_json TEXT, complexity_score REAL, recommended_pm_count INTEGER, "
+        "created_at TEXT, updated_at TEXT)"
+    )
+    legacy.execute("INSERT INTO submissions (project_name) VALUES ('old')")
+    legacy.commit()
+    legacy.close()
+
+    assert storage.migrate(db) == storage.SCHEMA_VERSION
+    conn = sqlite3.connect(db)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == storage.SCHEMA_VERSION
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert "scoring_version" in {r[1] for r in conn.execute("PRAGMA table_info(submissions)")}
+    conn.close()
+    assert storage.migrate(db) == storage.SCHEMA_VERSION  # no-op the second time
+    assert storage.list_submissions()[0]["project_name"] == "old"
+
+
+def test_connections_are_reused_per_thread(db):
+    sid = storage.store_submission({"project_title": "Apollo"})
+    storage.save_result(sid, {"complexity_score": 12})
+    assert storage.get_submission(sid)["complexity_score"] == 12
+
+    writer, reader = storage._get_conn(), storage._get_conn(readonly=True)
+    assert writer is not reader
+    assert storage._get_conn() is writer and storage._get_conn(readonly=True) is reader
+    assert reader.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(storage._get_conn()))
+    t.start()
+    t.join()
+    assert other[0] is not writer
+
+
+def test_connections_close_when_their_thread_exits(db):
+    storage._get_conn()
+    before = len(storage._pools)
+    conns = []
+    threads = [threading.Thread(target=lambda: conns.append(storage._get_conn(readonly=True))) for _ in range(20)]
+    for t in threads:
+        t.start()
+        t.join()
+    del threads
+    gc.collect()
+    for conn in conns:
+        with pytest.raises(sqlite3.ProgrammingError):  # closed
+            conn.execute("SELECT 1")
+    assert len(storage._pools) == before
+
+
+def test_readonly_connection_rejects_writes(db):
+    storage.store_submission({"project_title": "Apollo"})
+    with pytest.raises(sqlite3.OperationalError):
+        storage._get_conn(readonly=True).execute("DELETE FROM submissions")
+    assert len(storage.list_submissions()) == 1
@@ -0,0 +1,110 @@
+import json
+import os
+import pytest
+from app.services import render_cache, rescoring, storage
+from app.services.storage_sqlalchemy import SQLAlchemyBackend
+
+
+URLS = ["sqlite", pytest.param(os.getenv("TEST_POSTGRES_URL"), marks=pytest.mark.skipif(
+    not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set"))]
+
+
+@pytest.fixture(params=URLS)
+def backend(request, tmp_path, monkeypatch):
+    url = request.param if request.param != "sqlite" else f"sqlite:///{tmp_path / 'subs.db'}"
+    monkeypatch.setattr(storage, "BACKEND", "sqlalchemy")
+    monkeypatch.setattr(storage, "DATABASE_URL", url)
+    monkeypatch.setattr(render_cache, "on_result_saved", lambda sid: None)
+    backend = storage.get_backend()
+    assert isinstance(backend, SQLAlchemyBackend)
+    if backend.engine.dialect.name == "postgresql":
+        with backend.engine.begin() as conn:
+            conn.exec_driver_sql("TRUNCATE submissions RESTART IDENTITY")
+    yield backend
+    storage.close_all()
+
+
+def test_roundtrip_through_the_storage_facade(backend):
+    sid = storage.store_submission({"project_title": "Apollo", "sponsor": "Jane"})
+    assert storage.get_submission(sid)["result"] is None
+    storage.save_result(sid, {"complexity_score": 72.5, "recommended_pm_count": 2, "nested": {"a": [1, 2]}})
+    row = storage.get_submission(sid)
+    assert row["project_name"] == "Apollo" and row["complexity_score"] == 72.5
+    assert row["payload"] == {"project_title": "Apollo", "sponsor": "Jane"}
+    assert row["result"]["nested"] == {"a": [1, 2]}
+    assert "payload" not in storage.get_submission(sid, blobs=("result",))
+    assert storage.get_submission(sid + 1) is None
+
+
+def test_bulk_insert_returns_ids_in_order(backend):
+    ids = storage.store_submissions([{"project_title": f"P{i}"} for i in range(25)])
+    assert len(ids) == 25 and ids == sorted(ids)
+    assert [storage.get_submission(i, blobs=())["project_name"] for i in (ids[0], ids[-1])] == ["P0", "P24"]
+
+
+def test_paging_and_filters_match_the_sqlite_backend(backend, tmp_path, monkeypatch):
+    payloads = [{"project_title": f"P{i}", "sponsor": "Jane" if i % 2 else "bob"} for i in range(9)]
+    results = [{"complexity_score": 10 * i} for i in range(9)]
+
+    def listing():
+        for sid, result in zip(storage.store_submissions(payloads), results):
+            storage.save_result(sid, result)
+        pages, cursor = [], None
+        while True:
+            rows, cursor = storage.query_submissions(limit=2, cursor=cursor, sponsor="JANE", min_score=20)
+            pages.append([r["project_name"] for r in rows])
+            if cursor is None:
+                return pages
+
+    via_sqlalchemy = listing()
+    monkeypatch.setattr(storage, "BACKEND", "sqlite")
+    monkeypatch.setattr(storage, "DB_PATH", str(tmp_path / "plain.db"))
+    assert listing() == via_sqlalchemy == [["P7", "P5"], ["P3"]]
+
+
+def test_backend_selection(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage, "BACKEND", "auto")
+    monkeypatch.setattr(storage, "DATABASE_URL", "sqlite:///ignored.db")
+    assert storage.get_backend().name == "sqlite"
+    monkeypatch.setattr(storage, "DATABASE_URL", f"sqlite:///{tmp_path / 'sa.db'}")
+    monkeypatch.setattr(storage, "BACKEND", "sqlalchemy")
+    try:
+        assert storage.get_backend().name == "sqlalchemy:sqlite"
+        with pytest.raises(RuntimeError):
+            rescoring.rescore_all()
+    finally:
+        storage.close_all()
+
+
+def test_iter_submissions_returns_stored_json_text(backend):
+    ids = storage.store_submissions([{"project_title": f"P{i}"} for i in range(5)])
+    storage.save_result(ids[1], {"complexity_score": 3})
+    rows = list(storage.iter_submissions(since_id=ids[0]))
+    assert [r["id"] for r in rows] == ids[1:]
+    assert json.loads(rows[0]["payload"]) == {"project_title": "P1"} and json.loads(rows[0]["result"])["complexity_score"] == 3
+    assert storage.get_submission(ids[1], blobs=("result",), raw=True)["result"] == rows[0]["result"]
+
+
+def test_attribute_filters_and_aggregates(backend):
+    ids = storage.store_submissions([{"domain": d, "user_id": "ann"} for d in ("IT", "it", "Retail")])
+    storage.save_result(ids[0], {"complexity": "High", "complexity_score": 40, "recommended_pm_count": 2})
+    storage.save_result(ids[1], {"complexity_score": 20})
+    groups = storage.aggregate_submissions("industry", attributes={"user_id": "ANN"})
+    assert [(g["value"].lower(), g["count"], g["avg_complexity_score"]) for g in groups] == [("it", 2, 30.0), ("retail", 1, None)]
+    rows, _ = storage.query_submissions(attributes={"complexity": "high"})
+    assert [r["id"] for r in rows] == [ids[0]] and rows[0]["industry"] == "IT"
+
+
+def test_idempotent_claims(backend, monkeypatch):
+    first = storage.claim_submission({"project_title": "Apollo"}, "key-1")
+    assert first.state == "new"
+    assert storage.claim_submission({"project_title": "Apollo"}, "key-1") == (first.id, "pending")
+    assert storage.claim_submission({"project_title": "Other"}, "key-1").state == "conflict"
+    storage.fail_submission(first.id)
+    assert storage.claim_submission({"project_title": "Apollo"}, "key-1") == (first.id, "new")
+    storage.save_result(first.id, {"complexity_score": 10})
+    assert storage.claim_submission({"project_title": "Apollo"}, "key-1") == (first.id, "done")
+    assert storage.get_submission(first.id, blobs=())["status"] == "done"
+    monkeypatch.setattr(storage, "IDEMPOTENCY_WINDOW_SECONDS", -1)
+    again = storage.claim_submission({"project_title": "Apollo"}, "key-1")
+    assert again.state == "new" and again.id != first.id
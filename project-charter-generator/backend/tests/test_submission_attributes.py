@@ -0,0 +1,78 @@
+import json
+import sqlite3
+import pytest
+from app.services import attribute_backfill, storage
+
+
+SUBMISSIONS = [
+    ({"project_title": "P0", "domain": "IT", "user_id": "ann", "timeline": "6 months"},
+     {"industry": "Information Technology", "complexity": "High", "complexity_score": 50, "recommended_pm_count": 2}),
+    ({"project_title": "P1", "domain": "Healthcare", "user_id": "bob", "department": "Clinical"},
+     {"complexity": "Low", "complexity_score": 10, "recommended_pm_count": 1}),
+    ({"project_title": "P2", "domain": "healthcare", "user_id": "ann"},
+     {"complexity": "High", "complexity_score": 40, "recommended_pm_count": 1}),
+    ({"project_title": "P3", "domain": "Retail", "user_id": "ann"}, None),
+]
+
+
+@pytest.fixture
+def client(app_client):
+    for payload, result in SUBMISSIONS:
+        sid = storage.store_submission(payload)
+        if result is not None:
+            storage.save_result(sid, result)
+    return app_client
+
+
+def _stats(client, query):
+    resp = client.get(f"/api/submissions/stats?{query}")
+    assert resp.status_code == 200, resp.get_json()
+    return {g["value"].lower() if isinstance(g["value"], str) else g["value"]: g for g in resp.get_json()["groups"]}
+
+
+def test_attributes_come_from_result_then_payload(client):
+    rows = {r["project_name"]: r for r in storage.query_submissions(limit=10)[0]}
+    assert rows["P0"]["industry"] == "Information Technology" and rows["P0"]["duration"] == "6 months"
+    assert rows["P1"]["industry"] == "Healthcare" and rows["P1"]["department"] == "Clinical"
+    assert rows["P3"]["complexity"] is None
+
+
+def test_grouped_statistics(client):
+    by_industry = _stats(client, "group_by=industry")
+    assert by_industry["healthcare"]["count"] == 2  # case-insensitive groups
+    assert by_industry["healthcare"]["avg_complexity_score"] == 25
+    by_complexity = _stats(client, "group_by=complexity&user_id=ANN")
+    assert by_complexity["high"]["count"] == 2 and by_complexity["high"]["avg_pm_count"] == 1.5
+    assert by_complexity[None]["count"] == 1
+    assert set(_stats(client, "group_by=recommended_pm_count&band=high")) <= {1, 2}
+    assert client.get("/api/submissions/stats?group_by=payload_json").status_code == 400
+
+
+def test_listing_filters_on_attributes(client):
+    body = client.get("/api/submissions?industry=HEALTHCARE&complexity=high").get_json()
+    assert [r["project_name"] for r in body["submissions"]] == ["P2"]
+
+
+def test_aggregation_uses_the_attribute_index(client):
+    conn = sqlite3.connect(storage.DB_PATH)
+    plan = " ".join(r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT industry, COUNT(*), AVG(complexity_score) FROM submissions "
+        "GROUP BY industry COLLATE NOCASE"
+    ))
+    conn.close()
+    assert "COVERING INDEX idx_submissions_industry" in plan and "TEMP B-TREE FOR GROUP BY" not in plan
+
+
+def test_backfill_fills_rows_written_before_the_columns(client):
+    conn = sqlite3.connect(storage.DB_PATH)
+    conn.execute("UPDATE submissions SET industry = NULL, complexity = NULL, user_id = NULL")
+    conn.execute(
+        "INSERT INTO submissions (payload_json, result_json, updated_at) VALUES (?, ?, 'x')",
+        (json.dumps({"domain": "Energy"}), json.dumps({"complexity": "Medium"})),
+    )
+    conn.commit()
+    conn.close()
+    stats = attribute_backfill.backfill(chunk_size=2)
+    assert stats["rows"] == 5 and stats["updated"] == 5
+    assert _stats(client, "group_by=industry")["energy"]["count"] == 1
+    assert _stats(client, "group_by=user_id")["ann"]["count"] == 3
@@ -0,0 +1,123 @@
+import pytest
+from unittest.mock import patch
+from app.services import render_cache, storage
+
+
+@pytest.fixture
+def client(app_client, monkeypatch):
+    """
+    Flask test client on a fresh database, with pre-rendering run inline.
+    """
+    monkeypatch.setattr(render_cache, "on_result_saved",
+                        lambda sid: render_cache.invalidate(sid) or render_cache._prerender(sid))
+    render_cache.clear()
+    yield app_client
+    render_cache.clear()
+
+
+def _saved_submission(title="Apollo"):
+    sid = storage.store_submission({"project_title": title, "sponsor": "Jane"})
+    storage.save_result(sid, {"project_title": title, "objectives": ["Ship <it>"]})
+    return sid
+
+
+def test_html_format_with_etag_and_304(client):
+    sid = _saved_submission()
+    resp = client.get(f"/api/submissions/{sid}?format=html")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/html"
+    assert "<li>Ship &lt;it&gt;</li>" in resp.get_data(as_text=True)
+    etag = resp.headers["ETag"]
+    assert etag.startswith('"') and etag.endswith('-html"')
+    assert "must-revalidate" in resp.headers["Cache-Control"]
+
+    again = client.get(f"/api/submissions/{sid}?format=html", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.get_data() == b""
+
+
+def test_json_is_default_and_etag_differs_from_html(client):
+    sid = _saved_submission()
+    resp = client.get(f"/api/submissions/{sid}")
+    assert resp.status_code == 200
+    assert resp.get_json()["submission"]["result"]["objectives"] == ["Ship <it>"]
+    assert resp.headers["ETag"] != client.get(f"/api/submissions/{sid}?format=html").headers["ETag"]
+
+
+def test_prerendered_on_save_and_served_without_blob_read(client):
+    sid = _saved_submission()
+    reads = []
+    real = storage.get_submission
+    with patch.object(storage, "get_submission", side_effect=lambda *a, **kw: reads.append(kw) or real(*a, **kw)):
+        assert client.get(f"/api/submissions/{sid}?format=html").status_code == 200
+        assert client.get(f"/api/submissions/{sid}?format=json").status_code == 200
+    assert reads == [{"blobs": ()}, {"blobs": ()}]  # the version check only
+
+
+def test_new_result_changes_etag(client):
+    sid = _saved_submission()
+    first = client.get(f"/api/submissions/{sid}?format=html").headers["ETag"]
+    storage.save_result(sid, {"project_title": "Apollo", "objectives": ["Ship v2"]})
+    resp = client.get(f"/api/submissions/{sid}?format=html", headers={"If-None-Match": first})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != first
+    assert "Ship v2" in resp.get_data(as_text=True)
+
+
+def test_change_made_by_another_process_is_not_served_stale(client):
+    import sqlite3
+    sid = _saved_submission()
+    first = client.get(f"/api/submissions/{sid}")
+    conn = sqlite3.connect(storage.DB_PATH)  # e.g. the rescoring CLI: this process's cache is not told
+    conn.execute("UPDATE submissions SET complexity_score = 55, updated_at = 'later' WHERE id = ?", (sid,))
+    conn.commit()
+    conn.close()
+    again = client.get(f"/api/submissions/{sid}")
+    assert again.headers["ETag"] != first.headers["ETag"]
+    assert again.get_json()["submission"]["complexity_score"] == 55
+
+
+def test_cache_stays_bounded(client, monkeypatch):
+    monkeypatch.setattr(render_cache, "MAX_ENTRIES", 3)
+    for i in range(5):
+        render_cache._render_and_store({"id": i, "updated_at": "t", "result": {}}, "json")
+    assert [k[0] for k in render_cache._renders] == [2, 3, 4]
+    render_cache.invalidate(3)
+    assert [k[0] for k in render_cache._renders] == [2, 4]
+
+
+def test_unknown_format_and_missing_submission(client):
+    assert client.get("/api/submissions/1?format=pdf").status_code == 400
+    assert client.get("/api/submissions/999999?format=html").status_code == 404
+
+
+def test_json_splices_stored_text_without_decoding(client):
+    sid = _saved_submission()
+    render_cache.clear()
+    with patch.object(storage, "_decode", side_effect=AssertionError("decoded")):
+        resp = client.get(f"/api/submissions/{sid}")
+    assert resp.status_code == 200
+    assert resp.get_json()["submission"]["payload"] == {"project_title": "Apollo", "sponsor": "Jane"}
+
+
+def test_conditional_miss_is_answered_from_updated_at(client):
+    sid = _saved_submission()
+    etag = client.get(f"/api/submissions/{sid}").headers["ETag"]
+    render_cache.clear()
+    reads = []
+    real = storage.get_submission
+    with patch.object(storage, "get_submission", side_effect=lambda *a, **kw: reads.append(kw) or real(*a, **kw)):
+        resp = client.get(f"/api/submissions/{sid}", headers={"If-None-Match": etag})
+    assert resp.status_code == 304 and resp.headers["ETag"] == etag
+    assert reads == [{"blobs": ()}]
+
+
+def test_result_is_returned_verbatim(client):
+    sid = _saved_submission()
+    resp = client.get(f"/api/submissions/{sid}/result")
+    assert resp.status_code == 200 and resp.mimetype == "application/json"
+    assert resp.get_data(as_text=True) == '{"project_title": "Apollo", "objectives": ["Ship <it>"]}'
+    again = client.get(f"/api/submissions/{sid}/result", headers={"If-None-Match": resp.headers["ETag"]})
+    assert again.status_code == 304
+    assert client.get(f"/api/submissions/{storage.store_submission({})}/result").status_code == 404
@@ -0,0 +1,51 @@
+import pytest
+from app.services import storage
+
+
+@pytest.fixture
+def client(app_client):
+    for i in range(7):
+        sid = storage.store_submission({"project_title": f"P{i}", "sponsor": "Jane" if i % 2 else "Bob"})
+        storage.save_result(sid, {"project_title": f"P{i}", "complexity_score": [0, 10, 30, 45, 55, 20, 41][i]})
+    return app_client
+
+
+def _pages(client, query):
+    ids, cursor = [], None
+    while True:
+        resp = client.get(f"/api/submissions?{query}" + (f"&cursor={cursor}" if cursor else ""))
+        assert resp.status_code == 200
+        body = resp.get_json()
+        ids += [r["id"] for r in body["submissions"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_keyset_pages_cover_every_row_once(client):
+    assert _pages(client, "limit=3") == [7, 6, 5, 4, 3, 2, 1]
+    assert _pages(client, "limit=7") == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_summary_by_default_and_blobs_on_request(client):
+    row = client.get("/api/submissions?limit=1").get_json()["submissions"][0]
+    assert "payload" not in row and "result" not in row
+    assert row["project_name"] == "P6" and row["complexity_score"] == 41
+
+    row = client.get("/api/submissions?limit=1&fields=result").get_json()["submissions"][0]
+    assert row["result"]["project_title"] == "P6" and "payload" not in row
+    row = client.get("/api/submissions?limit=1&fields=full").get_json()["submissions"][0]
+    assert row["payload"]["sponsor"] == "Bob"
+
+
+def test_filters(client):
+    assert _pages(client, "sponsor=jane&limit=2") == [6, 4, 2]
+    assert _pages(client, "band=high") == [7, 4]  # 40 <= score < 52
+    assert _pages(client, "band=critical&sponsor=bob") == [5]
+    created = {r["id"]: r["created_at"] for r in storage.list_submissions()}
+    assert _pages(client, f"from={created[3]}&to={created[6]}".replace("+", "%2B")) == [5, 4, 3]
+
+
+@pytest.mark.parametrize("query", ["fields=everything", "limit=0", "band=extreme", "from=yesterday", "cursor=zzz"])
+def test_bad_parameters_are_400(client, query):
+    assert client.get(f"/api/submissions?{query}").status_code == 400
@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+import sqlite3
+import pytest
+from app.services import storage, table_export
+
+
+@pytest.fixture
+def client(app_client, monkeypatch):
+    monkeypatch.setattr(storage, "EXPORT_CHUNK_ROWS", 2)
+    monkeypatch.setattr(table_export, "CHUNK_BYTES", 100)
+    for i in range(5):
+        sid = storage.store_submission({"project_title": f"P{i}", "note": "line\nbreak, \"quoted\""})
+        if i != 2:
+            storage.save_result(sid, {"project_title": f"P{i}", "complexity_score": 10 * i, "text": "é" * 50})
+    return app_client
+
+
+def _ndjson(client, query=""):
+    resp = client.get(f"/api/submissions/export?{query}")
+    assert resp.status_code == 200 and resp.is_streamed
+    assert resp.mimetype == "application/x-ndjson"
+    return [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+
+
+def test_ndjson_streams_every_row_with_stored_json(client):
+    rows = _ndjson(client)
+    assert [r["id"] for r in rows] == [1, 2, 3, 4, 5]
+    assert rows[0]["payload"] == {"project_title": "P0", "note": "line\nbreak, \"quoted\""}
+    assert rows[3]["result"]["text"] == "é" * 50 and rows[3]["complexity_score"] == 30
+    assert rows[2]["result"] is None
+    assert set(_ndjson(client, "fields=summary")[0]) == set(storage.SUMMARY_FIELDS)
+
+
+def test_filters(client):
+    assert [r["id"] for r in _ndjson(client, "since_id=3&fields=result")] == [4, 5]
+    conn = sqlite3.connect(storage.DB_PATH)
+    conn.execute("UPDATE submissions SET created_at = '2020-01-01T00:00:00+00:00' WHERE id < 4")
+    conn.commit()
+    conn.close()
+    assert [r["id"] for r in _ndjson(client, "since=2021-01-01")] == [4, 5]
+    assert client.get("/api/submissions/export?since_id=x").status_code == 400
+    assert client.get("/api/submissions/export?format=xml").status_code == 400
+
+
+def test_csv(client):
+    resp = client.get("/api/submissions/export?format=csv&fields=payload")
+    assert resp.status_code == 200 and resp.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+    assert [r["id"] for r in rows] == ["1", "2", "3", "4", "5"] and "result" not in rows[0]
+    assert json.loads(rows[1]["payload"])["note"] == "line\nbreak, \"quoted\""
+
+
+def test_text_that_is_not_json_is_quoted(client):
+    conn = sqlite3.connect(storage.DB_PATH)
+    conn.execute("UPDATE submissions SET result_json = '{\"truncated\": \"ab' WHERE id = 1")
+    conn.commit()
+    conn.close()
+    assert _ndjson(client)[0]["result"] == '{"truncated": "ab'
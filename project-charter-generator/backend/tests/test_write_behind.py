@@ -0,0 +1,100 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.services import render_cache, storage, write_behind
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = str(tmp_path / "subs.db")
+    monkeypatch.setattr(storage, "DB_PATH", path)
+    storage._ensure_db()
+    yield path
+    storage.close_all()
+
+
+def _insert(name):
+    return lambda conn: conn.execute("INSERT INTO submissions (project_name) VALUES (?)", (name,)).lastrowid
+
+
+def test_concurrent_writes_are_group_committed(db):
+    writer = write_behind.Writer(lambda: storage._connect(db), batch_rows=16, batch_ms=20)
+    futures = [writer.submit(_insert(f"P{i}")) for i in range(40)]
+    ids = [f.result(5) for f in futures]
+    writer.close()
+    assert ids == list(range(1, 41))
+    assert writer.stats["ops"] == 40 and writer.stats["batches"] <= 4 and writer.stats["max_batch"] == 16
+
+
+def test_failed_operation_does_not_fail_the_batch(db):
+    writer = write_behind.Writer(lambda: storage._connect(db), batch_ms=20)
+
+    def bad(conn):
+        conn.execute("INSERT INTO submissions (project_name) VALUES ('half')")
+        raise ValueError("boom")
+
+    ok1, failed, ok2 = writer.submit(_insert("a")), writer.submit(bad), writer.submit(_insert("b"))
+    assert ok1.result(5) == 1 and ok2.result(5) == 2
+    with pytest.raises(ValueError):
+        failed.result(5)
+    writer.close()
+    conn = sqlite3.connect(db)
+    assert [r[0] for r in conn.execute("SELECT project_name FROM submissions ORDER BY id")] == ["a", "b"]
+    conn.close()
+
+
+def test_full_queue_applies_backpressure_and_close_flushes(db):
+    writer = write_behind.Writer(lambda: storage._connect(db), queue_size=1, put_timeout=0.05)
+    started, release = threading.Event(), threading.Event()
+    blocked = writer.submit(lambda conn: started.set() or release.wait(5))
+    assert started.wait(5)  # the writer is busy; the queue holds one more write
+    queued = writer.submit(_insert("queued"))
+    with pytest.raises(write_behind.WriteQueueFull):
+        writer.submit(_insert("overflow"))
+    release.set()
+    writer.close()
+    assert blocked.result(5) is True and queued.done() and queued.result() == 1
+    with pytest.raises(RuntimeError):
+        writer.submit(_insert("late"))
+
+
+def test_storage_write_behind_mode(db, monkeypatch):
+    saved = []
+    monkeypatch.setattr(storage, "WRITE_BEHIND", True)
+    monkeypatch.setattr(render_cache, "on_result_saved", saved.append)
+    with ThreadPoolExecutor(8) as pool:
+        ids = list(pool.map(lambda i: storage.store_submission({"project_title": f"P{i}"}), range(32)))
+    assert sorted(ids) == list(range(1, 33))
+    storage.save_result(ids[0], {"complexity_score": 41})
+    assert storage.save_result_async(999, {}).result(5) == 0
+    assert saved == [ids[0]]
+    assert storage.get_submission(ids[0])["complexity_score"] == 41
+
+
+def test_writer_that_cannot_connect_fails_its_writes(db, monkeypatch):
+    def connect():
+        raise sqlite3.OperationalError("unable to open database file")
+
+    writer = write_behind.Writer(connect)
+    writer._thread.join(5)
+    assert writer.closed
+    with pytest.raises(RuntimeError):
+        writer.submit(_insert("never"))
+    monkeypatch.setattr(storage, "WRITE_BEHIND", True)
+    monkeypatch.setattr(storage, "_writer", writer)
+    monkeypatch.setattr(storage, "_writer_path", db)
+    assert storage.store_submission({"project_title": "P"}) == 1  # a dead writer is replaced
+
+
+def test_queued_writes_fail_when_the_writer_dies(db):
+    started, release = threading.Event(), threading.Event()
+    writer = write_behind.Writer(lambda: storage._connect(db))
+    writer.submit(lambda conn: started.set() or release.wait(5))
+    assert started.wait(5)
+    queued = writer.submit(_insert("queued"))
+    writer._commit = lambda conn, ops: (_ for _ in ()).throw(SystemError("disk gone"))  # kills the thread
+    release.set()
+    with pytest.raises(SystemError):
+        queued.result(5)
+    assert writer.closed